@@ -1,259 +1,201 @@
-import pandas as pd
-import sqlite3
+import json
 from datetime import datetime
-from statistics import mean, median, multimode, variance, stdev
-
-def conectar_db(nombre="taller.db"):
-    return sqlite3.connect(nombre)
+import api
+import busqueda
+import depuracion
+import esquema
+import exportacion
+import instrumentacion
+import particiones
+from api import ErrorTaller
+from conexion import obtener_conexion, cerrar_conexiones
+from validaciones import nombre_valido, telefono_valido, costo_valido, convertir_fecha
+from resumen import reconstruir_resumen, verificar_resumen
+
+# Los menús solo piden datos y muestran resultados; la lógica vive en api.py
+# pandas (y analitica.py y series.py, que lo usan) se importa solo en las opciones que lo necesitan:
+# cargarlo tarda más que todo lo demás al abrir el menú
+
+def conectar_db(nombre=None):
+    # Conexión compartida del hilo actual; no se cierra al terminar cada función
+    return obtener_conexion(nombre)
 
 def crear_tablas():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    # Tabla clientes
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS clientes (
-        clave INTEGER PRIMARY KEY AUTOINCREMENT,
-        apellidos TEXT NOT NULL,
-        nombres TEXT NOT NULL,
-        telefono TEXT NOT NULL CHECK(length(telefono) = 10),
-        suspendido INTEGER NOT NULL DEFAULT 0
-    );
-    """)
-
-    # Tabla servicios
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS servicios (
-        clave INTEGER PRIMARY KEY AUTOINCREMENT,
-        nombre TEXT NOT NULL,
-        costo REAL NOT NULL CHECK(costo > 0),
-        suspendido INTEGER NOT NULL DEFAULT 0
-    );
-    """)
-
-    # Tabla notas
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS notas (
-        folio INTEGER PRIMARY KEY AUTOINCREMENT,
-        fecha TEXT NOT NULL,
-        cliente_clave INTEGER NOT NULL,
-        cancelada INTEGER NOT NULL DEFAULT 0,
-        FOREIGN KEY (cliente_clave) REFERENCES clientes(clave)
-    );
-    """)
-
-    # Tabla detalles_nota
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS detalles_nota (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        folio INTEGER NOT NULL,
-        servicio_clave INTEGER NOT NULL,
-        observaciones TEXT,
-        costo REAL NOT NULL,
-        FOREIGN KEY (folio) REFERENCES notas(folio),
-        FOREIGN KEY (servicio_clave) REFERENCES servicios(clave)
-    );
-    """)
-
-    conn.commit()
-    conn.close()
+    for version in esquema.crear_tablas(conectar_db()):
+        print(f"Esquema actualizado a la versión {version}.")
     print("Tablas creadas correctamente.")
 
 
 def registrar_nota():
-    conn = sqlite3.connect("taller.db")
-    cursor = conn.cursor()
-
-    # Obtener clientes activos ordenados alfabéticamente
-    cursor.execute("SELECT clave, apellidos || ' ' || nombres AS nombre_completo FROM clientes WHERE suspendido = 0 ORDER BY apellidos, nombres")
-    clientes = cursor.fetchall()
-    if not clientes:
-        print("No hay clientes activos registrados.")
-        conn.close()
-        return
-
     print("\n--- Seleccione un cliente ---")
-    for c in clientes:
-        print(f"{c[0]} - {c[1]}")
-
-    cliente_clave = input("Ingrese la clave del cliente: ").strip()
-    if cliente_clave not in [str(c[0]) for c in clientes]:
-        print("Cliente inválido.")
-        conn.close()
+    cliente_clave = seleccionar_cliente_activo("No hay clientes activos registrados.",
+                                               "Ingrese la clave del cliente: ", "Cliente inválido.")
+    if cliente_clave is None:
         return
 
     # Fecha de la nota
     fecha_input = input("Ingrese la fecha (mm-dd-yyyy) o deje vacío para usar la actual: ").strip()
     try:
         if fecha_input:
-            fecha_obj = datetime.strptime(fecha_input, "%m-%d-%Y")
-            if fecha_obj > datetime.now():
-                raise ValueError("Fecha futura no permitida.")
-            fecha = fecha_obj.strftime("%Y-%m-%d")
+            fecha = convertir_fecha(fecha_input)
         else:
             fecha = datetime.now().strftime("%Y-%m-%d")
     except Exception as e:
         print(f"Fecha inválida: {e}")
-        conn.close()
         return
 
-    # Generar folio automáticamente
-    cursor.execute("SELECT IFNULL(MAX(folio), 0) + 1 FROM notas")
-    nuevo_folio = cursor.fetchone()[0]
-
-    # Insertar nota (sin detalles aún)
-    cursor.execute("INSERT INTO notas (folio, fecha, cliente_clave, cancelada) VALUES (?, ?, ?, 0)",
-                   (nuevo_folio, fecha, cliente_clave))
-
-    # Agregar servicios
+    # Agregar servicios; la nota se escribe hasta el final para no bloquear la base mientras se captura
     print("\n--- Agregue al menos un servicio ---")
-    cursor.execute("SELECT clave, nombre, costo FROM servicios WHERE suspendido = 0 ORDER BY nombre")
-    servicios = cursor.fetchall()
+    servicios = api.servicios_activos()
     if not servicios:
         print("No hay servicios activos disponibles.")
-        conn.rollback()
-        conn.close()
         return
 
+    lineas = []
     total = 0
     while True:
         for s in servicios:
-            print(f"{s[0]} - {s[1]} (${s[2]:.2f})")
+            print(f"{s.clave} - {s.nombre} (${s.costo:.2f})")
         servicio_clave = input("Ingrese clave del servicio (o ENTER para terminar): ").strip()
         if servicio_clave == "" and total > 0:
             break
-        elif servicio_clave not in [str(s[0]) for s in servicios]:
+        servicio = api.servicio_activo(servicio_clave)
+        if servicio is None:
             print("Servicio inválido.")
             continue
 
         observaciones = input("Observaciones (puede quedar vacío): ").strip()
-        costo = next(float(s[2]) for s in servicios if str(s[0]) == servicio_clave)
-        cursor.execute("INSERT INTO detalles_nota (folio, servicio_clave, observaciones, costo) VALUES (?, ?, ?, ?)",
-                       (nuevo_folio, servicio_clave, observaciones, costo))
-        total += costo
+        lineas.append((servicio.clave, observaciones))
+        total += servicio.costo
         print(f"Servicio agregado. Total acumulado: ${total:.2f}")
 
-    conn.commit()
-    conn.close()
-    print(f"\nNota registrada con folio #{nuevo_folio} y total de ${total:.2f}")
+    try:
+        nota = api.crear_nota(cliente_clave, fecha, lineas)
+    except ErrorTaller as e:
+        print(e)
+        return
+    print(f"\nNota registrada con folio #{nota.folio} y total de ${nota.total:.2f}")
 
 
-def cancelar_nota():
-    conn = conectar_db()
-    cursor = conn.cursor()
+def elegir_de_paginas(obtener_pagina, mostrar, mensaje):
+    # Muestra una página a la vez y devuelve lo que se capture; "n" pasa a la página siguiente.
+    # Devuelve None si no hay nada que mostrar.
+    despues = None
+    while True:
+        pagina = obtener_pagina(despues)
+        if not pagina.elementos and despues is None:
+            return None
+        if pagina.aviso:
+            print(pagina.aviso)
+        for elemento in pagina.elementos:
+            mostrar(elemento)
+        if pagina.siguiente is not None:
+            print("(n = ver la página siguiente)")
+        respuesta = input(mensaje).strip()
+        if respuesta.lower() != "n" or pagina.siguiente is None:
+            return respuesta
+        despues = pagina.siguiente
+
+
+def mostrar_nota(nota, titulo="Nota encontrada:", titulo_detalles="Detalles de la nota:"):
+    print(f"\n{titulo}")
+    print(f"Folio: {nota.folio}")
+    print(f"Fecha: {nota.fecha}")
+    print(f"Cliente Clave: {nota.cliente_clave}")
+
+    if nota.lineas:
+        print(f"\n{titulo_detalles}")
+        for i, d in enumerate(nota.lineas, start=1):
+            print(f"{i}. Servicio: {d.servicio_clave} | Observaciones: {d.observaciones or '(sin observaciones)'} | Costo: ${d.costo:.2f}")
+    else:
+        print("Esta nota no tiene detalles registrados.")
+
 
+def cancelar_nota():
     # Solicitar folio
     folio = input("Ingrese el folio de la nota que desea cancelar: ").strip()
 
     # Verificar existencia y que no esté cancelada
-    cursor.execute("SELECT folio, fecha, cliente_clave FROM notas WHERE folio = ? AND cancelada = 0", (folio,))
-    nota = cursor.fetchone()
-
+    nota = api.obtener_nota(folio)
     if not nota:
         print("La nota no existe o ya está cancelada.")
-        conn.close()
         return
 
-    print(f"\nNota encontrada:")
-    print(f"Folio: {nota[0]}")
-    print(f"Fecha: {nota[1]}")
-    print(f"Cliente Clave: {nota[2]}")
-
-    # Mostrar detalles de la nota
-    cursor.execute("""
-        SELECT servicio_clave, observaciones, costo
-        FROM detalles_nota
-        WHERE folio = ?
-    """, (folio,))
-    detalles = cursor.fetchall()
-
-    if detalles:
-        print("\nDetalles de la nota:")
-        for i, d in enumerate(detalles, start=1):
-            print(f"{i}. Servicio: {d[0]} | Observaciones: {d[1] or '(sin observaciones)'} | Costo: ${d[2]:.2f}")
-    else:
-        print("Esta nota no tiene detalles registrados.")
+    mostrar_nota(nota)
 
     # Confirmar cancelación
     confirmar = input("\n¿Desea cancelar esta nota? (s/n): ").strip().lower()
     if confirmar == "s":
-        cursor.execute("UPDATE notas SET cancelada = 1 WHERE folio = ?", (folio,))
-        conn.commit()
+        try:
+            api.cancelar(folio)
+        except ErrorTaller as e:
+            print(e)
+            return
         print("Nota cancelada correctamente.")
     else:
         print("La nota no fue cancelada.")
 
-    conn.close()
-
 
 def recuperar_nota():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    # Obtener notas canceladas
-    cursor.execute("""
-        SELECT folio, fecha, cliente_clave
-        FROM notas
-        WHERE cancelada = 1
-        ORDER BY fecha
-    """)
-    notas = cursor.fetchall()
-
-    if not notas:
-        print("No hay notas canceladas para recuperar.")
-        conn.close()
-        return
-
     print("\nNotas canceladas:")
-    for n in notas:
-        print(f"Folio: {n[0]} | Fecha: {n[1]} | Cliente Clave: {n[2]}")
+    folio_input = elegir_de_paginas(
+        lambda despues: api.pagina_notas(cancelada=True, despues=despues),
+        lambda n: print(f"Folio: {n[0]} | Fecha: {n[1]} | Cliente Clave: {n[2]}"),
+        "\nIngrese el folio que desea recuperar (o presione ENTER para salir): ")
+    if folio_input is None:
+        # Las canceladas depuradas no se listan, pero se recuperan con su folio
+        print("No hay notas canceladas recientes.")
+        folio_input = input("Ingrese el folio de una nota depurada que desee recuperar (o presione ENTER para salir): ").strip()
 
-    folio_input = input("\nIngrese el folio que desea recuperar (o presione ENTER para salir): ").strip()
     if folio_input == "":
         print("ℹNo se recuperó ninguna nota.")
-        conn.close()
         return
 
-    cursor.execute("SELECT folio, fecha, cliente_clave FROM notas WHERE folio = ? AND cancelada = 1", (folio_input,))
-    nota = cursor.fetchone()
-
+    nota = api.obtener_nota(folio_input, cancelada=True)
     if not nota:
         print("El folio ingresado no corresponde a una nota cancelada.")
-        conn.close()
         return
 
-    print(f"\nNota a recuperar:")
-    print(f"Folio: {nota[0]}")
-    print(f"Fecha: {nota[1]}")
-    print(f"Cliente Clave: {nota[2]}")
-
-    # Mostrar detalles
-    cursor.execute("""
-        SELECT servicio_clave, observaciones, costo
-        FROM detalles_nota
-        WHERE folio = ?
-    """, (folio_input,))
-    detalles = cursor.fetchall()
-
-    if detalles:
-        print("\nDetalles de la nota:")
-        for i, d in enumerate(detalles, start=1):
-            print(f"{i}. Servicio: {d[0]} | Observaciones: {d[1] or '(sin observaciones)'} | Costo: ${d[2]:.2f}")
-    else:
-        print("Esta nota no tiene detalles registrados.")
+    mostrar_nota(nota, "Nota a recuperar:")
 
     confirmar = input("\n¿Desea recuperar esta nota? (s/n): ").strip().lower()
     if confirmar == "s":
-        cursor.execute("UPDATE notas SET cancelada = 0 WHERE folio = ?", (folio_input,))
-        conn.commit()
+        try:
+            api.recuperar(folio_input)
+        except ErrorTaller as e:
+            print(e)
+            return
         print("Nota recuperada correctamente.")
     else:
         print("ℹLa nota no fue recuperada.")
 
-    conn.close()
 
 
 
+def buscar():
+    # Búsqueda de texto en las observaciones de las notas, en clientes o en servicios (ver busqueda.py)
+    texto = input("Texto a buscar (termine una palabra con * para buscar por prefijo, p. ej. garan*): ").strip()
+    opcion = input("Buscar en (1) observaciones de notas, (2) clientes o (3) servicios, ENTER para notas: ").strip()
+    donde = {"2": "clientes", "3": "servicios"}.get(opcion, "notas")
+    try:
+        busqueda.consulta_fts(texto)
+    except ErrorTaller as e:
+        print(e)
+        return
+
+    mensaje = "\nIngrese un folio para ver la nota (ENTER para regresar): " if donde == "notas" else \
+        "\nPresione ENTER para regresar: "
+    respuesta = elegir_de_paginas(lambda despues: busqueda.BUSQUEDAS[donde](texto, despues), busqueda.mostrar,
+                                  mensaje)
+    if respuesta is None:
+        print("No se encontraron coincidencias.")
+    elif donde == "notas" and respuesta.isdigit():
+        nota = api.obtener_nota(respuesta) or api.obtener_nota(respuesta, cancelada=True)
+        if nota:
+            mostrar_nota(nota, titulo_detalles="Detalles del servicio:")
+        else:
+            print("El folio indicado no existe.")
+
 
 def menu_consultas_reportes():
     while True:
@@ -279,166 +221,91 @@ def menu_consultas_reportes():
             print("Opción no válida.\n")
 
 
-def consulta_por_periodo():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    fecha_inicio = input("Ingrese la fecha inicial (MM-DD-YYYY) o presione ENTER para usar la más antigua: ").strip()
-    if fecha_inicio == "":
-        cursor.execute("SELECT MIN(fecha) FROM notas WHERE cancelada = 0")
-        resultado = cursor.fetchone()[0]
-        if resultado:
-            fecha_inicio = resultado
-            print(f"Fecha inicial usada: {fecha_inicio}")
-        else:
-            print("No hay notas registradas.")
-            conn.close()
-            return
-    else:
-        try:
-            fecha_inicio = datetime.strptime(fecha_inicio, "%m-%d-%Y").strftime("%Y-%m-%d")
-        except ValueError:
-            print("Fecha inicial inválida.")
-            conn.close()
-            return
-
-    fecha_fin = input("Ingrese la fecha final (MM-DD-YYYY) o presione ENTER para usar la fecha actual: ").strip()
-    if fecha_fin == "":
-        fecha_fin = datetime.now().strftime("%Y-%m-%d")
-        print(f"Fecha final usada: {fecha_fin}")
-    else:
-        try:
-            fecha_fin = datetime.strptime(fecha_fin, "%m-%d-%Y").strftime("%Y-%m-%d")
-        except ValueError:
-            print("Fecha final inválida.")
-            conn.close()
-            return
+def exportar_reporte(nombre, funcion):
+    # Pregunta el formato y exporta en flujo desde la base (ver exportacion.py)
+    formato = input("Formato (xlsx/csv/parquet) o ENTER para xlsx: ").strip().lower() or "xlsx"
+    try:
+        resumen = funcion(f"{nombre}.{formato}")
+    except ErrorTaller as e:
+        print(e)
+        return
+    archivos = ", ".join(f"'{a}'" for a in resumen["archivos"])
+    print(f"Reporte exportado como {archivos}")
 
-    cursor.execute("""
-        SELECT n.folio, n.fecha, n.cliente_clave,
-               IFNULL(SUM(d.costo), 0) as total
-        FROM notas n
-        LEFT JOIN detalles_nota d ON n.folio = d.folio
-        WHERE n.cancelada = 0 AND n.fecha BETWEEN ? AND ?
-        GROUP BY n.folio
-        ORDER BY n.fecha;
-    """, (fecha_inicio, fecha_fin))
 
-    resultados = cursor.fetchall()
-    conn.close()
+def consulta_por_periodo():
+    periodo = pedir_periodo()
+    if periodo is None:
+        return
 
+    resultados = api.reporte_periodo(*periodo)
     if not resultados:
         print("No hay notas emitidas para el período seleccionado.")
     else:
-        df = pd.DataFrame(resultados, columns=["Folio", "Fecha", "Cliente Clave", "Total"])
+        import pandas as pd
+        df = pd.DataFrame([(n.folio, n.fecha, n.cliente_clave, n.total) for n in resultados],
+                          columns=["Folio", "Fecha", "Cliente Clave", "Total"])
         print(df)
 
-        exportar = input("¿Desea exportar el reporte a Excel? (s/n): ").strip().lower()
+        exportar = input("¿Desea exportar el reporte? (s/n): ").strip().lower()
         if exportar == "s":
-            df.to_excel("reporte_notas_periodo.xlsx", index=False)
-            print("Reporte exportado como 'reporte_notas_periodo.xlsx'")
+            exportar_reporte("reporte_notas_periodo",
+                             lambda ruta: exportacion.exportar_periodo(*periodo, ruta))
 
 
 #### 2
 def reporte_total_clientes():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT clave, apellidos, nombres, telefono,
-               CASE suspendido WHEN 0 THEN 'Activo' ELSE 'Suspendido' END AS estado
-        FROM clientes
-        ORDER BY clave
-    """)
-    clientes = cursor.fetchall()
-    conn.close()
-
+    clientes = api.listar_clientes()
     if not clientes:
         print("No hay clientes registrados.")
     else:
-        df = pd.DataFrame(clientes, columns=["Clave", "Apellidos", "Nombres", "Teléfono", "Estado"])
+        import pandas as pd
+        df = pd.DataFrame([(c.clave, c.apellidos, c.nombres, c.telefono,
+                            "Suspendido" if c.suspendido else "Activo") for c in clientes],
+                          columns=["Clave", "Apellidos", "Nombres", "Teléfono", "Estado"])
         print(df)
 
-        exportar = input("¿Desea exportar el reporte a Excel? (s/n): ").strip().lower()
+        exportar = input("¿Desea exportar el reporte? (s/n): ").strip().lower()
         if exportar == "s":
-            df.to_excel("Python3ero/reporte_clientes.xlsx", index=False)
-            print("Reporte exportado como 'reporte_clientes.xlsx'")
+            exportar_reporte("reporte_clientes", exportacion.exportar_clientes)
 
 
 ### 3
 
 def reporte_total_servicios():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT clave, nombre, costo,
-               CASE suspendido WHEN 0 THEN 'Activo' ELSE 'Suspendido' END AS estado
-        FROM servicios
-        ORDER BY nombre
-    """)
-    servicios = cursor.fetchall()
-    conn.close()
-
+    servicios = api.listar_servicios()
     if not servicios:
         print("No hay servicios registrados.")
     else:
-        df = pd.DataFrame(servicios, columns=["Clave", "Nombre del Servicio", "Costo", "Estado"])
+        import pandas as pd
+        df = pd.DataFrame([(s.clave, s.nombre, s.costo,
+                            "Suspendido" if s.suspendido else "Activo") for s in servicios],
+                          columns=["Clave", "Nombre del Servicio", "Costo", "Estado"])
         print(df)
 
-        exportar = input("¿Desea exportar el reporte a Excel? (s/n): ").strip().lower()
+        exportar = input("¿Desea exportar el reporte? (s/n): ").strip().lower()
         if exportar == "s":
-            df.to_excel("reporte_servicios.xlsx", index=False)
-            print("Reporte exportado como 'reporte_servicios.xlsx'")
+            exportar_reporte("reporte_servicios", exportacion.exportar_servicios)
 
 
 ### 4
 
 def consulta_por_folio():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT folio, fecha FROM notas WHERE cancelada = 0 ORDER BY fecha")
-    folios = cursor.fetchall()
-
-    if not folios:
+    print("\nFolios disponibles:")
+    folio_input = elegir_de_paginas(
+        lambda despues: api.pagina_notas(despues=despues),
+        lambda n: print(f"Folio: {n[0]} | Fecha: {n[1]}"),
+        "\nIngrese el folio que desea consultar: ")
+    if folio_input is None:
         print("No hay notas activas registradas.")
-        conn.close()
         return
 
-    print("\nFolios disponibles:")
-    for folio, fecha in folios:
-        print(f"Folio: {folio} | Fecha: {fecha}")
-
-    folio_input = input("\nIngrese el folio que desea consultar: ").strip()
-
-    cursor.execute("SELECT folio, fecha, cliente_clave FROM notas WHERE folio = ? AND cancelada = 0", (folio_input,))
-    nota = cursor.fetchone()
-
+    nota = api.obtener_nota(folio_input)
     if not nota:
         print("El folio indicado no existe o corresponde a una nota cancelada.")
-        conn.close()
         return
 
-    print(f"\nNota encontrada:")
-    print(f"Folio: {nota[0]}")
-    print(f"Fecha: {nota[1]}")
-    print(f"Cliente Clave: {nota[2]}")
-
-    cursor.execute("""
-        SELECT servicio_clave, observaciones, costo
-        FROM detalles_nota
-        WHERE folio = ?
-    """, (folio_input,))
-    detalles = cursor.fetchall()
-    conn.close()
-
-    if detalles:
-        print("\nDetalles del servicio:")
-        for i, d in enumerate(detalles, start=1):
-            print(f"{i}. Servicio: {d[0]} | Observaciones: {d[1] or '(sin observaciones)'} | Costo: ${d[2]:.2f}")
-    else:
-        print("Esta nota no tiene detalles registrados.")
+    mostrar_nota(nota, titulo_detalles="Detalles del servicio:")
 
 
 def menu_analisis_estadistico():
@@ -446,7 +313,9 @@ def menu_analisis_estadistico():
         print("\nANÁLISIS ESTADÍSTICO")
         print("1. Análisis de los totales por nota")
         print("2. Análisis de patrones")
-        print("3. Regresar al menú anterior")
+        print("3. Análisis completo de un período")
+        print("4. Ingresos y volumen por día, semana o mes")
+        print("5. Regresar al menú anterior")
         opcion = input("Seleccione una opción: ")
 
         if opcion == "1":
@@ -454,70 +323,32 @@ def menu_analisis_estadistico():
         elif opcion == "2":
             menu_analisis_patrones()
         elif opcion == "3":
+            analisis_completo_periodo()
+        elif opcion == "4":
+            series_de_tiempo()
+        elif opcion == "5":
             break
         else:
             print("Opción no válida.\n")
 
-def menu_mantenimiento_datos():
-    while True:
-        print("\n🛠 MANTENIMIENTO DE DATOS")
-        print("1. Clientes")
-        print("2. Servicios")
-        print("3. Regresar al menú principal")
-        opcion = input("Seleccione una opción: ")
-
-        if opcion == "1":
-            menu_clientes()
-        elif opcion == "2":
-            menu_servicios()
-        elif opcion == "3":
-            break
-        else:
-            print("Opción no válida.\n")
-
-def menu_analisis_totales():
-    while True:
-        print("\n--- ANÁLISIS DE LOS TOTALES POR NOTA ---")
-        print("1. Tendencias centrales")
-        print("2. Dispersión y distribución")
-        print("3. Volver al menú principal")
-
-        opcion = input("Seleccione una opción: ").strip()
-
-        if opcion == "1":
-            estadistica_tendencia_central()
-        elif opcion == "2":
-            estadistica_dispersion()
-        elif opcion == "3":
-            break
-        else:
-            print("Opción no válida.")
-
-def estadistica_tendencia_central():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    # Pedir fecha inicial
+def pedir_periodo():
+    # Devuelve (fecha_inicio, fecha_fin) en formato YYYY-MM-DD, o None si la entrada no es válida
     fecha_inicio = input("Ingrese la fecha inicial (MM-DD-YYYY) o presione ENTER para usar la más antigua: ").strip()
     if fecha_inicio == "":
-        cursor.execute("SELECT MIN(fecha) FROM notas WHERE cancelada = 0")
-        resultado = cursor.fetchone()[0]
+        resultado = api.fecha_mas_antigua()
         if resultado:
             fecha_inicio = resultado
             print(f"Fecha inicial usada: {fecha_inicio}")
         else:
             print("No hay notas registradas.")
-            conn.close()
-            return
+            return None
     else:
         try:
             fecha_inicio = datetime.strptime(fecha_inicio, "%m-%d-%Y").strftime("%Y-%m-%d")
         except ValueError:
             print("Fecha inicial inválida.")
-            conn.close()
-            return
+            return None
 
-    # Pedir fecha final
     fecha_fin = input("Ingrese la fecha final (MM-DD-YYYY) o presione ENTER para usar la actual: ").strip()
     if fecha_fin == "":
         fecha_fin = datetime.now().strftime("%Y-%m-%d")
@@ -527,110 +358,283 @@ def estadistica_tendencia_central():
             fecha_fin = datetime.strptime(fecha_fin, "%m-%d-%Y").strftime("%Y-%m-%d")
         except ValueError:
             print("Fecha final inválida.")
-            conn.close()
-            return
+            return None
 
-    # Obtener totales de notas
-    cursor.execute("""
-        SELECT SUM(d.costo) as total
-        FROM notas n
-        JOIN detalles_nota d ON n.folio = d.folio
-        WHERE n.cancelada = 0 AND n.fecha BETWEEN ? AND ?
-        GROUP BY n.folio
-    """, (fecha_inicio, fecha_fin))
+    return fecha_inicio, fecha_fin
 
-    resultados = [row[0] for row in cursor.fetchall()]
-    conn.close()
 
-    if not resultados:
+def mostrar_tendencia_central(tendencia):
+    print("\nEstadísticos de tendencia central:")
+    print(f"Conteo de notas: {tendencia.conteo}")
+    print(f"Media aritmética: {tendencia.media:.2f}")
+    print(f"Mediana: {tendencia.mediana:.2f}")
+    print(f"Moda(s): {', '.join(f'{m:.2f}' for m in tendencia.modas)}")
+
+
+def mostrar_dispersion(resultado):
+    print("\nEstadísticos de dispersión y distribución:")
+    print(f"Varianza: {resultado.varianza:.2f}")
+    print(f"Desviación estándar: {resultado.desviacion:.2f}")
+    print(f"Primer cuartil (Q1): {resultado.q1:.2f}")
+    print(f"Mediana (Q2): {resultado.q2:.2f}")
+    print(f"Tercer cuartil (Q3): {resultado.q3:.2f}")
+    print(f"Rango intercuartílico (IQR): {resultado.iqr:.2f}")
+    if not resultado.exacto:
+        print(f"(Cuartiles aproximados con error de rango de ±{api.ERROR_CUANTILES:.1%} sobre {resultado.conteo} notas)")
+
+
+def mostrar_posiciones(titulo, columna_nombre, columna_cantidad, posiciones):
+    print(f"\n{titulo}")
+    print("{:<6} {:<10} {:<30} {:>10} {:>12}".format("Lugar", "Clave", columna_nombre, columna_cantidad, "Ingresos"))
+    for p in posiciones:
+        print("{:<6} {:<10} {:<30} {:>10} {:>12.2f}".format(p.lugar, p.clave, p.nombre, p.cantidad, p.ingresos))
+
+
+def analisis_completo_periodo():
+    periodo = pedir_periodo()
+    if periodo is None:
+        return
+
+    # Una sola lectura del período para todos los análisis
+    from analitica import SesionAnalitica
+    mostrar_analisis(SesionAnalitica(*periodo))
+
+
+def mostrar_analisis(sesion):
+    if sesion.vacia:
         print("No hay notas emitidas en ese período.")
         return
 
-    # Calcular estadísticas
-    conteo = len(resultados)
-    promedio = mean(resultados)
-    mediana_valor = median(resultados)
-    modas = multimode(resultados)
+    tendencia = sesion.tendencia_central()
+    mostrar_tendencia_central(tendencia)
+    if tendencia.conteo >= 2:
+        mostrar_dispersion(sesion.dispersion())
+    mostrar_posiciones("Servicios más prestados:", "Servicio", "Veces", sesion.servicios_mas_prestados())
+    mostrar_posiciones("Clientes con más servicios:", "Cliente", "Servicios", sesion.clientes_con_mas_servicios())
 
-    print("\nEstadísticos de tendencia central:")
-    print(f"Conteo de notas: {conteo}")
-    print(f"Media aritmética: {promedio:.2f}")
-    print(f"Mediana: {mediana_valor:.2f}")
-    print(f"Moda(s): {', '.join(f'{m:.2f}' for m in modas)}")
+def series_de_tiempo():
+    periodo = pedir_periodo()
+    if periodo is None:
+        return
 
+    opcion = input("Agrupar por (1) día, (2) semana o (3) mes, ENTER para mes: ").strip()
+    agrupaciones = {"1": "dia", "2": "semana", "3": "mes", "": "mes"}
+    if opcion not in agrupaciones:
+        print("Opción no válida.")
+        return
+    agrupacion = agrupaciones[opcion]
 
+    from series import series_tiempo
+    try:
+        serie = series_tiempo(*periodo, agrupacion)
+    except ErrorTaller as e:
+        print(e)
+        return
+    print(serie)
 
-def estadistica_dispersion():
-    conn = conectar_db()
-    cursor = conn.cursor()
+    exportar = input("¿Desea exportar el reporte? (s/n): ").strip().lower()
+    if exportar == "s":
+        exportar_reporte(f"series_{agrupacion}",
+                         lambda ruta: exportacion.exportar_tablas(ruta, [(agrupacion.capitalize(), serie)]))
 
-    # Pedir fecha inicial
-    fecha_inicio = input("Ingrese la fecha inicial (MM-DD-YYYY) o presione ENTER para usar la más antigua: ").strip()
-    if fecha_inicio == "":
-        cursor.execute("SELECT MIN(fecha) FROM notas WHERE cancelada = 0")
-        resultado = cursor.fetchone()[0]
-        if resultado:
-            fecha_inicio = resultado
-            print(f"Fecha inicial usada: {fecha_inicio}")
+def menu_mantenimiento_datos():
+    while True:
+        print("\n🛠 MANTENIMIENTO DE DATOS")
+        print("1. Clientes")
+        print("2. Servicios")
+        print("3. Reconstruir resumen diario")
+        print("4. Verificar resumen diario")
+        print("5. Caché de reportes")
+        print("6. Años archivados")
+        print("7. Depurar notas canceladas y antiguas")
+        print("8. Métricas de consultas")
+        print("9. Regresar al menú principal")
+        opcion = input("Seleccione una opción: ")
+
+        if opcion == "1":
+            menu_clientes()
+        elif opcion == "2":
+            menu_servicios()
+        elif opcion == "3":
+            reconstruir_resumen(conectar_db())
+            # Los reportes guardados se calcularon con el resumen anterior
+            api.CACHE_REPORTES.vaciar()
+            print("Resumen diario reconstruido.")
+        elif opcion == "4":
+            verificar_resumen_diario()
+        elif opcion == "5":
+            cache_de_reportes()
+        elif opcion == "6":
+            anios_archivados()
+        elif opcion == "7":
+            depurar_notas()
+        elif opcion == "8":
+            metricas_de_consultas()
+        elif opcion == "9":
+            break
         else:
-            print("No hay notas registradas.")
-            conn.close()
-            return
+            print("Opción no válida.\n")
+
+def verificar_resumen_diario():
+    diferencias = verificar_resumen(conectar_db())
+    if not diferencias:
+        print("El resumen diario coincide con las notas registradas.")
+        return
+
+    print(f"Se encontraron {len(diferencias)} diferencias:")
+    for tabla, llave, esperado, guardado in diferencias[:20]:
+        print(f"{tabla} {llave}: esperado {esperado}, guardado {guardado}")
+    print("Use la opción 'Reconstruir resumen diario' para corregirlo.")
+
+def cache_de_reportes():
+    estadisticas = api.CACHE_REPORTES.estadisticas()
+    print(f"Reportes guardados: {estadisticas['entradas']} ({estadisticas['bytes'] / 1024:.1f} KiB)")
+    print(f"En esta sesión: {estadisticas['aciertos']} aciertos, {estadisticas['fallos']} fallos, "
+          f"{estadisticas['desalojos']} desalojos")
+    if input("¿Desea vaciar la caché? (s/n): ").strip().lower() == "s":
+        api.CACHE_REPORTES.vaciar()
+        print("Caché de reportes vaciada.")
+
+def anios_archivados():
+    archivados = particiones.anios_archivados()
+    if archivados:
+        import pandas as pd
+        print(pd.DataFrame([(anio, notas, lineas, f"{tamano / 1024 ** 2:.1f} MB", archivo)
+                            for anio, archivo, notas, lineas, tamano in archivados],
+                           columns=["Año", "Notas", "Líneas", "Tamaño", "Archivo"]).to_string(index=False))
     else:
+        print("No hay años archivados.")
+
+    anio = input("Año a archivar o desarchivar (ENTER para regresar): ").strip()
+    if not anio:
+        return
+    if not anio.isdigit():
+        print("Año inválido.")
+        return
+    try:
+        if int(anio) in {fila[0] for fila in archivados}:
+            if input(f"El año {anio} está archivado. ¿Desea regresar sus notas a la base? (s/n): ").strip().lower() == "s":
+                resultado = particiones.desarchivar_anio(anio)
+                print(f"{resultado['notas']} notas de {anio} regresaron a la base.")
+        elif input(f"¿Desea archivar las notas de {anio}? Ya no se podrán cancelar ni recuperar (s/n): ").strip().lower() == "s":
+            resultado = particiones.archivar_anio(anio)
+            print(f"{resultado['notas']} notas de {anio} archivadas en {resultado['archivo']}.")
+    except ErrorTaller as e:
+        print(e)
+
+def pedir_dias(mensaje, omision):
+    # Número de días, ENTER para el valor por omisión o "0" para no aplicar el criterio
+    texto = input(f"{mensaje} (ENTER = {omision}, 0 = no depurar por este criterio): ").strip()
+    if not texto:
+        return omision
+    if not texto.isdigit():
+        print("Valor inválido; se usará el valor por omisión.")
+        return omision
+    return int(texto) or None
+
+def depurar_notas():
+    actual = depuracion.estado()
+    print(f"Notas depuradas: {actual['notas']} ({actual['lineas']} líneas) en {actual['archivo']}")
+    print(f"Notas canceladas en la base: {actual['canceladas']}")
+    horizonte = pedir_dias("Días que una nota se conserva en la base", depuracion.HORIZONTE_DIAS)
+    canceladas = pedir_dias("Días que una nota cancelada se conserva en la base", depuracion.DIAS_CANCELADA)
+    if input("Las notas depuradas siguen en los reportes y se recuperan por folio. ¿Desea continuar? (s/n): "
+             ).strip().lower() != "s":
+        print("Depuración cancelada.")
+        return
+    try:
+        depuracion.imprimir_depuracion(depuracion.depurar(horizonte, canceladas))
+    except ErrorTaller as e:
+        print(e)
+
+def metricas_de_consultas():
+    if not instrumentacion.activa():
+        print("La medición de consultas está apagada.")
+        umbral = input(f"Umbral de consultas lentas en ms para activarla (ENTER = {instrumentacion.UMBRAL_LENTAS_MS}, "
+                       "n = dejarla apagada): ").strip().lower()
+        if umbral == "n":
+            return
         try:
-            fecha_inicio = datetime.strptime(fecha_inicio, "%m-%d-%Y").strftime("%Y-%m-%d")
+            instrumentacion.activar(float(umbral) if umbral else instrumentacion.UMBRAL_LENTAS_MS)
         except ValueError:
-            print("Fecha inicial inválida.")
-            conn.close()
+            print("Umbral inválido.")
             return
+        print(f"Medición activada; las consultas lentas se registran en {instrumentacion.instantanea()['archivo_lentas']}.")
+        return
 
-    # Pedir fecha final
-    fecha_fin = input("Ingrese la fecha final (MM-DD-YYYY) o presione ENTER para usar la actual: ").strip()
-    if fecha_fin == "":
-        fecha_fin = datetime.now().strftime("%Y-%m-%d")
-        print(f"Fecha final usada: {fecha_fin}")
+    actual = instrumentacion.instantanea()
+    if actual["sentencias"]:
+        import pandas as pd
+        print(pd.DataFrame([(s["funcion"], s["ejecuciones"], f"{s['segundos'] * 1000:.1f}", f"{s['max_ms']:.1f}",
+                             s["filas"], s["lentas"], s["sql"][:60])
+                            for s in actual["sentencias"][:15]],
+                           columns=["Función", "Ejecuciones", "Total ms", "Máx ms", "Filas", "Lentas", "Sentencia"]
+                           ).to_string(index=False))
     else:
-        try:
-            fecha_fin = datetime.strptime(fecha_fin, "%m-%d-%Y").strftime("%Y-%m-%d")
-        except ValueError:
-            print("Fecha final inválida.")
-            conn.close()
-            return
+        print("Todavía no hay consultas medidas.")
+    print("1. Exportar en JSON")
+    print("2. Exportar en formato de Prometheus")
+    print("3. Reiniciar contadores")
+    print("4. Apagar la medición")
+    opcion = input("Seleccione una opción (ENTER para regresar): ").strip()
+    if opcion in ("1", "2"):
+        ruta = input("Archivo de destino: ").strip() or ("metricas.json" if opcion == "1" else "metricas.prom")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            if opcion == "1":
+                json.dump(actual, archivo, indent=2, ensure_ascii=False)
+            else:
+                archivo.write(instrumentacion.prometheus())
+        print(f"Métricas guardadas en {ruta}.")
+    elif opcion == "3":
+        instrumentacion.reiniciar()
+        print("Contadores reiniciados.")
+    elif opcion == "4":
+        instrumentacion.desactivar()
+        print("Medición apagada.")
+
+def menu_analisis_totales():
+    while True:
+        print("\n--- ANÁLISIS DE LOS TOTALES POR NOTA ---")
+        print("1. Tendencias centrales")
+        print("2. Dispersión y distribución")
+        print("3. Volver al menú principal")
 
-    # Obtener totales por nota
-    cursor.execute("""
-        SELECT SUM(d.costo) as total
-        FROM notas n
-        JOIN detalles_nota d ON n.folio = d.folio
-        WHERE n.cancelada = 0 AND n.fecha BETWEEN ? AND ?
-        GROUP BY n.folio
-    """, (fecha_inicio, fecha_fin))
+        opcion = input("Seleccione una opción: ").strip()
 
-    resultados = [row[0] for row in cursor.fetchall()]
-    conn.close()
+        if opcion == "1":
+            estadistica_tendencia_central()
+        elif opcion == "2":
+            estadistica_dispersion()
+        elif opcion == "3":
+            break
+        else:
+            print("Opción no válida.")
 
-    if not resultados or len(resultados) < 2:
-        print("No hay suficientes notas para calcular dispersión (se requiere al menos 2).")
+def estadistica_tendencia_central():
+    periodo = pedir_periodo()
+    if periodo is None:
         return
 
-    serie = pd.Series(resultados)
+    tendencia = api.tendencia_central(*periodo)
+    if tendencia is None:
+        print("No hay notas emitidas en ese período.")
+        return
 
-    # Cálculos
-    varianza = variance(resultados)
-    desviacion = stdev(resultados)
-    q1 = serie.quantile(0.25)
-    q2 = serie.quantile(0.50)
-    q3 = serie.quantile(0.75)
-    iqr = q3 - q1
+    mostrar_tendencia_central(tendencia)
 
-    # Mostrar reporte
-    print("\nEstadísticos de dispersión y distribución:")
-    print(f"Varianza: {varianza:.2f}")
-    print(f"Desviación estándar: {desviacion:.2f}")
-    print(f"Primer cuartil (Q1): {q1:.2f}")
-    print(f"Mediana (Q2): {q2:.2f}")
-    print(f"Tercer cuartil (Q3): {q3:.2f}")
-    print(f"Rango intercuartílico (IQR): {iqr:.2f}")
+
+
+def estadistica_dispersion():
+    periodo = pedir_periodo()
+    if periodo is None:
+        return
+
+    resultado = api.dispersion(*periodo)
+    if resultado is None:
+        print("No hay suficientes notas para calcular dispersión (se requiere al menos 2).")
+        return
+
+    mostrar_dispersion(resultado)
 
 
 def menu_analisis_patrones():
@@ -650,121 +654,49 @@ def menu_analisis_patrones():
         else:
             print("Opción no válida.\n")
 
-def servicio_mas_prestado():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    # Pedir fechas
-    fecha_inicio = input("Ingrese la fecha inicial (MM-DD-YYYY) o ENTER para usar la más antigua: ").strip()
-    if fecha_inicio == "":
-        cursor.execute("SELECT MIN(fecha) FROM notas WHERE cancelada = 0")
-        resultado = cursor.fetchone()[0]
-        if resultado:
-            fecha_inicio = resultado
-            print(f"Fecha inicial usada: {fecha_inicio}")
-        else:
-            print("No hay notas registradas.")
-            conn.close()
-            return
-    else:
-        try:
-            fecha_inicio = datetime.strptime(fecha_inicio, "%m-%d-%Y").strftime("%Y-%m-%d")
-        except ValueError:
-            print("Fecha inicial inválida.")
-            conn.close()
-            return
-
-    fecha_fin = input("Ingrese la fecha final (MM-DD-YYYY) o ENTER para usar la actual: ").strip()
-    if fecha_fin == "":
-        fecha_fin = datetime.now().strftime("%Y-%m-%d")
-    else:
-        try:
-            fecha_fin = datetime.strptime(fecha_fin, "%m-%d-%Y").strftime("%Y-%m-%d")
-        except ValueError:
-            print("Fecha final inválida.")
-            conn.close()
-            return
+def pedir_ranking():
+    # Devuelve (lugares, criterio), o None si la entrada no es válida
+    lugares = input(f"¿Cuántos lugares desea ver? (ENTER para {api.LUGARES_RANKING}): ").strip()
+    if lugares == "":
+        lugares = api.LUGARES_RANKING
+    elif not lugares.isdigit() or int(lugares) < 1:
+        print("Número de lugares inválido.")
+        return None
+
+    criterio = input("Ordenar por (1) cantidad o (2) ingresos, ENTER para cantidad: ").strip()
+    if criterio not in ("", "1", "2"):
+        print("Criterio inválido.")
+        return None
+    return int(lugares), "ingresos" if criterio == "2" else "cantidad"
 
-    # Consulta: los 3 servicios más prestados
-    cursor.execute("""
-        SELECT s.clave, s.nombre, COUNT(*) AS veces
-        FROM notas n
-        JOIN detalles_nota d ON n.folio = d.folio
-        JOIN servicios s ON d.servicio_clave = s.clave
-        WHERE n.cancelada = 0 AND n.fecha BETWEEN ? AND ?
-        GROUP BY s.clave, s.nombre
-        ORDER BY veces ASC
-        LIMIT 3
-    """, (fecha_inicio, fecha_fin))
-
-    servicios = cursor.fetchall()
-    conn.close()
+def servicio_mas_prestado():
+    periodo = pedir_periodo()
+    if periodo is None:
+        return
+    opciones = pedir_ranking()
+    if opciones is None:
+        return
 
+    servicios = api.servicios_mas_prestados(*periodo, k=opciones[0], criterio=opciones[1])
     if not servicios:
         print("No se encontraron servicios prestados en ese período.")
     else:
-        print("\nServicios más prestados:")
-        print("{:<10} {:<30} {:>10}".format("Clave", "Servicio", "Veces"))
-        for s in servicios:
-            print("{:<10} {:<30} {:>10}".format(s[0], s[1], s[2]))
+        mostrar_posiciones("Servicios más prestados:", "Servicio", "Veces", servicios)
 
 def cliente_con_mas_servicios():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    # Pedir fechas
-    fecha_inicio = input("Ingrese la fecha inicial (MM-DD-YYYY) o ENTER para usar la más antigua: ").strip()
-    if fecha_inicio == "":
-        cursor.execute("SELECT MIN(fecha) FROM notas WHERE cancelada = 0")
-        resultado = cursor.fetchone()[0]
-        if resultado:
-            fecha_inicio = resultado
-            print(f"Fecha inicial usada: {fecha_inicio}")
-        else:
-            print("No hay notas registradas.")
-            conn.close()
-            return
-    else:
-        try:
-            fecha_inicio = datetime.strptime(fecha_inicio, "%m-%d-%Y").strftime("%Y-%m-%d")
-        except ValueError:
-            print("Fecha inicial inválida.")
-            conn.close()
-            return
-
-    fecha_fin = input("Ingrese la fecha final (MM-DD-YYYY) o ENTER para usar la actual: ").strip()
-    if fecha_fin == "":
-        fecha_fin = datetime.now().strftime("%Y-%m-%d")
-    else:
-        try:
-            fecha_fin = datetime.strptime(fecha_fin, "%m-%d-%Y").strftime("%Y-%m-%d")
-        except ValueError:
-            print("Fecha final inválida.")
-            conn.close()
-            return
+    periodo = pedir_periodo()
+    if periodo is None:
+        return
 
-    # Consulta: los 3 clientes con más servicios solicitados
-    cursor.execute("""
-        SELECT c.clave, c.apellidos || ' ' || c.nombres AS nombre_completo, COUNT(*) AS total_servicios
-        FROM notas n
-        JOIN detalles_nota d ON n.folio = d.folio
-        JOIN clientes c ON n.cliente_clave = c.clave
-        WHERE n.cancelada = 0 AND n.fecha BETWEEN ? AND ?
-        GROUP BY c.clave, nombre_completo
-        ORDER BY total_servicios ASC
-        LIMIT 3
-    """, (fecha_inicio, fecha_fin))
-
-    clientes = cursor.fetchall()
-    conn.close()
+    opciones = pedir_ranking()
+    if opciones is None:
+        return
 
+    clientes = api.clientes_con_mas_servicios(*periodo, k=opciones[0], criterio=opciones[1])
     if not clientes:
         print("No se encontraron servicios solicitados en ese período.")
     else:
-        print("\nClientes con más servicios:")
-        print("{:<10} {:<30} {:>10}".format("Clave", "Cliente", "Servicios"))
-        for c in clientes:
-            print("{:<10} {:<30} {:>10}".format(c[0], c[1], c[2]))
+        mostrar_posiciones("Clientes con más servicios:", "Cliente", "Servicios", clientes)
 
 def menu_clientes():
     while True:
@@ -787,131 +719,88 @@ def menu_clientes():
             print("Opción no válida.\n")
 
 def alta_cliente():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
     apellidos = input("Ingrese apellidos (sin números): ").strip()
-    if not apellidos.replace(" ", "").isalpha():
+    if not nombre_valido(apellidos):
         print("Apellidos inválidos.")
-        conn.close()
         return
 
     nombres = input("Ingrese nombres (sin números): ").strip()
-    if not nombres.replace(" ", "").isalpha():
+    if not nombre_valido(nombres):
         print("Nombres inválidos.")
-        conn.close()
         return
 
     telefono = input("Ingrese teléfono (10 dígitos sin espacios): ").strip()
-    if not (telefono.isdigit() and len(telefono) == 10):
+    if not telefono_valido(telefono):
         print("Número telefónico inválido.")
-        conn.close()
         return
 
-    cursor.execute("""
-        INSERT INTO clientes (apellidos, nombres, telefono, suspendido)
-        VALUES (?, ?, ?, 0)
-    """, (apellidos, nombres, telefono))
-    conn.commit()
+    api.alta_cliente(apellidos, nombres, telefono)
     print("Cliente registrado correctamente.")
-    conn.close()
 
 
-def baja_cliente():
-    conn = conectar_db()
-    cursor = conn.cursor()
+def seleccionar_cliente_activo(mensaje_vacio, mensaje_clave, mensaje_invalido="Clave inválida."):
+    # Lista los clientes activos por páginas (opcionalmente filtrados por apellidos)
+    # y devuelve la clave elegida, o None
+    prefijo = input("Buscar por apellidos (ENTER para ver todos): ").strip()
 
-    cursor.execute("""
-        SELECT clave, apellidos, nombres FROM clientes
-        WHERE suspendido = 0
-        ORDER BY apellidos, nombres
-    """)
-    clientes = cursor.fetchall()
+    print("\nClientes activos:")
+    clave = elegir_de_paginas(
+        lambda despues: api.pagina_clientes(prefijo, despues),
+        lambda c: print(f"Clave: {c.clave} | Nombre: {c.nombre_completo}"),
+        mensaje_clave)
+    if clave is None:
+        print(mensaje_vacio if not prefijo else "Ningún cliente activo coincide con la búsqueda.")
+        return None
 
-    if not clientes:
-        print("No hay clientes activos para suspender.")
-        conn.close()
-        return
+    if not api.cliente_activo(clave):
+        print(mensaje_invalido)
+        return None
+    return clave
 
-    print("\nClientes activos:")
-    for c in clientes:
-        print(f"Clave: {c[0]} | Nombre: {c[1]} {c[2]}")
 
-    clave = input("\nIngrese la clave del cliente a suspender: ").strip()
-    if clave not in [str(c[0]) for c in clientes]:
-        print("Clave inválida.")
-        conn.close()
+def baja_cliente():
+    clave = seleccionar_cliente_activo("No hay clientes activos para suspender.",
+                                       "\nIngrese la clave del cliente a suspender: ")
+    if clave is None:
         return
 
     confirmar = input("¿Está seguro que desea suspender a este cliente? (s/n): ").strip().lower()
     if confirmar == "s":
-        cursor.execute("UPDATE clientes SET suspendido = 1 WHERE clave = ?", (clave,))
-        conn.commit()
+        api.suspender_cliente(clave)
         print("Cliente suspendido correctamente.")
     else:
         print("Operación cancelada.")
 
-    conn.close()
-
 
 def editar_cliente():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT clave, apellidos, nombres FROM clientes
-        WHERE suspendido = 0
-        ORDER BY apellidos, nombres
-    """)
-    clientes = cursor.fetchall()
-
-    if not clientes:
-        print("No hay clientes activos para editar.")
-        conn.close()
-        return
-
-    print("\nClientes activos:")
-    for c in clientes:
-        print(f"Clave: {c[0]} | Nombre: {c[1]} {c[2]}")
-
-    clave = input("\nIngrese la clave del cliente a editar: ").strip()
-    if clave not in [str(c[0]) for c in clientes]:
-        print("Clave inválida.")
-        conn.close()
+    clave = seleccionar_cliente_activo("No hay clientes activos para editar.",
+                                       "\nIngrese la clave del cliente a editar: ")
+    if clave is None:
         return
 
     confirmar = input("¿Desea editar este cliente? (s/n): ").strip().lower()
     if confirmar != "s":
         print("Edición cancelada.")
-        conn.close()
         return
 
     # Nuevos datos
     apellidos = input("Nuevo apellidos: ").strip()
-    if not apellidos.replace(" ", "").isalpha():
+    if not nombre_valido(apellidos):
         print("Apellidos inválidos.")
-        conn.close()
         return
 
     nombres = input("Nuevo nombres: ").strip()
-    if not nombres.replace(" ", "").isalpha():
+    if not nombre_valido(nombres):
         print("Nombres inválidos.")
-        conn.close()
         return
 
     telefono = input("Nuevo teléfono (10 dígitos): ").strip()
-    if not (telefono.isdigit() and len(telefono) == 10):
+    if not telefono_valido(telefono):
         print("Teléfono inválido.")
-        conn.close()
         return
 
-    cursor.execute("""
-        UPDATE clientes SET apellidos = ?, nombres = ?, telefono = ?
-        WHERE clave = ?
-    """, (apellidos, nombres, telefono, clave))
-    conn.commit()
+    api.editar_cliente(clave, apellidos, nombres, telefono)
     print("Cliente actualizado correctamente.")
-    conn.close()
 
 
 def menu_servicios():
@@ -935,124 +824,81 @@ def menu_servicios():
             print("Opción no válida.\n")
 
 def alta_servicio():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
     nombre = input("Ingrese el nombre del servicio: ").strip()
     if not nombre:
         print("El nombre no puede estar vacío.")
-        conn.close()
         return
 
     try:
         costo = float(input("Ingrese el costo del servicio: ").strip())
-        if costo <= 0:
+        if not costo_valido(costo):
             raise ValueError
     except ValueError:
         print("Costo inválido. Debe ser un número mayor que cero.")
-        conn.close()
         return
 
-    cursor.execute("""
-        INSERT INTO servicios (nombre, costo, suspendido)
-        VALUES (?, ?, 0)
-    """, (nombre, costo))
-    conn.commit()
+    api.alta_servicio(nombre, costo)
     print("Servicio registrado correctamente.")
-    conn.close()
-
 
-def baja_servicio():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT clave, nombre FROM servicios
-        WHERE suspendido = 0
-        ORDER BY nombre
-    """)
-    servicios = cursor.fetchall()
 
+def seleccionar_servicio_activo(mensaje_vacio, mensaje_clave):
+    # Muestra los servicios activos y devuelve la clave elegida, o None
+    servicios = api.servicios_activos()
     if not servicios:
-        print("No hay servicios activos para suspender.")
-        conn.close()
-        return
+        print(mensaje_vacio)
+        return None
 
     print("\nServicios activos:")
     for s in servicios:
-        print(f"Clave: {s[0]} | Nombre: {s[1]}")
+        print(f"Clave: {s.clave} | Nombre: {s.nombre}")
 
-    clave = input("\nIngrese la clave del servicio a suspender: ").strip()
-    if clave not in [str(s[0]) for s in servicios]:
+    clave = input(mensaje_clave).strip()
+    if not api.servicio_activo(clave):
         print("Clave inválida.")
-        conn.close()
+        return None
+    return clave
+
+
+def baja_servicio():
+    clave = seleccionar_servicio_activo("No hay servicios activos para suspender.",
+                                        "\nIngrese la clave del servicio a suspender: ")
+    if clave is None:
         return
 
     confirmar = input("¿Está seguro que desea suspender este servicio? (s/n): ").strip().lower()
     if confirmar == "s":
-        cursor.execute("UPDATE servicios SET suspendido = 1 WHERE clave = ?", (clave,))
-        conn.commit()
+        api.suspender_servicio(clave)
         print("Servicio suspendido correctamente.")
     else:
         print("Operación cancelada.")
 
-    conn.close()
-
 
 def editar_servicio():
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT clave, nombre FROM servicios
-        WHERE suspendido = 0
-        ORDER BY nombre
-    """)
-    servicios = cursor.fetchall()
-
-    if not servicios:
-        print("No hay servicios activos para editar.")
-        conn.close()
-        return
-
-    print("\nServicios activos:")
-    for s in servicios:
-        print(f"Clave: {s[0]} | Nombre: {s[1]}")
-
-    clave = input("\nIngrese la clave del servicio a editar: ").strip()
-    if clave not in [str(s[0]) for s in servicios]:
-        print("Clave inválida.")
-        conn.close()
+    clave = seleccionar_servicio_activo("No hay servicios activos para editar.",
+                                        "\nIngrese la clave del servicio a editar: ")
+    if clave is None:
         return
 
     confirmar = input("¿Desea editar este servicio? (s/n): ").strip().lower()
     if confirmar != "s":
         print("Edición cancelada.")
-        conn.close()
         return
 
     nombre = input("Nuevo nombre del servicio: ").strip()
     if not nombre:
         print("Nombre inválido.")
-        conn.close()
         return
 
     try:
         costo = float(input("Nuevo costo del servicio: ").strip())
-        if costo <= 0:
+        if not costo_valido(costo):
             raise ValueError
     except ValueError:
         print("Costo inválido.")
-        conn.close()
         return
 
-    cursor.execute("""
-        UPDATE servicios SET nombre = ?, costo = ?
-        WHERE clave = ?
-    """, (nombre, costo, clave))
-    conn.commit()
+    api.editar_servicio(clave, nombre, costo)
     print("Servicio actualizado correctamente.")
-    conn.close()
 
 def mainMenu():
     while True:
@@ -1063,7 +909,8 @@ def mainMenu():
         print("4. Recuperar una nota")
         print("5. Análisis estadísticos")
         print("6. Mantenimiento de datos")
-        print("7. Salir")
+        print("7. Buscar")
+        print("8. Salir")
 
         opcion = input("Seleccione una opción: ").strip()
 
@@ -1080,6 +927,8 @@ def mainMenu():
         elif opcion == "6":
             menu_mantenimiento_datos()
         elif opcion == "7":
+            buscar()
+        elif opcion == "8":
             confirmar = input("¿Está seguro que desea salir? (s/n): ").strip().lower()
             if confirmar == "s":
                 print("Saliendo del sistema.")
@@ -1089,4 +938,5 @@ def mainMenu():
 
 if __name__ == "__main__":
     crear_tablas()
-    mainMenu()
\ No newline at end of file
+    mainMenu()
+    cerrar_conexiones()
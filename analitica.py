@@ -0,0 +1,80 @@
+# Sesión de análisis: carga una sola vez las notas activas del período en un DataFrame
+# columnar y calcula todos los análisis del menú sobre ese mismo DataFrame.
+# Los datos salen de la base o, con instantanea=<directorio>, de la instantánea Parquet.
+import pandas as pd
+
+from api import TendenciaCentral, Dispersion, LUGARES_RANKING, ranking
+from conexion import obtener_conexion
+from fechas import rango_dias
+from instantanea import leer_periodo, leer_nombres
+
+TIPOS_DETALLE = {
+    "folio": "int32",
+    "cliente_clave": "category",
+    "servicio_clave": "category",
+    "costo": "float32",
+}
+
+
+class SesionAnalitica:
+    def __init__(self, fecha_inicio, fecha_fin, nombre_db=None, instantanea=None):
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self._totales = None
+
+        if instantanea is not None:
+            self.detalles = leer_periodo(instantanea, fecha_inicio, fecha_fin).astype(TIPOS_DETALLE)
+            self.nombres_servicio, self.nombres_cliente = leer_nombres(instantanea)
+            return
+
+        conn = obtener_conexion(nombre_db)
+        self.detalles = pd.read_sql_query("""
+            SELECT folio, cliente_clave, servicio_clave, costo
+            FROM todas_lineas
+            WHERE cancelada = 0 AND dia BETWEEN ? AND ?
+        """, conn, params=rango_dias(fecha_inicio, fecha_fin), dtype=TIPOS_DETALLE)
+
+        self.nombres_servicio = dict(conn.execute("SELECT clave, nombre FROM servicios").fetchall())
+        self.nombres_cliente = dict(conn.execute(
+            "SELECT clave, apellidos || ' ' || nombres FROM clientes").fetchall())
+
+    @property
+    def vacia(self):
+        return self.detalles.empty
+
+    @property
+    def totales(self):
+        # Total por nota; se acumula en float64 para no perder precisión con float32
+        if self._totales is None:
+            self._totales = self.detalles["costo"].astype("float64").groupby(self.detalles["folio"]).sum()
+        return self._totales
+
+    def tendencia_central(self):
+        totales = self.totales
+        frecuencias = totales.value_counts()
+        modas = sorted(frecuencias[frecuencias == frecuencias.max()].index)
+        return TendenciaCentral(int(totales.size), float(totales.mean()), float(totales.median()),
+                                [float(m) for m in modas])
+
+    def dispersion(self):
+        totales = self.totales
+        q1, q2, q3 = totales.quantile([0.25, 0.50, 0.75])
+        return Dispersion(int(totales.size), float(totales.var()), float(totales.std()),
+                          float(q1), float(q2), float(q3), float(q3 - q1))
+
+    def _ranking(self, columna, nombres, k, criterio, empates):
+        # (clave, cantidad, ingresos) por clave y la misma selección por montículo que api.ranking
+        costo = self.detalles["costo"].astype("float64")
+        grupos = costo.groupby(self.detalles[columna], observed=True)
+        veces, ingresos = grupos.size(), grupos.sum().round(2)
+        filas = ((int(clave), int(n), float(i)) for clave, n, i in zip(veces.index, veces, ingresos))
+        posiciones = ranking(filas, k, criterio, empates)
+        for posicion in posiciones:
+            posicion.nombre = nombres.get(posicion.clave, "")
+        return posiciones
+
+    def servicios_mas_prestados(self, k=LUGARES_RANKING, criterio="cantidad", empates=True):
+        return self._ranking("servicio_clave", self.nombres_servicio, k, criterio, empates)
+
+    def clientes_con_mas_servicios(self, k=LUGARES_RANKING, criterio="cantidad", empates=True):
+        return self._ranking("cliente_clave", self.nombres_cliente, k, criterio, empates)
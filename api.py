@@ -0,0 +1,659 @@
+# Capa de servicios del taller: funciones sin input()/print() que reciben parámetros
+# y devuelven resultados tipados. Los menús de Main.py y cualquier integración la usan.
+import heapq
+from dataclasses import dataclass, field
+from functools import partial, wraps
+from inspect import signature
+from itertools import islice
+from datetime import date, datetime
+from statistics import mean, median, multimode
+from typing import List, Optional, Sequence, Tuple
+
+from cache_reportes import CacheReportes
+from catalogo import Catalogo
+import paralelo
+from conexion import obtener_conexion
+from estadisticas import Frecuencias, Welford, Cuantiles, top_k
+from fechas import a_dia, rango_dias
+from resumen import tramos_periodo
+from validaciones import nombre_valido, telefono_valido, costo_valido
+
+# Cuartiles: exactos hasta este número de notas; por encima se usa un sketch con este error de rango
+LIMITE_CUANTILES_EXACTOS = 100_000
+ERROR_CUANTILES = 0.01
+# Filas por página en los listados
+TAMANO_PAGINA = 20
+# Rankings de servicios y clientes: lugares por omisión y criterios para ordenarlos
+LUGARES_RANKING = 3
+CRITERIOS_RANKING = ("cantidad", "ingresos")
+
+
+class ErrorTaller(Exception):
+    # Error de validación o de negocio; el mensaje está listo para mostrarse al usuario
+    pass
+
+
+@dataclass
+class Cliente:
+    clave: int
+    apellidos: str
+    nombres: str
+    telefono: str
+    suspendido: bool = False
+
+    @property
+    def nombre_completo(self):
+        return f"{self.apellidos} {self.nombres}"
+
+
+@dataclass
+class Servicio:
+    clave: int
+    nombre: str
+    costo: float
+    suspendido: bool = False
+
+
+@dataclass
+class LineaNota:
+    servicio_clave: int
+    observaciones: str
+    costo: float
+
+
+@dataclass
+class Nota:
+    folio: int
+    fecha: str
+    cliente_clave: int
+    cancelada: bool = False
+    lineas: List[LineaNota] = field(default_factory=list)
+
+    @property
+    def total(self):
+        return sum(linea.costo for linea in self.lineas)
+
+
+@dataclass
+class NotaPeriodo:
+    folio: int
+    fecha: str
+    cliente_clave: int
+    total: float
+
+
+@dataclass
+class TendenciaCentral:
+    conteo: int
+    media: float
+    mediana: float
+    modas: List[float]
+
+
+@dataclass
+class Dispersion:
+    conteo: int
+    varianza: float
+    desviacion: float
+    q1: float
+    q2: float
+    q3: float
+    iqr: float
+    exacto: bool = True
+
+
+@dataclass
+class Posicion:
+    clave: int
+    nombre: str
+    cantidad: int
+    ingresos: float = 0.0
+    lugar: int = 0   # los empatados comparten lugar
+
+
+@dataclass
+class Pagina:
+    elementos: list
+    siguiente: Optional[tuple] = None   # llave para pedir la página siguiente; None si es la última
+    aviso: Optional[str] = None         # nota para quien ve la página (p. ej. una búsqueda que no va por relevancia)
+
+
+def _conn():
+    return obtener_conexion()
+
+
+# Catálogos activos en memoria (ver catalogo.py); las altas, bajas y ediciones los invalidan
+CATALOGO_CLIENTES = Catalogo(
+    "clientes",
+    "SELECT clave, apellidos, nombres, telefono, suspendido FROM clientes WHERE clave = ? AND suspendido = 0",
+    "SELECT clave, apellidos, nombres, telefono, suspendido FROM clientes WHERE suspendido = 0 "
+    "ORDER BY apellidos, nombres",
+    Cliente)
+CATALOGO_SERVICIOS = Catalogo(
+    "servicios",
+    "SELECT clave, nombre, costo, suspendido FROM servicios WHERE clave = ? AND suspendido = 0",
+    "SELECT clave, nombre, costo, suspendido FROM servicios WHERE suspendido = 0 ORDER BY nombre",
+    Servicio)
+
+# Resultados de los reportes por período, persistidos entre sesiones (ver cache_reportes.py)
+CACHE_REPORTES = CacheReportes()
+
+
+# ---------------------------------------------------------------- clientes
+
+def listar_clientes() -> List[Cliente]:
+    cursor = _conn().execute("SELECT clave, apellidos, nombres, telefono, suspendido FROM clientes ORDER BY clave")
+    return [Cliente(*fila) for fila in cursor]
+
+
+def obtener_cliente(clave) -> Cliente:
+    fila = _conn().execute("SELECT clave, apellidos, nombres, telefono, suspendido FROM clientes WHERE clave = ?",
+                           (clave,)).fetchone()
+    if not fila:
+        raise ErrorTaller("Clave inválida.")
+    return Cliente(*fila)
+
+
+def cliente_activo(clave) -> Optional[Cliente]:
+    # El cliente activo con esa clave, o None
+    return CATALOGO_CLIENTES.obtener(_conn(), clave)
+
+
+def pagina_clientes(prefijo="", despues=None, limite=TAMANO_PAGINA) -> Pagina:
+    # Clientes activos ordenados por apellidos, una página a la vez (paginación por llave:
+    # cada página continúa después de la última fila de la anterior, sin OFFSET).
+    # prefijo filtra por el inicio de los apellidos sin distinguir mayúsculas.
+    condiciones = ["suspendido = 0"]
+    parametros = []
+    if prefijo:
+        condiciones.append("apellidos COLLATE NOCASE >= ? AND apellidos COLLATE NOCASE < ?")
+        parametros += [prefijo, prefijo + "\U0010FFFF"]
+    if despues is not None:
+        condiciones.append("(apellidos COLLATE NOCASE, nombres, clave) > (?, ?, ?)")
+        parametros += list(despues)
+
+    cursor = _conn().execute(f"""
+        SELECT clave, apellidos, nombres, telefono, suspendido FROM clientes
+        WHERE {" AND ".join(condiciones)}
+        ORDER BY apellidos COLLATE NOCASE, nombres, clave
+        LIMIT ?
+    """, (*parametros, limite + 1))
+    clientes = [Cliente(*fila) for fila in cursor]
+    return _pagina(clientes, limite, lambda c: (c.apellidos, c.nombres, c.clave))
+
+
+def _pagina(filas, limite, llave):
+    # Se pide una fila de más para saber si hay otra página sin hacer un COUNT(*)
+    if len(filas) <= limite:
+        return Pagina(filas)
+    filas = filas[:limite]
+    return Pagina(filas, llave(filas[-1]))
+
+
+def _validar_cliente(apellidos, nombres, telefono):
+    if not nombre_valido(apellidos):
+        raise ErrorTaller("Apellidos inválidos.")
+    if not nombre_valido(nombres):
+        raise ErrorTaller("Nombres inválidos.")
+    if not telefono_valido(telefono):
+        raise ErrorTaller("Número telefónico inválido.")
+
+
+def alta_cliente(apellidos, nombres, telefono) -> Cliente:
+    _validar_cliente(apellidos, nombres, telefono)
+    conn = _conn()
+    cursor = conn.execute("""
+        INSERT INTO clientes (apellidos, nombres, telefono, suspendido)
+        VALUES (?, ?, ?, 0)
+    """, (apellidos, nombres, telefono))
+    conn.commit()
+    CATALOGO_CLIENTES.invalidar()
+    return Cliente(cursor.lastrowid, apellidos, nombres, telefono)
+
+
+def suspender_cliente(clave):
+    conn = _conn()
+    cursor = conn.execute("UPDATE clientes SET suspendido = 1 WHERE clave = ? AND suspendido = 0", (clave,))
+    conn.commit()
+    CATALOGO_CLIENTES.invalidar()
+    if cursor.rowcount == 0:
+        raise ErrorTaller("Clave inválida.")
+
+
+def editar_cliente(clave, apellidos, nombres, telefono) -> Cliente:
+    _validar_cliente(apellidos, nombres, telefono)
+    conn = _conn()
+    cursor = conn.execute("""
+        UPDATE clientes SET apellidos = ?, nombres = ?, telefono = ?
+        WHERE clave = ?
+    """, (apellidos, nombres, telefono, clave))
+    conn.commit()
+    CATALOGO_CLIENTES.invalidar()
+    if cursor.rowcount == 0:
+        raise ErrorTaller("Clave inválida.")
+    return obtener_cliente(clave)
+
+
+# ---------------------------------------------------------------- servicios
+
+def servicios_activos() -> List[Servicio]:
+    return CATALOGO_SERVICIOS.activos(_conn())
+
+
+def listar_servicios() -> List[Servicio]:
+    cursor = _conn().execute("SELECT clave, nombre, costo, suspendido FROM servicios ORDER BY nombre")
+    return [Servicio(*fila) for fila in cursor]
+
+
+def servicio_activo(clave) -> Optional[Servicio]:
+    # El servicio activo con esa clave, o None
+    return CATALOGO_SERVICIOS.obtener(_conn(), clave)
+
+
+def _validar_servicio(nombre, costo):
+    if not nombre:
+        raise ErrorTaller("El nombre no puede estar vacío.")
+    if not costo_valido(costo):
+        raise ErrorTaller("Costo inválido. Debe ser un número mayor que cero.")
+
+
+def alta_servicio(nombre, costo) -> Servicio:
+    _validar_servicio(nombre, costo)
+    conn = _conn()
+    cursor = conn.execute("""
+        INSERT INTO servicios (nombre, costo, suspendido)
+        VALUES (?, ?, 0)
+    """, (nombre, costo))
+    conn.commit()
+    CATALOGO_SERVICIOS.invalidar()
+    return Servicio(cursor.lastrowid, nombre, costo)
+
+
+def suspender_servicio(clave):
+    conn = _conn()
+    cursor = conn.execute("UPDATE servicios SET suspendido = 1 WHERE clave = ? AND suspendido = 0", (clave,))
+    conn.commit()
+    CATALOGO_SERVICIOS.invalidar()
+    if cursor.rowcount == 0:
+        raise ErrorTaller("Clave inválida.")
+
+
+def editar_servicio(clave, nombre, costo) -> Servicio:
+    _validar_servicio(nombre, costo)
+    conn = _conn()
+    cursor = conn.execute("""
+        UPDATE servicios SET nombre = ?, costo = ?
+        WHERE clave = ?
+    """, (nombre, costo, clave))
+    conn.commit()
+    CATALOGO_SERVICIOS.invalidar()
+    if cursor.rowcount == 0:
+        raise ErrorTaller("Clave inválida.")
+    return Servicio(int(clave), nombre, costo)
+
+
+# ---------------------------------------------------------------- notas
+
+def _leer_fecha(fecha) -> date:
+    # date, datetime o texto YYYY-MM-DD
+    if isinstance(fecha, datetime):
+        return fecha.date()
+    if isinstance(fecha, date):
+        return fecha
+    try:
+        return datetime.strptime(fecha, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ErrorTaller(f"Fecha inválida: {fecha}") from None
+
+
+def validar_fecha(fecha=None) -> str:
+    # Acepta None (hoy), un date/datetime o texto YYYY-MM-DD; no se permiten fechas futuras
+    if fecha is None or fecha == "":
+        return date.today().isoformat()
+    fecha_obj = _leer_fecha(fecha)
+    if fecha_obj > date.today():
+        raise ErrorTaller("Fecha inválida: Fecha futura no permitida.")
+    return fecha_obj.isoformat()
+
+
+def validar_periodo(fecha_inicio=None, fecha_fin=None) -> Tuple[Optional[str], str]:
+    # (inicio, fin) de un reporte en YYYY-MM-DD. El fin puede ser futuro (el último día del mes en
+    # curso, por ejemplo) y se recorta a hoy: no hay notas después. Sin inicio se devuelve None,
+    # que quien llama toma como la fecha más antigua. No consulta la base.
+    hoy = date.today()
+    fin = min(_leer_fecha(fecha_fin), hoy) if fecha_fin else hoy
+    inicio = validar_fecha(fecha_inicio) if fecha_inicio else None
+    if inicio is not None and inicio > fin.isoformat():
+        raise ErrorTaller("La fecha final no puede ser anterior a la inicial.")
+    return inicio, fin.isoformat()
+
+
+def crear_nota(cliente_clave, fecha, lineas: Sequence[Tuple[int, str]]) -> Nota:
+    # lineas: [(servicio_clave, observaciones)]; el costo se toma del catálogo de servicios
+    conn = _conn()
+    fecha, cliente_clave, detalle = preparar_nota(conn, cliente_clave, fecha, lineas)
+    folio = guardar_nota(conn, fecha, cliente_clave, detalle)
+    return Nota(folio, fecha, cliente_clave, False, detalle)
+
+
+def preparar_nota(conn, cliente_clave, fecha, lineas: Sequence[Tuple[int, str]]):
+    # Valida la nota contra los catálogos: (fecha, cliente_clave, [LineaNota]) listos para insertar_nota
+    fecha = validar_fecha(fecha)
+
+    cliente = CATALOGO_CLIENTES.obtener(conn, cliente_clave)
+    if cliente is None:
+        raise ErrorTaller("Cliente inválido.")
+    if not lineas:
+        raise ErrorTaller("La nota debe tener al menos un servicio.")
+
+    detalle = []
+    for servicio_clave, observaciones in lineas:
+        servicio = CATALOGO_SERVICIOS.obtener(conn, servicio_clave)
+        if servicio is None:
+            raise ErrorTaller("Servicio inválido.")
+        detalle.append(LineaNota(servicio.clave, observaciones or "", float(servicio.costo)))
+    return fecha, cliente.clave, detalle
+
+
+def insertar_nota(cursor, fecha, cliente_clave, lineas: Sequence[LineaNota]) -> int:
+    # Dentro de una transacción ya abierta; devuelve el folio
+    cursor.execute("INSERT INTO notas (dia, cliente_clave, cancelada) VALUES (?, ?, 0)",
+                   (a_dia(fecha), cliente_clave))
+    folio = cursor.lastrowid
+    cursor.executemany("INSERT INTO detalles_nota (folio, servicio_clave, observaciones, costo) VALUES (?, ?, ?, ?)",
+                       [(folio, l.servicio_clave, l.observaciones, l.costo) for l in lineas])
+    return folio
+
+
+def guardar_nota(conn, fecha, cliente_clave, lineas: Sequence[LineaNota]) -> int:
+    # El folio lo asigna AUTOINCREMENT dentro de una transacción BEGIN IMMEDIATE,
+    # así dos terminales nunca obtienen el mismo folio.
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        folio = insertar_nota(cursor, fecha, cliente_clave, lineas)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return folio
+
+
+def obtener_nota(folio, cancelada=False) -> Optional[Nota]:
+    # Devuelve la nota activa (o cancelada, según el parámetro) con sus líneas, o None
+    conn = _conn()
+    fila = conn.execute("SELECT folio, fecha, cliente_clave, cancelada FROM todas_notas WHERE folio = ? AND cancelada = ?",
+                        (folio, int(cancelada))).fetchone()
+    if not fila:
+        return None
+    lineas = [LineaNota(*l) for l in conn.execute("""
+        SELECT servicio_clave, observaciones, costo
+        FROM todos_detalles
+        WHERE folio = ?
+        ORDER BY id
+    """, (folio,))]
+    return Nota(fila[0], fila[1], fila[2], bool(fila[3]), lineas)
+
+
+def actualizar_estado(cursor, folio, cancelada) -> bool:
+    # False si la nota no está en la base con el estado contrario (ver _cambiar_estado)
+    cursor.execute("UPDATE notas SET cancelada = ? WHERE folio = ? AND cancelada = ?",
+                   (int(cancelada), folio, int(not cancelada)))
+    return cursor.rowcount > 0
+
+
+def _cambiar_estado(folio, cancelada, mensaje):
+    conn = _conn()
+    cambiada = actualizar_estado(conn.cursor(), folio, cancelada)
+    conn.commit()
+    if not cambiada:
+        archivada = conn.execute("SELECT fecha FROM todas_notas WHERE folio = ? AND cancelada = ?",
+                                 (folio, int(not cancelada))).fetchone()
+        if archivada:
+            # Una nota depurada regresa a la base para cambiarla (ver depuracion.py); las de los
+            # años archivados (ver particiones.py) solo se leen
+            import depuracion   # aquí y no arriba: depuracion usa este módulo
+            if depuracion.restaurar_nota(folio):
+                return _cambiar_estado(folio, cancelada, mensaje)
+            raise ErrorTaller(f"La nota es del año archivado {archivada[0][:4]}; desarchívelo para modificarla.")
+        raise ErrorTaller(mensaje)
+
+
+def cancelar(folio):
+    _cambiar_estado(folio, True, "La nota no existe o ya está cancelada.")
+
+
+def recuperar(folio):
+    _cambiar_estado(folio, False, "El folio ingresado no corresponde a una nota cancelada.")
+
+
+def pagina_notas(cancelada=False, despues=None, limite=TAMANO_PAGINA) -> Pagina:
+    # Notas (folio, fecha, cliente_clave) ordenadas por fecha y folio, una página a la vez.
+    # El índice idx_notas_cancelada_dia cubre el orden en la base y en cada archivo adjunto. Sobre
+    # la vista todas_notas SQLite ordena la unión completa, así que se lee una página de cada
+    # esquema por separado y se mezclan. Las canceladas solo se listan de la base: las depuradas
+    # se recuperan con su folio.
+    conn = _conn()
+    condicion = "AND (dia, folio) > (?, ?)" if despues is not None else ""
+    llave = (a_dia(despues[0]), despues[1]) if despues is not None else ()
+    esquemas = ["main"] if cancelada else [fila[1] for fila in conn.execute("PRAGMA database_list")
+                                          if fila[1] != "temp"]
+    partes = [conn.execute(f"""
+        SELECT dia, folio, fecha, cliente_clave
+        FROM {esquema}.notas
+        WHERE cancelada = ? {condicion}
+        ORDER BY dia, folio
+        LIMIT ?
+    """, (int(cancelada), *llave, limite + 1)).fetchall() for esquema in esquemas]
+    filas = [fila[1:] for fila in islice(heapq.merge(*partes), limite + 1)]
+    return _pagina(filas, limite, lambda n: (n[1], n[0]))
+
+
+# ---------------------------------------------------------------- reportes
+
+def fecha_mas_antigua(conn=None) -> Optional[str]:
+    # El resumen diario incluye los años archivados y es mucho más chico que notas
+    return (conn or _conn()).execute("SELECT MIN(fecha) FROM resumen_diario WHERE notas > 0").fetchone()[0]
+
+
+def _en_cache(tipo, poner_nombres=None):
+    # Los reportes se guardan en CACHE_REPORTES con el nombre de la función (y sus opciones,
+    # si las hay) como llave. Los nombres de servicios y clientes se pueden editar sin tocar
+    # las notas, así que en las posiciones se vuelven a leer (con poner_nombres) al devolverlas.
+    # La función sin caché queda en reporte.__wrapped__.
+    def decorar(calcular):
+        firma = signature(calcular)
+
+        @wraps(calcular)
+        def reporte(fecha_inicio, fecha_fin, **opciones):
+            # Las opciones omitidas entran a la llave con su valor por omisión
+            argumentos = firma.bind(fecha_inicio, fecha_fin, **opciones)
+            argumentos.apply_defaults()
+            opciones = dict(list(argumentos.arguments.items())[2:])
+            llave = calcular.__name__ + "".join(f";{k}={v}" for k, v in opciones.items())
+            valor = CACHE_REPORTES.obtener(llave, tipo, partial(calcular, **opciones), fecha_inicio, fecha_fin)
+            if poner_nombres:
+                poner_nombres(_conn(), valor)
+            return valor
+        return reporte
+    return decorar
+
+
+def _poner_nombres(conn, posiciones, consulta_nombres):
+    # consulta_nombres recibe la lista de claves en el lugar de "{}"
+    if not posiciones:
+        return posiciones
+    nombres = dict(conn.execute(consulta_nombres.format(", ".join("?" * len(posiciones))),
+                                   [p.clave for p in posiciones]))
+    for posicion in posiciones:
+        posicion.nombre = nombres.get(posicion.clave, posicion.nombre)
+    return posiciones
+
+
+def notas_periodo(conn, fecha_inicio, fecha_fin) -> List[NotaPeriodo]:
+    cursor = conn.execute("""
+        SELECT folio, fecha, cliente_clave, total
+        FROM totales_nota
+        WHERE cancelada = 0 AND dia BETWEEN ? AND ?
+        ORDER BY dia, folio;
+    """, rango_dias(fecha_inicio, fecha_fin))
+    return [NotaPeriodo(*fila) for fila in cursor]
+
+
+@_en_cache(NotaPeriodo)
+def reporte_periodo(fecha_inicio, fecha_fin) -> List[NotaPeriodo]:
+    # Los tramos (ver paralelo.py) van en orden de fecha: basta con encadenarlos
+    partes = paralelo.ejecutar(notas_periodo, paralelo.tramos(fecha_inicio, fecha_fin))
+    return [nota for parte in partes for nota in parte]
+
+
+def totales_por_nota(conn, fecha_inicio, fecha_fin):
+    # Cursor con el total de cada nota activa del rango, en una columna
+    return conn.execute("""
+        SELECT SUM(costo) as total
+        FROM todas_lineas
+        WHERE cancelada = 0 AND dia BETWEEN ? AND ?
+        GROUP BY folio
+    """, rango_dias(fecha_inicio, fecha_fin))
+
+
+def frecuencias_totales(conn, fecha_inicio, fecha_fin) -> Frecuencias:
+    # Cuántas notas hay de cada total; SQLite agrupa y solo regresan los totales distintos
+    return Frecuencias(conn.execute("""
+        SELECT total, COUNT(*)
+        FROM (SELECT SUM(costo) AS total
+              FROM todas_lineas
+              WHERE cancelada = 0 AND dia BETWEEN ? AND ?
+              GROUP BY folio)
+        GROUP BY total
+    """, rango_dias(fecha_inicio, fecha_fin)))
+
+
+def _frecuencias_en_tramos(fecha_inicio, fecha_fin):
+    # Frecuencias del período repartido en tramos, o None si conviene una sola pasada
+    tramos = paralelo.tramos(fecha_inicio, fecha_fin)
+    if len(tramos) == 1:
+        return None
+    frecuencias = Frecuencias()
+    for parte in paralelo.ejecutar(frecuencias_totales, tramos):
+        frecuencias.combinar(parte)
+    return frecuencias
+
+
+@_en_cache(TendenciaCentral)
+def tendencia_central(fecha_inicio, fecha_fin) -> Optional[TendenciaCentral]:
+    frecuencias = _frecuencias_en_tramos(fecha_inicio, fecha_fin)
+    if frecuencias is not None:
+        if not frecuencias.conteo:
+            return None
+        return TendenciaCentral(frecuencias.conteo, frecuencias.media, frecuencias.mediana, frecuencias.modas)
+
+    resultados = [fila[0] for fila in totales_por_nota(_conn(), fecha_inicio, fecha_fin)]
+    if not resultados:
+        return None
+    return TendenciaCentral(len(resultados), mean(resultados), median(resultados), multimode(resultados))
+
+
+@_en_cache(Dispersion)
+def dispersion(fecha_inicio, fecha_fin) -> Optional[Dispersion]:
+    frecuencias = _frecuencias_en_tramos(fecha_inicio, fecha_fin)
+    if frecuencias is not None:
+        # Repartido en tramos, las frecuencias dan también los cuartiles exactos
+        if frecuencias.conteo < 2:
+            return None
+        q1, q2, q3 = (frecuencias.cuantil(q) for q in (0.25, 0.50, 0.75))
+        return Dispersion(frecuencias.conteo, frecuencias.varianza, frecuencias.desviacion, q1, q2, q3, q3 - q1)
+
+    # Una sola pasada por el cursor, sin cargar los totales en memoria
+    momentos = Welford()
+    cuartiles = Cuantiles(ERROR_CUANTILES, LIMITE_CUANTILES_EXACTOS)
+    for (total,) in totales_por_nota(_conn(), fecha_inicio, fecha_fin):
+        momentos.agregar(total)
+        cuartiles.agregar(total)
+
+    if momentos.conteo < 2:
+        return None
+    q1 = cuartiles.cuantil(0.25)
+    q2 = cuartiles.cuantil(0.50)
+    q3 = cuartiles.cuantil(0.75)
+    return Dispersion(momentos.conteo, momentos.varianza, momentos.desviacion, q1, q2, q3, q3 - q1,
+                      cuartiles.exacto)
+
+
+_NOMBRES_SERVICIO = "SELECT clave, nombre FROM servicios WHERE clave IN ({})"
+_NOMBRES_CLIENTE = "SELECT clave, apellidos || ' ' || nombres FROM clientes WHERE clave IN ({})"
+
+
+def poner_nombres_servicios(conn, posiciones):
+    return _poner_nombres(conn, posiciones, _NOMBRES_SERVICIO)
+
+
+def poner_nombres_clientes(conn, posiciones):
+    return _poner_nombres(conn, posiciones, _NOMBRES_CLIENTE)
+
+
+def ranking(filas, k=LUGARES_RANKING, criterio="cantidad", empates=True) -> List[Posicion]:
+    # filas: (clave, cantidad, ingresos) ya agregadas por clave. Se eligen las k mejores con un
+    # montículo (ver estadisticas.top_k), sin ordenar todas; los nombres se ponen después.
+    try:
+        k = int(k)
+    except (TypeError, ValueError):
+        raise ErrorTaller("El número de lugares debe ser un entero.") from None
+    if k < 1:
+        raise ErrorTaller("El número de lugares debe ser al menos 1.")
+    if criterio not in CRITERIOS_RANKING:
+        raise ErrorTaller(f"Criterio inválido; use {' o '.join(CRITERIOS_RANKING)}.")
+
+    indice = 1 if criterio == "cantidad" else 2
+    return [Posicion(clave, "", cantidad, ingresos, lugar)
+            for lugar, (clave, cantidad, ingresos) in top_k(filas, k, lambda fila: fila[indice], empates)]
+
+
+def _agregado_por_clave(conn, tabla_diaria, tabla_periodo, llave, cantidad, fecha_inicio, fecha_fin):
+    # (clave, cantidad, ingresos) del rango: los días sueltos de las orillas salen del resumen
+    # diario y los meses y años completos de los acumulados (ver resumen.tramos_periodo).
+    # El GROUP BY no ordena por cantidad; de eso se encarga el montículo de ranking().
+    dias, periodos = tramos_periodo(conn, fecha_inicio, fecha_fin)
+    partes, parametros = [], []
+    for inicio, fin in dias:
+        partes.append(f"SELECT {llave} AS clave, {cantidad} AS cantidad, ingresos FROM {tabla_diaria} "
+                      "WHERE fecha BETWEEN ? AND ?")
+        parametros += [inicio, fin]
+    if periodos:
+        partes.append(f"SELECT {llave} AS clave, {cantidad} AS cantidad, ingresos FROM {tabla_periodo} "
+                      f"WHERE periodo IN ({', '.join('?' * len(periodos))})")
+        parametros += periodos
+    if not partes:
+        return []
+    return conn.execute(f"""
+        SELECT clave, SUM(cantidad) AS total, ROUND(SUM(ingresos), 2)
+        FROM ({" UNION ALL ".join(partes)})
+        GROUP BY clave
+        HAVING total > 0
+    """, parametros)
+
+
+def agregado_servicios(conn, fecha_inicio, fecha_fin):
+    # (servicio_clave, veces, ingresos) del rango
+    return _agregado_por_clave(conn, "resumen_diario_servicio", "resumen_periodo_servicio", "servicio_clave",
+                               "veces", fecha_inicio, fecha_fin)
+
+
+def agregado_clientes(conn, fecha_inicio, fecha_fin):
+    # (cliente_clave, servicios, ingresos) del rango
+    return _agregado_por_clave(conn, "resumen_diario_cliente", "resumen_periodo_cliente", "cliente_clave",
+                               "servicios", fecha_inicio, fecha_fin)
+
+
+@_en_cache(Posicion, poner_nombres_servicios)
+def servicios_mas_prestados(fecha_inicio, fecha_fin, k=LUGARES_RANKING, criterio="cantidad",
+                            empates=True) -> List[Posicion]:
+    filas = agregado_servicios(_conn(), fecha_inicio, fecha_fin)
+    return poner_nombres_servicios(_conn(), ranking(filas, k, criterio, empates))
+
+
+@_en_cache(Posicion, poner_nombres_clientes)
+def clientes_con_mas_servicios(fecha_inicio, fecha_fin, k=LUGARES_RANKING, criterio="cantidad",
+                               empates=True) -> List[Posicion]:
+    filas = agregado_clientes(_conn(), fecha_inicio, fecha_fin)
+    return poner_nombres_clientes(_conn(), ranking(filas, k, criterio, empates))
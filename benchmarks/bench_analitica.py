@@ -0,0 +1,61 @@
+# Compara los cinco análisis por separado (una consulta cada uno) contra SesionAnalitica
+# Uso: python -m benchmarks.bench_analitica [lineas ...]
+import sys
+import time
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import conexion
+from analitica import SesionAnalitica
+
+# Respuestas para cada función: fechas y lugares por omisión y no exportar
+FUNCIONES = (
+    (Main.consulta_por_periodo, ["", "", "n"]),
+    (Main.estadistica_tendencia_central, ["", ""]),
+    (Main.estadistica_dispersion, ["", ""]),
+    (Main.servicio_mas_prestado, ["", "", "", ""]),
+    (Main.cliente_con_mas_servicios, ["", "", "", ""]),
+)
+
+
+def ruta_por_funcion():
+    for funcion, respuestas in FUNCIONES:
+        with entradas_simuladas(respuestas):
+            funcion()
+
+
+def ruta_sesion(fecha_inicio, fecha_fin):
+    sesion = SesionAnalitica(fecha_inicio, fecha_fin)
+    sesion.tendencia_central()
+    sesion.dispersion()
+    sesion.servicios_mas_prestados()
+    sesion.clientes_con_mas_servicios()
+
+
+def ejecutar(lineas):
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        generar_datos(Main.conectar_db(), clientes=2000, notas=int(lineas / 2.5), dias=730)
+        fecha_inicio = Main.conectar_db().execute("SELECT MIN(fecha) FROM notas").fetchone()[0]
+        fecha_fin = time.strftime("%Y-%m-%d")
+
+        inicio = time.perf_counter()
+        ruta_por_funcion()
+        por_funcion = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        ruta_sesion(fecha_inicio, fecha_fin)
+        sesion = time.perf_counter() - inicio
+        conexion.cerrar_conexiones()
+    return por_funcion, sesion
+
+
+if __name__ == "__main__":
+    tamanos = [int(n) for n in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'Líneas':>10} {'5 funciones (s)':>16} {'sesión (s)':>12} {'aceleración':>12}")
+    for lineas in tamanos:
+        por_funcion, sesion = ejecutar(lineas)
+        print(f"{lineas:>10} {por_funcion:>16.3f} {sesion:>12.3f} {por_funcion / sesion:>11.1f}x")
@@ -0,0 +1,84 @@
+# Arranque del menú en frío (python Main.py, un proceso nuevo cada vez) y en caliente (python
+# residente.py con un residente ya iniciado), sobre un taller sintético de 10k líneas: abrir el
+# menú y salir, y abrir el menú, sacar el reporte de todo el historial y salir. Además, lo que
+# tarda importar Main y pandas (que ya no se carga al abrir el menú) y la revisión del esquema
+# en una base al día. Antes de medir se compilan los .pyc para no contar la compilación.
+# Uso: python -m benchmarks.bench_arranque [repeticiones]
+import compileall
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.utilidades import RAIZ, directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_taller
+
+import Main
+import conexion
+import esquema
+import residente
+
+SESIONES = {
+    "abrir y salir": "8\ns\n",
+    "reporte del historial": "2\n1\n\n\nn\n5\n8\ns\n",   # sin exportar
+}
+
+
+def _correr(argumentos, entrada):
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, *argumentos], input=entrada.encode(), stdout=subprocess.DEVNULL, check=True,
+                   env={**os.environ, "PYTHONPATH": RAIZ})
+    return (time.perf_counter() - inicio) * 1000
+
+
+def medir_proceso(argumentos, entrada, repeticiones):
+    _correr(argumentos, entrada)   # la primera vez no se cuenta (caché de disco)
+    return resumen_latencias([_correr(argumentos, entrada) for _ in range(repeticiones)])
+
+
+def iniciar_residente():
+    proceso = subprocess.Popen([sys.executable, os.path.join(RAIZ, "residente.py"), "iniciar"],
+                               stdout=subprocess.DEVNULL)
+    inicio = time.perf_counter()
+    while not os.path.exists(residente.ruta_residente()):
+        if proceso.poll() is not None:
+            raise RuntimeError("El residente terminó al iniciar.")
+        time.sleep(0.01)
+    return proceso, (time.perf_counter() - inicio) * 1000
+
+
+def ejecutar(repeticiones):
+    compileall.compile_dir(RAIZ, quiet=1)
+    resultados = {}
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        escala = generar_taller(Main.conectar_db(), 10_000)
+        conn = conexion.obtener_conexion()
+        resultados["revisar esquema"] = resumen_latencias(medir(lambda: esquema.crear_tablas(conn), repeticiones * 100))
+        conexion.cerrar_conexiones()
+
+        resultados["importar Main"] = medir_proceso(["-c", "import Main"], "", repeticiones)
+        resultados["importar pandas"] = medir_proceso(["-c", "import pandas"], "", repeticiones)
+        resultados["Python vacío"] = medir_proceso(["-c", "pass"], "", repeticiones)
+        for nombre, entrada in SESIONES.items():
+            resultados[f"frío, {nombre}"] = medir_proceso([os.path.join(RAIZ, "Main.py")], entrada, repeticiones)
+
+        proceso, iniciar = iniciar_residente()
+        try:
+            for nombre, entrada in SESIONES.items():
+                resultados[f"caliente, {nombre}"] = medir_proceso([os.path.join(RAIZ, "residente.py")], entrada,
+                                                                  repeticiones)
+        finally:
+            subprocess.run([sys.executable, os.path.join(RAIZ, "residente.py"), "detener"],
+                           stdout=subprocess.DEVNULL)
+            proceso.wait()
+    return escala, iniciar, resultados
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    escala, iniciar, resultados = ejecutar(repeticiones)
+    print(f"{escala['notas']} notas, {escala['lineas']} líneas; iniciar el residente: {iniciar:.0f} ms")
+    for nombre, r in resultados.items():
+        print(f"  {nombre:<32} p50 {r['p50_ms']:8.2f} ms | p99 {r['p99_ms']:8.2f} ms")
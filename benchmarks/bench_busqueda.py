@@ -0,0 +1,105 @@
+# Búsqueda de texto (busqueda.py) sobre un taller sintético de 1M líneas con observaciones en el
+# 30%: palabras raras, comunes y muy comunes (con más de busqueda.MAX_RELEVANCIA coincidencias, sin
+# bm25), varias palabras, prefijos cortos y largos, páginas avanzadas, clientes y servicios. Se comprueba que el índice encuentre las mismas líneas
+# que un recorrido completo, y se mide lo que los triggers de búsqueda agregan al registrar una nota.
+# Termina con error si alguna búsqueda pasa de LIMITE_MS en la mediana, salvo los prefijos de más de
+# 4 letras, que no tienen índice propio (ver busqueda.py).
+# Uso: python -m benchmarks.bench_busqueda [lineas] [repeticiones]
+import re
+import sys
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_taller
+
+import Main
+import api
+import busqueda
+
+BUSQUEDAS = [
+    ("notas", "placa (rara)", None),
+    ("notas", "sobrecalentamiento", None),
+    ("notas", "balatas traseros", None),
+    ("notas", "frenos", None),
+    ("notas", "revisar", None),
+    ("notas", "revisar", (100,)),
+    # La página que cruza el final de las candidatas a bm25 y una de las más antiguas
+    ("notas", "sobrecalentamiento", (busqueda.CANDIDATAS - 10,)),
+    ("notas", "sobrecalentamiento", (busqueda.CANDIDATAS + 100,)),
+    ("notas", "gar*", None),
+    ("notas", "sobrecal*", None),
+    ("notas", "revis*", None),
+    ("clientes", "garcia lopez", None),
+    ("clientes", "55*", None),
+    ("servicios", "cambio ace*", None),
+]
+LIMITE_MS = 10
+LINEAS_NOTA = [(1, "revisar ruido en frenos delanteros"), (2, "cliente trae refacción"), (3, "")]
+
+
+def coincidencias_recorrido(conn, palabra):
+    # Líneas con la palabra exacta, sin el índice (las observaciones sintéticas no llevan acentos
+    # en las palabras que se revisan aquí)
+    patron = re.compile(rf"\b{palabra}\b", re.IGNORECASE)
+    return {i for i, texto in conn.execute("SELECT id, observaciones FROM todos_detalles WHERE observaciones <> ''")
+            if patron.search(texto)}
+
+
+def ejecutar(lineas, repeticiones):
+    resultados = []
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        conn = Main.conectar_db()
+        escala = generar_taller(conn, lineas, fraccion_observaciones=0.3)
+        conn.execute("INSERT INTO busqueda_observaciones (busqueda_observaciones) VALUES ('optimize')")
+        conn.commit()
+        escala["con_observaciones"] = conn.execute(
+            "SELECT COUNT(*) FROM detalles_nota WHERE observaciones <> ''").fetchone()[0]
+        placa = conn.execute("SELECT observaciones FROM detalles_nota WHERE observaciones LIKE '%placa%' "
+                             "LIMIT 1").fetchone()[0].split()[-1]
+
+        for donde, texto, despues in BUSQUEDAS:
+            texto = placa if texto.startswith("placa") else texto
+            buscar = busqueda.BUSQUEDAS[donde]
+            tabla = {"notas": "busqueda_observaciones"}.get(donde, f"busqueda_{donde}")
+            total = conn.execute(f"SELECT COUNT(*) FROM {tabla} WHERE {tabla} MATCH ?",
+                                 (busqueda.consulta_fts(texto),)).fetchone()[0]
+            tiempos = medir(lambda: buscar(texto, despues), repeticiones)
+            resultados.append((donde, texto, despues, total, len(buscar(texto, despues).elementos),
+                               resumen_latencias(tiempos)))
+
+        # Con una palabra completa (sin prefijo) el índice debe dar lo mismo que revisar cada línea
+        consulta = '"sobrecalentamiento"'
+        indice = {fila[0] for fila in conn.execute(
+            "SELECT rowid FROM busqueda_observaciones WHERE busqueda_observaciones MATCH ?", (consulta,))}
+        igual = indice == coincidencias_recorrido(conn, "sobrecalentamiento")
+
+        registrar = resumen_latencias(medir(lambda: api.crear_nota(1, None, LINEAS_NOTA), repeticiones * 5))
+        triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                                "AND name LIKE 'trg_busqueda_detalle_%'").fetchall()
+        for nombre, _ in triggers:
+            conn.execute(f"DROP TRIGGER {nombre}")
+        sin_triggers = resumen_latencias(medir(lambda: api.crear_nota(1, None, LINEAS_NOTA), repeticiones * 5))
+        for _, sql in triggers:
+            conn.execute(sql)
+        conn.commit()
+    return escala, resultados, igual, registrar, sin_triggers
+
+
+if __name__ == "__main__":
+    lineas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    escala, resultados, igual, registrar, sin_triggers = ejecutar(lineas, repeticiones)
+    print(f"{escala['notas']} notas, {escala['lineas']} líneas ({escala['con_observaciones']} con observaciones), "
+          f"{escala['clientes']} clientes, {escala['servicios']} servicios")
+    for donde, texto, despues, total, en_pagina, r in resultados:
+        pagina = f" desde {despues[0]}" if despues else ""
+        print(f"  {donde:<9} {texto!r:<22}{pagina:<10} {total:7d} coincidencias, {en_pagina:2d} en la página | "
+              f"p50 {r['p50_ms']:6.2f} ms | p99 {r['p99_ms']:6.2f} ms")
+    print(f"  Índice igual a un recorrido completo: {'sí' if igual else 'NO'}")
+    print(f"  Registrar una nota con observaciones: p50 {registrar['p50_ms']:.2f} ms con los triggers de búsqueda, "
+          f"{sin_triggers['p50_ms']:.2f} ms sin ellos")
+    lentas = [(donde, texto) for donde, texto, _, _, _, r in resultados
+              if r["p50_ms"] > LIMITE_MS and not re.search(r"[^\W_]{5,}\*", texto)]
+    print(f"{len(lentas)} búsquedas con p50 de más de {LIMITE_MS} ms")
+    sys.exit(1 if lentas or not igual else 0)
@@ -0,0 +1,64 @@
+# Latencia de los cinco reportes por período sin caché, con la caché vacía (se calcula y se
+# guarda) y con la caché llena; después registra una nota en el último mes y repite la consulta
+# de cada rango para comprobar que solo se recalculan los rangos que la contienen.
+# Uso: python -m benchmarks.bench_cache_reportes [notas] [repeticiones]
+import calendar
+import sys
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import api
+import conexion
+
+REPORTES = (api.reporte_periodo, api.tendencia_central, api.dispersion,
+            api.servicios_mas_prestados, api.clientes_con_mas_servicios)
+
+
+def rangos(conn):
+    # Un rango por mes y uno con todo el historial
+    meses = [fila[0] for fila in conn.execute("SELECT DISTINCT substr(fecha, 1, 7) FROM notas ORDER BY 1")]
+    return ([(f"{mes}-01", f"{mes}-{calendar.monthrange(int(mes[:4]), int(mes[5:]))[1]}") for mes in meses]
+            + [("0000-01-01", "9999-12-31")])
+
+
+def consultar(periodos, sin_cache=False):
+    for periodo in periodos:
+        for reporte in REPORTES:
+            (reporte.__wrapped__ if sin_cache else reporte)(*periodo)
+
+
+def ejecutar(notas, repeticiones):
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        conn = Main.conectar_db()
+        generar_datos(conn, clientes=500, servicios=50, notas=notas)
+        periodos = rangos(conn)
+        cache = api.CACHE_REPORTES
+
+        sin_cache = medir(lambda: consultar(periodos, sin_cache=True), repeticiones)
+        vacia = medir(lambda: (cache.vaciar(), consultar(periodos)), repeticiones)
+        llena = medir(lambda: consultar(periodos), repeticiones)
+
+        ultimo = periodos[-2][0]
+        api.crear_nota(1, ultimo, [(1, "")])
+        fallos = cache.fallos
+        consultar(periodos)
+        recalculados = (cache.fallos - fallos) // len(REPORTES)
+        estadisticas = cache.estadisticas()
+        conexion.cerrar_conexiones()
+    return periodos, sin_cache, vacia, llena, recalculados, estadisticas
+
+
+if __name__ == "__main__":
+    notas = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    periodos, sin_cache, vacia, llena, recalculados, estadisticas = ejecutar(notas, repeticiones)
+    print(f"{notas} notas, {len(periodos)} rangos x {len(REPORTES)} reportes por recorrido")
+    for nombre, tiempos in (("Sin caché", sin_cache), ("Caché vacía", vacia), ("Caché llena", llena)):
+        r = resumen_latencias(tiempos)
+        print(f"  {nombre:<12} media {r['media_ms']:.1f} ms | p50 {r['p50_ms']:.1f} ms | p99 {r['p99_ms']:.1f} ms")
+    print(f"  Nota nueva en {periodos[-2][0][:7]}: se recalcularon {recalculados} de {len(periodos)} rangos")
+    print(f"  Caché: {estadisticas['entradas']} reportes, {estadisticas['bytes'] / 1024:.1f} KiB")
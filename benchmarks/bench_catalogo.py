@@ -0,0 +1,73 @@
+# Costo de validar cliente y servicios al registrar una nota: consulta de los catálogos completos
+# y búsqueda lineal (como lo hacía registrar_nota) contra la caché de catálogos de api.py.
+# Uso: python -m benchmarks.bench_catalogo [clientes] [servicios] [notas]
+import random
+import sys
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import api
+import conexion
+
+LINEAS_POR_NOTA = 3
+
+
+def validar_anterior(conn, cliente_clave, servicios_clave):
+    # Cada nota volvía a leer los catálogos y buscaba cada clave en una lista
+    clientes = conn.execute("SELECT clave, apellidos, nombres FROM clientes WHERE suspendido = 0 "
+                            "ORDER BY apellidos, nombres").fetchall()
+    if cliente_clave not in [str(c[0]) for c in clientes]:
+        raise ValueError
+    servicios = conn.execute("SELECT clave, nombre, costo FROM servicios WHERE suspendido = 0").fetchall()
+    total = 0
+    for servicio_clave in servicios_clave:
+        if servicio_clave not in [str(s[0]) for s in servicios]:
+            raise ValueError
+        total += next(float(s[2]) for s in servicios if str(s[0]) == servicio_clave)
+    return total
+
+
+def validar_cache(cliente_clave, servicios_clave):
+    if api.cliente_activo(cliente_clave) is None:
+        raise ValueError
+    api.servicios_activos()
+    total = 0
+    for servicio_clave in servicios_clave:
+        servicio = api.servicio_activo(servicio_clave)
+        if servicio is None:
+            raise ValueError
+        total += servicio.costo
+    return total
+
+
+def ejecutar(clientes, servicios, notas):
+    azar = random.Random(1)
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        conn = Main.conectar_db()
+        generar_datos(conn, clientes=clientes, servicios=servicios, notas=0)
+        entradas = [(str(azar.randint(1, clientes)), [str(azar.randint(1, servicios)) for _ in range(LINEAS_POR_NOTA)])
+                    for _ in range(notas)]
+
+        iterador = iter(entradas * 2)
+        anterior = medir(lambda: validar_anterior(conn, *next(iterador)), notas)
+        iterador = iter(entradas * 2)
+        cache = medir(lambda: validar_cache(*next(iterador)), notas)
+        conexion.cerrar_conexiones()
+    return anterior, cache
+
+
+if __name__ == "__main__":
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    servicios = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    notas = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    anterior, cache = ejecutar(clientes, servicios, notas)
+    print(f"{clientes} clientes, {servicios} servicios, {notas} notas de {LINEAS_POR_NOTA} líneas")
+    for nombre, tiempos in (("Consulta + búsqueda lineal", anterior), ("Caché de catálogos", cache)):
+        r = resumen_latencias(tiempos)
+        print(f"  {nombre:<28} media {r['media_ms']:.3f} ms | p50 {r['p50_ms']:.3f} ms | p99 {r['p99_ms']:.3f} ms")
+    for nombre, catalogo in (("clientes", api.CATALOGO_CLIENTES), ("servicios", api.CATALOGO_SERVICIOS)):
+        print(f"  Aciertos de caché de {nombre}: {catalogo.aciertos} de {catalogo.aciertos + catalogo.fallos}")
@@ -0,0 +1,78 @@
+# Registro sostenido de notas con 1, 4 y 16 productores (hilos) durante unos segundos: cada
+# productor registra una nota de tres servicios, espera la confirmación con el folio y sigue.
+# Directo: cada productor llama a api.crear_nota con su conexión (una transacción por nota).
+# Cola: los productores encolan en ColaEscritura, que agrupa las notas en commits.
+# Uso: python -m benchmarks.bench_cola_escritura [segundos] [productores...]
+import sqlite3
+import sys
+import threading
+import time
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, resumen_latencias
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import api
+import conexion
+from cola_escritura import ColaEscritura
+
+LINEAS = [(1, ""), (2, "revisión"), (3, "")]
+
+
+def producir(registrar, segundos, latencias, errores):
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            registrar()
+        except sqlite3.OperationalError:
+            errores.append(1)
+            continue
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    conexion.cerrar_conexiones()
+
+
+def medir_modo(modo, productores, segundos):
+    latencias, errores = [], []
+    cola = ColaEscritura() if modo == "cola" else None
+    if cola is None:
+        def registrar():
+            api.crear_nota(1, None, LINEAS)
+    else:
+        def registrar():
+            cola.registrar(1, None, LINEAS).result()
+    hilos = [threading.Thread(target=producir, args=(registrar, segundos, latencias, errores))
+             for _ in range(productores)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+    estadisticas = None
+    if cola is not None:
+        cola.cerrar()
+        estadisticas = cola.estadisticas()
+    return len(latencias) / transcurrido, resumen_latencias(latencias), len(errores), estadisticas
+
+
+def ejecutar(segundos, grupos):
+    resultados = []
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        generar_datos(Main.conectar_db(), notas=1000)
+        conexion.cerrar_conexiones()
+        for productores in grupos:
+            for modo in ("directo", "cola"):
+                resultados.append((productores, modo, *medir_modo(modo, productores, segundos)))
+    return resultados
+
+
+if __name__ == "__main__":
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    grupos = [int(n) for n in sys.argv[2:]] or [1, 4, 16]
+    for productores, modo, por_segundo, r, errores, estadisticas in ejecutar(segundos, grupos):
+        extra = f" | {estadisticas['pedidos_por_lote']} notas por commit" if estadisticas else ""
+        print(f"  {productores:2d} productores, {modo:<7}: {por_segundo:7.0f} notas/s | p50 {r['p50_ms']:6.2f} ms | "
+              f"p99 {r['p99_ms']:7.2f} ms | errores {errores}{extra}")
@@ -0,0 +1,53 @@
+# Compara la latencia de abrir una conexión por llamada contra la conexión compartida
+# Uso: python -m benchmarks.bench_conexion [repeticiones]
+import sqlite3
+import sys
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import conexion
+
+
+def conexion_por_llamada(nombre="taller.db"):
+    # Comportamiento anterior: conexión nueva sin PRAGMAs en cada acción del menú
+    return sqlite3.connect(nombre)
+
+
+def ejecutar(repeticiones):
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        generar_datos(Main.conectar_db(), notas=5000)
+        folio = str(Main.conectar_db().execute("SELECT MAX(folio) FROM notas").fetchone()[0])
+
+        def consulta():
+            with entradas_simuladas([folio]):
+                Main.consulta_por_folio()
+
+        def registro():
+            with entradas_simuladas(["1", "", "1", "", ""]):
+                Main.registrar_nota()
+
+        resultados = {}
+        original = Main.conectar_db
+        for modo, fabrica in (("por_llamada", conexion_por_llamada), ("compartida", original)):
+            Main.conectar_db = fabrica
+            try:
+                resultados[modo] = {
+                    "consulta_por_folio": resumen_latencias(medir(consulta, repeticiones)),
+                    "registrar_nota": resumen_latencias(medir(registro, repeticiones)),
+                }
+            finally:
+                Main.conectar_db = original
+        conexion.cerrar_conexiones()
+    return resultados
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for modo, funciones in ejecutar(repeticiones).items():
+        print(f"\n{modo}")
+        for funcion, datos in funciones.items():
+            print(f"  {funcion:<20} media {datos['media_ms']:.3f} ms | p50 {datos['p50_ms']:.3f} ms | p99 {datos['p99_ms']:.3f} ms")
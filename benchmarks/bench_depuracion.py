@@ -0,0 +1,52 @@
+# Depuración sobre cinco años de notas con el 10 % canceladas (la mitad hace 90 días): primero con
+# los valores por omisión y después con un horizonte de un año. La base es nueva, así que ya usa
+# auto_vacuum incremental. Muestra notas/s, espacio recuperado, las consultas medidas antes y
+# después, y la latencia de recuperar una nota depurada por folio.
+# Uso: python -m benchmarks.bench_depuracion [notas] [repeticiones]
+import random
+import sys
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import api
+import conexion
+import depuracion
+
+
+def cancelar_notas(conn, fraccion=0.1, semilla=7):
+    folios = [fila[0] for fila in conn.execute("SELECT folio FROM notas")]
+    cancelados = random.Random(semilla).sample(folios, int(len(folios) * fraccion))
+    conn.executemany("UPDATE notas SET cancelada = 1 WHERE folio = ?", [(folio,) for folio in cancelados])
+    conn.execute("UPDATE cancelaciones SET dia = dia - 90 WHERE folio % 2 = 0")
+    conn.commit()
+
+
+def ejecutar(notas, repeticiones):
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        conn = Main.conectar_db()
+        lineas = generar_datos(conn, clientes=5000, servicios=200, notas=notas, dias=5 * 365)["lineas"]
+        cancelar_notas(conn)
+        pasadas = [("horizonte 3 años, canceladas 30 días", depuracion.depurar()),
+                   ("horizonte 1 año", depuracion.depurar(horizonte_dias=365))]
+        # Cada folio se recupera una sola vez: al recuperarlo regresa a la base
+        depurados = iter(fila[0] for fila in conn.execute(
+            "SELECT folio FROM archivo.notas WHERE cancelada = 1 LIMIT ?", (repeticiones,)).fetchall())
+        recuperar = medir(lambda: api.recuperar(next(depurados)), repeticiones)
+        conexion.cerrar_conexiones()
+    return lineas, pasadas, recuperar
+
+
+if __name__ == "__main__":
+    notas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    lineas, pasadas, recuperar = ejecutar(notas, repeticiones)
+    print(f"{notas} notas, {lineas} líneas de detalle")
+    for nombre, resultado in pasadas:
+        print(f"\n{nombre}: {resultado['notas'] / resultado['segundos']:.0f} notas/s")
+        depuracion.imprimir_depuracion(resultado)
+    r = resumen_latencias(recuperar)
+    print(f"\nRecuperar una nota depurada por folio: p50 {r['p50_ms']:.1f} ms | p99 {r['p99_ms']:.1f} ms")
@@ -0,0 +1,108 @@
+# Compara la exportación anterior (DataFrame completo + to_excel) contra la exportación en flujo
+# de exportacion.py. Cada prueba corre en un proceso nuevo para medir su memoria máxima (RSS).
+# Uso: python -m benchmarks.bench_exportacion [notas ...]
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas
+from benchmarks.datos_sinteticos import generar_datos
+
+INICIO, FIN = "0000-01-01", "9999-12-31"
+
+
+def to_excel_anterior(ruta_db):
+    import pandas as pd
+    import api
+    import conexion
+
+    conexion.RUTA_DB = ruta_db
+    resultados = api.reporte_periodo.__wrapped__(INICIO, FIN)
+    df = pd.DataFrame([(n.folio, n.fecha, n.cliente_clave, n.total) for n in resultados],
+                      columns=["Folio", "Fecha", "Cliente Clave", "Total"])
+    df.to_excel("anterior.xlsx", index=False)
+    return len(df)
+
+
+def en_flujo(formato, hojas):
+    def exportar(ruta_db):
+        import exportacion
+        from fechas import rango_dias
+
+        seleccion = exportacion.HOJAS_PERIODO[:hojas]
+        resumen = exportacion.exportar(f"flujo.{formato}", seleccion, rango_dias(INICIO, FIN), ruta_db)
+        return sum(resumen["filas"].values())
+    return exportar
+
+
+PRUEBAS = (
+    ("to_excel (anterior, notas)", to_excel_anterior),
+    ("XLSX en flujo (notas)", en_flujo("xlsx", 1)),
+    ("XLSX en flujo (3 hojas)", en_flujo("xlsx", 3)),
+    ("CSV en flujo (3 hojas)", en_flujo("csv", 3)),
+    ("Parquet en flujo (3 hojas)", en_flujo("parquet", 3)),
+)
+
+
+def _memoria_mb():
+    # VmHWM es el RSS máximo del proceso actual; ru_maxrss puede heredar el del padre
+    try:
+        with open("/proc/self/status") as estado:
+            for linea in estado:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _hijo(indice, ruta_db, cola):
+    import pandas  # noqa: F401  (la línea base incluye las bibliotecas cargadas)
+    import openpyxl  # noqa: F401
+    import exportacion  # noqa: F401
+
+    base = _memoria_mb()
+    inicio = time.perf_counter()
+    try:
+        filas = PRUEBAS[indice][1](ruta_db)
+    except Exception as e:
+        cola.put((None, 0, 0, 0, str(e)))
+        return
+    cola.put((filas, time.perf_counter() - inicio, base, _memoria_mb(), None))
+
+
+def ejecutar(notas):
+    resultados = []
+    contexto = multiprocessing.get_context("spawn")
+    with directorio_temporal() as carpeta:
+        import Main
+        import conexion
+
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        generar_datos(Main.conectar_db(), notas=notas)
+        conexion.cerrar_conexiones()
+        ruta_db = os.path.join(carpeta, "taller.db")
+
+        for indice, (nombre, _) in enumerate(PRUEBAS):
+            cola = contexto.Queue()
+            hijo = contexto.Process(target=_hijo, args=(indice, ruta_db, cola))
+            hijo.start()
+            resultados.append((nombre, *cola.get()))
+            hijo.join()
+    return resultados
+
+
+if __name__ == "__main__":
+    tamanos = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for notas in tamanos:
+        print(f"\n{notas:,} notas")
+        print(f"  {'Método':<28} {'Filas':>9} {'Segundos':>9} {'Filas/s':>9} {'RSS base':>9} {'RSS máx':>9}")
+        for nombre, filas, segundos, base, pico, error in ejecutar(notas):
+            if error:
+                print(f"  {nombre:<28} error: {error}")
+                continue
+            print(f"  {nombre:<28} {filas:>9,} {segundos:>9.2f} {filas / segundos:>9,.0f} "
+                  f"{base:>7.0f}MB {pico:>7.0f}MB")
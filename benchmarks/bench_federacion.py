@@ -0,0 +1,60 @@
+# Reportes consolidados (federacion.py) de N sucursales sintéticas con 1, 2, 4... procesos hasta el
+# número de núcleos: los cinco reportes sobre todo el historial, con el grupo de procesos ya
+# arrancado (el arranque se muestra aparte). Con un solo núcleo no puede haber aceleración.
+# Uso: python -m benchmarks.bench_federacion [sucursales] [lineas_por_sucursal] [repeticiones]
+import os
+import sys
+import time
+
+from benchmarks.utilidades import directorio_temporal, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_taller
+
+import conexion
+import esquema
+import federacion
+
+
+def crear_sucursales(sucursales, lineas):
+    rutas = {}
+    for i in range(sucursales):
+        ruta = os.path.abspath(f"sucursal{i + 1}.db")
+        conn = conexion.obtener_conexion(ruta)
+        esquema.crear_tablas(conn)
+        generar_taller(conn, lineas, semilla=i)
+        rutas[f"Sucursal {i + 1}"] = ruta
+    conexion.cerrar_conexiones()
+    return rutas
+
+
+def todos(grupo):
+    for nombre in federacion.REPORTES:
+        grupo.reporte(nombre)
+
+
+def ejecutar(sucursales, lineas, repeticiones):
+    resultados = []
+    with directorio_temporal():
+        rutas = crear_sucursales(sucursales, lineas)
+        procesos = 1
+        while True:
+            inicio = time.perf_counter()
+            with federacion.Federacion(rutas, procesos) as grupo:
+                todos(grupo)   # arranca los procesos y migra cada base una vez
+                arranque = time.perf_counter() - inicio
+                resultados.append((procesos, arranque, resumen_latencias(medir(lambda: todos(grupo), repeticiones))))
+            if procesos >= min(os.cpu_count() or 1, sucursales):
+                break
+            procesos = min(procesos * 2, os.cpu_count() or 1, sucursales)
+    return resultados
+
+
+if __name__ == "__main__":
+    sucursales = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    lineas = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    repeticiones = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    resultados = ejecutar(sucursales, lineas, repeticiones)
+    print(f"{sucursales} sucursales de {lineas} líneas; {os.cpu_count()} núcleos")
+    base = resultados[0][2]["p50_ms"]
+    for procesos, arranque, r in resultados:
+        print(f"  {procesos:2d} procesos: p50 {r['p50_ms']:9.1f} ms | p99 {r['p99_ms']:9.1f} ms | "
+              f"aceleración x{base / r['p50_ms']:.2f} | arranque y primera pasada {arranque:.1f} s")
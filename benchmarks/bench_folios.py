@@ -0,0 +1,87 @@
+# Prueba de estrés: varios procesos registran notas a la vez sobre la misma base.
+# Verifica que no haya folios duplicados y reporta notas por segundo.
+# Uso: python -m benchmarks.bench_folios [procesos] [notas_por_proceso]
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+from fechas import a_dia
+import api
+import conexion
+
+LINEAS = [api.LineaNota(1, "", 500.0), api.LineaNota(2, "frenos", 800.0)]
+
+
+def trabajador_actual(ruta, notas, cola):
+    conn = conexion.abrir_conexion(ruta)
+    folios, errores = [], 0
+    for _ in range(notas):
+        try:
+            folios.append(api.guardar_nota(conn, "2024-01-15", 1, LINEAS))
+        except sqlite3.Error:
+            errores += 1
+    cola.put((folios, errores))
+
+
+def trabajador_max_folio(ruta, notas, cola):
+    # Asignación anterior: SELECT MAX(folio) + 1 y luego INSERT con ese folio
+    conn = conexion.abrir_conexion(ruta)
+    folios, errores = [], 0
+    for _ in range(notas):
+        try:
+            cursor = conn.cursor()
+            folio = cursor.execute("SELECT IFNULL(MAX(folio), 0) + 1 FROM notas").fetchone()[0]
+            cursor.execute("INSERT INTO notas (folio, dia, cliente_clave, cancelada) VALUES (?, ?, 1, 0)",
+                           (folio, a_dia("2024-01-15")))
+            cursor.executemany("INSERT INTO detalles_nota (folio, servicio_clave, observaciones, costo) VALUES (?, ?, ?, ?)",
+                               [(folio, l.servicio_clave, l.observaciones, l.costo) for l in LINEAS])
+            conn.commit()
+            folios.append(folio)
+        except sqlite3.Error:
+            conn.rollback()
+            errores += 1
+    cola.put((folios, errores))
+
+
+def ejecutar(trabajador, procesos, notas):
+    with directorio_temporal() as carpeta:
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        generar_datos(Main.conectar_db(), clientes=10, servicios=2, notas=0)
+        conexion.cerrar_conexiones()
+        ruta = os.path.join(carpeta, "taller.db")
+
+        cola = multiprocessing.Queue()
+        hijos = [multiprocessing.Process(target=trabajador, args=(ruta, notas, cola)) for _ in range(procesos)]
+        inicio = time.perf_counter()
+        for hijo in hijos:
+            hijo.start()
+        resultados = [cola.get() for _ in hijos]
+        for hijo in hijos:
+            hijo.join()
+        segundos = time.perf_counter() - inicio
+
+        folios = [folio for lista, _ in resultados for folio in lista]
+        errores = sum(e for _, e in resultados)
+        duplicados = sum(n - 1 for n in Counter(folios).values() if n > 1)
+        en_base = sqlite3.connect(ruta).execute("SELECT COUNT(*) FROM notas").fetchone()[0]
+    return len(folios), errores, duplicados, en_base, segundos
+
+
+if __name__ == "__main__":
+    procesos = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    notas = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    for nombre, trabajador in (("BEGIN IMMEDIATE + AUTOINCREMENT", trabajador_actual),
+                               ("MAX(folio) + 1 (anterior)", trabajador_max_folio)):
+        registradas, errores, duplicados, en_base, segundos = ejecutar(trabajador, procesos, notas)
+        print(f"\n{nombre}")
+        print(f"  Notas registradas: {registradas} de {procesos * notas} | en la base: {en_base}")
+        print(f"  Errores: {errores} | folios duplicados: {duplicados}")
+        print(f"  {registradas / segundos:,.0f} notas/s con {procesos} procesos")
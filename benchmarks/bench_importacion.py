@@ -0,0 +1,51 @@
+# Mide la velocidad de importacion.importar_notas con un CSV sintético
+# Uso: python -m benchmarks.bench_importacion [lineas]
+import csv
+import random
+import sys
+from datetime import date, timedelta
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import conexion
+from importacion import importar_notas
+
+
+def escribir_csv(ruta, lineas, servicios, semilla=7):
+    azar = random.Random(semilla)
+    hoy = date.today()
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(["folio", "fecha", "telefono", "apellidos", "nombres",
+                           "servicio_clave", "observaciones", "costo"])
+        folio = 0
+        escritas = 0
+        while escritas < lineas:
+            folio += 1
+            fecha = (hoy - timedelta(days=azar.randrange(3650))).strftime("%m-%d-%Y")
+            telefono = str(5500000000 + azar.randrange(5000))
+            for _ in range(min(azar.randint(1, 4), lineas - escritas)):
+                escritor.writerow([folio, fecha, telefono, "Garcia Lopez", "Ana",
+                                   azar.choice(servicios), "", ""])
+                escritas += 1
+
+
+def ejecutar(lineas):
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        generar_datos(Main.conectar_db(), clientes=0, notas=0)
+        servicios = [str(r[0]) for r in Main.conectar_db().execute("SELECT clave FROM servicios")]
+        escribir_csv("historico.csv", lineas, servicios)
+        resumen = importar_notas("historico.csv")
+        conexion.cerrar_conexiones()
+    return resumen
+
+
+if __name__ == "__main__":
+    lineas = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    resumen = ejecutar(lineas)
+    print(f"Líneas: {resumen['lineas']} | notas: {resumen['notas']} | rechazadas: {resumen['rechazadas']}")
+    print(f"Tiempo: {resumen['segundos']:.2f} s ({resumen['lineas'] / resumen['segundos']:,.0f} líneas/s)")
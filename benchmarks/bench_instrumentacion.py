@@ -0,0 +1,79 @@
+# Costo de la medición de sentencias (instrumentacion.py): las mismas operaciones con la medición
+# apagada y encendida, alternando varias rondas sobre la misma base. Reportes del menú sin caché
+# (pocas sentencias grandes), consultas por folio (muchas sentencias pequeñas, el peor caso por
+# sentencia) y un recorrido fila por fila de todas las líneas (el peor caso por fila). El costo
+# se da también por sentencia: la diferencia entre las medianas entre las sentencias de una pasada.
+# Uso: python -m benchmarks.bench_instrumentacion [lineas] [rondas]
+import sys
+from statistics import median
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir
+from benchmarks.datos_sinteticos import generar_taller
+
+import Main
+import api
+import conexion
+import instrumentacion
+
+FOLIOS_POR_MEDICION = 2000
+
+
+def operaciones(notas):
+    def reportes():
+        for funcion, respuestas in ((Main.consulta_por_periodo, ["", "", "n"]),
+                                    (Main.estadistica_tendencia_central, ["", ""]),
+                                    (Main.estadistica_dispersion, ["", ""]),
+                                    (Main.servicio_mas_prestado, ["", "", "", ""]),
+                                    (Main.cliente_con_mas_servicios, ["", "", "", ""])):
+            api.CACHE_REPORTES.vaciar()
+            with entradas_simuladas(respuestas):
+                funcion()
+
+    def por_folio():
+        for folio in range(1, min(notas, FOLIOS_POR_MEDICION) + 1):
+            api.obtener_nota(folio)
+
+    def recorrido():
+        for _ in conexion.obtener_conexion().execute("SELECT folio, costo FROM todos_detalles"):
+            pass
+
+    return {"Reportes del menú (sin caché)": reportes,
+            f"{FOLIOS_POR_MEDICION} consultas por folio": por_folio,
+            "Recorrido de todas las líneas": recorrido}
+
+
+def ejecutar(lineas, rondas):
+    tiempos = {}
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        escala = generar_taller(Main.conectar_db(), lineas)
+        pruebas = operaciones(escala["notas"])
+        for _ in range(rondas):
+            for medida in (False, True):
+                if medida:
+                    # Sin registro de lentas: se mide el costo de contar, no el de escribir el archivo
+                    instrumentacion.activar(archivo_lentas="")
+                else:
+                    instrumentacion.desactivar()
+                for nombre, prueba in pruebas.items():
+                    tiempos.setdefault((nombre, medida), []).extend(medir(prueba, 3))
+        sentencias = sum(s["ejecuciones"] for s in instrumentacion.instantanea()["sentencias"])
+        por_prueba = {}
+        for nombre, prueba in pruebas.items():
+            instrumentacion.reiniciar()
+            prueba()
+            por_prueba[nombre] = sum(s["ejecuciones"] for s in instrumentacion.instantanea()["sentencias"])
+        instrumentacion.desactivar()
+    return escala, sentencias, por_prueba, {llave: median(valores) for llave, valores in tiempos.items()}
+
+
+if __name__ == "__main__":
+    lineas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rondas = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    escala, sentencias, por_prueba, medianas = ejecutar(lineas, rondas)
+    print(f"{escala['notas']} notas, {escala['lineas']} líneas; {sentencias} sentencias medidas")
+    for nombre, cuantas in por_prueba.items():
+        sin, con = medianas[(nombre, False)], medianas[(nombre, True)]
+        print(f"  {nombre:<32} sin medir {sin:9.2f} ms | midiendo {con:9.2f} ms | costo {con / sin - 1:+.1%}"
+              f" | {(con - sin) * 1000 / cuantas:+.2f} µs por sentencia ({cuantas})")
@@ -0,0 +1,60 @@
+# Compara el listado completo de folios (fetchall de todas las notas) contra la primera
+# página del listado paginado por llave. Reporta tiempo y memoria máxima de Python.
+# Uso: python -m benchmarks.bench_listados [notas ...]
+import sys
+import time
+import tracemalloc
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import api
+import conexion
+
+
+def listado_completo():
+    # Lo que hacía consulta_por_folio antes: todas las notas activas en una lista
+    filas = api._conn().execute("SELECT folio, fecha FROM notas WHERE cancelada = 0 ORDER BY fecha").fetchall()
+    return [f"Folio: {folio} | Fecha: {fecha}" for folio, fecha in filas]
+
+
+def primera_pagina():
+    return [f"Folio: {n[0]} | Fecha: {n[1]}" for n in api.pagina_notas().elementos]
+
+
+def diez_paginas():
+    despues = None
+    for _ in range(10):
+        despues = api.pagina_notas(despues=despues).siguiente
+
+
+def medir_memoria(funcion):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos * 1000, pico / 2**20
+
+
+def ejecutar(notas):
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        generar_datos(Main.conectar_db(), notas=notas, max_lineas=1)
+        resultados = [(nombre, *medir_memoria(funcion))
+                      for nombre, funcion in (("Listado completo", listado_completo),
+                                              ("Primera página", primera_pagina),
+                                              ("Diez páginas", diez_paginas))]
+        conexion.cerrar_conexiones()
+    return resultados
+
+
+if __name__ == "__main__":
+    tamanos = [int(a) for a in sys.argv[1:]] or [10_000, 200_000]
+    for notas in tamanos:
+        print(f"\n{notas:,} notas")
+        for nombre, ms, mb in ejecutar(notas):
+            print(f"  {nombre:<18} {ms:>9.2f} ms {mb:>9.2f} MB")
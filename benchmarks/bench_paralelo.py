@@ -0,0 +1,64 @@
+# Reportes de todo el historial repartidos por fechas (paralelo.py) con 1, 2, 4... hilos, hasta
+# el número de núcleos (al menos 4, para ver el costo de repartir cuando sobran hilos), sobre un
+# taller sintético de 5M líneas. Sin caché; se comprueba que cada reporte dé lo mismo que con un hilo
+# (los cuartiles de la dispersión con un hilo son aproximados y no se comparan).
+# Uso: python -m benchmarks.bench_paralelo [lineas] [repeticiones]
+import os
+import sys
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_taller
+
+import Main
+import api
+import paralelo
+
+REPORTES = (api.reporte_periodo, api.tendencia_central, api.dispersion)
+
+
+def ejecutar(lineas, repeticiones):
+    resultados = []
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        escala = generar_taller(Main.conectar_db(), lineas)
+        periodo = (api.fecha_mas_antigua(), api.validar_fecha(None))
+        hilos_originales = paralelo.HILOS
+        referencia = {}
+        hilos = 1
+        try:
+            while hilos <= max(os.cpu_count() or 1, 4):
+                paralelo.HILOS = hilos
+                paralelo.cerrar()
+                for reporte in REPORTES:
+                    calcular = reporte.__wrapped__
+                    resultado = calcular(*periodo)
+                    if reporte is api.tendencia_central:
+                        igual = resultado.conteo == referencia.setdefault(reporte, resultado).conteo and \
+                            abs(resultado.media - referencia[reporte].media) < 1e-6 and \
+                            resultado.mediana == referencia[reporte].mediana
+                    elif reporte is api.dispersion:
+                        igual = resultado.conteo == referencia.setdefault(reporte, resultado).conteo and \
+                            abs(resultado.varianza / referencia[reporte].varianza - 1) < 1e-9
+                    else:
+                        igual = resultado == referencia.setdefault(reporte, resultado)
+                    tiempos = medir(lambda: calcular(*periodo), repeticiones)
+                    resultados.append((reporte.__name__, hilos, len(paralelo.tramos(*periodo)),
+                                       resumen_latencias(tiempos), igual))
+                hilos *= 2
+        finally:
+            paralelo.HILOS = hilos_originales
+            paralelo.cerrar()
+    return escala, resultados
+
+
+if __name__ == "__main__":
+    lineas = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    escala, resultados = ejecutar(lineas, repeticiones)
+    print(f"{escala['notas']} notas, {escala['lineas']} líneas; {os.cpu_count()} núcleos")
+    base = {}
+    for nombre, hilos, tramos, r, igual in resultados:
+        base.setdefault(nombre, r["p50_ms"])
+        print(f"  {nombre:<18} {hilos:2d} hilos ({tramos} tramos): p50 {r['p50_ms']:9.1f} ms | "
+              f"aceleración x{base[nombre] / r['p50_ms']:.2f}" + ("" if igual else "  RESULTADO DISTINTO"))
@@ -0,0 +1,96 @@
+# Top-K de servicios y clientes sobre cinco años de notas: agregación sobre las notas con
+# ORDER BY completo, la consulta anterior sobre el resumen diario (GROUP BY con JOIN y ORDER BY)
+# y api.ranking (acumulados por mes y año + montículo), para todo el historial y para 18 meses.
+# Se mide sin la caché de reportes.
+# Uso: python -m benchmarks.bench_ranking [notas] [k]
+import sys
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import api
+import conexion
+from fechas import rango_dias
+
+REPETICIONES = 20
+RANGOS = (("todo", "0000-01-01", "9999-12-31"), ("18 meses", None, None))
+
+DESDE_NOTAS = {
+    "servicios": """
+        SELECT d.servicio_clave, COUNT(*) AS veces, ROUND(SUM(d.costo), 2)
+        FROM notas n
+        JOIN detalles_nota d ON d.folio = n.folio
+        WHERE n.cancelada = 0 AND n.dia BETWEEN ? AND ?
+        GROUP BY d.servicio_clave
+        ORDER BY veces DESC
+        LIMIT ?""",
+    "clientes": """
+        SELECT n.cliente_clave, COUNT(*) AS servicios, ROUND(SUM(d.costo), 2)
+        FROM notas n
+        JOIN detalles_nota d ON d.folio = n.folio
+        WHERE n.cancelada = 0 AND n.dia BETWEEN ? AND ?
+        GROUP BY n.cliente_clave
+        ORDER BY servicios DESC
+        LIMIT ?""",
+}
+
+RESUMEN_ORDENADO = {
+    "servicios": """
+        SELECT s.clave, s.nombre, SUM(r.veces) AS veces
+        FROM resumen_diario_servicio r
+        JOIN servicios s ON r.servicio_clave = s.clave
+        WHERE r.fecha BETWEEN ? AND ?
+        GROUP BY s.clave, s.nombre
+        HAVING veces > 0
+        ORDER BY veces DESC
+        LIMIT ?""",
+    "clientes": """
+        SELECT c.clave, c.apellidos || ' ' || c.nombres AS nombre_completo, SUM(r.servicios) AS total_servicios
+        FROM resumen_diario_cliente r
+        JOIN clientes c ON r.cliente_clave = c.clave
+        WHERE r.fecha BETWEEN ? AND ?
+        GROUP BY c.clave, nombre_completo
+        HAVING total_servicios > 0
+        ORDER BY total_servicios DESC
+        LIMIT ?""",
+}
+
+MONTICULO = {
+    "servicios": api.servicios_mas_prestados.__wrapped__,
+    "clientes": api.clientes_con_mas_servicios.__wrapped__,
+}
+
+
+def ejecutar(notas, k):
+    resultados = []
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        conn = Main.conectar_db()
+        generar_datos(conn, clientes=5000, servicios=200, notas=notas, dias=5 * 365)
+        ultima = conn.execute("SELECT MAX(fecha) FROM resumen_diario").fetchone()[0]
+        for nombre, inicio, fin in RANGOS:
+            if inicio is None:
+                # Un año y medio que no empieza ni termina en mes completo
+                inicio, fin = f"{int(ultima[:4]) - 2}-02-10", f"{int(ultima[:4]) - 1}-07-20"
+            for ranking in ("servicios", "clientes"):
+                resultados.append((ranking, nombre, (
+                    medir(lambda: conn.execute(DESDE_NOTAS[ranking], (*rango_dias(inicio, fin), k)).fetchall(), REPETICIONES),
+                    medir(lambda: conn.execute(RESUMEN_ORDENADO[ranking], (inicio, fin, k)).fetchall(),
+                          REPETICIONES),
+                    medir(lambda: MONTICULO[ranking](inicio, fin, k=k), REPETICIONES),
+                )))
+        conexion.cerrar_conexiones()
+    return resultados
+
+
+if __name__ == "__main__":
+    notas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{notas} notas en cinco años, top-{k}")
+    for ranking, rango, tiempos in ejecutar(notas, k):
+        print(f"  {ranking} ({rango}):")
+        for nombre, t in zip(("Notas + ORDER BY", "Resumen + ORDER BY", "Acumulados + montículo"), tiempos):
+            r = resumen_latencias(t)
+            print(f"    {nombre:<24} p50 {r['p50_ms']:.2f} ms | p99 {r['p99_ms']:.2f} ms")
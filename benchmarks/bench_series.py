@@ -0,0 +1,68 @@
+# Series por día, semana ISO y mes sobre cinco años (~1M líneas de detalle con 400000 notas):
+# una consulta por intervalo y otra por su año anterior (como se haría con un ciclo) contra
+# series.series_tiempo, que lee los totales diarios una vez y resuelve intervalos, ventanas y
+# año anterior con sumas acumuladas, leyendo de las notas o del resumen diario.
+# Uso: python -m benchmarks.bench_series [notas] [repeticiones]
+import sys
+
+import pandas as pd
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import conexion
+import series
+from fechas import rango_dias
+
+POR_INTERVALO = """
+    SELECT COUNT(DISTINCT n.folio), IFNULL(SUM(d.costo), 0)
+    FROM notas n
+    JOIN detalles_nota d ON n.folio = d.folio
+    WHERE n.cancelada = 0 AND n.dia BETWEEN ? AND ?
+"""
+
+
+def consulta_por_intervalo(conn, serie):
+    # Mismos intervalos que la serie; el año anterior se toma de sus columnas Inicio y Fin
+    filas = []
+    for inicio, fin in zip(serie["Inicio"], serie["Fin"]):
+        actual = conn.execute(POR_INTERVALO, rango_dias(inicio, fin)).fetchone()
+        anterior_inicio = (pd.Timestamp(inicio) - pd.DateOffset(years=1)).date().isoformat()
+        anterior_fin = (pd.Timestamp(fin) - pd.DateOffset(years=1)).date().isoformat()
+        filas.append((*actual, *conn.execute(POR_INTERVALO, rango_dias(anterior_inicio, anterior_fin)).fetchone()))
+    return filas
+
+
+def ejecutar(notas, repeticiones):
+    resultados = []
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        conn = Main.conectar_db()
+        lineas = generar_datos(conn, clientes=5000, servicios=200, notas=notas, dias=5 * 365)["lineas"]
+        primera, ultima = conn.execute("SELECT MIN(fecha), MAX(fecha) FROM notas").fetchone()
+        # Los últimos cuatro años, para que todos tengan año anterior
+        inicio = f"{int(primera[:4]) + 1}-01-01"
+        for agrupacion in series.AGRUPACIONES:
+            serie = series.series_tiempo(inicio, ultima, agrupacion)
+            resultados.append((agrupacion, len(serie), (
+                medir(lambda: consulta_por_intervalo(conn, serie), repeticiones),
+                medir(lambda: series.series_tiempo(inicio, ultima, agrupacion, fuente="notas"), repeticiones),
+                medir(lambda: series.series_tiempo(inicio, ultima, agrupacion), repeticiones),
+            )))
+        conexion.cerrar_conexiones()
+    return lineas, inicio, ultima, resultados
+
+
+if __name__ == "__main__":
+    notas = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    lineas, inicio, fin, resultados = ejecutar(notas, repeticiones)
+    print(f"{notas} notas, {lineas} líneas de detalle; series de {inicio} a {fin}")
+    for agrupacion, intervalos, tiempos in resultados:
+        print(f"  {agrupacion} ({intervalos} intervalos):")
+        for nombre, t in zip(("Consulta por intervalo", "Sumas acumuladas (notas)", "Sumas acumuladas (resumen)"),
+                             tiempos):
+            r = resumen_latencias(t)
+            print(f"    {nombre:<28} p50 {r['p50_ms']:.1f} ms | p99 {r['p99_ms']:.1f} ms")
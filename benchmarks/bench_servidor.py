@@ -0,0 +1,119 @@
+# Prueba de carga del servidor HTTP: levanta servidor.py sobre una base temporal con datos
+# sintéticos y lanza peticiones concurrentes (reportes, consultas de folio y registros).
+# Reporta latencia p50/p99 por tipo de petición y peticiones por segundo.
+# Uso: python -m benchmarks.bench_servidor [conexiones] [peticiones]
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks.utilidades import RAIZ, directorio_temporal, entradas_simuladas, resumen_latencias
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import conexion
+
+NOTAS = 20_000
+# Proporción de cada tipo de petición en la carga
+MEZCLA = (("reporte", 0.6), ("folio", 0.3), ("registro", 0.1))
+REPORTES = ("periodo", "tendencia", "dispersion", "servicios", "clientes")
+
+
+async def peticion(lector, escritor, metodo, destino, datos=None):
+    cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+    escritor.write(f"{metodo} {destino} HTTP/1.1\r\nHost: localhost\r\n"
+                   f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode("latin-1")
+                   + cuerpo)
+    await escritor.drain()
+    estado = int((await lector.readline()).split()[1])
+    largo = 0
+    while True:
+        encabezado = await lector.readline()
+        if encabezado in (b"\r\n", b""):
+            break
+        nombre, _, valor = encabezado.decode("latin-1").partition(":")
+        if nombre.lower() == "content-length":
+            largo = int(valor)
+    return estado, json.loads(await lector.readexactly(largo))
+
+
+def siguiente_peticion(azar, periodos):
+    tipo = azar.choices([t for t, _ in MEZCLA], [p for _, p in MEZCLA])[0]
+    if tipo == "reporte":
+        inicio, fin = azar.choice(periodos)
+        return tipo, "GET", f"/reportes/{azar.choice(REPORTES)}?inicio={inicio}&fin={fin}", None
+    if tipo == "folio":
+        return tipo, "GET", f"/notas/{azar.randint(1, NOTAS)}", None
+    lineas = [{"servicio_clave": azar.randint(1, 12), "observaciones": ""} for _ in range(azar.randint(1, 3))]
+    return tipo, "POST", "/notas", {"cliente_clave": azar.randint(1, 200), "lineas": lineas}
+
+
+async def cliente(host, puerto, cantidad, semilla, periodos, tiempos, errores):
+    azar = random.Random(semilla)
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    for _ in range(cantidad):
+        tipo, metodo, destino, datos = siguiente_peticion(azar, periodos)
+        inicio = time.perf_counter()
+        estado, _ = await peticion(lector, escritor, metodo, destino, datos)
+        tiempos.setdefault(tipo, []).append((time.perf_counter() - inicio) * 1000)
+        if estado >= 400:
+            errores.append((estado, destino))
+    escritor.close()
+
+
+async def carga(host, puerto, conexiones, peticiones):
+    # Pocos períodos distintos, como cuando varios mostradores piden el reporte de la semana o del mes
+    hoy = date.today()
+    periodos = [((hoy - timedelta(days=d)).isoformat(), hoy.isoformat()) for d in (7, 30, 90)]
+    tiempos, errores = {}, []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(host, puerto, peticiones // conexiones, i, periodos, tiempos, errores)
+                           for i in range(conexiones)))
+    segundos = time.perf_counter() - inicio
+
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    _, estado = await peticion(lector, escritor, "GET", "/estado")
+    escritor.close()
+    return tiempos, errores, segundos, estado
+
+
+def ejecutar(conexiones, peticiones):
+    with directorio_temporal() as carpeta:
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        generar_datos(Main.conectar_db(), clientes=200, servicios=12, notas=NOTAS)
+        conexion.cerrar_conexiones()
+
+        proceso = subprocess.Popen([sys.executable, os.path.join(RAIZ, "servidor.py"), "--puerto", "0",
+                                    "--db", os.path.join(carpeta, "taller.db")],
+                                   stdout=subprocess.PIPE, text=True)
+        try:
+            # La primera línea es "Escuchando en http://host:puerto"
+            direccion = proceso.stdout.readline().strip().rsplit("/", 1)[-1]
+            host, puerto = direccion.rsplit(":", 1)
+            return asyncio.run(carga(host, int(puerto), conexiones, peticiones))
+        finally:
+            proceso.terminate()
+            proceso.wait()
+
+
+if __name__ == "__main__":
+    conexiones = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    peticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    tiempos, errores, segundos, estado = ejecutar(conexiones, peticiones)
+
+    total = sum(len(t) for t in tiempos.values())
+    print(f"{total} peticiones con {conexiones} conexiones en {segundos:.2f} s: {total / segundos:,.0f} peticiones/s")
+    print(f"{'Tipo':<10} {'Peticiones':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for tipo, lista in sorted(tiempos.items()):
+        r = resumen_latencias(lista)
+        print(f"{tipo:<10} {len(lista):>10} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+    r = resumen_latencias([t for lista in tiempos.values() for t in lista])
+    print(f"{'total':<10} {total:>10} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+    print(f"Reportes coalescidos: {estado['coalescidas']} | errores: {len(errores)}")
+    for estado_http, destino in errores[:10]:
+        print(f"  {estado_http} {destino}")
@@ -0,0 +1,144 @@
+import random
+from datetime import date, timedelta
+from itertools import accumulate
+
+from busqueda import indexar_observaciones
+from cambios import marcar_cambios
+from fechas import a_dia
+from resumen import reconstruir_resumen
+from suspension import triggers_suspendidos
+
+APELLIDOS = ["Garcia", "Lopez", "Martinez", "Hernandez", "Gonzalez", "Perez", "Rodriguez",
+             "Sanchez", "Ramirez", "Cruz", "Flores", "Gomez", "Morales", "Vazquez", "Reyes"]
+NOMBRES = ["Ana", "Luis", "Maria", "Jose", "Carmen", "Juan", "Laura", "Pedro", "Sofia", "Miguel"]
+SERVICIOS = ["Afinacion", "Cambio de aceite", "Frenos", "Alineacion", "Balanceo", "Suspension",
+             "Clutch", "Diagnostico", "Lavado de motor", "Cambio de llantas", "Bateria", "Radiador"]
+# Palabras de las observaciones, de la más a la menos frecuente
+PALABRAS_OBSERVACIONES = [
+    "revisar", "cliente", "ruido", "frenos", "delanteros", "traseros", "cambio", "aceite", "fuga", "trae",
+    "refacción", "pendiente", "garantía", "llanta", "balatas", "suspensión", "batería", "motor", "bujías",
+    "filtro", "aire", "gasolina", "urgente", "entregar", "mañana", "tarde", "presupuesto", "autorizado",
+    "vibración", "volante", "dirección", "hidráulica", "amortiguadores", "radiador", "anticongelante",
+    "banda", "distribución", "escape", "catalizador", "sensor", "oxígeno", "tablero", "luces", "foco",
+    "limpiaparabrisas", "ventilador", "compresor", "clima", "recarga", "rótulas", "terminales",
+    "horquilla", "bomba", "agua", "marcha", "alternador", "falla", "intermitente", "esperar", "pieza",
+    "original", "genérica", "rechinido", "golpeteo", "sobrecalentamiento", "humo", "tolva", "soporte",
+]
+
+
+def _pesos_zipf(n, s):
+    # Pesos acumulados de una ley de Zipf: el elemento i (desde 0) pesa 1 / (i + 1) ** s
+    acumulado, total = [], 0.0
+    for i in range(n):
+        total += 1 / (i + 1) ** s
+        acumulado.append(total)
+    return acumulado
+
+
+# Líneas por nota: la mayoría de las notas lleva uno o dos servicios
+PESOS_LINEAS = (45, 27, 14, 7, 4, 2, 1)
+# Notas por día de la semana (lunes a domingo): el domingo casi no se abre
+PESOS_SEMANA = (1.0, 1.0, 1.0, 1.0, 1.1, 0.8, 0.2)
+LOTE_GENERACION = 50_000
+
+
+def generar_datos(conn, clientes=200, servicios=12, notas=1000, max_lineas=4, dias=365, semilla=42,
+                  sesgado=False, fraccion_canceladas=0.0, fraccion_observaciones=0.0):
+    # Datos deterministas: la misma semilla produce siempre la misma base. Las notas caen en los
+    # últimos `dias` días y los folios crecen con la fecha. Sin sesgo, cliente, servicio, día y
+    # número de líneas (de 1 a max_lineas) se eligen con la misma probabilidad; con sesgado=True
+    # se reparten como en un taller real: pocos clientes concentran muchas notas y pocos
+    # servicios muchas líneas (Zipf), la mayoría de las notas tiene uno o dos servicios
+    # (PESOS_LINEAS) y el volumen crece con el tiempo y baja el fin de semana.
+    # Una fracción de las líneas lleva observaciones de 2 a 8 palabras (Zipf), a veces con placas;
+    # salen de otro generador, así que el resto de los datos no cambia con fraccion_observaciones.
+    # Todo se carga en una transacción con los triggers de notas suspendidos (ver suspension.py)
+    # y los resúmenes, el registro de cambios y la búsqueda se actualizan al final.
+    # Devuelve {clientes, servicios, notas, lineas}.
+    azar = random.Random(semilla)
+    azar_texto = random.Random(semilla + 1)
+    pesos_palabras = _pesos_zipf(len(PALABRAS_OBSERVACIONES), 1.0)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO clientes (apellidos, nombres, telefono, suspendido) VALUES (?, ?, ?, 0)",
+        [(f"{azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}", azar.choice(NOMBRES),
+          f"{azar.randrange(10**9, 10**10)}") for _ in range(clientes)])
+    cursor.executemany(
+        "INSERT INTO servicios (nombre, costo, suspendido) VALUES (?, ?, 0)",
+        [(f"{SERVICIOS[i % len(SERVICIOS)]} {i // len(SERVICIOS) + 1}", float(azar.randrange(200, 5000, 50)))
+         for i in range(servicios)])
+    conn.commit()
+    # El orden de popularidad no sigue a la clave: se barajan antes de asignar los pesos
+    claves_cliente = [fila[0] for fila in cursor.execute("SELECT clave FROM clientes")]
+    servicios_costo = cursor.execute("SELECT clave, costo FROM servicios").fetchall()
+    azar.shuffle(claves_cliente)
+    azar.shuffle(servicios_costo)
+    pesos_cliente = _pesos_zipf(len(claves_cliente), 0.6 if sesgado else 0)
+    pesos_servicio = _pesos_zipf(len(servicios_costo), 1.1 if sesgado else 0)
+    pesos_lineas = list(accumulate(PESOS_LINEAS[:max_lineas] if sesgado else [1] * max_lineas))
+
+    # Día de cada nota, en orden para que los folios crezcan con la fecha; con sesgo, el peso
+    # del día sube de 1 a 1.5 a lo largo del periodo y depende del día de la semana
+    hoy = date.today()
+    fechas = [hoy - timedelta(days=dias - 1 - i) for i in range(dias)]
+    pesos_dia = list(accumulate((1 + 0.5 * i / dias) * PESOS_SEMANA[f.weekday()] if sesgado else 1
+                                for i, f in enumerate(fechas)))
+    dias_notas = sorted(azar.choices(range(dias), cum_weights=pesos_dia, k=notas))
+
+    def observaciones():
+        if azar_texto.random() >= fraccion_observaciones:
+            return ""
+        palabras = azar_texto.choices(PALABRAS_OBSERVACIONES, cum_weights=pesos_palabras,
+                                      k=azar_texto.randint(2, 8))
+        if azar_texto.random() < 0.1:
+            palabras.append(f"placa {azar_texto.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}{azar_texto.randrange(10**5, 10**6)}")
+        return " ".join(palabras)
+
+    folio = cursor.execute("SELECT IFNULL(MAX(folio), 0) + 1 FROM notas").fetchone()[0]
+    ultimo_id = cursor.execute("SELECT IFNULL(MAX(id), 0) FROM detalles_nota").fetchone()[0]
+    filas_notas, filas_detalles = [], []
+    resultado = {"clientes": clientes, "servicios": servicios, "notas": 0, "lineas": 0}
+
+    def guardar():
+        cursor.executemany("INSERT INTO notas (folio, dia, cliente_clave, cancelada) VALUES (?, ?, ?, ?)",
+                           filas_notas)
+        cursor.executemany(
+            "INSERT INTO detalles_nota (folio, servicio_clave, observaciones, costo) VALUES (?, ?, ?, ?)",
+            filas_detalles)
+        resultado["notas"] += len(filas_notas)
+        resultado["lineas"] += len(filas_detalles)
+        filas_notas.clear()
+        filas_detalles.clear()
+
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        with triggers_suspendidos(cursor, "datos sintéticos"):
+            for i in dias_notas:
+                cliente = azar.choices(claves_cliente, cum_weights=pesos_cliente)[0]
+                filas_notas.append((folio, a_dia(fechas[i]), cliente, int(azar.random() < fraccion_canceladas)))
+                n_lineas = azar.choices(range(1, len(pesos_lineas) + 1), cum_weights=pesos_lineas)[0]
+                for clave, costo in azar.choices(servicios_costo, cum_weights=pesos_servicio, k=n_lineas):
+                    filas_detalles.append((folio, clave, observaciones(), costo))
+                folio += 1
+                if len(filas_detalles) >= LOTE_GENERACION:
+                    guardar()
+            guardar()
+            indexar_observaciones(conn, ultimo_id)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    reconstruir_resumen(conn)
+    marcar_cambios(conn)
+    return resultado
+
+
+def generar_taller(conn, lineas=100_000, dias=3 * 365, semilla=42, fraccion_canceladas=0.03,
+                   fraccion_observaciones=0.0):
+    # Taller sintético sesgado (generar_datos con sesgado=True) de unas `lineas` líneas de
+    # detalle; el número de clientes y de servicios crece con la escala
+    lineas_por_nota = sum(n * p for n, p in enumerate(PESOS_LINEAS, start=1)) / sum(PESOS_LINEAS)
+    return generar_datos(conn, clientes=max(50, lineas // 40), servicios=min(400, max(20, lineas // 5000)),
+                         notas=round(lineas / lineas_por_nota), max_lineas=len(PESOS_LINEAS), dias=dias,
+                         semilla=semilla, sesgado=True, fraccion_canceladas=fraccion_canceladas,
+                         fraccion_observaciones=fraccion_observaciones)
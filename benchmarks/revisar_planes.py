@@ -0,0 +1,83 @@
+# Revisión de los planes de las consultas de notas: corre los reportes y listados del menú sobre
+# una base sintética de tres años con el más antiguo archivado (ver particiones.py), toma cada
+# sentencia que ejecutan (set_trace_callback, con los parámetros ya puestos) y revisa con EXPLAIN
+# QUERY PLAN que notas y detalles_nota se lean por sus índices, en la base y en el archivo.
+# Una migración que reconstruya las tablas sin sus índices, o una consulta nueva que las recorra
+# completas, hace que termine con código 1.
+# Uso: python -m benchmarks.revisar_planes
+import re
+import sys
+from datetime import date
+
+from benchmarks.utilidades import directorio_temporal, entradas_simuladas
+from benchmarks.datos_sinteticos import generar_datos
+
+import Main
+import api
+import particiones
+
+# Alias con que las vistas de particiones.py leen cada tabla -> índices aceptados. La llave
+# primaria cuenta para las consultas por folio.
+INDICES = {
+    "n": ("idx_notas_cancelada_dia", "INTEGER PRIMARY KEY"),
+    "d": ("idx_detalles_folio",),
+    "notas": ("idx_notas_cancelada_dia", "INTEGER PRIMARY KEY"),
+    "detalles_nota": ("idx_detalles_folio",),
+}
+_PASO = re.compile(r"^(SCAN|SEARCH) (?:\w+\.)?(\w+)\b")
+
+
+def consultas(conn, periodo):
+    # Sentencias que ejecutan los reportes y listados, sin caché y en una sola pasada
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    try:
+        for reporte in (api.reporte_periodo, api.tendencia_central, api.dispersion):
+            reporte.__wrapped__(*periodo)
+        api.frecuencias_totales(conn, *periodo)
+        api.pagina_notas()
+        api.pagina_notas(cancelada=True)
+        folio = api.pagina_notas().elementos[0][0]
+        api.obtener_nota(folio)
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in sentencias if s.lstrip().upper().startswith("SELECT")]
+
+
+def problemas(conn, sql):
+    # Pasos del plan que leen notas o detalles_nota sin uno de sus índices
+    malos = []
+    for *_, paso in conn.execute("EXPLAIN QUERY PLAN " + sql):
+        coincidencia = _PASO.match(paso)
+        if not coincidencia or coincidencia.group(2) not in INDICES:
+            continue
+        if coincidencia.group(1) == "SCAN" or not any(i in paso for i in INDICES[coincidencia.group(2)]):
+            malos.append(paso)
+    return malos
+
+
+def ejecutar():
+    resultados = []
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        conn = Main.conectar_db()
+        generar_datos(conn, notas=3000, dias=3 * 365)
+        particiones.archivar_anio(date.today().year - 2)
+        conn.execute("ANALYZE")
+        conn.commit()
+        periodo = (api.fecha_mas_antigua(), api.validar_fecha(None))
+        for sql in consultas(conn, periodo):
+            resultados.append((" ".join(sql.split()), problemas(conn, sql)))
+    return resultados
+
+
+if __name__ == "__main__":
+    resultados = ejecutar()
+    fallas = [(sql, malos) for sql, malos in resultados if malos]
+    for sql, malos in fallas:
+        print(f"SIN ÍNDICE: {sql[:100]}")
+        for paso in malos:
+            print(f"    {paso}")
+    print(f"{len(resultados)} consultas revisadas, {len(fallas)} sin índice")
+    sys.exit(1 if fallas else 0)
@@ -0,0 +1,164 @@
+# Suite de benchmarks de los reportes y escrituras del menú (Main.py) sobre un taller sintético
+# (datos_sinteticos.generar_taller) de la escala pedida. Cada reporte se mide para todo el historial
+# y para el último mes, sin caché (se vacía antes de cada llamada, fuera del tiempo) y con la caché
+# llena; después se registran y cancelan notas. Los resultados se guardan en JSON con el commit, el
+# entorno y la escala, y `comparar` marca las operaciones que empeoraron entre dos archivos.
+# Uso: python -m benchmarks.suite ejecutar [--lineas 100000] [--repeticiones 10] [--salida suite.json]
+#      python -m benchmarks.suite comparar anterior.json nuevo.json [--umbral 0.1]
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.utilidades import RAIZ, directorio_temporal, entradas_simuladas, medir, resumen_latencias
+from benchmarks.datos_sinteticos import generar_taller
+
+import Main
+import api
+import conexion
+
+FORMATO = 1
+
+# Reportes del menú: (nombre, función, respuestas después de las dos fechas del período)
+REPORTES = [
+    ("consulta_por_periodo", Main.consulta_por_periodo, ["n"]),   # sin exportar
+    ("estadistica_tendencia_central", Main.estadistica_tendencia_central, []),
+    ("estadistica_dispersion", Main.estadistica_dispersion, []),
+    ("servicio_mas_prestado", Main.servicio_mas_prestado, ["", ""]),   # lugares y criterio por omisión
+    ("cliente_con_mas_servicios", Main.cliente_con_mas_servicios, ["", ""]),
+]
+
+
+def _periodos():
+    # Respuestas de pedir_periodo: ENTER usa la fecha más antigua y la actual
+    hace_un_mes = (date.today() - timedelta(days=30)).strftime("%m-%d-%Y")
+    return {"historial": ["", ""], "ultimo_mes": [hace_un_mes, ""]}
+
+
+def _commit():
+    # Commit actual (con "-sucio" si hay cambios sin confirmar), o None fuera de un repositorio git
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        cambios = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-sucio" if cambios else "")
+
+
+def _en_menu(funcion, respuestas):
+    def llamar():
+        with entradas_simuladas(respuestas):
+            funcion()
+    return llamar
+
+
+def ejecutar(lineas, repeticiones, semilla=42):
+    operaciones = {}
+    with directorio_temporal():
+        with entradas_simuladas([]):
+            Main.crear_tablas()
+        conn = Main.conectar_db()
+        inicio = time.perf_counter()
+        escala = generar_taller(conn, lineas, semilla=semilla)
+        escala.update(lineas_pedidas=lineas, semilla=semilla, segundos_generacion=time.perf_counter() - inicio)
+
+        for periodo, fechas in _periodos().items():
+            for nombre, funcion, respuestas in REPORTES:
+                llamar = _en_menu(funcion, fechas + respuestas)
+                operaciones[f"{nombre}/{periodo}"] = medir(llamar, repeticiones, api.CACHE_REPORTES.vaciar)
+                llamar()
+                operaciones[f"{nombre}/{periodo}/cache"] = medir(llamar, repeticiones)
+
+        # Escrituras: una nota de dos servicios para el cliente 1 y cancelaciones de notas activas al azar
+        servicios = [str(fila[0]) for fila in conn.execute("SELECT clave FROM servicios ORDER BY clave LIMIT 2")]
+        operaciones["registrar_nota"] = medir(
+            _en_menu(Main.registrar_nota, ["", "1", "", servicios[0], "", servicios[1], "", ""]), repeticiones)
+        activas = [str(fila[0]) for fila in conn.execute("SELECT folio FROM notas WHERE cancelada = 0")]
+        folios = iter(random.Random(semilla).sample(activas, repeticiones))
+        operaciones["cancelar_nota"] = medir(lambda: _en_menu(Main.cancelar_nota, [next(folios), "s"])(),
+                                             repeticiones)
+        conexion.cerrar_conexiones()
+
+    return {
+        "formato": FORMATO,
+        "commit": _commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                    "plataforma": platform.platform()},
+        "escala": escala,
+        "repeticiones": repeticiones,
+        "operaciones": {nombre: {**resumen_latencias(tiempos), "min_ms": min(tiempos)}
+                        for nombre, tiempos in operaciones.items()},
+    }
+
+
+def comparar(anterior, nuevo, umbral=0.1, minimo_ms=0.5):
+    # [(operación, p50 anterior, p50 nuevo, cambio relativo, ¿regresión?)]. Una operación empeora si
+    # su p50 sube más que el umbral relativo y más que minimo_ms (para no marcar ruido en las rápidas).
+    filas = []
+    for nombre, datos in nuevo["operaciones"].items():
+        if nombre not in anterior["operaciones"]:
+            continue
+        antes, despues = anterior["operaciones"][nombre]["p50_ms"], datos["p50_ms"]
+        cambio = (despues - antes) / antes if antes else 0.0
+        filas.append((nombre, antes, despues, cambio, cambio > umbral and despues - antes > minimo_ms))
+    return filas
+
+
+def imprimir_resultados(resultados):
+    escala = resultados["escala"]
+    print(f"Commit {resultados['commit']} | {escala['notas']} notas, {escala['lineas']} líneas, "
+          f"{escala['clientes']} clientes, {escala['servicios']} servicios "
+          f"(generados en {escala['segundos_generacion']:.1f} s)")
+    for nombre, datos in resultados["operaciones"].items():
+        print(f"  {nombre:<48} p50 {datos['p50_ms']:9.2f} ms | p99 {datos['p99_ms']:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de los reportes y escrituras del menú.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    correr = comandos.add_parser("ejecutar")
+    correr.add_argument("--lineas", type=int, default=100_000, help="líneas de detalle a generar (1k a 10M)")
+    correr.add_argument("--repeticiones", type=int, default=10)
+    correr.add_argument("--semilla", type=int, default=42)
+    correr.add_argument("--salida", default="suite.json")
+    contra = comandos.add_parser("comparar")
+    contra.add_argument("anterior")
+    contra.add_argument("nuevo")
+    contra.add_argument("--umbral", type=float, default=0.1, help="aumento relativo del p50 que cuenta como regresión")
+    args = parser.parse_args()
+
+    if args.comando == "ejecutar":
+        resultados = ejecutar(args.lineas, args.repeticiones, args.semilla)
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        imprimir_resultados(resultados)
+        print(f"Resultados guardados en {args.salida}")
+        return
+
+    with open(args.anterior, encoding="utf-8") as archivo:
+        anterior = json.load(archivo)
+    with open(args.nuevo, encoding="utf-8") as archivo:
+        nuevo = json.load(archivo)
+    if (anterior["escala"]["lineas_pedidas"], anterior["escala"]["semilla"]) != \
+            (nuevo["escala"]["lineas_pedidas"], nuevo["escala"]["semilla"]):
+        print("Aviso: los archivos se generaron con distinta escala o semilla.")
+    print(f"{anterior['commit']} -> {nuevo['commit']}")
+    filas = comparar(anterior, nuevo, args.umbral)
+    for nombre, antes, despues, cambio, regresion in filas:
+        print(f"  {nombre:<48} {antes:9.2f} ms -> {despues:9.2f} ms ({cambio:+.0%})"
+              + ("  REGRESIÓN" if regresion else ""))
+    regresiones = sum(fila[4] for fila in filas)
+    print(f"{regresiones} regresiones con umbral de {args.umbral:.0%}.")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
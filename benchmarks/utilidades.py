@@ -0,0 +1,57 @@
+import builtins
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+# Permite importar Main.py y los demás módulos de la raíz del proyecto
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+@contextlib.contextmanager
+def entradas_simuladas(respuestas):
+    # Sustituye input() por una lista de respuestas y descarta lo que se imprime
+    pendientes = iter(respuestas)
+    original = builtins.input
+    builtins.input = lambda mensaje="": next(pendientes)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = original
+
+
+@contextlib.contextmanager
+def directorio_temporal():
+    # Main.py trabaja con "taller.db" relativo, así que cada benchmark corre en su propia carpeta
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory() as carpeta:
+        os.chdir(carpeta)
+        try:
+            yield carpeta
+        finally:
+            os.chdir(anterior)
+
+
+def medir(funcion, repeticiones, preparar=None):
+    # Devuelve la latencia de cada llamada en milisegundos; preparar (si se da) corre antes de
+    # cada llamada y no se cuenta
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def resumen_latencias(tiempos):
+    ordenados = sorted(tiempos)
+    p50 = ordenados[len(ordenados) // 2]
+    p99 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.99))]
+    return {"media_ms": sum(ordenados) / len(ordenados), "p50_ms": p50, "p99_ms": p99}
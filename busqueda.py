@@ -0,0 +1,330 @@
+# Búsqueda de texto completo (FTS5) en clientes (apellidos, nombres y teléfono), nombres de
+# servicios y observaciones de las notas, con resultados ordenados por relevancia (BM25) y por
+# páginas. Los índices se mantienen con triggers; ninguno distingue mayúsculas ni acentos. Se buscan
+# las líneas con todas las palabras; una palabra terminada en * es un prefijo ("gar*" encuentra
+# "garantía"). Los prefijos de 2 a 4 letras tienen su propio índice; uno más largo de una palabra
+# muy común tarda más, porque FTS5 junta las listas de todas las palabras que empiezan así.
+# bm25() solo puntúa las CANDIDATAS coincidencias más recientes, y solo si hay a lo más
+# MAX_RELEVANCIA; las demás van en orden de registro. Así una palabra que está en cientos de miles
+# de observaciones tarda lo mismo que una que está en unas miles.
+# El índice de observaciones no guarda el texto (contentless): el texto se lee de todos_detalles.
+# Como los resúmenes, cubre las notas archivadas y depuradas: al mover notas entre la base y un
+# archivo particiones.py suspende los triggers de detalles_nota, y el índice conserva sus líneas
+# (el id de una línea no cambia al moverla). El taller sintético y la importación masiva cargan
+# con los triggers suspendidos e indexan lo cargado (indexar_observaciones).
+# Uso: python busqueda.py buscar "frenos delanteros" [--en notas|clientes|servicios] [--pagina 2]
+#      python busqueda.py reconstruir
+import argparse
+import re
+import sys
+import time
+import unicodedata
+from dataclasses import dataclass
+
+import conexion
+from api import TAMANO_PAGINA, ErrorTaller, Cliente, Pagina, Servicio, _pagina
+from suspension import ACTIVOS
+
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+# Pesos de bm25 por columna: una coincidencia en los apellidos pesa más que en nombres o teléfono
+PESOS_CLIENTES = "2.0, 1.0, 1.0"
+# Coincidencias más recientes que se ordenan por relevancia, y cuántas puede haber en total para
+# que se ordenen (ver _por_relevancia)
+CANDIDATAS = 200
+MAX_RELEVANCIA = 20000
+_SIN_LIMITE = 2 ** 63 - 1
+
+ESQUEMA_BUSQUEDA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_clientes USING fts5(
+        apellidos, nombres, telefono,
+        content='clientes', content_rowid='clave', tokenize='{TOKENIZADOR}', prefix='2 3 4'
+    )""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_servicios USING fts5(
+        nombre, content='servicios', content_rowid='clave', tokenize='{TOKENIZADOR}', prefix='2 3 4'
+    )""",
+    # rowid = id de la línea en detalles_nota; solo las líneas con observaciones
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_observaciones USING fts5(
+        observaciones, content='', tokenize='{TOKENIZADOR}', prefix='2 3 4'
+    )""",
+
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_clientes_insert
+    AFTER INSERT ON clientes
+    BEGIN
+        INSERT INTO busqueda_clientes (rowid, apellidos, nombres, telefono)
+        VALUES (NEW.clave, NEW.apellidos, NEW.nombres, NEW.telefono);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_clientes_update
+    AFTER UPDATE OF apellidos, nombres, telefono ON clientes
+    BEGIN
+        INSERT INTO busqueda_clientes (busqueda_clientes, rowid, apellidos, nombres, telefono)
+        VALUES ('delete', OLD.clave, OLD.apellidos, OLD.nombres, OLD.telefono);
+        INSERT INTO busqueda_clientes (rowid, apellidos, nombres, telefono)
+        VALUES (NEW.clave, NEW.apellidos, NEW.nombres, NEW.telefono);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_clientes_delete
+    AFTER DELETE ON clientes
+    BEGIN
+        INSERT INTO busqueda_clientes (busqueda_clientes, rowid, apellidos, nombres, telefono)
+        VALUES ('delete', OLD.clave, OLD.apellidos, OLD.nombres, OLD.telefono);
+    END""",
+
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_servicios_insert
+    AFTER INSERT ON servicios
+    BEGIN
+        INSERT INTO busqueda_servicios (rowid, nombre) VALUES (NEW.clave, NEW.nombre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_servicios_update
+    AFTER UPDATE OF nombre ON servicios
+    BEGIN
+        INSERT INTO busqueda_servicios (busqueda_servicios, rowid, nombre) VALUES ('delete', OLD.clave, OLD.nombre);
+        INSERT INTO busqueda_servicios (rowid, nombre) VALUES (NEW.clave, NEW.nombre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_servicios_delete
+    AFTER DELETE ON servicios
+    BEGIN
+        INSERT INTO busqueda_servicios (busqueda_servicios, rowid, nombre) VALUES ('delete', OLD.clave, OLD.nombre);
+    END""",
+
+    # Un índice sin contenido solo puede borrar una fila con el texto exacto que se indexó
+    f"""CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_insert
+    AFTER INSERT ON detalles_nota
+    WHEN {ACTIVOS} AND NEW.observaciones <> ''
+    BEGIN
+        INSERT INTO busqueda_observaciones (rowid, observaciones) VALUES (NEW.id, NEW.observaciones);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_update
+    AFTER UPDATE OF observaciones ON detalles_nota
+    WHEN {ACTIVOS}
+    BEGIN
+        INSERT INTO busqueda_observaciones (busqueda_observaciones, rowid, observaciones)
+        SELECT 'delete', OLD.id, OLD.observaciones WHERE OLD.observaciones <> '';
+        INSERT INTO busqueda_observaciones (rowid, observaciones)
+        SELECT NEW.id, NEW.observaciones WHERE NEW.observaciones <> '';
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_delete
+    AFTER DELETE ON detalles_nota
+    WHEN {ACTIVOS} AND OLD.observaciones <> ''
+    BEGIN
+        INSERT INTO busqueda_observaciones (busqueda_observaciones, rowid, observaciones)
+        VALUES ('delete', OLD.id, OLD.observaciones);
+    END""",
+]
+
+
+@dataclass
+class Coincidencia:
+    # Línea de una nota cuyas observaciones coinciden con la búsqueda
+    folio: int
+    fecha: str
+    cliente_clave: int
+    cliente: str
+    cancelada: bool
+    servicio: str
+    observaciones: str
+
+
+def indexar_observaciones(conn, desde_id=0):
+    # Indexa las observaciones de las líneas de la base con id > desde_id (cargadas sin triggers)
+    conn.execute("""
+        INSERT INTO busqueda_observaciones (rowid, observaciones)
+        SELECT id, observaciones FROM main.detalles_nota WHERE id > ? AND observaciones <> ''
+    """, (desde_id,))
+
+
+def reconstruir_busqueda(conn):
+    # Rehace los tres índices; las observaciones se toman de la base y de los archivos adjuntos
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO busqueda_clientes (busqueda_clientes) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO busqueda_servicios (busqueda_servicios) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO busqueda_observaciones (busqueda_observaciones) VALUES ('delete-all')")
+    cursor.execute("""
+        INSERT INTO busqueda_observaciones (rowid, observaciones)
+        SELECT id, observaciones FROM todos_detalles WHERE observaciones <> ''
+    """)
+    # Junta los segmentos del índice en uno solo: las búsquedas leen menos páginas
+    for tabla in ("busqueda_clientes", "busqueda_servicios", "busqueda_observaciones"):
+        cursor.execute(f"INSERT INTO {tabla} ({tabla}) VALUES ('optimize')")
+    conn.commit()
+
+
+class _SinAcentos(dict):
+    # Tabla para str.translate que quita los acentos; cada carácter se calcula una sola vez
+    def __missing__(self, codigo):
+        letras = "".join(c for c in unicodedata.normalize("NFD", chr(codigo)) if not unicodedata.combining(c))
+        self[codigo] = letras
+        return letras
+
+
+_SIN_ACENTOS = _SinAcentos()
+
+
+def _normalizar(texto):
+    # Como el tokenizador: minúsculas y sin acentos
+    texto = texto.lower()
+    return texto if texto.isascii() else texto.translate(_SIN_ACENTOS)
+
+
+def _palabras(texto):
+    # [(palabra, es_prefijo)] del texto buscado
+    palabras = [(_normalizar(p), bool(prefijo)) for p, prefijo in re.findall(r"([^\W_]+)(\*?)", texto or "")]
+    if not palabras:
+        raise ErrorTaller("Escriba al menos una palabra para buscar.")
+    return palabras
+
+
+def consulta_fts(texto):
+    # Texto libre -> consulta FTS5: todas las palabras, sin operadores; "gar*" queda como prefijo
+    return " ".join(f'"{palabra}"' + ("*" if prefijo else "") for palabra, prefijo in _palabras(texto))
+
+
+def _por_relevancia(conn, tabla, consulta, pesos, despues, limite):
+    # rowids de una página de coincidencias. Las CANDIDATAS más recientes (rowid mayor) van primero,
+    # de la más relevante a la menos (bm25 de FTS5); las demás siguen de la más reciente a la más
+    # antigua. bm25 recorre una vez la lista completa de cada palabra para saber qué tan común es,
+    # así que con más de MAX_RELEVANCIA coincidencias no se usa: todas van en orden de registro y la
+    # página lo avisa.
+    # La llave es (desplazamiento,) mientras la página termina dentro de las candidatas y
+    # (desplazamiento, rowid) después: las más antiguas se piden por rowid, sin volver a recorrer
+    # las anteriores. Con solo el desplazamiento (una página pedida por número) también se llega,
+    # recorriendo el índice.
+    desplazamiento = despues[0] if despues else 0
+    candidatas, aviso = [], None
+    if despues and len(despues) > 1:
+        antes_de, saltar = despues[1], 0
+    elif conn.execute(f"""
+        SELECT 1 FROM {tabla} WHERE {tabla} MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?
+    """, (consulta, MAX_RELEVANCIA)).fetchone():
+        antes_de, saltar = _SIN_LIMITE, desplazamiento
+        aviso = (f"Más de {MAX_RELEVANCIA:,} coincidencias: se muestran de la más reciente a la más antigua. "
+                 "Agregue palabras para ordenarlas por relevancia.")
+    elif desplazamiento < CANDIDATAS:
+        candidatas = conn.execute(f"""
+            SELECT rowid, bm25({tabla}, {pesos}) FROM {tabla} WHERE {tabla} MATCH ?
+            ORDER BY rowid DESC LIMIT ?
+        """, (consulta, CANDIDATAS)).fetchall()
+        antes_de = candidatas[-1][0] if len(candidatas) == CANDIDATAS else None
+        candidatas.sort(key=lambda fila: (fila[1], -fila[0]))
+        saltar = 0
+    else:
+        antes_de = conn.execute(f"""
+            SELECT rowid FROM {tabla} WHERE {tabla} MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?
+        """, (consulta, CANDIDATAS - 1)).fetchone()[0]
+        saltar = desplazamiento - CANDIDATAS
+    rowids = [fila[0] for fila in candidatas[desplazamiento:desplazamiento + limite + 1]]
+    if len(rowids) <= limite and antes_de is not None:
+        # La página llega al final de las candidatas (o no hay): se completa con las más antiguas
+        rowids += _anteriores(conn, tabla, consulta, antes_de, saltar, limite + 1 - len(rowids))
+    siguiente = desplazamiento + limite
+    pagina = _pagina(rowids, limite,
+                     lambda ultimo: (siguiente,) if siguiente <= len(candidatas) else (siguiente, ultimo))
+    pagina.aviso = aviso
+    return pagina
+
+
+def _anteriores(conn, tabla, consulta, antes_de, saltar, limite):
+    # rowids de las coincidencias con rowid < antes_de, de la más reciente a la más antigua
+    return [fila[0] for fila in conn.execute(f"""
+        SELECT rowid FROM {tabla} WHERE {tabla} MATCH ? AND rowid < ?
+        ORDER BY rowid DESC LIMIT ? OFFSET ?
+    """, (consulta, antes_de, limite, saltar))]
+
+
+def _en_orden(pagina, filas, clase):
+    # Las filas leídas por clave, en el orden de la página (las que ya no existen se omiten)
+    por_clave = {fila[0]: fila for fila in filas}
+    pagina.elementos = [clase(*por_clave[c]) for c in pagina.elementos if c in por_clave]
+    return pagina
+
+
+def _marcas(claves):
+    return ", ".join("?" * len(claves))
+
+
+def buscar_clientes(texto, despues=None, limite=TAMANO_PAGINA, nombre_db=None) -> Pagina:
+    # Clientes (activos y suspendidos) por apellidos, nombres o teléfono
+    conn = conexion.obtener_conexion(nombre_db)
+    pagina = _por_relevancia(conn, "busqueda_clientes", consulta_fts(texto), PESOS_CLIENTES, despues, limite)
+    filas = conn.execute(f"""
+        SELECT clave, apellidos, nombres, telefono, suspendido FROM clientes WHERE clave IN ({_marcas(pagina.elementos)})
+    """, pagina.elementos).fetchall()
+    return _en_orden(pagina, filas, Cliente)
+
+
+def buscar_servicios(texto, despues=None, limite=TAMANO_PAGINA, nombre_db=None) -> Pagina:
+    # Servicios (activos y suspendidos) por nombre
+    conn = conexion.obtener_conexion(nombre_db)
+    pagina = _por_relevancia(conn, "busqueda_servicios", consulta_fts(texto), "1.0", despues, limite)
+    filas = conn.execute(f"""
+        SELECT clave, nombre, costo, suspendido FROM servicios WHERE clave IN ({_marcas(pagina.elementos)})
+    """, pagina.elementos).fetchall()
+    return _en_orden(pagina, filas, Servicio)
+
+
+def buscar_notas(texto, despues=None, limite=TAMANO_PAGINA, nombre_db=None) -> Pagina:
+    # Líneas de notas (de la base, archivadas o depuradas) por sus observaciones
+    conn = conexion.obtener_conexion(nombre_db)
+    pagina = _por_relevancia(conn, "busqueda_observaciones", consulta_fts(texto), "1.0", despues, limite)
+    filas = conn.execute(f"""
+        SELECT d.id, d.folio, d.fecha, d.cliente_clave, c.apellidos || ' ' || c.nombres, d.cancelada,
+               s.nombre, d.observaciones
+        FROM todos_detalles d
+        JOIN clientes c ON c.clave = d.cliente_clave
+        JOIN servicios s ON s.clave = d.servicio_clave
+        WHERE d.id IN ({_marcas(pagina.elementos)})
+    """, pagina.elementos).fetchall()
+    return _en_orden(pagina, filas, _coincidencia)
+
+
+def _coincidencia(_, folio, fecha, cliente_clave, cliente, cancelada, servicio, observaciones):
+    return Coincidencia(folio, fecha, cliente_clave, cliente, bool(cancelada), servicio, observaciones)
+
+
+BUSQUEDAS = {"notas": buscar_notas, "clientes": buscar_clientes, "servicios": buscar_servicios}
+
+
+def mostrar(elemento):
+    if isinstance(elemento, Coincidencia):
+        estado = " (cancelada)" if elemento.cancelada else ""
+        print(f"Folio {elemento.folio}{estado} | {elemento.fecha} | {elemento.cliente} | "
+              f"{elemento.servicio}: {elemento.observaciones}")
+    elif isinstance(elemento, Cliente):
+        estado = " (suspendido)" if elemento.suspendido else ""
+        print(f"{elemento.clave} - {elemento.apellidos} {elemento.nombres} | Tel. {elemento.telefono}{estado}")
+    else:
+        estado = " (suspendido)" if elemento.suspendido else ""
+        print(f"{elemento.clave} - {elemento.nombre} (${elemento.costo:.2f}){estado}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda de texto en clientes, servicios y observaciones.")
+    parser.add_argument("comando", choices=("buscar", "reconstruir"))
+    parser.add_argument("texto", nargs="?", default="")
+    parser.add_argument("--en", choices=tuple(BUSQUEDAS), default="notas")
+    parser.add_argument("--pagina", type=int, default=1)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    if args.comando == "reconstruir":
+        inicio = time.perf_counter()
+        reconstruir_busqueda(conexion.obtener_conexion(args.db))
+        print(f"Índices de búsqueda reconstruidos en {time.perf_counter() - inicio:.2f} s.")
+        return
+    try:
+        inicio = time.perf_counter()
+        pagina = BUSQUEDAS[args.en](args.texto, ((args.pagina - 1) * TAMANO_PAGINA,) if args.pagina > 1 else None,
+                                    nombre_db=args.db)
+    except ErrorTaller as e:
+        print(e)
+        sys.exit(1)
+    if pagina.aviso:
+        print(pagina.aviso)
+    for elemento in pagina.elementos:
+        mostrar(elemento)
+    if not pagina.elementos:
+        print("Sin resultados.")
+    print(f"({(time.perf_counter() - inicio) * 1000:.1f} ms" +
+          (f"; hay más resultados: --pagina {args.pagina + 1})" if pagina.siguiente else ")"))
+
+
+if __name__ == "__main__":
+    main()
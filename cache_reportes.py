@@ -0,0 +1,146 @@
+# Caché persistente de resultados de reportes por período, en un archivo SQLite aparte
+# (taller.db -> taller.cache.db) para no escribir en la base en uso al consultar.
+# La llave es (reporte, fecha_inicio, fecha_fin). Cada resultado guarda la versión más alta de
+# cambios_fecha dentro de su rango al momento de calcularse (ver cambios.py): si después se
+# registra, cancela o recupera una nota de ese rango, la versión cambia y el resultado se
+# recalcula; los cambios fuera del rango no lo afectan.
+# Cuando el archivo rebasa limite_bytes se desalojan los resultados usados hace más tiempo.
+# La hora de uso se anota con resolución de RESOLUCION_USO segundos, para que leer un resultado
+# guardado no tenga que escribir en el archivo cada vez.
+import json
+import os
+import threading
+import time
+
+import conexion
+
+LIMITE_BYTES = 50 * 2**20
+RESOLUCION_USO = 60
+# Se incrementa cuando cambia el cálculo o el formato de algún reporte: al abrir una caché
+# de otra versión se descartan sus resultados
+VERSION = 2
+
+ESQUEMA = [
+    """CREATE TABLE IF NOT EXISTS resultados (
+        reporte TEXT NOT NULL,
+        fecha_inicio TEXT NOT NULL,
+        fecha_fin TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        valor TEXT NOT NULL,
+        tamano INTEGER NOT NULL,
+        usado REAL NOT NULL,
+        PRIMARY KEY (reporte, fecha_inicio, fecha_fin)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_resultados_usado ON resultados (usado)",
+]
+
+
+def ruta_cache(ruta_db=None):
+    base, _ = os.path.splitext(ruta_db or conexion.RUTA_DB)
+    return base + ".cache.db"
+
+
+# Los dataclasses se guardan como listas de valores en el orden de sus campos: ocupan menos que
+# un objeto por fila y se reconstruyen con tipo(*valores). Un reporte sin resultado queda como null.
+def _a_json(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, list):
+        return {"filas": [list(v.__dict__.values()) for v in valor]}
+    return {"valor": list(valor.__dict__.values())}
+
+
+def _de_json(datos, tipo):
+    if datos is None:
+        return None
+    if "filas" in datos:
+        return [tipo(*fila) for fila in datos["filas"]]
+    return tipo(*datos["valor"])
+
+
+class CacheReportes:
+    def __init__(self, limite_bytes=LIMITE_BYTES):
+        self.limite_bytes = limite_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._preparadas = set()
+        self._candado = threading.Lock()
+
+    def _conexion(self):
+        # Ruta absoluta: con RUTA_DB relativa, el mismo nombre puede ser otro archivo tras un chdir
+        ruta = os.path.abspath(ruta_cache())
+        conn = conexion.obtener_conexion(ruta)
+        if ruta not in self._preparadas:
+            for sentencia in ESQUEMA:
+                conn.execute(sentencia)
+            if conn.execute("PRAGMA user_version").fetchone()[0] != VERSION:
+                conn.execute("DELETE FROM resultados")
+                conn.execute(f"PRAGMA user_version = {VERSION}")
+            conn.commit()
+            self._preparadas.add(ruta)
+        return conn
+
+    def version_rango(self, fecha_inicio, fecha_fin):
+        return conexion.obtener_conexion().execute(
+            "SELECT IFNULL(MAX(version), 0) FROM cambios_fecha WHERE fecha BETWEEN ? AND ?",
+            (fecha_inicio, fecha_fin)).fetchone()[0]
+
+    def obtener(self, reporte, tipo, calcular, fecha_inicio, fecha_fin):
+        cache = self._conexion()
+        # La versión se lee antes de calcular: si una nota cambia mientras tanto, el resultado
+        # queda guardado con la versión anterior y la siguiente consulta lo recalcula
+        version = self.version_rango(fecha_inicio, fecha_fin)
+        llave = (reporte, fecha_inicio, fecha_fin)
+
+        fila = cache.execute("""
+            SELECT valor, usado FROM resultados
+            WHERE reporte = ? AND fecha_inicio = ? AND fecha_fin = ? AND version = ?
+        """, (*llave, version)).fetchone()
+        if fila is not None:
+            ahora = time.time()
+            if ahora - fila[1] >= RESOLUCION_USO:
+                cache.execute("UPDATE resultados SET usado = ? WHERE reporte = ? AND fecha_inicio = ? AND fecha_fin = ?",
+                              (ahora, *llave))
+                cache.commit()
+            with self._candado:
+                self.aciertos += 1
+            return _de_json(json.loads(fila[0]), tipo)
+
+        with self._candado:
+            self.fallos += 1
+        valor = calcular(fecha_inicio, fecha_fin)
+        texto = json.dumps(_a_json(valor))
+        if len(texto) <= self.limite_bytes:
+            cache.execute("""
+                INSERT OR REPLACE INTO resultados (reporte, fecha_inicio, fecha_fin, version, valor, tamano, usado)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (*llave, version, texto, len(texto), time.time()))
+            self._desalojar(cache)
+            cache.commit()
+        return valor
+
+    def _desalojar(self, cache):
+        total = cache.execute("SELECT IFNULL(SUM(tamano), 0) FROM resultados").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        for reporte, fecha_inicio, fecha_fin, tamano in cache.execute(
+                "SELECT reporte, fecha_inicio, fecha_fin, tamano FROM resultados ORDER BY usado").fetchall():
+            cache.execute("DELETE FROM resultados WHERE reporte = ? AND fecha_inicio = ? AND fecha_fin = ?",
+                          (reporte, fecha_inicio, fecha_fin))
+            with self._candado:
+                self.desalojos += 1
+            total -= tamano
+            if total <= self.limite_bytes:
+                break
+
+    def vaciar(self):
+        cache = self._conexion()
+        cache.execute("DELETE FROM resultados")
+        cache.commit()
+
+    def estadisticas(self):
+        entradas, tamano = self._conexion().execute(
+            "SELECT COUNT(*), IFNULL(SUM(tamano), 0) FROM resultados").fetchone()
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "desalojos": self.desalojos,
+                "entradas": entradas, "bytes": tamano}
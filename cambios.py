@@ -0,0 +1,73 @@
+# Registro de las fechas cuyas notas cambiaron. Cada fecha guarda el número de versión del
+# último cambio; quien necesite saber qué cambió (la instantánea Parquet, por ejemplo) guarda la
+# versión que ya procesó y pide las fechas con una versión mayor. La tabla tiene a lo más una
+# fila por día, así que no crece con el número de notas.
+from conexion import obtener_conexion
+from fechas import rango_dias
+from suspension import ACTIVOS
+
+_SIGUIENTE_VERSION = "(SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha)"
+
+
+def _trigger(nombre, evento, tabla, fechas):
+    # fechas: SELECT que devuelve las fechas afectadas por la fila modificada
+    return f"""CREATE TRIGGER IF NOT EXISTS {nombre}
+    AFTER {evento} ON {tabla}
+    WHEN {ACTIVOS}
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, {_SIGUIENTE_VERSION} FROM ({fechas}) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END"""
+
+
+ESQUEMA_CAMBIOS = [
+    """CREATE TABLE IF NOT EXISTS cambios_fecha (
+        fecha TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_cambios_fecha_version ON cambios_fecha (version)",
+
+    _trigger("trg_cambios_nota_insert", "INSERT", "notas", "SELECT NEW.fecha AS fecha"),
+    _trigger("trg_cambios_nota_update", "UPDATE", "notas",
+             "SELECT OLD.fecha AS fecha UNION SELECT NEW.fecha"),
+    _trigger("trg_cambios_nota_delete", "DELETE", "notas", "SELECT OLD.fecha AS fecha"),
+    _trigger("trg_cambios_detalle_insert", "INSERT", "detalles_nota",
+             "SELECT fecha FROM notas WHERE folio = NEW.folio"),
+    _trigger("trg_cambios_detalle_update", "UPDATE", "detalles_nota",
+             "SELECT fecha FROM notas WHERE folio IN (OLD.folio, NEW.folio)"),
+    _trigger("trg_cambios_detalle_delete", "DELETE", "detalles_nota",
+             "SELECT fecha FROM notas WHERE folio = OLD.folio"),
+]
+
+
+def version_cambios(conn=None):
+    conn = conn or obtener_conexion()
+    return conn.execute("SELECT IFNULL(MAX(version), 0) FROM cambios_fecha").fetchone()[0]
+
+
+def fechas_cambiadas(conn, desde_version):
+    # Fechas modificadas después de desde_version, en orden
+    return [fila[0] for fila in conn.execute(
+        "SELECT fecha FROM cambios_fecha WHERE version > ? ORDER BY fecha", (desde_version,))]
+
+
+def marcar_cambios(conn, fecha_inicio="0000-01-01", fecha_fin="9999-12-31"):
+    # Para cargas que se hacen sin triggers (migraciones, datos sintéticos): marca como cambiadas
+    # todas las fechas con notas dentro del rango, con una sola versión nueva
+    conn.execute(f"""
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT DISTINCT fecha, {_SIGUIENTE_VERSION} FROM todas_notas WHERE dia BETWEEN ? AND ?
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version
+    """, rango_dias(fecha_inicio, fecha_fin))
+    conn.commit()
+
+
+def marcar_fechas(cursor, fechas):
+    # Para las cargas hechas con los triggers suspendidos (importación masiva): marca las fechas
+    # dadas con una sola versión nueva, dentro de la transacción en curso
+    version = cursor.execute(f"SELECT {_SIGUIENTE_VERSION}").fetchone()[0]
+    cursor.executemany("""
+        INSERT INTO cambios_fecha (fecha, version) VALUES (?, ?)
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version
+    """, [(fecha, version) for fecha in sorted(fechas)])
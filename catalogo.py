@@ -0,0 +1,114 @@
+# Caché en memoria de los catálogos activos (clientes y servicios), indexada por clave.
+# Se invalida de dos formas:
+#   - invalidar(): la llaman las altas, bajas y ediciones hechas en este proceso.
+#   - versiones_catalogo: un contador por tabla que suben los triggers de ESQUEMA_CATALOGO en
+#     cada alta, baja o edición, venga de donde venga (otro mostrador, otro hilo, una
+#     importación); si cambió desde la última lectura se descarta todo lo guardado. A diferencia
+#     de PRAGMA data_version, no cambia con las notas y vale igual para cualquier conexión.
+import threading
+from collections import OrderedDict
+
+CAPACIDAD = 1024
+TABLAS = ("clientes", "servicios")
+
+
+def _triggers_version(tabla):
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_catalogo_{tabla}_{evento.lower()}
+           AFTER {evento} ON {tabla}
+           BEGIN
+               UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = '{tabla}';
+           END"""
+        for evento in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+ESQUEMA_CATALOGO = [
+    """CREATE TABLE IF NOT EXISTS versiones_catalogo (
+        tabla TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    "INSERT OR IGNORE INTO versiones_catalogo (tabla) VALUES " + ", ".join(f"('{t}')" for t in TABLAS),
+    *(trigger for tabla in TABLAS for trigger in _triggers_version(tabla)),
+]
+
+
+class Catalogo:
+    # tabla es una de TABLAS; consulta_una recibe la clave y devuelve la fila activa o nada;
+    # consulta_todas devuelve las filas activas en el orden en que se muestran. Las filas se
+    # convierten con tipo(*fila).
+    def __init__(self, tabla, consulta_una, consulta_todas, tipo, capacidad=CAPACIDAD):
+        self.tabla = tabla
+        self.consulta_una = consulta_una
+        self.consulta_todas = consulta_todas
+        self.tipo = tipo
+        self.capacidad = capacidad
+        self.version = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._por_clave = OrderedDict()   # LRU: las usadas más recientemente quedan al final
+        self._todas = None
+        self._version_tabla = None   # último valor visto en versiones_catalogo
+        self._candado = threading.Lock()
+
+    def invalidar(self):
+        with self._candado:
+            self._invalidar()
+
+    def _invalidar(self):
+        self.version += 1
+        self._por_clave.clear()
+        self._todas = None
+
+    def _revisar(self, conn):
+        fila = conn.execute("SELECT version FROM versiones_catalogo WHERE tabla = ?", (self.tabla,)).fetchone()
+        actual = fila[0] if fila else None
+        if actual != self._version_tabla:
+            self._version_tabla = actual
+            self._invalidar()
+
+    def obtener(self, conn, clave):
+        # Devuelve el registro activo con esa clave, o None si no existe o está suspendido
+        try:
+            clave = int(clave)
+        except (TypeError, ValueError):
+            return None
+
+        with self._candado:
+            self._revisar(conn)
+            if clave in self._por_clave:
+                self._por_clave.move_to_end(clave)
+                self.aciertos += 1
+                return self._por_clave[clave]
+            self.fallos += 1
+            version = self.version
+
+        fila = conn.execute(self.consulta_una, (clave,)).fetchone()
+        registro = self.tipo(*fila) if fila else None
+
+        with self._candado:
+            # Si se invalidó mientras se consultaba, el resultado no se guarda
+            if self.version == version:
+                self._por_clave[clave] = registro
+                if len(self._por_clave) > self.capacidad:
+                    self._por_clave.popitem(last=False)
+        return registro
+
+    def activos(self, conn):
+        with self._candado:
+            self._revisar(conn)
+            if self._todas is not None:
+                self.aciertos += 1
+                return list(self._todas)
+            self.fallos += 1
+            version = self.version
+
+        todas = [self.tipo(*fila) for fila in conn.execute(self.consulta_todas)]
+        with self._candado:
+            if self.version != version:
+                return list(todas)
+            self._todas = todas
+            # Se aprovecha la lista completa para llenar las búsquedas por clave
+            for registro in todas[:self.capacidad]:
+                self._por_clave[registro.clave] = registro
+        return list(todas)
@@ -0,0 +1,190 @@
+# Cola de escritura con commits agrupados. Muchos productores (los hilos del servidor, por
+# ejemplo) encolan registros, cancelaciones y recuperaciones de notas; un solo hilo escritor los
+# junta en lotes (lo que se acumuló mientras se aplicaba el anterior más lo que llegue en
+# VENTANA_MS, hasta LOTE_MAXIMO) y aplica cada lote en una sola transacción. Cada pedido va en su
+# propio SAVEPOINT: uno que falle, por la razón que sea, se deshace sin tirar el lote. Cada productor recibe un Future que se resuelve después del COMMIT
+# con la nota registrada (con su folio) o con el folio cancelado o recuperado.
+# Si otra conexión (otro proceso) tiene la base ocupada, el escritor reintenta con espera
+# exponencial además del busy_timeout de la conexión.
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import api
+import conexion
+from api import ErrorTaller, Nota
+
+# Con 0 no se espera: con synchronous = NORMAL el COMMIT es barato y esperar solo agrega latencia
+VENTANA_MS = 0
+LOTE_MAXIMO = 256
+# Reintentos al encontrar la base ocupada: espera inicial, máxima (en segundos) y número de intentos
+ESPERA_INICIAL = 0.005
+ESPERA_MAXIMA = 0.5
+REINTENTOS = 8
+
+
+def _ocupada(error):
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+
+def con_reintentos(funcion, *args):
+    # Llama a funcion hasta que la base no esté ocupada, con espera exponencial y al azar
+    espera = ESPERA_INICIAL
+    for intento in range(REINTENTOS):
+        try:
+            return funcion(*args)
+        except sqlite3.OperationalError as e:
+            if not _ocupada(e) or intento == REINTENTOS - 1:
+                raise
+        time.sleep(random.uniform(espera / 2, espera))
+        espera = min(espera * 2, ESPERA_MAXIMA)
+
+
+class ColaEscritura:
+    # Escribe en conexion.RUTA_DB, como las funciones de api.py
+    def __init__(self, ventana_ms=VENTANA_MS, lote_maximo=LOTE_MAXIMO):
+        self.ventana = ventana_ms / 1000
+        self.lote_maximo = lote_maximo
+        self.lotes = 0
+        self.pedidos = 0
+        self.reintentos = 0
+        self._cola = queue.Queue()
+        self._cerrada = False
+        self._candado = threading.Lock()
+        self._hilo = threading.Thread(target=self._escribir, name="cola-escritura", daemon=True)
+        self._hilo.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+    # ------------------------------------------------------------ productores
+
+    def _encolar(self, tipo, *args):
+        futuro = Future()
+        with self._candado:
+            if self._cerrada:
+                raise ErrorTaller("La cola de escritura está cerrada.")
+            self._cola.put((tipo, args, futuro))
+        return futuro
+
+    def registrar(self, cliente_clave, fecha, lineas) -> Future:
+        # Future con la Nota registrada; lineas: [(servicio_clave, observaciones)] como api.crear_nota
+        return self._encolar("registrar", cliente_clave, fecha, lineas)
+
+    def cancelar(self, folio) -> Future:
+        return self._encolar("cancelar", folio)
+
+    def recuperar(self, folio) -> Future:
+        return self._encolar("recuperar", folio)
+
+    def cerrar(self):
+        # Aplica lo que ya estaba en la cola y termina el hilo escritor
+        with self._candado:
+            if self._cerrada:
+                return
+            self._cerrada = True
+            self._cola.put(None)
+        self._hilo.join()
+
+    def estadisticas(self):
+        return {"lotes": self.lotes, "pedidos": self.pedidos, "reintentos": self.reintentos,
+                "pendientes": self._cola.qsize(),
+                "pedidos_por_lote": round(self.pedidos / self.lotes, 2) if self.lotes else 0.0}
+
+    # ------------------------------------------------------------ escritor
+
+    def _escribir(self):
+        try:
+            terminar = False
+            while not terminar:
+                pedido = self._cola.get()
+                if pedido is None:
+                    break
+                lote = [pedido]
+                limite = time.monotonic() + self.ventana
+                while len(lote) < self.lote_maximo:
+                    try:
+                        pedido = self._cola.get(timeout=max(limite - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    if pedido is None:
+                        terminar = True
+                        break
+                    lote.append(pedido)
+                self._aplicar(lote)
+        finally:
+            conexion.cerrar_conexiones()
+
+    def _empezar(self, cursor):
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            if _ocupada(e):
+                self.reintentos += 1
+            raise
+
+    def _aplicar(self, lote):
+        conn = conexion.obtener_conexion()
+        cursor = conn.cursor()
+        try:
+            con_reintentos(self._empezar, cursor)
+        except Exception as e:
+            for _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+
+        resultados = []   # (futuro, resultado o excepción)
+        # Un cambio de estado de una nota que no está en la base (depurada, o que no existe) se
+        # resuelve con api.cancelar o api.recuperar fuera del lote, como sin la cola: el lote se
+        # corta ahí para respetar el orden de llegada y lo que sigue va en otro lote.
+        tardio, resto = None, []
+        try:
+            for indice, (tipo, args, futuro) in enumerate(lote):
+                cursor.execute("SAVEPOINT pedido")
+                try:
+                    if tipo == "registrar":
+                        fecha, cliente_clave, detalle = api.preparar_nota(conn, *args)
+                        folio = api.insertar_nota(cursor, fecha, cliente_clave, detalle)
+                        resultados.append((futuro, Nota(folio, fecha, cliente_clave, False, detalle)))
+                    elif api.actualizar_estado(cursor, args[0], tipo == "cancelar"):
+                        resultados.append((futuro, args[0]))
+                    else:
+                        tardio, resto = lote[indice], lote[indice + 1:]
+                except Exception as e:
+                    # Cualquier falla del pedido (una línea mal formada, un tipo que SQLite no
+                    # acepta) se deshace solo a él; el resto del lote sigue
+                    cursor.execute("ROLLBACK TO pedido")
+                    resultados.append((futuro, e))
+                cursor.execute("RELEASE pedido")
+                if tardio is not None:
+                    break
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            for _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+
+        self.lotes += 1
+        self.pedidos += len(resultados)
+        for futuro, resultado in resultados:
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+        if tardio is not None:
+            tipo, (folio,), futuro = tardio
+            self.pedidos += 1
+            try:
+                (api.cancelar if tipo == "cancelar" else api.recuperar)(folio)
+                futuro.set_result(folio)
+            except Exception as e:
+                futuro.set_exception(e)
+            if resto:
+                self._aplicar(resto)
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import threading
+
+RUTA_DB = "taller.db"
+
+# Se aplican una sola vez al abrir cada conexión
+PRAGMAS = (
+    # Antes que WAL, que inicializa el archivo: solo surte efecto en una base nueva; en una
+    # existente lo aplica depuracion.compactar
+    "PRAGMA auto_vacuum = INCREMENTAL",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",   # 256 MB
+    "PRAGMA cache_size = -65536",     # 64 MB (valor negativo = KiB)
+    "PRAGMA busy_timeout = 5000",
+)
+# Las de una conexión de solo lectura: las demás escriben en el archivo
+PRAGMAS_LECTURA = PRAGMAS[3:]
+
+# Clase de las conexiones nuevas; instrumentacion.activar la cambia por ConexionMedida
+FABRICA_CONEXION = sqlite3.Connection
+
+# Una conexión por hilo y por archivo: sqlite3 no permite compartirlas entre hilos
+_local = threading.local()
+
+
+def _conexiones_del_hilo():
+    conexiones = getattr(_local, "conexiones", None)
+    if conexiones is None:
+        conexiones = _local.conexiones = {}
+    return conexiones
+
+
+def abrir_conexion(nombre=None, solo_lectura=False):
+    if solo_lectura:
+        # La base ya debe existir y estar en modo WAL (la crea y migra una conexión normal).
+        # urllib.request se importa aquí y no arriba: tarda más que el resto del arranque del menú
+        from urllib.request import pathname2url
+        ruta = pathname2url(os.path.abspath(nombre or RUTA_DB))
+        conn = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True, factory=FABRICA_CONEXION)
+        pragmas = PRAGMAS_LECTURA
+    else:
+        conn = sqlite3.connect(nombre or RUTA_DB, factory=FABRICA_CONEXION)
+        pragmas = PRAGMAS
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+def obtener_conexion(nombre=None, solo_lectura=False):
+    # Sin nombre se usa RUTA_DB, que se puede cambiar para trabajar con otra base
+    nombre = nombre or RUTA_DB
+    conexiones = _conexiones_del_hilo()
+    ruta = os.path.abspath(nombre)
+    llave = ruta + "?mode=ro" if solo_lectura else ruta
+
+    conn = conexiones.get(llave)
+    if conn is None:
+        conn = abrir_conexion(nombre, solo_lectura)
+        conexiones[llave] = conn
+    _revisar_particiones(conn, llave)
+    return conn
+
+
+def _revisar_particiones(conn, ruta):
+    # Los años archivados se adjuntan a cada conexión (ver particiones.py). Archivar o migrar
+    # cambia el esquema de la base, así que basta comparar schema_version (se lee del encabezado
+    # del archivo) para saber si hay que volver a adjuntarlos.
+    versiones = getattr(_local, "versiones", None)
+    if versiones is None:
+        versiones = _local.versiones = {}
+    # Con sqlite3.Connection.execute para que instrumentacion no mida esta consulta de cada llamada
+    version = sqlite3.Connection.execute(conn, "PRAGMA schema_version").fetchone()[0]
+    if versiones.get(ruta) != version and not conn.in_transaction:
+        import particiones   # aquí y no arriba: particiones usa este módulo
+        particiones.adjuntar_particiones(conn)
+        versiones[ruta] = version
+
+
+def cerrar_conexiones():
+    conexiones = _conexiones_del_hilo()
+    for conn in conexiones.values():
+        conn.close()
+    conexiones.clear()
+    getattr(_local, "versiones", {}).clear()
@@ -0,0 +1,307 @@
+# Depuración de notas: las canceladas hace más de DIAS_CANCELADA días y las anteriores al
+# horizonte (HORIZONTE_DIAS) pasan de la base a taller.archivo.db por lotes, y después la base se
+# compacta con VACUUM incremental. particiones.py adjunta ese archivo como a un año archivado, así
+# que los reportes y la consulta por folio las siguen viendo; el listado de notas canceladas
+# solo muestra las que siguen en la base. Una nota depurada se recupera por folio: al cancelarla o
+# recuperarla regresa a la base (restaurar_nota).
+# Uso: python depuracion.py depurar [--horizonte 1095] [--canceladas 30] | restaurar 1234 | compactar
+import argparse
+import os
+import time
+from datetime import date
+from statistics import median
+
+import conexion
+from api import ErrorTaller
+from fechas import SQL_DIA, a_dia
+from particiones import (ARCHIVO_NOTAS, TABLAS_ARCHIVO, _tablas, adjuntar_particiones, revisar_limite_adjuntos,
+                         ruta_archivo_notas)
+from suspension import ACTIVOS, triggers_suspendidos
+
+# Días que una nota se queda en la base; None = no se depuran por antigüedad
+HORIZONTE_DIAS = 3 * 365
+# Días que una nota cancelada se queda en la base; None = no se depuran por cancelación
+DIAS_CANCELADA = 30
+# Notas por transacción al depurar y páginas liberadas por cada paso de VACUUM incremental
+LOTE_NOTAS = 5000
+LOTE_PAGINAS = 2048
+
+# Fecha de cancelación de cada nota, mantenida por triggers. Las canceladas antes de esta
+# versión y las que llegan canceladas por la importación masiva (que carga con los triggers
+# suspendidos) no tienen fila: para ellas cuenta la fecha de la nota.
+ESQUEMA_DEPURACION = [
+    """CREATE TABLE IF NOT EXISTS cancelaciones (
+        folio INTEGER PRIMARY KEY,
+        dia INTEGER NOT NULL
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_insert
+    AFTER INSERT ON notas
+    WHEN {ACTIVOS} AND NEW.cancelada = 1
+    BEGIN
+        INSERT OR REPLACE INTO cancelaciones (folio, dia) VALUES (NEW.folio, {SQL_DIA.format("'now', 'localtime'")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_update
+    AFTER UPDATE OF cancelada ON notas
+    WHEN {ACTIVOS}
+    BEGIN
+        DELETE FROM cancelaciones WHERE folio = NEW.folio AND NEW.cancelada = 0;
+        INSERT OR REPLACE INTO cancelaciones (folio, dia)
+        SELECT NEW.folio, {SQL_DIA.format("'now', 'localtime'")} WHERE NEW.cancelada = 1;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_delete
+    AFTER DELETE ON notas
+    WHEN {ACTIVOS}
+    BEGIN
+        DELETE FROM cancelaciones WHERE folio = OLD.folio;
+    END""",
+]
+
+# Consultas que se miden antes y después de depurar (mediana de varias ejecuciones)
+CONSULTAS_MEDIDAS = [
+    ("Listado de canceladas",
+     "SELECT folio, fecha, cliente_clave FROM notas WHERE cancelada = 1 ORDER BY dia, folio", 0),
+    ("Notas activas en la base", "SELECT COUNT(*) FROM notas WHERE cancelada = 0", 0),
+    ("Reporte de los últimos 30 días",
+     "SELECT COUNT(*), IFNULL(SUM(total), 0) FROM totales_nota WHERE cancelada = 0 AND dia BETWEEN ? AND ?", 30),
+]
+
+
+def _adjuntos(conn):
+    return {fila[1] for fila in conn.execute("PRAGMA database_list")}
+
+
+def _abrir_archivo(conn):
+    # Adjunta taller.archivo.db (lo crea la primera vez) y rehace las vistas para incluirlo
+    adjuntos = _adjuntos(conn)
+    if ARCHIVO_NOTAS not in adjuntos:
+        revisar_limite_adjuntos(conn, adjuntos - {"main", "temp"} | {ARCHIVO_NOTAS})
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVO_NOTAS}", (ruta_archivo_notas(conn),))
+    if not conn.execute(f"SELECT 1 FROM {ARCHIVO_NOTAS}.sqlite_master LIMIT 1").fetchone():
+        # Solo surte efecto antes de crear la primera tabla
+        conn.execute(f"PRAGMA {ARCHIVO_NOTAS}.auto_vacuum = INCREMENTAL")
+    for sentencia in TABLAS_ARCHIVO:
+        conn.execute(sentencia.format(esquema=ARCHIVO_NOTAS))
+    conn.commit()
+    adjuntar_particiones(conn)
+
+
+def _copiar_lote(cursor, origen, destino):
+    # Copia las notas de temp.lote_depuracion (y sus detalles) de un esquema a otro
+    cursor.execute(f"""INSERT OR REPLACE INTO {destino}.notas (folio, dia, cliente_clave, cancelada)
+                       SELECT folio, dia, cliente_clave, cancelada FROM {origen}.notas
+                       WHERE folio IN (SELECT folio FROM temp.lote_depuracion)""")
+    cursor.execute(f"""INSERT OR REPLACE INTO {destino}.detalles_nota (id, folio, servicio_clave, observaciones, costo)
+                       SELECT id, folio, servicio_clave, observaciones, costo FROM {origen}.detalles_nota
+                       WHERE folio IN (SELECT folio FROM temp.lote_depuracion)""")
+
+
+def _borrar_lote(cursor, esquema):
+    cursor.execute(f"DELETE FROM {esquema}.detalles_nota WHERE folio IN (SELECT folio FROM temp.lote_depuracion)")
+    lineas = cursor.rowcount
+    cursor.execute(f"DELETE FROM {esquema}.notas WHERE folio IN (SELECT folio FROM temp.lote_depuracion)")
+    return cursor.rowcount, lineas
+
+
+def _mover_lote(conn, origen, destino, seleccion, parametros=()):
+    # Mueve las notas que devuelve seleccion de origen a destino: se copian y se borran del origen
+    # en una sola transacción sobre la base y el archivo adjunto, así que un proceso interrumpido
+    # no deja notas en los dos lados. Los resúmenes ya cuentan estas notas, así que los triggers
+    # de notas y detalles de la base se suspenden mientras se mueven (ver suspension.py).
+    cursor = conn.cursor()
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS lote_depuracion (folio INTEGER PRIMARY KEY)")
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("DELETE FROM temp.lote_depuracion")
+        cursor.execute(f"INSERT INTO temp.lote_depuracion (folio) {seleccion}", parametros)
+        if cursor.rowcount == 0:
+            conn.commit()
+            return 0, 0
+        with triggers_suspendidos(cursor, "depuracion"):
+            _copiar_lote(cursor, origen, destino)
+            notas, lineas = _borrar_lote(cursor, origen)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return notas, lineas
+
+
+def _seleccion(horizonte_dias, dias_cancelada):
+    # SELECT de los folios de la base que se depuran (los LIMIT ? primeros) y sus parámetros
+    hoy = a_dia(date.today())
+    partes, parametros = [], []
+    if horizonte_dias is not None:
+        partes.append("SELECT folio FROM main.notas WHERE cancelada IN (0, 1) AND dia < ?")
+        parametros.append(hoy - horizonte_dias)
+    if dias_cancelada is not None:
+        partes.append("""SELECT n.folio FROM main.notas n LEFT JOIN cancelaciones c ON c.folio = n.folio
+                         WHERE n.cancelada = 1 AND IFNULL(c.dia, n.dia) <= ?""")
+        parametros.append(hoy - dias_cancelada)
+    if not partes:
+        return None, ()
+    return " UNION ".join(partes) + " LIMIT ?", tuple(parametros)
+
+
+def archivar_notas(horizonte_dias=HORIZONTE_DIAS, dias_cancelada=DIAS_CANCELADA, nombre_db=None,
+                   lote=LOTE_NOTAS):
+    # Pasa a taller.archivo.db las notas anteriores al horizonte y las canceladas hace más de
+    # dias_cancelada días, lote por lote. Devuelve {notas, lineas, lotes, segundos}.
+    conn = conexion.obtener_conexion(nombre_db)
+    if "cancelaciones" not in _tablas(conn):
+        raise ErrorTaller("La base no tiene el esquema actualizado; ejecute el sistema una vez para migrarla.")
+    inicio = time.perf_counter()
+    resultado = {"notas": 0, "lineas": 0, "lotes": 0}
+    seleccion, parametros = _seleccion(horizonte_dias, dias_cancelada)
+    if seleccion:
+        _abrir_archivo(conn)
+        while True:
+            notas, lineas = _mover_lote(conn, "main", ARCHIVO_NOTAS, seleccion, (*parametros, lote))
+            if not notas:
+                break
+            resultado["notas"] += notas
+            resultado["lineas"] += lineas
+            resultado["lotes"] += 1
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+def restaurar_nota(folio, nombre_db=None):
+    # Regresa una nota depurada (y sus detalles) a la base. Devuelve False si el folio no está
+    # en el archivo de notas depuradas.
+    conn = conexion.obtener_conexion(nombre_db)
+    if ARCHIVO_NOTAS not in _adjuntos(conn):
+        return False
+    fila = conn.execute(f"SELECT folio, fecha FROM {ARCHIVO_NOTAS}.notas WHERE folio = ?", (folio,)).fetchone()
+    if not fila:
+        return False
+    # Las notas de un año archivado no se modifican (ver particiones.py)
+    if conn.execute("SELECT 1 FROM anios_archivados WHERE anio = ?", (int(fila[1][:4]),)).fetchone():
+        raise ErrorTaller(f"La nota es del año archivado {fila[1][:4]}; desarchívelo para modificarla.")
+    _mover_lote(conn, ARCHIVO_NOTAS, "main", "VALUES (?)", (fila[0],))
+    return True
+
+
+def _tamano(conn, esquema):
+    # Bytes en disco del archivo y de su WAL
+    ruta = next(fila[2] for fila in conn.execute("PRAGMA database_list") if fila[1] == esquema)
+    return sum(os.path.getsize(ruta + sufijo) for sufijo in ("", "-wal") if os.path.exists(ruta + sufijo))
+
+
+def compactar(nombre_db=None, esquema="main"):
+    # Devuelve al sistema las páginas libres. La primera vez la base se cambia a
+    # auto_vacuum = INCREMENTAL, que solo surte efecto con un VACUUM completo; después basta
+    # PRAGMA incremental_vacuum, que libera LOTE_PAGINAS por transacción y no bloquea a las
+    # terminales mucho tiempo. Devuelve {paginas, bytes_antes, bytes_despues, completo, segundos}.
+    conn = conexion.obtener_conexion(nombre_db)
+    conn.commit()
+    inicio = time.perf_counter()
+    conn.execute(f"PRAGMA {esquema}.wal_checkpoint(TRUNCATE)").fetchall()
+    bytes_antes = _tamano(conn, esquema)
+    paginas = conn.execute(f"PRAGMA {esquema}.freelist_count").fetchone()[0]
+    completo = conn.execute(f"PRAGMA {esquema}.auto_vacuum").fetchone()[0] != 2
+    if completo:
+        conn.execute(f"PRAGMA {esquema}.auto_vacuum = INCREMENTAL")
+        conn.execute(f"VACUUM {esquema}")
+    else:
+        while conn.execute(f"PRAGMA {esquema}.freelist_count").fetchone()[0]:
+            # Cada fila devuelta es un paso; hay que leerlas todas para que termine
+            conn.execute(f"PRAGMA {esquema}.incremental_vacuum({LOTE_PAGINAS})").fetchall()
+    # En modo WAL el archivo se recorta hasta que las páginas pasan del WAL a la base
+    conn.execute(f"PRAGMA {esquema}.wal_checkpoint(TRUNCATE)").fetchall()
+    return {"paginas": paginas, "bytes_antes": bytes_antes, "bytes_despues": _tamano(conn, esquema),
+            "completo": completo, "segundos": time.perf_counter() - inicio}
+
+
+def medir_consultas(nombre_db=None, repeticiones=5):
+    # [(consulta, mediana en ms)] de CONSULTAS_MEDIDAS; la primera ejecución solo calienta la caché
+    conn = conexion.obtener_conexion(nombre_db)
+    hoy = a_dia(date.today())
+    resultado = []
+    for nombre, sql, dias in CONSULTAS_MEDIDAS:
+        parametros = (hoy - dias, hoy) if dias else ()
+        conn.execute(sql, parametros).fetchall()
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            conn.execute(sql, parametros).fetchall()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultado.append((nombre, median(tiempos)))
+    return resultado
+
+
+def depurar(horizonte_dias=HORIZONTE_DIAS, dias_cancelada=DIAS_CANCELADA, nombre_db=None, compactar_base=True):
+    # Depura, compacta y mide: {notas, lineas, lotes, segundos, compactacion, consultas}, con
+    # consultas = [(consulta, ms antes, ms después)] y compactacion = None si no se compactó
+    antes = medir_consultas(nombre_db)
+    resultado = archivar_notas(horizonte_dias, dias_cancelada, nombre_db)
+    resultado["compactacion"] = compactar(nombre_db) if compactar_base else None
+    despues = medir_consultas(nombre_db)
+    resultado["consultas"] = [(nombre, ms_antes, ms_despues)
+                              for (nombre, ms_antes), (_, ms_despues) in zip(antes, despues)]
+    return resultado
+
+
+def estado(nombre_db=None):
+    # Notas y líneas en el archivo de depuradas, canceladas que siguen en la base y páginas libres
+    conn = conexion.obtener_conexion(nombre_db)
+    archivadas = (0, 0)
+    if ARCHIVO_NOTAS in _adjuntos(conn):
+        archivadas = conn.execute(f"""SELECT (SELECT COUNT(*) FROM {ARCHIVO_NOTAS}.notas),
+                                             (SELECT COUNT(*) FROM {ARCHIVO_NOTAS}.detalles_nota)""").fetchone()
+    return {"notas": archivadas[0], "lineas": archivadas[1],
+            "canceladas": conn.execute("SELECT COUNT(*) FROM notas WHERE cancelada = 1").fetchone()[0],
+            "paginas_libres": conn.execute("PRAGMA main.freelist_count").fetchone()[0],
+            "archivo": ruta_archivo_notas(conn)}
+
+
+def imprimir_compactacion(compactacion):
+    tipo = "VACUUM completo (primera vez)" if compactacion["completo"] else "VACUUM incremental"
+    print(f"{tipo}: {compactacion['paginas']} páginas libres; "
+          f"{compactacion['bytes_antes'] / 1024 ** 2:.1f} MB -> {compactacion['bytes_despues'] / 1024 ** 2:.1f} MB "
+          f"({(compactacion['bytes_antes'] - compactacion['bytes_despues']) / 1024 ** 2:.1f} MB recuperados) "
+          f"en {compactacion['segundos']:.1f} s.")
+
+
+def imprimir_depuracion(resultado):
+    print(f"{resultado['notas']} notas y {resultado['lineas']} líneas pasaron al archivo en "
+          f"{resultado['lotes']} lotes ({resultado['segundos']:.1f} s).")
+    if resultado["compactacion"]:
+        imprimir_compactacion(resultado["compactacion"])
+    for nombre, antes, despues in resultado["consultas"]:
+        print(f"  {nombre:<32} {antes:8.2f} ms -> {despues:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pasa notas canceladas y antiguas a un archivo aparte.")
+    parser.add_argument("comando", choices=("estado", "depurar", "restaurar", "compactar"))
+    parser.add_argument("folios", nargs="*", type=int)
+    parser.add_argument("--horizonte", type=int, default=HORIZONTE_DIAS,
+                        help="días que una nota se queda en la base (0 = no depurar por antigüedad)")
+    parser.add_argument("--canceladas", type=int, default=DIAS_CANCELADA,
+                        help="días que una nota cancelada se queda en la base (0 = no depurarlas)")
+    parser.add_argument("--sin-compactar", action="store_true")
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    try:
+        if args.comando == "estado":
+            actual = estado(args.db)
+            print(f"{actual['notas']} notas y {actual['lineas']} líneas en {actual['archivo']}; "
+                  f"{actual['canceladas']} canceladas en la base; {actual['paginas_libres']} páginas libres.")
+        elif args.comando == "depurar":
+            imprimir_depuracion(depurar(args.horizonte or None, args.canceladas or None, args.db,
+                                        not args.sin_compactar))
+        elif args.comando == "restaurar":
+            if not args.folios:
+                parser.error("indique al menos un folio")
+            for folio in args.folios:
+                print(f"Folio {folio}: " + ("regresó a la base." if restaurar_nota(folio, args.db)
+                                            else "no está en el archivo."))
+        else:
+            imprimir_compactacion(compactar(args.db))
+    except ErrorTaller as e:
+        print(e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# Definición de las tablas y migraciones versionadas de taller.db
+import re
+from functools import partial
+
+import migraciones
+from busqueda import reconstruir_busqueda
+from cambios import marcar_cambios
+from fechas import SQL_DIA
+from particiones import adjuntar_particiones, quitar_vistas
+from resumen import reconstruir_acumulados, reconstruir_resumen
+
+
+def crear_tablas(conn):
+    # Con la base al día basta leer PRAGMA user_version, que está en el encabezado del archivo
+    # (y revisar que no hayan quedado índices sin crear de una carga masiva interrumpida)
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRACIONES):
+        restaurar_indices(conn)
+        return []
+    cursor = conn.cursor()
+
+    # Tabla clientes
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS clientes (
+        clave INTEGER PRIMARY KEY AUTOINCREMENT,
+        apellidos TEXT NOT NULL,
+        nombres TEXT NOT NULL,
+        telefono TEXT NOT NULL CHECK(length(telefono) = 10),
+        suspendido INTEGER NOT NULL DEFAULT 0
+    );
+    """)
+
+    # Tabla servicios
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS servicios (
+        clave INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL,
+        costo REAL NOT NULL CHECK(costo > 0),
+        suspendido INTEGER NOT NULL DEFAULT 0
+    );
+    """)
+
+    # Tabla notas (la migración 6 cambia fecha por dia, ver _notas_por_dia)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS notas (
+        folio INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha TEXT NOT NULL,
+        cliente_clave INTEGER NOT NULL,
+        cancelada INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (cliente_clave) REFERENCES clientes(clave)
+    );
+    """)
+
+    # Tabla detalles_nota
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS detalles_nota (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        folio INTEGER NOT NULL,
+        servicio_clave INTEGER NOT NULL,
+        observaciones TEXT,
+        costo REAL NOT NULL,
+        FOREIGN KEY (folio) REFERENCES notas(folio),
+        FOREIGN KEY (servicio_clave) REFERENCES servicios(clave)
+    );
+    """)
+
+    conn.commit()
+    aplicadas = migrar_esquema(conn)
+    restaurar_indices(conn)
+    return aplicadas
+
+
+def restaurar_indices(conn):
+    # indices_diferidos (migración 9) guarda los índices quitados por una carga masiva de una versión
+    # anterior de importacion.py que no terminó; la importación actual los quita dentro de su transacción.
+    # Crea los índices pendientes y los quita de indices_diferidos en una sola transacción
+    cursor = conn.cursor()
+    if not cursor.execute("SELECT 1 FROM indices_diferidos LIMIT 1").fetchone():
+        return []
+    cursor.execute("BEGIN IMMEDIATE")
+    pendientes = cursor.execute("SELECT nombre, sql FROM indices_diferidos").fetchall()
+    for nombre, sql in pendientes:
+        cursor.execute(re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX IF NOT EXISTS", sql))
+        cursor.execute("DELETE FROM indices_diferidos WHERE nombre = ?", (nombre,))
+    conn.commit()
+    cursor.execute("PRAGMA optimize")
+    return [nombre for nombre, _ in pendientes]
+
+
+def _notas_por_dia(conn):
+    # notas.fecha (texto YYYY-MM-DD) pasa a notas.dia (días desde 1970-01-01, ver fechas.py) y
+    # fecha queda como columna generada para las consultas y triggers que la leen. SQLite no
+    # cambia el tipo de una columna, así que la tabla se copia a una nueva; los triggers que
+    # mencionan notas (y las vistas de particiones.py) se quitan antes y se vuelven a crear al final.
+    cursor = conn.cursor()
+    triggers = cursor.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'trigger' AND tbl_name IN ('notas', 'detalles_nota')
+    """).fetchall()
+    for nombre, _ in triggers:
+        cursor.execute(f"DROP TRIGGER {nombre}")
+    quitar_vistas(conn)
+    cursor.execute("""
+    CREATE TABLE notas_por_dia (
+        folio INTEGER PRIMARY KEY AUTOINCREMENT,
+        dia INTEGER NOT NULL,
+        cliente_clave INTEGER NOT NULL,
+        cancelada INTEGER NOT NULL DEFAULT 0,
+        fecha TEXT GENERATED ALWAYS AS (date(dia + 2440587.5)) VIRTUAL,
+        FOREIGN KEY (cliente_clave) REFERENCES clientes(clave)
+    );
+    """)
+    cursor.execute(f"""
+        INSERT INTO notas_por_dia (folio, dia, cliente_clave, cancelada)
+        SELECT folio, {SQL_DIA.format("fecha")}, cliente_clave, cancelada FROM notas
+    """)
+    # AUTOINCREMENT no repite folios de notas borradas; se conserva el último asignado
+    secuencia = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'notas'").fetchone()
+    cursor.execute("DROP TABLE notas")
+    cursor.execute("ALTER TABLE notas_por_dia RENAME TO notas")
+    if secuencia:
+        cursor.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'notas'", secuencia)
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('notas', ?)", secuencia)
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_notas_cancelada_dia
+                      ON notas (cancelada, dia, folio, cliente_clave)""")
+    for _, sql in triggers:
+        cursor.execute(sql)
+    cursor.execute("ANALYZE")
+
+
+def _rehacer_triggers(tablas, sentencias, conn):
+    # Quita los triggers de las tablas y crea los de la versión
+    cursor = conn.cursor()
+    marcas = ", ".join("?" * len(tablas))
+    for (nombre,) in cursor.execute(f"""
+        SELECT name FROM main.sqlite_master WHERE type = 'trigger' AND tbl_name IN ({marcas})
+    """, tablas).fetchall():
+        cursor.execute(f"DROP TRIGGER {nombre}")
+    for sentencia in sentencias:
+        cursor.execute(sentencia)
+
+
+# Cada entrada es una versión del esquema; PRAGMA user_version guarda la última aplicada.
+# Una sentencia puede ser SQL o una función que recibe la conexión. El SQL de cada versión está
+# congelado en migraciones.py: un cambio posterior va en una versión nueva.
+MIGRACIONES = [
+    # 1: índices cubrientes para los reportes por período
+    [
+        """CREATE INDEX IF NOT EXISTS idx_notas_cancelada_fecha
+           ON notas (cancelada, fecha, folio, cliente_clave)""",
+        """CREATE INDEX IF NOT EXISTS idx_detalles_folio
+           ON detalles_nota (folio, servicio_clave, costo)""",
+        "ANALYZE",
+    ],
+    # 2: resumen diario mantenido por triggers (ver resumen.py)
+    [
+        *migraciones.RESUMEN_V2,
+        # Los acumulados por mes y año todavía no existen en esta versión
+        partial(reconstruir_resumen, acumulados=False),
+    ],
+    # 3: listado paginado y búsqueda de clientes activos por prefijo de apellidos
+    [
+        """CREATE INDEX IF NOT EXISTS idx_clientes_apellidos
+           ON clientes (suspendido, apellidos COLLATE NOCASE, nombres, clave)""",
+    ],
+    # 4: registro de fechas modificadas (ver cambios.py); todas las fechas existentes parten como cambiadas
+    [
+        *migraciones.CAMBIOS_V4,
+        marcar_cambios,
+    ],
+    # 5: acumulados por mes y año de los resúmenes por servicio y por cliente (rankings)
+    [
+        *migraciones.ACUMULADOS_V5,
+        reconstruir_acumulados,
+    ],
+    # 6: la fecha de las notas como número de día y años archivados en archivos aparte (ver particiones.py)
+    [
+        _notas_por_dia,
+        *migraciones.PARTICIONES_V6,
+        adjuntar_particiones,
+    ],
+    # 7: fecha de cancelación de las notas, para depurar las canceladas (ver depuracion.py)
+    [
+        *migraciones.DEPURACION_V7,
+    ],
+    # 8: búsqueda de texto en clientes, servicios y observaciones (ver busqueda.py)
+    [
+        *migraciones.BUSQUEDA_V8,
+        reconstruir_busqueda,
+    ],
+    # 9: índices pendientes de una importación masiva
+    [
+        *migraciones.DIFERIDOS_V9,
+    ],
+    # 10: contador de cambios de clientes y servicios para la caché de catálogos (ver catalogo.py)
+    [
+        *migraciones.CATALOGO_V10,
+    ],
+    # 11: triggers de notas que se suspenden sin quitarlos (ver suspension.py)
+    [
+        partial(_rehacer_triggers, ("notas", "detalles_nota"), migraciones.TRIGGERS_V11),
+    ],
+    # 12: los acumulados también se suspenden; la importación masiva los suma por lote (ver resumen.sumar_diferencias)
+    [
+        partial(_rehacer_triggers, ("resumen_diario_servicio", "resumen_diario_cliente"),
+                migraciones.ACUMULADOS_V12),
+    ],
+]
+
+
+def migrar_esquema(conn):
+    # Aplica las migraciones pendientes y devuelve los números de versión aplicados
+    cursor = conn.cursor()
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    aplicadas = []
+    if version < len(MIGRACIONES):
+        # Las migraciones que reconstruyen resúmenes leen las notas por las vistas de particiones.py
+        adjuntar_particiones(conn)
+
+    for numero, sentencias in enumerate(MIGRACIONES[version:], start=version + 1):
+        for sentencia in sentencias:
+            if callable(sentencia):
+                sentencia(conn)
+            else:
+                cursor.execute(sentencia)
+        cursor.execute(f"PRAGMA user_version = {numero}")
+        conn.commit()
+        aplicadas.append(numero)
+
+    return aplicadas
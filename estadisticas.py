@@ -0,0 +1,268 @@
+# Estadísticos en una sola pasada y con memoria acotada.
+# Todas las clases se pueden combinar (combinar) para unir resultados parciales.
+import heapq
+import math
+import random
+from collections import Counter
+from fractions import Fraction
+
+
+class Welford:
+    # Media y varianza incrementales (algoritmo de Welford / Chan para combinar)
+    def __init__(self):
+        self.conteo = 0
+        self.media = 0.0
+        self.m2 = 0.0
+
+    def agregar(self, valor):
+        self.conteo += 1
+        delta = valor - self.media
+        self.media += delta / self.conteo
+        self.m2 += delta * (valor - self.media)
+
+    def combinar(self, otro):
+        if otro.conteo == 0:
+            return self
+        total = self.conteo + otro.conteo
+        delta = otro.media - self.media
+        self.media += delta * otro.conteo / total
+        self.m2 += otro.m2 + delta * delta * self.conteo * otro.conteo / total
+        self.conteo = total
+        return self
+
+    @property
+    def varianza(self):
+        # Varianza muestral, igual que statistics.variance
+        if self.conteo < 2:
+            raise ValueError("Se requieren al menos 2 valores para la varianza.")
+        return self.m2 / (self.conteo - 1)
+
+    @property
+    def desviacion(self):
+        return math.sqrt(self.varianza)
+
+
+class SketchKLL:
+    # Sketch de cuantiles KLL: error de rango aproximado de 1.65 / k con memoria O(k)
+    def __init__(self, error=0.01, semilla=0):
+        self.k = max(8, math.ceil(1.65 / error))
+        self.niveles = [[]]
+        self.conteo = 0
+        self._azar = random.Random(semilla)
+        self._calcular_capacidades()
+
+    def _calcular_capacidades(self):
+        altura = len(self.niveles)
+        self._capacidades = [max(2, math.ceil(self.k * (2 / 3) ** (altura - nivel - 1)))
+                             for nivel in range(altura)]
+
+    def agregar(self, valor):
+        nivel_cero = self.niveles[0]
+        nivel_cero.append(valor)
+        self.conteo += 1
+        if len(nivel_cero) >= self._capacidades[0]:
+            self._compactar()
+
+    def _compactar(self):
+        nivel = 0
+        while nivel < len(self.niveles):
+            if len(self.niveles[nivel]) >= self._capacidades[nivel]:
+                if nivel + 1 == len(self.niveles):
+                    self.niveles.append([])
+                    self._calcular_capacidades()
+                elementos = sorted(self.niveles[nivel])
+                # Se conserva uno de cada dos (con desfase aleatorio) y sube de nivel con el doble de peso
+                self.niveles[nivel] = [elementos.pop()] if len(elementos) % 2 else []
+                self.niveles[nivel + 1].extend(elementos[self._azar.getrandbits(1)::2])
+            nivel += 1
+
+    def combinar(self, otro):
+        while len(self.niveles) < len(otro.niveles):
+            self.niveles.append([])
+        self._calcular_capacidades()
+        for nivel, elementos in enumerate(otro.niveles):
+            self.niveles[nivel].extend(elementos)
+        self.conteo += otro.conteo
+        self._compactar()
+        return self
+
+    def cuantil(self, q):
+        if self.conteo == 0:
+            raise ValueError("El sketch está vacío.")
+        ponderados = sorted((valor, 2 ** nivel)
+                            for nivel, elementos in enumerate(self.niveles) for valor in elementos)
+        peso_total = sum(peso for _, peso in ponderados)
+        objetivo = q * peso_total
+        acumulado = 0
+        for valor, peso in ponderados:
+            acumulado += peso
+            if acumulado >= objetivo:
+                return valor
+        return ponderados[-1][0]
+
+
+def cuantil_exacto(ordenados, q):
+    # Interpolación lineal, igual que pandas.Series.quantile
+    posicion = q * (len(ordenados) - 1)
+    inferior = math.floor(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+class Cuantiles:
+    # Exacto mientras haya pocos valores; al rebasar limite_exacto pasa a un sketch KLL.
+    # limite_exacto=None fuerza el modo exacto sin importar el tamaño.
+    def __init__(self, error=0.01, limite_exacto=100_000):
+        self.error = error
+        self.limite_exacto = limite_exacto
+        self.valores = []
+        self.sketch = None
+
+    @property
+    def exacto(self):
+        return self.sketch is None
+
+    def agregar(self, valor):
+        if self.sketch is not None:
+            self.sketch.agregar(valor)
+            return
+        self.valores.append(valor)
+        if self.limite_exacto is not None and len(self.valores) > self.limite_exacto:
+            self._pasar_a_sketch()
+
+    def _pasar_a_sketch(self):
+        self.sketch = SketchKLL(self.error)
+        for valor in self.valores:
+            self.sketch.agregar(valor)
+        self.valores = []
+
+    def combinar(self, otro):
+        if otro.sketch is not None and self.sketch is None:
+            self._pasar_a_sketch()
+        if self.sketch is not None:
+            if otro.sketch is not None:
+                self.sketch.combinar(otro.sketch)
+            for valor in otro.valores:
+                self.sketch.agregar(valor)
+        else:
+            for valor in otro.valores:
+                self.agregar(valor)
+        return self
+
+    def cuantil(self, q):
+        if self.sketch is not None:
+            return self.sketch.cuantil(q)
+        if not self.valores:
+            raise ValueError("No hay valores.")
+        self.valores.sort()
+        return cuantil_exacto(self.valores, q)
+
+
+class Frecuencias:
+    # Cuántas veces aparece cada valor. Media, varianza, mediana, cuartiles y modas salen exactos;
+    # la memoria crece con los valores distintos, no con el conteo (los totales de las notas se
+    # repiten mucho: son sumas de los costos del catálogo).
+    def __init__(self, frecuencias=()):
+        self.frecuencias = Counter(dict(frecuencias))
+
+    def agregar(self, valor, veces=1):
+        self.frecuencias[valor] += veces
+
+    def combinar(self, otro):
+        self.frecuencias.update(otro.frecuencias)
+        return self
+
+    @property
+    def conteo(self):
+        return sum(self.frecuencias.values())
+
+    def _suma(self, potencia):
+        # Con fracciones exactas, como statistics.mean y statistics.variance
+        return sum(Fraction(valor) ** potencia * veces for valor, veces in self.frecuencias.items())
+
+    @property
+    def media(self):
+        return float(self._suma(1) / self.conteo)
+
+    @property
+    def varianza(self):
+        conteo = self.conteo
+        if conteo < 2:
+            raise ValueError("Se requieren al menos 2 valores para la varianza.")
+        suma = self._suma(1)
+        return float((self._suma(2) - suma * suma / conteo) / (conteo - 1))
+
+    @property
+    def desviacion(self):
+        return math.sqrt(self.varianza)
+
+    def _en_posiciones(self, posiciones):
+        # Valores en las posiciones (0..conteo-1, ascendentes) de los valores ordenados
+        valores = []
+        pendientes = iter(posiciones)
+        posicion = next(pendientes, None)
+        acumulado = 0
+        for valor in sorted(self.frecuencias):
+            acumulado += self.frecuencias[valor]
+            while posicion is not None and posicion < acumulado:
+                valores.append(valor)
+                posicion = next(pendientes, None)
+            if posicion is None:
+                break
+        return valores
+
+    @property
+    def mediana(self):
+        # Igual que statistics.median: el promedio de los dos centrales si el conteo es par
+        conteo = self.conteo
+        if not conteo:
+            raise ValueError("No hay valores.")
+        inferior, superior = self._en_posiciones([(conteo - 1) // 2, conteo // 2])
+        return (inferior + superior) / 2
+
+    def cuantil(self, q):
+        # Interpolación lineal, igual que cuantil_exacto
+        conteo = self.conteo
+        if not conteo:
+            raise ValueError("No hay valores.")
+        posicion = q * (conteo - 1)
+        inferior = math.floor(posicion)
+        abajo, arriba = self._en_posiciones([inferior, min(inferior + 1, conteo - 1)])
+        return abajo + (arriba - abajo) * (posicion - inferior)
+
+    @property
+    def modas(self):
+        if not self.frecuencias:
+            return []
+        maximo = max(self.frecuencias.values())
+        return sorted(valor for valor, veces in self.frecuencias.items() if veces == maximo)
+
+
+def top_k(elementos, k, valor, empates=True):
+    # Los k elementos con mayor valor(elemento) en una sola pasada, con un montículo de tamaño k
+    # (O(n log k) sin ordenar todo). Con empates=True también se devuelven los que empatan con el
+    # k-ésimo. Devuelve (lugar, elemento) de mayor a menor; los empatados comparten lugar
+    # (1, 2, 2, 4) y, entre ellos, se respeta el orden de llegada.
+    if k <= 0:
+        return []
+    monticulo = []   # (valor, -orden, elemento): el mínimo es el primero en salir
+    empatados = []   # fuera del montículo pero con el mismo valor que su mínimo
+    for orden, elemento in enumerate(elementos):
+        entrada = (valor(elemento), -orden, elemento)
+        if len(monticulo) < k:
+            heapq.heappush(monticulo, entrada)
+        elif entrada[0] > monticulo[0][0]:
+            salio = heapq.heappushpop(monticulo, entrada)
+            if salio[0] == monticulo[0][0]:
+                empatados.append(salio)
+            else:
+                empatados = []
+        elif entrada[0] == monticulo[0][0]:
+            empatados.append(entrada)
+
+    ordenados = sorted(monticulo + (empatados if empates else []), key=lambda e: (-e[0], -e[1]))
+    resultado = []
+    for i, (v, _, elemento) in enumerate(ordenados):
+        lugar = resultado[-1][0] if resultado and v == ordenados[i - 1][0] else i + 1
+        resultado.append((lugar, elemento))
+    return resultado
@@ -0,0 +1,253 @@
+# Exportación de reportes en flujo: las filas pasan del cursor al archivo en lotes de tamaño fijo,
+# así la memoria no crece con el tamaño del reporte.
+# Formatos: XLSX (openpyxl en modo write-only, una hoja por sección), CSV y Parquet
+# (un archivo por sección; Parquet requiere pyarrow).
+# Uso: python exportacion.py periodo 2024-01-01 2024-12-31 reporte.xlsx
+#      python exportacion.py clientes clientes.csv
+import argparse
+import csv
+import os
+import time
+
+from api import ErrorTaller
+from conexion import obtener_conexion
+from fechas import SQL_FECHA, rango_dias
+
+TAMANO_LOTE = 5000
+FORMATOS = ("xlsx", "csv", "parquet")
+
+# (hoja, columnas, consulta); las consultas del período reciben (primer día, último día) como
+# números de día (ver fechas.py)
+HOJAS_PERIODO = (
+    ("Notas", ["Folio", "Fecha", "Cliente Clave", "Cliente", "Total"], """
+        SELECT n.folio, n.fecha, n.cliente_clave, c.apellidos || ' ' || c.nombres, n.total
+        FROM totales_nota n
+        JOIN clientes c ON c.clave = n.cliente_clave
+        WHERE n.cancelada = 0 AND n.dia BETWEEN ? AND ?
+        ORDER BY n.dia, n.folio
+    """),
+    ("Detalles", ["Folio", "Fecha", "Servicio Clave", "Servicio", "Observaciones", "Costo"], """
+        SELECT l.folio, l.fecha, l.servicio_clave, s.nombre, l.observaciones, l.costo
+        FROM todos_detalles l
+        JOIN servicios s ON s.clave = l.servicio_clave
+        WHERE l.cancelada = 0 AND l.dia BETWEEN ? AND ?
+        ORDER BY l.dia, l.folio, l.id
+    """),
+    ("Totales", ["Fecha", "Notas", "Ingresos"], f"""
+        SELECT fecha, notas, ingresos
+        FROM resumen_diario
+        WHERE notas > 0 AND fecha BETWEEN {SQL_FECHA.format("?")} AND {SQL_FECHA.format("?")}
+        ORDER BY fecha
+    """),
+)
+
+HOJA_CLIENTES = ("Clientes", ["Clave", "Apellidos", "Nombres", "Teléfono", "Estado"], """
+    SELECT clave, apellidos, nombres, telefono, CASE suspendido WHEN 0 THEN 'Activo' ELSE 'Suspendido' END
+    FROM clientes
+    ORDER BY clave
+""")
+
+HOJA_SERVICIOS = ("Servicios", ["Clave", "Nombre del Servicio", "Costo", "Estado"], """
+    SELECT clave, nombre, costo, CASE suspendido WHEN 0 THEN 'Activo' ELSE 'Suspendido' END
+    FROM servicios
+    ORDER BY nombre
+""")
+
+
+class EscritorXLSX:
+    # Un libro con una hoja por sección; en modo write-only cada fila se escribe y se descarta
+    def __init__(self, ruta):
+        from openpyxl import Workbook
+
+        self.ruta = ruta
+        self.libro = Workbook(write_only=True)
+        self.hoja = None
+
+    def nueva_hoja(self, nombre, columnas):
+        self.hoja = self.libro.create_sheet(nombre)
+        self.hoja.append(columnas)
+
+    def escribir(self, filas):
+        for fila in filas:
+            self.hoja.append(fila)
+
+    def cerrar(self):
+        self.libro.save(self.ruta)
+        return [self.ruta]
+
+
+class EscritorCSV:
+    # Un archivo por sección: reporte.csv -> reporte_notas.csv, reporte_detalles.csv, ...
+    def __init__(self, ruta, varias_hojas):
+        self.base, _ = os.path.splitext(ruta)
+        self.ruta = ruta
+        self.varias_hojas = varias_hojas
+        self.archivo = None
+        self.archivos = []
+
+    def _ruta_hoja(self, nombre, extension):
+        if not self.varias_hojas:
+            return self.ruta
+        return f"{self.base}_{nombre.lower()}.{extension}"
+
+    def nueva_hoja(self, nombre, columnas):
+        self._cerrar_archivo()
+        ruta = self._ruta_hoja(nombre, "csv")
+        # utf-8-sig para que Excel reconozca los acentos al abrir el CSV
+        self.archivo = open(ruta, "w", newline="", encoding="utf-8-sig")
+        self.csv = csv.writer(self.archivo)
+        self.csv.writerow(columnas)
+        self.archivos.append(ruta)
+
+    def escribir(self, filas):
+        self.csv.writerows(filas)
+
+    def _cerrar_archivo(self):
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+    def cerrar(self):
+        self._cerrar_archivo()
+        return self.archivos
+
+
+class EscritorParquet(EscritorCSV):
+    # Un archivo por sección; cada lote se escribe como un row group
+    def __init__(self, ruta, varias_hojas):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ErrorTaller("Para exportar a Parquet instale pyarrow (pip install pyarrow).") from None
+        super().__init__(ruta, varias_hojas)
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.escritor = None
+        self.ruta_actual = None
+
+    def nueva_hoja(self, nombre, columnas):
+        self._cerrar_archivo()
+        self.ruta_actual = self._ruta_hoja(nombre, "parquet")
+        self.columnas = columnas
+        self.archivos.append(self.ruta_actual)
+
+    def escribir(self, filas):
+        tabla = self.pa.table(dict(zip(self.columnas, zip(*filas))))
+        if self.escritor is None:
+            # El esquema se toma del primer lote; una columna que solo trae NULL se guarda como texto
+            esquema = self.pa.schema([self.pa.field(c.name, self.pa.string()) if self.pa.types.is_null(c.type) else c
+                                      for c in tabla.schema])
+            self.escritor = self.pq.ParquetWriter(self.ruta_actual, esquema)
+        self.escritor.write_table(tabla.cast(self.escritor.schema))
+
+    def _cerrar_archivo(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            self.escritor = None
+        elif self.ruta_actual is not None:
+            # Hoja sin filas: se escribe solo el encabezado
+            self.pq.write_table(self.pa.table({c: [] for c in self.columnas}), self.ruta_actual)
+        self.ruta_actual = None
+
+
+def formato_de(ruta):
+    extension = os.path.splitext(ruta)[1].lower().lstrip(".")
+    if extension not in FORMATOS:
+        raise ErrorTaller(f"Formato no soportado: '{extension}'. Use {', '.join(FORMATOS)}.")
+    return extension
+
+
+def abrir_escritor(ruta, varias_hojas=True):
+    formato = formato_de(ruta)
+    if formato == "xlsx":
+        return EscritorXLSX(ruta)
+    if formato == "csv":
+        return EscritorCSV(ruta, varias_hojas)
+    return EscritorParquet(ruta, varias_hojas)
+
+
+def exportar(ruta, hojas, parametros=(), nombre_db=None, tamano_lote=TAMANO_LOTE):
+    # hojas: [(nombre, columnas, consulta)]. Devuelve los archivos escritos y las filas por hoja.
+    conn = obtener_conexion(nombre_db)
+    escritor = abrir_escritor(ruta, varias_hojas=len(hojas) > 1)
+    inicio = time.perf_counter()
+    filas_por_hoja = {}
+    try:
+        for nombre, columnas, consulta in hojas:
+            escritor.nueva_hoja(nombre, columnas)
+            cursor = conn.execute(consulta, parametros)
+            total = 0
+            while True:
+                lote = cursor.fetchmany(tamano_lote)
+                if not lote:
+                    break
+                escritor.escribir(lote)
+                total += len(lote)
+            filas_por_hoja[nombre] = total
+    finally:
+        archivos = escritor.cerrar()
+    return {"archivos": archivos, "filas": filas_por_hoja, "segundos": time.perf_counter() - inicio}
+
+
+def exportar_tablas(ruta, tablas):
+    # tablas: [(nombre, DataFrame)] ya calculadas en memoria, como las series de tiempo. Cada
+    # tabla se escribe en un solo lote (así Parquet toma los tipos de todas sus filas) y los NaN
+    # quedan como celdas vacías.
+    escritor = abrir_escritor(ruta, varias_hojas=len(tablas) > 1)
+    inicio = time.perf_counter()
+    filas_por_hoja = {}
+    try:
+        for nombre, tabla in tablas:
+            escritor.nueva_hoja(nombre, list(tabla.columns))
+            valores = tabla.astype(object).where(tabla.notna(), None)
+            if len(valores):
+                escritor.escribir(list(valores.itertuples(index=False, name=None)))
+            filas_por_hoja[nombre] = len(tabla)
+    finally:
+        archivos = escritor.cerrar()
+    return {"archivos": archivos, "filas": filas_por_hoja, "segundos": time.perf_counter() - inicio}
+
+
+def exportar_periodo(fecha_inicio, fecha_fin, ruta, nombre_db=None, tamano_lote=TAMANO_LOTE):
+    return exportar(ruta, HOJAS_PERIODO, rango_dias(fecha_inicio, fecha_fin), nombre_db, tamano_lote)
+
+
+def exportar_clientes(ruta, nombre_db=None):
+    return exportar(ruta, [HOJA_CLIENTES], nombre_db=nombre_db)
+
+
+def exportar_servicios(ruta, nombre_db=None):
+    return exportar(ruta, [HOJA_SERVICIOS], nombre_db=nombre_db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta reportes del taller a XLSX, CSV o Parquet.")
+    parser.add_argument("reporte", choices=("periodo", "clientes", "servicios"))
+    parser.add_argument("argumentos", nargs="+", help="periodo: INICIO FIN ARCHIVO; clientes/servicios: ARCHIVO")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE)
+    args = parser.parse_args()
+
+    try:
+        if args.reporte == "periodo":
+            if len(args.argumentos) != 3:
+                parser.error("periodo requiere INICIO FIN ARCHIVO")
+            resumen = exportar_periodo(*args.argumentos, nombre_db=args.db, tamano_lote=args.lote)
+        elif args.reporte == "clientes":
+            resumen = exportar_clientes(args.argumentos[0], args.db)
+        else:
+            resumen = exportar_servicios(args.argumentos[0], args.db)
+    except ErrorTaller as e:
+        print(e)
+        return
+
+    filas = sum(resumen["filas"].values())
+    for hoja, n in resumen["filas"].items():
+        print(f"{hoja}: {n} filas")
+    print(f"{filas} filas en {resumen['segundos']:.2f} s ({filas / max(resumen['segundos'], 1e-9):,.0f} filas/s)")
+    print("Archivos: " + ", ".join(resumen["archivos"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Fechas como número de día (días desde 1970-01-01), el formato en que notas guarda la fecha
+# (columna dia). La columna fecha (texto YYYY-MM-DD) se calcula a partir de dia.
+# Las conversiones se memorizan: en una sesión se repiten pocas fechas distintas.
+import calendar
+from datetime import date
+from functools import lru_cache
+
+ORDINAL_1970 = date(1970, 1, 1).toordinal()
+
+# Expresiones SQL equivalentes a a_fecha y a_dia (julianday da .5 en la medianoche)
+SQL_FECHA = "date({} + 2440587.5)"
+SQL_DIA = "CAST(julianday({}) - 2440587.5 AS INTEGER)"
+
+
+@lru_cache(maxsize=4096)
+def a_dia(fecha) -> int:
+    # fecha: texto YYYY-MM-DD o date
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha)
+    return fecha.toordinal() - ORDINAL_1970
+
+
+@lru_cache(maxsize=4096)
+def a_fecha(dia) -> str:
+    return date.fromordinal(dia + ORDINAL_1970).isoformat()
+
+
+@lru_cache(maxsize=4096)
+def _dia_limite(fecha, final):
+    # Los rangos se comparaban como texto, así que se aceptan límites como '0000-01-01' o
+    # '2024-02-31': un día que no existe se acomoda al último del mes (fin) o al primero del
+    # siguiente (inicio), y el año se lleva a 1..9999
+    anio, mes, dia = (int(parte) for parte in fecha.split("-"))
+    anio, mes = min(max(anio, 1), 9999), min(max(mes, 1), 12)
+    ultimo = calendar.monthrange(anio, mes)[1]
+    if dia > ultimo:
+        return a_dia(date(anio, mes, ultimo)) + (0 if final else 1)
+    return a_dia(date(anio, mes, max(dia, 1)))
+
+
+def rango_dias(fecha_inicio, fecha_fin):
+    # (primer día, último día) para filtrar notas.dia con BETWEEN
+    return _dia_limite(fecha_inicio, False), _dia_limite(fecha_fin, True)
@@ -0,0 +1,303 @@
+# Reportes consolidados de varias sucursales, cada una con su propia taller.db. Las sucursales se
+# registran en sucursales.json (nombre -> ruta) y cada reporte se calcula en un grupo de procesos:
+# cada proceso lee una sucursal y devuelve un resultado parcial combinable, y aquí se combinan.
+#   periodo      notas de cada sucursal, ya ordenadas; se intercalan por fecha (exacto)
+#   tendencia    frecuencia de cada total (estadisticas.Frecuencias): media, mediana y modas exactas
+#   dispersion   Welford (conteo, media y M2) y Cuantiles: varianza exacta, cuartiles exactos hasta
+#                api.LIMITE_CUANTILES_EXACTOS totales y con error de rango acotado después
+#   servicios    cantidad e ingresos de cada servicio, por nombre (el catálogo es chico); se suman
+#   clientes     los k mejores clientes de cada sucursal con sus empates: un cliente es de una sola
+#                sucursal, así que los k mejores del total están entre ellos (exacto)
+# Uso: python federacion.py agregar Centro /ruta/centro/taller.db | quitar Centro | listar
+#      python federacion.py periodo|tendencia|dispersion|servicios|clientes [--inicio YYYY-MM-DD]
+#                           [--fin YYYY-MM-DD] [--k 3] [--criterio cantidad|ingresos] [--procesos N]
+import argparse
+import heapq
+import json
+import math
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import api
+import conexion
+import esquema
+from api import ErrorTaller, TendenciaCentral, Dispersion, LUGARES_RANKING
+from estadisticas import Frecuencias, Welford, Cuantiles
+
+ARCHIVO_SUCURSALES = "sucursales.json"
+REPORTES = ("periodo", "tendencia", "dispersion", "servicios", "clientes")
+
+
+@dataclass
+class NotaSucursal:
+    sucursal: str
+    folio: int
+    fecha: str
+    cliente_clave: int
+    total: float
+
+
+@dataclass
+class PosicionSucursal:
+    nombre: str
+    cantidad: int
+    ingresos: float
+    lugar: int
+    sucursal: str = ""   # en clientes, la sucursal del cliente; en servicios, vacío (suma de todas)
+
+
+# ---------------------------------------------------------------- registro de sucursales
+
+def leer_sucursales(archivo=ARCHIVO_SUCURSALES):
+    if not os.path.exists(archivo):
+        return {}
+    with open(archivo, encoding="utf-8") as entrada:
+        return json.load(entrada)
+
+
+def _guardar_sucursales(sucursales, archivo):
+    temporal = archivo + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as salida:
+        json.dump(sucursales, salida, indent=2, ensure_ascii=False)
+    os.replace(temporal, archivo)
+
+
+def agregar_sucursal(nombre, ruta, archivo=ARCHIVO_SUCURSALES):
+    nombre = nombre.strip()
+    if not nombre:
+        raise ErrorTaller("El nombre de la sucursal no puede estar vacío.")
+    ruta = os.path.abspath(ruta)
+    if not os.path.exists(ruta):
+        raise ErrorTaller(f"No existe la base {ruta}.")
+    sucursales = leer_sucursales(archivo)
+    sucursales[nombre] = ruta
+    _guardar_sucursales(sucursales, archivo)
+    return ruta
+
+
+def quitar_sucursal(nombre, archivo=ARCHIVO_SUCURSALES):
+    sucursales = leer_sucursales(archivo)
+    if sucursales.pop(nombre, None) is None:
+        raise ErrorTaller(f"No hay una sucursal llamada {nombre}.")
+    _guardar_sucursales(sucursales, archivo)
+
+
+# ---------------------------------------------------------------- resultados parciales (en los procesos)
+
+def _abrir(ruta):
+    # Solo lectura y sin migrar: un reporte no cambia la base de una sucursal. Una base con
+    # migraciones pendientes se rechaza, porque le pueden faltar los resúmenes que se leen aquí.
+    conn = conexion.obtener_conexion(ruta, solo_lectura=True)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < len(esquema.MIGRACIONES):
+        raise ErrorTaller(f"La base {ruta} tiene el esquema en la versión {version} de "
+                          f"{len(esquema.MIGRACIONES)}; ábrala una vez con el sistema para actualizarla.")
+    return conn
+
+
+def _parcial(ruta, reporte, fecha_inicio, fecha_fin, opciones):
+    conn = _abrir(ruta)
+    fecha_fin = api.validar_fecha(fecha_fin)
+    fecha_inicio = fecha_inicio or api.fecha_mas_antigua(conn)
+    if fecha_inicio is None or fecha_inicio > fecha_fin:
+        return None
+
+    if reporte == "periodo":
+        return [(n.folio, n.fecha, n.cliente_clave, n.total)
+                for n in api.notas_periodo(conn, fecha_inicio, fecha_fin)]
+
+    if reporte == "tendencia":
+        return api.frecuencias_totales(conn, fecha_inicio, fecha_fin)
+
+    if reporte == "dispersion":
+        momentos = Welford()
+        cuartiles = Cuantiles(api.ERROR_CUANTILES, api.LIMITE_CUANTILES_EXACTOS)
+        for (total,) in api.totales_por_nota(conn, fecha_inicio, fecha_fin):
+            momentos.agregar(total)
+            cuartiles.agregar(total)
+        return momentos, cuartiles
+
+    if reporte == "servicios":
+        nombres = dict(conn.execute("SELECT clave, nombre FROM servicios"))
+        filas = api.agregado_servicios(conn, fecha_inicio, fecha_fin)
+        return [(nombres.get(clave, str(clave)), cantidad, ingresos) for clave, cantidad, ingresos in filas]
+
+    filas = api.agregado_clientes(conn, fecha_inicio, fecha_fin)
+    candidatos = api.ranking(filas, opciones.get("k", LUGARES_RANKING), opciones.get("criterio", "cantidad"),
+                             empates=True)
+    api.poner_nombres_clientes(conn, candidatos)
+    return [(p.nombre, p.cantidad, p.ingresos) for p in candidatos]
+
+
+# ---------------------------------------------------------------- combinación
+
+def _combinar_tendencia(parciales):
+    frecuencias = Frecuencias()
+    for parcial in parciales.values():
+        frecuencias.combinar(parcial)
+    if not frecuencias.conteo:
+        return None
+    return TendenciaCentral(frecuencias.conteo, frecuencias.media, frecuencias.mediana, frecuencias.modas)
+
+
+def _combinar_dispersion(parciales):
+    momentos = Welford()
+    cuartiles = Cuantiles(api.ERROR_CUANTILES, api.LIMITE_CUANTILES_EXACTOS)
+    for parcial_momentos, parcial_cuartiles in parciales.values():
+        momentos.combinar(parcial_momentos)
+        cuartiles.combinar(parcial_cuartiles)
+    if momentos.conteo < 2:
+        return None
+    q1, q2, q3 = (cuartiles.cuantil(q) for q in (0.25, 0.50, 0.75))
+    return Dispersion(momentos.conteo, momentos.varianza, momentos.desviacion, q1, q2, q3, q3 - q1,
+                      cuartiles.exacto)
+
+
+def _combinar_ranking(filas, k, criterio, empates):
+    # filas: (nombre, cantidad, ingresos, sucursal); api.ranking valida k y criterio
+    posiciones = api.ranking([(i, cantidad, ingresos) for i, (_, cantidad, ingresos, _) in enumerate(filas)],
+                             k, criterio, empates)
+    return [PosicionSucursal(filas[p.clave][0], p.cantidad, round(p.ingresos, 2), p.lugar, filas[p.clave][3])
+            for p in posiciones]
+
+
+def _combinar(reporte, parciales, opciones):
+    if reporte == "periodo":
+        # Cada sucursal ya viene ordenada por fecha y folio
+        por_sucursal = [[(fecha, nombre, folio, cliente, total) for folio, fecha, cliente, total in notas]
+                        for nombre, notas in parciales.items()]
+        return [NotaSucursal(nombre, folio, fecha, cliente, total)
+                for fecha, nombre, folio, cliente, total in heapq.merge(*por_sucursal)]
+    if reporte == "tendencia":
+        return _combinar_tendencia(parciales)
+    if reporte == "dispersion":
+        return _combinar_dispersion(parciales)
+
+    k = opciones.get("k", LUGARES_RANKING)
+    criterio = opciones.get("criterio", "cantidad")
+    empates = opciones.get("empates", True)
+    if reporte == "servicios":
+        # El mismo servicio tiene otra clave en cada sucursal: se junta por nombre
+        sumas = {}
+        for filas in parciales.values():
+            for nombre, cantidad, ingresos in filas:
+                llave = " ".join(nombre.split()).casefold()
+                anterior = sumas.get(llave, (nombre, 0, 0.0, ""))
+                sumas[llave] = (anterior[0], anterior[1] + cantidad, anterior[2] + ingresos, "")
+        return _combinar_ranking(list(sumas.values()), k, criterio, empates)
+    return _combinar_ranking([(nombre, cantidad, ingresos, sucursal)
+                              for sucursal, filas in parciales.items()
+                              for nombre, cantidad, ingresos in filas], k, criterio, empates)
+
+
+# ---------------------------------------------------------------- reportes
+
+class Federacion:
+    # Grupo de procesos para varios reportes seguidos; con procesos=1 todo corre en este proceso
+    def __init__(self, sucursales=None, procesos=None):
+        self.sucursales = leer_sucursales() if sucursales is None else dict(sucursales)
+        if not self.sucursales:
+            raise ErrorTaller("No hay sucursales registradas.")
+        procesos = min(procesos or os.cpu_count() or 1, len(self.sucursales))
+        self.grupo = None
+        if procesos > 1:
+            # spawn: los procesos no heredan las conexiones abiertas de este
+            self.grupo = ProcessPoolExecutor(procesos, multiprocessing.get_context("spawn"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+    def cerrar(self):
+        if self.grupo is not None:
+            self.grupo.shutdown()
+            self.grupo = None
+
+    def reporte(self, reporte, fecha_inicio=None, fecha_fin=None, **opciones):
+        if reporte not in REPORTES:
+            raise ErrorTaller(f"Reporte inválido; use {', '.join(REPORTES)}.")
+        if fecha_inicio:
+            fecha_inicio = api.validar_fecha(fecha_inicio)
+        fecha_fin = api.validar_fecha(fecha_fin)
+        if fecha_inicio and fecha_fin < fecha_inicio:
+            raise ErrorTaller("La fecha final no puede ser anterior a la inicial.")
+        if reporte in ("servicios", "clientes"):
+            api.ranking([], opciones.get("k", LUGARES_RANKING), opciones.get("criterio", "cantidad"))
+
+        argumentos = (reporte, fecha_inicio, fecha_fin, opciones)
+        if self.grupo is None:
+            parciales = {nombre: _parcial(ruta, *argumentos) for nombre, ruta in self.sucursales.items()}
+        else:
+            futuros = {nombre: self.grupo.submit(_parcial, ruta, *argumentos)
+                       for nombre, ruta in self.sucursales.items()}
+            parciales = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+        return _combinar(reporte, {nombre: p for nombre, p in parciales.items() if p is not None}, opciones)
+
+
+def reporte(reporte, fecha_inicio=None, fecha_fin=None, sucursales=None, procesos=None, **opciones):
+    with Federacion(sucursales, procesos) as federacion:
+        return federacion.reporte(reporte, fecha_inicio, fecha_fin, **opciones)
+
+
+def imprimir(reporte, resultado):
+    if not resultado:
+        print("No hay notas en el período.")
+    elif reporte == "periodo":
+        por_sucursal = Counter()
+        ingresos = {}
+        for nota in resultado:
+            por_sucursal[nota.sucursal] += 1
+            ingresos.setdefault(nota.sucursal, []).append(nota.total)
+        for sucursal, notas in por_sucursal.items():
+            print(f"  {sucursal:<20} {notas:8d} notas  {math.fsum(ingresos[sucursal]):14,.2f}")
+        print(f"  {'Total':<20} {len(resultado):8d} notas  {math.fsum(n.total for n in resultado):14,.2f}")
+    elif reporte == "tendencia":
+        print(f"Notas: {resultado.conteo}  Media: {resultado.media:,.2f}  Mediana: {resultado.mediana:,.2f}  "
+              f"Modas: {', '.join(f'{m:,.2f}' for m in resultado.modas[:10])}")
+    elif reporte == "dispersion":
+        print(f"Notas: {resultado.conteo}  Varianza: {resultado.varianza:,.2f}  "
+              f"Desviación: {resultado.desviacion:,.2f}")
+        print(f"Q1: {resultado.q1:,.2f}  Q2: {resultado.q2:,.2f}  Q3: {resultado.q3:,.2f}  IQR: {resultado.iqr:,.2f}"
+              + ("" if resultado.exacto else f"  (cuartiles aproximados, error de rango ~{api.ERROR_CUANTILES:.0%})"))
+    else:
+        for p in resultado:
+            print(f"  {p.lugar:3d}. {p.nombre:<32} {p.sucursal:<16} {p.cantidad:8d}  {p.ingresos:14,.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportes consolidados de varias sucursales.")
+    parser.add_argument("comando", choices=("agregar", "quitar", "listar") + REPORTES)
+    parser.add_argument("argumentos", nargs="*", help="agregar: NOMBRE RUTA; quitar: NOMBRE")
+    parser.add_argument("--inicio", default=None, help="YYYY-MM-DD (por omisión, la nota más antigua)")
+    parser.add_argument("--fin", default=None, help="YYYY-MM-DD (por omisión, hoy)")
+    parser.add_argument("--k", type=int, default=LUGARES_RANKING)
+    parser.add_argument("--criterio", default="cantidad")
+    parser.add_argument("--procesos", type=int, default=None, help="por omisión, uno por núcleo")
+    args = parser.parse_args()
+
+    try:
+        if args.comando == "agregar":
+            if len(args.argumentos) != 2:
+                parser.error("indique el nombre y la ruta de la sucursal")
+            print(f"Sucursal {args.argumentos[0]}: {agregar_sucursal(*args.argumentos)}")
+        elif args.comando == "quitar":
+            if len(args.argumentos) != 1:
+                parser.error("indique el nombre de la sucursal")
+            quitar_sucursal(args.argumentos[0])
+        elif args.comando == "listar":
+            for nombre, ruta in leer_sucursales().items():
+                print(f"  {nombre:<20} {ruta}")
+        else:
+            opciones = {"k": args.k, "criterio": args.criterio} if args.comando in ("servicios", "clientes") else {}
+            imprimir(args.comando, reporte(args.comando, args.inicio, args.fin, procesos=args.procesos, **opciones))
+    except ErrorTaller as e:
+        print(e)
+
+
+if __name__ == "__main__":
+    main()
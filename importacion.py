@@ -0,0 +1,341 @@
+# Importación masiva de notas históricas desde CSV o Excel
+# Cada fila del archivo es una línea de servicio; las filas con el mismo folio forman una nota.
+# Los triggers de notas y detalles_nota no corren línea por línea: lo que agregan las líneas al
+# resumen diario y sus acumulados se suma mientras se leen y se escribe con una sentencia por tabla,
+# junto con las fechas cambiadas y el índice de búsqueda (resumir).
+# - En una base en uso, cada lote va en su propia transacción con los triggers suspendidos
+#   (suspension.py) y se resume antes del COMMIT. Las notas que se registren desde el menú o el
+#   servidor entre un lote y otro pasan por los triggers como siempre.
+# - En una base sin notas que nadie más tiene abierta, todo el archivo va en una sola transacción
+#   con el candado exclusivo, sin los índices ni los triggers de notas y detalles_nota (aun
+#   suspendidos, cada línea paga por ellos). Se vuelven a crear al final, antes del COMMIT; si la
+#   carga falla o el proceso muere, la base queda vacía como estaba.
+# Uso: python importacion.py notas.csv [--lote 20000] [--sin-diferir-indices]
+import argparse
+import csv
+import sqlite3
+import time
+from datetime import date, datetime
+
+import esquema
+from api import CATALOGO_CLIENTES
+from busqueda import indexar_observaciones
+from cambios import marcar_fechas
+from conexion import obtener_conexion
+from fechas import a_dia
+from particiones import maximo_folio
+from resumen import sumar_diferencias
+from suspension import triggers_suspendidos
+from validaciones import nombre_valido, telefono_valido, costo_valido
+
+COLUMNAS_REQUERIDAS = ("folio", "fecha", "telefono", "servicio_clave")
+TAMANO_LOTE = 20000
+MAX_ERRORES_GUARDADOS = 1000
+
+
+def leer_csv(ruta):
+    with open(ruta, newline="", encoding="utf-8-sig") as archivo:
+        yield from csv.reader(archivo)
+
+
+def leer_xlsx(ruta):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        for fila in libro.active.iter_rows(values_only=True):
+            yield [_texto(valor) for valor in fila]
+    finally:
+        libro.close()
+
+
+def leer_filas(ruta):
+    # Devuelve el encabezado y un iterador de filas como listas de texto
+    if ruta.lower().endswith((".xlsx", ".xlsm")):
+        filas = leer_xlsx(ruta)
+    else:
+        filas = leer_csv(ruta)
+    encabezado = [c.strip().lower() for c in next(filas, [])]
+    return encabezado, filas
+
+
+def _texto(valor):
+    # Normaliza lo que llega de Excel (números y fechas) a texto como en un CSV
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime("%Y-%m-%d")
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+class _ValidadorFechas:
+    # strptime es lo más caro por fila; las fechas distintas son pocas, así que se memorizan
+    def __init__(self):
+        self.hoy = date.today().isoformat()
+        self.cache = {}
+
+    def convertir(self, texto):
+        if texto not in self.cache:
+            self.cache[texto] = self._convertir(texto)
+        fecha = self.cache[texto]
+        if fecha is None:
+            raise ValueError(f"fecha inválida '{texto}'")
+        return fecha
+
+    def _convertir(self, texto):
+        for formato in ("%Y-%m-%d", "%m-%d-%Y"):
+            try:
+                fecha = datetime.strptime(texto, formato).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+            return fecha if fecha <= self.hoy else None
+        return None
+
+
+def _tomar_exclusiva(conn):
+    # Se pide el candado exclusivo sin esperar, que falla si otra conexión (otra terminal, el
+    # servidor, el residente) tiene la base abierta, y se conserva solo si no hay notas todavía
+    espera = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+    conn.execute("PRAGMA main.locking_mode = EXCLUSIVE")
+    conn.execute("PRAGMA busy_timeout = 0")
+    try:
+        conn.execute("BEGIN EXCLUSIVE")
+        vacia = not conn.execute("SELECT 1 FROM todas_notas LIMIT 1").fetchone()
+        conn.commit()
+    except sqlite3.OperationalError:
+        vacia = False
+    finally:
+        conn.execute(f"PRAGMA busy_timeout = {espera}")
+    if not vacia:
+        _soltar_exclusiva(conn)
+    return vacia
+
+
+def _soltar_exclusiva(conn):
+    conn.execute("PRAGMA main.locking_mode = NORMAL")
+    # El candado se suelta en el siguiente acceso al archivo
+    conn.execute("SELECT COUNT(*) FROM main.sqlite_master").fetchone()
+
+
+def _quitar_indices_y_triggers(cursor):
+    # Dentro de la transacción de la carga; devuelve su SQL para volver a crearlos, índices primero
+    quitados = cursor.execute("""
+        SELECT type, name, sql FROM main.sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ('notas', 'detalles_nota')
+        ORDER BY type
+    """).fetchall()
+    for tipo, nombre, _ in quitados:
+        cursor.execute(f"DROP {tipo.upper()} main.{nombre}")
+    return [sql for _, _, sql in quitados]
+
+
+def importar_notas(ruta, nombre_db=None, tamano_lote=TAMANO_LOTE, diferir_indices=True):
+    conn = obtener_conexion(nombre_db)
+    cursor = conn.cursor()
+    inicio = time.perf_counter()
+    esquema.crear_tablas(conn)
+
+    clientes = dict(cursor.execute("SELECT telefono, clave FROM clientes").fetchall())
+    servicios = {str(clave): (clave, costo) for clave, costo in cursor.execute("SELECT clave, costo FROM servicios")}
+    fechas = _ValidadorFechas()
+
+    # folio del archivo -> [folio asignado, fecha, cliente, cancelada, total, líneas, total y líneas ya
+    # resumidos] para unir líneas de la misma nota entre lotes y sumar al resumen solo lo nuevo
+    folios = {}
+    siguiente_folio = 0
+    notas, detalles = [], []
+    # Lo que falta llevar al resumen (ver resumir): notas activas con líneas nuevas, veces e ingresos
+    # por fecha y servicio, y las fechas con notas nuevas
+    tocadas, por_servicio, cambiadas = {}, {}, set()
+    errores = []
+    resumen = {"lineas": 0, "notas": 0, "clientes_nuevos": 0, "rechazadas": 0}
+
+    def rechazar(linea, mensaje):
+        resumen["rechazadas"] += 1
+        if len(errores) < MAX_ERRORES_GUARDADOS:
+            errores.append((linea, mensaje))
+
+    def resumir(desde_id):
+        # Con los triggers suspendidos: lo que harían por cada línea con id > desde_id
+        por_dia, por_cliente = {}, {}
+        for nota in tocadas.values():
+            _, fecha, cliente_clave, _, total, lineas, antes, lineas_antes = nota
+            nueva = 0 if lineas_antes else 1
+            dia = por_dia.get(fecha)
+            if dia is None:
+                por_dia[fecha] = [nueva, total - antes, total * total - antes * antes]
+            else:
+                dia[0] += nueva
+                dia[1] += total - antes
+                dia[2] += total * total - antes * antes
+            cliente = por_cliente.get((fecha, cliente_clave))
+            if cliente is None:
+                por_cliente[fecha, cliente_clave] = [nueva, lineas - lineas_antes, total - antes]
+            else:
+                cliente[0] += nueva
+                cliente[1] += lineas - lineas_antes
+                cliente[2] += total - antes
+            nota[6], nota[7] = total, lineas
+        sumar_diferencias(cursor, por_dia, por_servicio, por_cliente)
+        marcar_fechas(cursor, cambiadas)
+        indexar_observaciones(conn, desde_id)
+        tocadas.clear()
+        por_servicio.clear()
+        cambiadas.clear()
+
+    def guardar_lote():
+        # En la transacción abierta al empezar el lote (o la carga); las líneas nuevas son las de id > desde_id
+        desde_id = cursor.execute("SELECT IFNULL(MAX(id), 0) FROM main.detalles_nota").fetchone()[0]
+        with triggers_suspendidos(cursor, "importación"):
+            cursor.executemany("INSERT INTO notas (folio, dia, cliente_clave, cancelada) VALUES (?, ?, ?, ?)", notas)
+            cursor.executemany("""
+                INSERT INTO detalles_nota (folio, servicio_clave, observaciones, costo)
+                VALUES (?, ?, ?, ?)
+            """, detalles)
+            if not una_transaccion:
+                resumir(desde_id)
+        if not una_transaccion:
+            conn.commit()
+        resumen["notas"] += len(notas)
+        resumen["lineas"] += len(detalles)
+        notas.clear()
+        detalles.clear()
+
+    encabezado, filas = leer_filas(ruta)
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in encabezado]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+    posicion = {nombre: i for i, nombre in enumerate(encabezado)}
+    i_folio, i_fecha, i_telefono, i_servicio = (posicion[c] for c in COLUMNAS_REQUERIDAS)
+    # Las columnas opcionales que faltan apuntan a una columna vacía que se agrega al final de cada fila
+    ancho = len(encabezado) + 1
+    i_apellidos, i_nombres, i_observaciones, i_costo, i_cancelada = (
+        posicion.get(c, ancho - 1) for c in ("apellidos", "nombres", "observaciones", "costo", "cancelada"))
+
+    una_transaccion = diferir_indices and _tomar_exclusiva(conn)
+    try:
+        if una_transaccion:
+            cursor.execute("BEGIN IMMEDIATE")
+            desde_id = cursor.execute("SELECT IFNULL(MAX(id), 0) FROM main.detalles_nota").fetchone()[0]
+            quitados = _quitar_indices_y_triggers(cursor)
+        en_lote = 0
+        # La línea 1 es el encabezado
+        for linea, fila in enumerate(filas, start=2):
+            if not conn.in_transaction:
+                # Una transacción de escritura por lote; el folio se recalcula por si otra terminal registró notas
+                # (también los de años archivados, que ya no están en notas)
+                cursor.execute("BEGIN IMMEDIATE")
+            if en_lote == 0:
+                siguiente_folio = max(siguiente_folio, maximo_folio(conn) + 1)
+
+            en_lote += 1
+            if len(fila) < ancho:
+                fila = fila + [""] * (ancho - len(fila))
+            try:
+                folio_origen = fila[i_folio].strip()
+                if not folio_origen:
+                    raise ValueError("folio vacío")
+                fecha = fechas.convertir(fila[i_fecha].strip())
+
+                servicio = servicios.get(fila[i_servicio].strip())
+                if servicio is None:
+                    raise ValueError(f"servicio inexistente '{fila[i_servicio].strip()}'")
+
+                costo_texto = fila[i_costo].strip()
+                costo = float(costo_texto) if costo_texto else servicio[1]
+                if not costo_valido(costo):
+                    raise ValueError(f"costo inválido '{costo_texto}'")
+
+                telefono = fila[i_telefono].strip()
+                cliente_clave = clientes.get(telefono)
+                if cliente_clave is None:
+                    if not telefono_valido(telefono):
+                        raise ValueError(f"teléfono inválido '{telefono}'")
+                    apellidos = fila[i_apellidos].strip()
+                    nombres = fila[i_nombres].strip()
+                    if not (nombre_valido(apellidos) and nombre_valido(nombres)):
+                        raise ValueError("cliente nuevo sin apellidos/nombres válidos")
+
+                # Un cliente nuevo no puede ser el de una nota que ya se leyó
+                nota = folios.get(folio_origen)
+                if nota is not None and (nota[1] != fecha or nota[2] != cliente_clave):
+                    raise ValueError(f"el folio {folio_origen} tiene fecha o cliente distintos en otra línea")
+            except ValueError as e:
+                rechazar(linea, str(e))
+                continue
+
+            # La fila es válida: hasta aquí se da de alta el cliente nuevo
+            if cliente_clave is None:
+                cursor.execute("""
+                    INSERT INTO clientes (apellidos, nombres, telefono, suspendido)
+                    VALUES (?, ?, ?, 0)
+                """, (apellidos, nombres, telefono))
+                cliente_clave = clientes[telefono] = cursor.lastrowid
+                resumen["clientes_nuevos"] += 1
+            if nota is None:
+                cancelada = 1 if fila[i_cancelada].strip().lower() in ("1", "s", "si") else 0
+                nota = folios[folio_origen] = [siguiente_folio, fecha, cliente_clave, cancelada, 0.0, 0, 0.0, 0]
+                siguiente_folio += 1
+                notas.append((nota[0], a_dia(fecha), cliente_clave, cancelada))
+                cambiadas.add(fecha)
+
+            detalles.append((nota[0], servicio[0], fila[i_observaciones].strip(), costo))
+            # Las notas canceladas no cuentan en el resumen
+            if not nota[3]:
+                nota[4] += costo
+                nota[5] += 1
+                tocadas[folio_origen] = nota
+                veces = por_servicio.get((fecha, servicio[0]))
+                if veces is None:
+                    por_servicio[fecha, servicio[0]] = [1, costo]
+                else:
+                    veces[0] += 1
+                    veces[1] += costo
+            if en_lote >= tamano_lote:
+                guardar_lote()
+                en_lote = 0
+
+        if en_lote:
+            guardar_lote()
+        if una_transaccion:
+            for sql in quitados:
+                cursor.execute(sql)
+            with triggers_suspendidos(cursor, "importación"):
+                resumir(desde_id)
+            conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        if una_transaccion:
+            _soltar_exclusiva(conn)
+        if resumen["clientes_nuevos"]:
+            CATALOGO_CLIENTES.invalidar()
+
+    resumen["segundos"] = time.perf_counter() - inicio
+    resumen["errores"] = errores
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa notas históricas desde un CSV o XLSX.")
+    parser.add_argument("archivo")
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE)
+    parser.add_argument("--sin-diferir-indices", action="store_true")
+    args = parser.parse_args()
+
+    resumen = importar_notas(args.archivo, args.db, args.lote, not args.sin_diferir_indices)
+    segundos = resumen["segundos"]
+    print(f"Notas importadas: {resumen['notas']}")
+    print(f"Líneas importadas: {resumen['lineas']} ({resumen['lineas'] / segundos:,.0f} líneas/s)")
+    print(f"Clientes nuevos: {resumen['clientes_nuevos']}")
+    print(f"Líneas rechazadas: {resumen['rechazadas']}")
+    for linea, mensaje in resumen["errores"][:20]:
+        print(f"  Línea {linea}: {mensaje}")
+
+
+if __name__ == "__main__":
+    main()
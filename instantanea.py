@@ -0,0 +1,199 @@
+# Instantánea Parquet de notas, detalles, clientes y servicios para análisis fuera de la base en uso.
+# notas y detalles_nota se particionan por mes (notas/mes=2024-01/parte.parquet). Cada
+# actualización reescribe solo los meses con fechas cambiadas desde la anterior (ver cambios.py);
+# clientes y servicios, que son pequeños, se reescriben completos. Requiere pyarrow.
+# Uso: python instantanea.py actualizar [--dir instantanea]
+#      python instantanea.py analizar 2024-01-01 2024-12-31 [--dir instantanea]
+import argparse
+import json
+import os
+import shutil
+import time
+
+from api import ErrorTaller
+from cambios import fechas_cambiadas, version_cambios
+from conexion import obtener_conexion
+from fechas import rango_dias
+
+DIRECTORIO = "instantanea"
+ARCHIVO_ESTADO = "_estado.json"
+
+# (tabla, columnas con su tipo de pyarrow, consulta); las consultas de las tablas particionadas
+# reciben (primer día, último día) del mes como números de día e incluyen los años archivados
+# (ver particiones.py). El esquema es explícito para que todos los meses
+# coincidan aunque en alguno una columna solo traiga NULL.
+TABLAS_PARTICIONADAS = (
+    ("notas", (("folio", "int64"), ("fecha", "string"), ("cliente_clave", "int64"), ("cancelada", "int64")), """
+        SELECT folio, fecha, cliente_clave, cancelada
+        FROM todas_notas
+        WHERE dia BETWEEN ? AND ?
+        ORDER BY dia, folio
+    """),
+    ("detalles_nota", (("id", "int64"), ("folio", "int64"), ("fecha", "string"), ("servicio_clave", "int64"),
+                       ("observaciones", "string"), ("costo", "float64")), """
+        SELECT id, folio, fecha, servicio_clave, observaciones, costo
+        FROM todos_detalles
+        WHERE dia BETWEEN ? AND ?
+        ORDER BY dia, folio, id
+    """),
+)
+
+TABLAS_COMPLETAS = (
+    ("clientes", (("clave", "int64"), ("apellidos", "string"), ("nombres", "string"), ("telefono", "string"),
+                  ("suspendido", "int64")),
+     "SELECT clave, apellidos, nombres, telefono, suspendido FROM clientes ORDER BY clave"),
+    ("servicios", (("clave", "int64"), ("nombre", "string"), ("costo", "float64"), ("suspendido", "int64")),
+     "SELECT clave, nombre, costo, suspendido FROM servicios ORDER BY clave"),
+)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ErrorTaller("La instantánea Parquet requiere pyarrow (pip install pyarrow).") from None
+    return pyarrow
+
+
+def _leer_estado(directorio):
+    ruta = os.path.join(directorio, ARCHIVO_ESTADO)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _escribir_parquet(pa, columnas, cursor, ruta, aunque_vacia=False):
+    # Se escribe a un archivo temporal y se reemplaza al final para no dejar partes a medias;
+    # el nombre temporal empieza con "." para que pyarrow no lo lea como parte del dataset
+    filas = cursor.fetchall()
+    if not filas and not aunque_vacia:
+        return 0
+    esquema = pa.schema([(nombre, getattr(pa, tipo)()) for nombre, tipo in columnas])
+    tabla = pa.table([list(valores) for valores in zip(*filas)] if filas else [[] for _ in columnas],
+                     schema=esquema)
+    carpeta = os.path.dirname(ruta)
+    temporal = os.path.join(carpeta, f".{os.path.basename(ruta)}.tmp")
+    os.makedirs(carpeta, exist_ok=True)
+    pa.parquet.write_table(tabla, temporal)
+    os.replace(temporal, ruta)
+    return len(filas)
+
+
+def actualizar_instantanea(directorio=DIRECTORIO, nombre_db=None, completa=False):
+    pa = _pyarrow()
+    conn = obtener_conexion(nombre_db)
+    inicio = time.perf_counter()
+    estado = None if completa else _leer_estado(directorio)
+
+    # Todo se lee dentro de una misma transacción de lectura para que la instantánea sea consistente
+    conn.execute("BEGIN")
+    try:
+        version = version_cambios(conn)
+        if estado is None:
+            meses = {fila[0] for fila in conn.execute("SELECT DISTINCT substr(fecha, 1, 7) FROM todas_notas")}
+        else:
+            meses = {fecha[:7] for fecha in fechas_cambiadas(conn, estado["version"])}
+
+        filas = {}
+        for tabla, columnas, consulta in TABLAS_PARTICIONADAS:
+            filas[tabla] = 0
+            if estado is None and os.path.isdir(os.path.join(directorio, tabla)):
+                # En una instantánea completa se quitan los meses que ya no existen en la base
+                for particion in os.listdir(os.path.join(directorio, tabla)):
+                    if particion.startswith("mes=") and particion[4:] not in meses:
+                        shutil.rmtree(os.path.join(directorio, tabla, particion))
+            for mes in sorted(meses):
+                particion = os.path.join(directorio, tabla, f"mes={mes}")
+                escritas = _escribir_parquet(pa, columnas, conn.execute(consulta, rango_dias(f"{mes}-01", f"{mes}-31")),
+                                             os.path.join(particion, "parte.parquet"))
+                if escritas == 0:
+                    # El mes se quedó sin notas
+                    shutil.rmtree(particion, ignore_errors=True)
+                filas[tabla] += escritas
+
+        for tabla, columnas, consulta in TABLAS_COMPLETAS:
+            filas[tabla] = _escribir_parquet(pa, columnas, conn.execute(consulta),
+                                             os.path.join(directorio, f"{tabla}.parquet"), aunque_vacia=True)
+    finally:
+        conn.commit()
+
+    # El estado se guarda al final: si algo falla, la siguiente actualización repite estos meses
+    with open(os.path.join(directorio, ARCHIVO_ESTADO), "w", encoding="utf-8") as archivo:
+        json.dump({"version": version}, archivo)
+
+    return {"meses": sorted(meses), "filas": filas, "version": version,
+            "segundos": time.perf_counter() - inicio}
+
+
+def leer_periodo(directorio, fecha_inicio, fecha_fin):
+    # Detalles de las notas activas del período, con las mismas columnas que la consulta de
+    # SesionAnalitica. El filtro por fecha se aplica al leer: se descartan las particiones
+    # (meses) fuera del rango y los row groups cuyas estadísticas de fecha no lo tocan.
+    pa = _pyarrow()
+    ds = pa.dataset
+    if _leer_estado(directorio) is None:
+        raise ErrorTaller(f"No hay instantánea en '{directorio}'. Ejecute: python instantanea.py actualizar")
+
+    en_rango = ((ds.field("mes") >= fecha_inicio[:7]) & (ds.field("mes") <= fecha_fin[:7])
+                & (ds.field("fecha") >= fecha_inicio) & (ds.field("fecha") <= fecha_fin))
+
+    def tabla(nombre, columnas, filtro):
+        ruta = os.path.join(directorio, nombre)
+        if not os.path.isdir(ruta):
+            return None
+        return ds.dataset(ruta, format="parquet", partitioning="hive").to_table(columns=columnas, filter=filtro)
+
+    notas = tabla("notas", ["folio", "cliente_clave"], en_rango & (ds.field("cancelada") == 0))
+    detalles = tabla("detalles_nota", ["folio", "servicio_clave", "costo"], en_rango)
+    if notas is None or detalles is None:
+        unidas = pa.table({"folio": pa.array([], pa.int64()), "cliente_clave": pa.array([], pa.int64()),
+                           "servicio_clave": pa.array([], pa.int64()), "costo": pa.array([], pa.float64())})
+    else:
+        unidas = detalles.join(notas, "folio", join_type="inner")
+    return unidas.select(["folio", "cliente_clave", "servicio_clave", "costo"]).to_pandas()
+
+
+def leer_nombres(directorio):
+    # (nombres de servicio, nombres de cliente) por clave
+    pq = _pyarrow().parquet
+    servicios = pq.read_table(os.path.join(directorio, "servicios.parquet"), columns=["clave", "nombre"]).to_pydict()
+    clientes = pq.read_table(os.path.join(directorio, "clientes.parquet"),
+                             columns=["clave", "apellidos", "nombres"]).to_pydict()
+    return (dict(zip(servicios["clave"], servicios["nombre"])),
+            {clave: f"{apellidos} {nombres}"
+             for clave, apellidos, nombres in zip(clientes["clave"], clientes["apellidos"], clientes["nombres"])})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantánea Parquet para análisis fuera de la base en uso.")
+    parser.add_argument("comando", choices=("actualizar", "analizar"))
+    parser.add_argument("fechas", nargs="*", help="analizar: INICIO FIN (YYYY-MM-DD)")
+    parser.add_argument("--dir", default=DIRECTORIO)
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--completa", action="store_true", help="reescribe todos los meses")
+    args = parser.parse_args()
+
+    try:
+        if args.comando == "actualizar":
+            resumen = actualizar_instantanea(args.dir, args.db, args.completa)
+            print(f"Meses actualizados: {len(resumen['meses'])}")
+            for tabla, filas in resumen["filas"].items():
+                print(f"  {tabla}: {filas} filas")
+            print(f"Versión {resumen['version']} en {resumen['segundos']:.2f} s")
+        else:
+            if len(args.fechas) != 2:
+                parser.error("analizar requiere INICIO FIN")
+            # analitica.py importa pandas y Main.py trae los menús: solo los usa este comando
+            import Main
+            from analitica import SesionAnalitica
+
+            Main.mostrar_analisis(SesionAnalitica(*args.fechas, instantanea=args.dir))
+    except ErrorTaller as e:
+        print(e)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# Medición de las sentencias SQL. Con la medición activa, conexion.abrir_conexion crea conexiones
+# ConexionMedida, cuyos cursores toman el tiempo de cada sentencia (execute y las lecturas de sus
+# filas), cuentan las filas devueltas (o modificadas) y anotan la función del proyecto que la
+# ejecutó. Las sentencias que pasan del umbral se escriben en el registro de lentas con su
+# EXPLAIN QUERY PLAN. Los contadores se leen como JSON (instantanea) o en el formato de texto de
+# Prometheus (prometheus); servidor.py los publica en GET /metricas.
+# Se activa antes de abrir conexiones: activar() solo cierra las del hilo que la llama.
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from itertools import chain
+from time import perf_counter
+
+import conexion
+
+UMBRAL_LENTAS_MS = 100
+# Largo máximo del texto de la sentencia en las etiquetas de Prometheus; dos sentencias que
+# empiezan igual se distinguen por la etiqueta id, un hash corto del texto normalizado completo
+LARGO_ETIQUETA = 120
+# Filas que lee cada paso al recorrer un cursor con for: se mide por bloque y no por fila
+FILAS_POR_BLOQUE = 256
+
+_RAIZ = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_ESTE_ARCHIVO = os.path.abspath(__file__)
+
+
+class _Estado:
+    activa = False
+    umbral = UMBRAL_LENTAS_MS / 1000
+    archivo_lentas = None
+    # (función, sentencia tal cual) -> [ejecuciones, segundos, máximo en segundos, filas, lentas];
+    # el texto se normaliza al leer los contadores, no en cada ejecución
+    contadores = {}
+    candado = threading.Lock()
+    planes = {}   # sentencia -> EXPLAIN QUERY PLAN, una vez por sentencia
+
+
+def _normalizar(sql):
+    return " ".join(sql.split())
+
+
+# Código del marco que ejecuta -> función del proyecto a la que se atribuye, o None si el marco no
+# es del proyecto (pandas, por ejemplo, ejecuta por nosotros) y hay que recorrer la pila
+_FUNCIONES = {}
+
+
+def _nombre(marco):
+    return f"{marco.f_globals.get('__name__', '?')}.{getattr(marco.f_code, 'co_qualname', marco.f_code.co_name)}"
+
+
+def _llamador(marco):
+    # Primera función del proyecto desde el marco que ejecuta, fuera de este módulo; solo se llama
+    # cuando el marco no está ya en _FUNCIONES como función del proyecto
+    codigo = marco.f_code
+    if codigo not in _FUNCIONES:
+        archivo = codigo.co_filename
+        _FUNCIONES[codigo] = funcion = (_nombre(marco) if archivo.startswith(_RAIZ) and archivo != _ESTE_ARCHIVO
+                                        else None)
+        if funcion is not None:
+            return funcion
+    primero = None
+    while marco is not None:
+        archivo = marco.f_code.co_filename
+        if archivo != _ESTE_ARCHIVO:
+            if primero is None:
+                primero = marco
+            if archivo.startswith(_RAIZ):
+                break
+        marco = marco.f_back
+    marco = marco or primero
+    return _nombre(marco) if marco is not None else "?"
+
+
+def _plan(conn, sql, parametros):
+    plan = _Estado.planes.get(sql)
+    if plan is None:
+        try:
+            filas = conn.cursor(sqlite3.Cursor).execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()
+            plan = [fila[-1] for fila in filas]
+        except (sqlite3.Error, ValueError):
+            plan = []
+        _Estado.planes[sql] = plan
+    return plan
+
+
+def _registrar_lenta(conn, sql, parametros, funcion, segundos, filas):
+    if _Estado.archivo_lentas:
+        entrada = {"fecha": datetime.now().isoformat(timespec="milliseconds"), "funcion": funcion,
+                   "ms": round(segundos * 1000, 3), "filas": filas, "sql": _normalizar(sql),
+                   "plan": _plan(conn, sql, parametros) if parametros is not None else []}
+        with _Estado.candado, open(_Estado.archivo_lentas, "a", encoding="utf-8") as archivo:
+            archivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+
+
+class CursorMedido(sqlite3.Cursor):
+    # La sentencia en curso se registra al agotar sus filas, al ejecutar otra o al cerrar el cursor
+    _sentencia = None
+
+    def _terminar(self):
+        sentencia = self._sentencia
+        if sentencia is None:
+            return
+        self._sentencia = None
+        sql, parametros, funcion, segundos, filas = sentencia
+        if not filas:
+            filas = max(self.rowcount, 0)
+        lenta = segundos >= _Estado.umbral
+        with _Estado.candado:
+            contador = _Estado.contadores.get((funcion, sql))
+            if contador is None:
+                _Estado.contadores[(funcion, sql)] = [1, segundos, segundos, filas, int(lenta)]
+            else:
+                contador[0] += 1
+                contador[1] += segundos
+                if segundos > contador[2]:
+                    contador[2] = segundos
+                contador[3] += filas
+                contador[4] += lenta
+        if lenta:
+            try:
+                _registrar_lenta(self.connection, sql, parametros, funcion, segundos, filas)
+            except sqlite3.Error:
+                pass
+
+    def execute(self, sql, parametros=()):
+        return self._ejecutar(sys._getframe(1), sql, parametros)
+
+    def _ejecutar(self, marco, sql, parametros):
+        # La función se busca por el código del marco que ejecuta; la pila se recorre solo para
+        # los marcos que no son del proyecto (pandas, por ejemplo, ejecuta por nosotros)
+        if self._sentencia is not None:
+            self._terminar()
+        funcion = _FUNCIONES.get(marco.f_code) or _llamador(marco)
+        inicio = perf_counter()
+        try:
+            return sqlite3.Cursor.execute(self, sql, parametros)
+        finally:
+            self._sentencia = [sql, parametros, funcion, perf_counter() - inicio, 0]
+
+    def executemany(self, sql, filas):
+        return self._ejecutar_varias(sys._getframe(1), sql, filas)
+
+    def _ejecutar_varias(self, marco, sql, filas):
+        if self._sentencia is not None:
+            self._terminar()
+        funcion = _FUNCIONES.get(marco.f_code) or _llamador(marco)
+        inicio = perf_counter()
+        try:
+            return sqlite3.Cursor.executemany(self, sql, filas)
+        finally:
+            # Los parámetros de executemany pueden ser un generador ya consumido: sin plan
+            self._sentencia = [sql, None, funcion, perf_counter() - inicio, 0]
+            self._terminar()
+
+    def fetchone(self):
+        inicio = perf_counter()
+        fila = sqlite3.Cursor.fetchone(self)
+        sentencia = self._sentencia
+        if sentencia is not None:
+            sentencia[3] += perf_counter() - inicio
+            if fila is None:
+                self._terminar()
+            else:
+                sentencia[4] += 1
+        return fila
+
+    def fetchmany(self, size=None):
+        inicio = perf_counter()
+        filas = sqlite3.Cursor.fetchmany(self, self.arraysize if size is None else size)
+        sentencia = self._sentencia
+        if sentencia is not None:
+            sentencia[3] += perf_counter() - inicio
+            sentencia[4] += len(filas)
+            if not filas:
+                self._terminar()
+        return filas
+
+    def fetchall(self):
+        inicio = perf_counter()
+        filas = sqlite3.Cursor.fetchall(self)
+        sentencia = self._sentencia
+        if sentencia is not None:
+            sentencia[3] += perf_counter() - inicio
+            sentencia[4] += len(filas)
+            self._terminar()
+        return filas
+
+    def __iter__(self):
+        # Medir cada fila costaría más que leerla: el for lee por bloques con fetchmany y recorre
+        # cada bloque en C. next(cursor) usa el __next__ de sqlite3, sin medir.
+        bloque = self.fetchmany(FILAS_POR_BLOQUE)
+        if len(bloque) < FILAS_POR_BLOQUE:
+            # Un bloque incompleto ya agotó la sentencia
+            self._terminar()
+            return iter(bloque)
+        return chain(bloque, chain.from_iterable(iter(lambda: self.fetchmany(FILAS_POR_BLOQUE), [])))
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._terminar()
+        except Exception:
+            # Al cerrar el intérprete los módulos pueden ya no estar disponibles
+            pass
+
+
+class ConexionMedida(sqlite3.Connection):
+    # sqlite3.Connection.execute no pasa por cursor(), así que se redefinen los atajos
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return sqlite3.Connection.cursor(self, CursorMedido)._ejecutar(sys._getframe(1), sql, parametros)
+
+    def executemany(self, sql, filas):
+        return sqlite3.Connection.cursor(self, CursorMedido)._ejecutar_varias(sys._getframe(1), sql, filas)
+
+
+def activar(umbral_ms=UMBRAL_LENTAS_MS, archivo_lentas=None):
+    # archivo_lentas: por omisión taller.lentas.log junto a la base; "" para no escribirlo
+    if archivo_lentas is None:
+        archivo_lentas = f"{os.path.splitext(os.path.abspath(conexion.RUTA_DB))[0]}.lentas.log"
+    _Estado.umbral = umbral_ms / 1000
+    _Estado.archivo_lentas = archivo_lentas or None
+    _Estado.activa = True
+    conexion.FABRICA_CONEXION = ConexionMedida
+    conexion.cerrar_conexiones()
+
+
+def desactivar():
+    _Estado.activa = False
+    conexion.FABRICA_CONEXION = sqlite3.Connection
+    conexion.cerrar_conexiones()
+
+
+def activa():
+    return _Estado.activa
+
+
+def reiniciar():
+    with _Estado.candado:
+        _Estado.contadores.clear()
+        _Estado.planes.clear()
+    _FUNCIONES.clear()
+
+
+def instantanea():
+    # Contadores por función y sentencia, de la que más tiempo ha tomado a la que menos
+    with _Estado.candado:
+        copia = [(llave, list(valores)) for llave, valores in _Estado.contadores.items()]
+    juntos = {}
+    for (funcion, sql), valores in copia:
+        llave = (funcion, _normalizar(sql))
+        if llave in juntos:
+            anterior = juntos[llave]
+            valores = [anterior[0] + valores[0], anterior[1] + valores[1], max(anterior[2], valores[2]),
+                       anterior[3] + valores[3], anterior[4] + valores[4]]
+        juntos[llave] = valores
+    sentencias = [{"funcion": funcion, "sql": sql, "ejecuciones": ejecuciones,
+                   "segundos": round(segundos, 6), "max_ms": round(maximo * 1000, 3),
+                   "filas": filas, "lentas": lentas}
+                  for (funcion, sql), (ejecuciones, segundos, maximo, filas, lentas) in juntos.items()]
+    sentencias.sort(key=lambda s: s["segundos"], reverse=True)
+    return {"activa": _Estado.activa, "umbral_ms": _Estado.umbral * 1000,
+            "archivo_lentas": _Estado.archivo_lentas, "sentencias": sentencias}
+
+
+def _etiqueta(texto):
+    if len(texto) > LARGO_ETIQUETA:
+        texto = texto[:LARGO_ETIQUETA - 3] + "..."
+    return texto.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _id_sentencia(sql):
+    return hashlib.sha1(sql.encode()).hexdigest()[:12]
+
+
+def prometheus():
+    # Formato de texto de Prometheus (versión 0.0.4)
+    metricas = [
+        ("taller_sql_ejecuciones_total", "counter", "Sentencias ejecutadas", "ejecuciones"),
+        ("taller_sql_segundos_total", "counter", "Tiempo total de las sentencias", "segundos"),
+        ("taller_sql_filas_total", "counter", "Filas devueltas o modificadas", "filas"),
+        ("taller_sql_lentas_total", "counter", "Sentencias que pasaron el umbral", "lentas"),
+        ("taller_sql_maximo_segundos", "gauge", "Sentencia más lenta", "max_ms"),
+    ]
+    sentencias = instantanea()["sentencias"]
+    lineas = []
+    for nombre, tipo, ayuda, campo in metricas:
+        lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+        for s in sentencias:
+            valor = s[campo] / 1000 if campo == "max_ms" else s[campo]
+            lineas.append(f'{nombre}{{funcion="{_etiqueta(s["funcion"])}",id="{_id_sentencia(s["sql"])}",'
+                          f'sql="{_etiqueta(s["sql"])}"}} {valor}')
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,735 @@
+# SQL de cada versión del esquema tal como se publicó (ver esquema.MIGRACIONES). No se edita:
+# una base que ya pasó por una versión no la vuelve a aplicar, así que un cambio en las tablas o
+# triggers de resumen.py, cambios.py, depuracion.py, busqueda.py, particiones.py, catalogo.py o
+# suspension.py va en una versión nueva con su propio SQL. tests/test_migraciones.py revisa que una
+# base migrada desde cero quede igual a las definiciones actuales de esos módulos.
+
+# 2: resumen diario y sus triggers (resumen.py)
+RESUMEN_V2 = [
+    """CREATE TABLE IF NOT EXISTS resumen_diario (
+        fecha TEXT PRIMARY KEY,
+        notas INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        suma_cuadrados REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS resumen_diario_servicio (
+        fecha TEXT NOT NULL,
+        servicio_clave INTEGER NOT NULL,
+        veces INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, servicio_clave)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS resumen_diario_cliente (
+        fecha TEXT NOT NULL,
+        cliente_clave INTEGER NOT NULL,
+        notas INTEGER NOT NULL DEFAULT 0,
+        servicios INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, cliente_clave)
+    ) WITHOUT ROWID""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_detalle_insert
+    AFTER INSERT ON detalles_nota
+    WHEN (SELECT cancelada FROM notas WHERE folio = NEW.folio) = 0
+    BEGIN
+        INSERT INTO resumen_diario (fecha, notas, ingresos, suma_cuadrados)
+        SELECT n.fecha,
+               (SELECT COUNT(*) FROM detalles_nota WHERE folio = NEW.folio) = 1,
+               NEW.costo,
+               NEW.costo * (2 * ((SELECT SUM(costo) FROM detalles_nota WHERE folio = NEW.folio) - NEW.costo) + NEW.costo)
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha) DO UPDATE SET
+            notas = notas + excluded.notas,
+            ingresos = ingresos + excluded.ingresos,
+            suma_cuadrados = suma_cuadrados + excluded.suma_cuadrados;
+
+        INSERT INTO resumen_diario_servicio (fecha, servicio_clave, veces, ingresos)
+        SELECT n.fecha, NEW.servicio_clave, 1, NEW.costo
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha, servicio_clave) DO UPDATE SET
+            veces = veces + 1,
+            ingresos = ingresos + excluded.ingresos;
+
+        INSERT INTO resumen_diario_cliente (fecha, cliente_clave, notas, servicios, ingresos)
+        SELECT n.fecha, n.cliente_clave,
+               (SELECT COUNT(*) FROM detalles_nota WHERE folio = NEW.folio) = 1,
+               1, NEW.costo
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha, cliente_clave) DO UPDATE SET
+            notas = notas + excluded.notas,
+            servicios = servicios + 1,
+            ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_detalle_delete
+    AFTER DELETE ON detalles_nota
+    WHEN (SELECT cancelada FROM notas WHERE folio = OLD.folio) = 0
+    BEGIN
+        UPDATE resumen_diario SET
+            notas = notas - (NOT EXISTS (SELECT 1 FROM detalles_nota WHERE folio = OLD.folio)),
+            ingresos = ingresos - OLD.costo,
+            suma_cuadrados = suma_cuadrados - OLD.costo * (
+                2 * (SELECT IFNULL(SUM(costo), 0) FROM detalles_nota WHERE folio = OLD.folio) + OLD.costo)
+        WHERE fecha = (SELECT fecha FROM notas WHERE folio = OLD.folio);
+
+        UPDATE resumen_diario_servicio SET
+            veces = veces - 1,
+            ingresos = ingresos - OLD.costo
+        WHERE fecha = (SELECT fecha FROM notas WHERE folio = OLD.folio)
+          AND servicio_clave = OLD.servicio_clave;
+
+        UPDATE resumen_diario_cliente SET
+            notas = notas - (NOT EXISTS (SELECT 1 FROM detalles_nota WHERE folio = OLD.folio)),
+            servicios = servicios - 1,
+            ingresos = ingresos - OLD.costo
+        WHERE (fecha, cliente_clave) = (SELECT fecha, cliente_clave FROM notas WHERE folio = OLD.folio);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_nota_cancelada
+    AFTER UPDATE OF cancelada ON notas
+    WHEN OLD.cancelada <> NEW.cancelada
+     AND EXISTS (SELECT 1 FROM detalles_nota WHERE folio = NEW.folio)
+    BEGIN
+        INSERT INTO resumen_diario (fecha, notas, ingresos, suma_cuadrados)
+        SELECT NEW.fecha,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo) * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        ON CONFLICT (fecha) DO UPDATE SET
+            notas = notas + excluded.notas,
+            ingresos = ingresos + excluded.ingresos,
+            suma_cuadrados = suma_cuadrados + excluded.suma_cuadrados;
+
+        INSERT INTO resumen_diario_servicio (fecha, servicio_clave, veces, ingresos)
+        SELECT NEW.fecha, servicio_clave,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * COUNT(*),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        GROUP BY servicio_clave
+        ON CONFLICT (fecha, servicio_clave) DO UPDATE SET
+            veces = veces + excluded.veces,
+            ingresos = ingresos + excluded.ingresos;
+
+        INSERT INTO resumen_diario_cliente (fecha, cliente_clave, notas, servicios, ingresos)
+        SELECT NEW.fecha, NEW.cliente_clave,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * COUNT(*),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        ON CONFLICT (fecha, cliente_clave) DO UPDATE SET
+            notas = notas + excluded.notas,
+            servicios = servicios + excluded.servicios,
+            ingresos = ingresos + excluded.ingresos;
+    END""",
+]
+
+# 4: registro de fechas cambiadas (cambios.py)
+CAMBIOS_V4 = [
+    """CREATE TABLE IF NOT EXISTS cambios_fecha (
+        fecha TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    ) WITHOUT ROWID""",
+    """CREATE INDEX IF NOT EXISTS idx_cambios_fecha_version ON cambios_fecha (version)""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_nota_insert
+    AFTER INSERT ON notas
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT NEW.fecha AS fecha) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_nota_update
+    AFTER UPDATE ON notas
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT OLD.fecha AS fecha UNION SELECT NEW.fecha) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_nota_delete
+    AFTER DELETE ON notas
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT OLD.fecha AS fecha) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_detalle_insert
+    AFTER INSERT ON detalles_nota
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT fecha FROM notas WHERE folio = NEW.folio) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_detalle_update
+    AFTER UPDATE ON detalles_nota
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT fecha FROM notas WHERE folio IN (OLD.folio, NEW.folio)) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_detalle_delete
+    AFTER DELETE ON detalles_nota
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT fecha FROM notas WHERE folio = OLD.folio) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+]
+
+# 5: acumulados por mes, año y total (resumen.py)
+ACUMULADOS_V5 = [
+    """CREATE TABLE IF NOT EXISTS resumen_periodo_servicio (
+        periodo TEXT NOT NULL,
+        servicio_clave INTEGER NOT NULL,
+        veces INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (periodo, servicio_clave)
+    ) WITHOUT ROWID""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_servicio_insert
+    AFTER INSERT ON resumen_diario_servicio
+    BEGIN
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.servicio_clave, NEW.veces, NEW.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.servicio_clave, NEW.veces, NEW.ingresos),
+               ('total', NEW.servicio_clave, NEW.veces, NEW.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_servicio_delete
+    AFTER DELETE ON resumen_diario_servicio
+    BEGIN
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(OLD.fecha, 1, 7), OLD.servicio_clave, -OLD.veces, -OLD.ingresos),
+               (substr(OLD.fecha, 1, 4), OLD.servicio_clave, -OLD.veces, -OLD.ingresos),
+               ('total', OLD.servicio_clave, -OLD.veces, -OLD.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_servicio_update
+    AFTER UPDATE ON resumen_diario_servicio
+    WHEN OLD.fecha = NEW.fecha AND OLD.servicio_clave = NEW.servicio_clave
+    BEGIN
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.servicio_clave, NEW.veces - OLD.veces, NEW.ingresos - OLD.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.servicio_clave, NEW.veces - OLD.veces, NEW.ingresos - OLD.ingresos),
+               ('total', NEW.servicio_clave, NEW.veces - OLD.veces, NEW.ingresos - OLD.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_servicio_update_llave
+    AFTER UPDATE ON resumen_diario_servicio
+    WHEN NOT (OLD.fecha = NEW.fecha AND OLD.servicio_clave = NEW.servicio_clave)
+    BEGIN
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(OLD.fecha, 1, 7), OLD.servicio_clave, -OLD.veces, -OLD.ingresos),
+               (substr(OLD.fecha, 1, 4), OLD.servicio_clave, -OLD.veces, -OLD.ingresos),
+               ('total', OLD.servicio_clave, -OLD.veces, -OLD.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.servicio_clave, NEW.veces, NEW.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.servicio_clave, NEW.veces, NEW.ingresos),
+               ('total', NEW.servicio_clave, NEW.veces, NEW.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TABLE IF NOT EXISTS resumen_periodo_cliente (
+        periodo TEXT NOT NULL,
+        cliente_clave INTEGER NOT NULL,
+        notas INTEGER NOT NULL DEFAULT 0,
+        servicios INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (periodo, cliente_clave)
+    ) WITHOUT ROWID""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_cliente_insert
+    AFTER INSERT ON resumen_diario_cliente
+    BEGIN
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos),
+               ('total', NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_cliente_delete
+    AFTER DELETE ON resumen_diario_cliente
+    BEGIN
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(OLD.fecha, 1, 7), OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos),
+               (substr(OLD.fecha, 1, 4), OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos),
+               ('total', OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_cliente_update
+    AFTER UPDATE ON resumen_diario_cliente
+    WHEN OLD.fecha = NEW.fecha AND OLD.cliente_clave = NEW.cliente_clave
+    BEGIN
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.cliente_clave, NEW.notas - OLD.notas, NEW.servicios - OLD.servicios, NEW.ingresos - OLD.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.cliente_clave, NEW.notas - OLD.notas, NEW.servicios - OLD.servicios, NEW.ingresos - OLD.ingresos),
+               ('total', NEW.cliente_clave, NEW.notas - OLD.notas, NEW.servicios - OLD.servicios, NEW.ingresos - OLD.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_cliente_update_llave
+    AFTER UPDATE ON resumen_diario_cliente
+    WHEN NOT (OLD.fecha = NEW.fecha AND OLD.cliente_clave = NEW.cliente_clave)
+    BEGIN
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(OLD.fecha, 1, 7), OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos),
+               (substr(OLD.fecha, 1, 4), OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos),
+               ('total', OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos),
+               ('total', NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+    END""",
+]
+
+# 6: años archivados (particiones.py)
+PARTICIONES_V6 = [
+    """CREATE TABLE IF NOT EXISTS anios_archivados (
+        anio INTEGER PRIMARY KEY,
+        archivo TEXT NOT NULL,
+        notas INTEGER NOT NULL,
+        lineas INTEGER NOT NULL
+    )""",
+]
+
+# 7: fecha de cancelación de las notas (depuracion.py)
+DEPURACION_V7 = [
+    """CREATE TABLE IF NOT EXISTS cancelaciones (
+        folio INTEGER PRIMARY KEY,
+        dia INTEGER NOT NULL
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_insert
+    AFTER INSERT ON notas
+    WHEN NEW.cancelada = 1
+    BEGIN
+        INSERT OR REPLACE INTO cancelaciones (folio, dia) VALUES (NEW.folio, CAST(julianday('now', 'localtime') - 2440587.5 AS INTEGER));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_update
+    AFTER UPDATE OF cancelada ON notas
+    BEGIN
+        DELETE FROM cancelaciones WHERE folio = NEW.folio AND NEW.cancelada = 0;
+        INSERT OR REPLACE INTO cancelaciones (folio, dia)
+        SELECT NEW.folio, CAST(julianday('now', 'localtime') - 2440587.5 AS INTEGER) WHERE NEW.cancelada = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_delete
+    AFTER DELETE ON notas
+    BEGIN
+        DELETE FROM cancelaciones WHERE folio = OLD.folio;
+    END""",
+]
+
+# 8: índices de búsqueda y sus triggers (busqueda.py)
+BUSQUEDA_V8 = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_clientes USING fts5(
+        apellidos, nombres, telefono,
+        content='clientes', content_rowid='clave', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_servicios USING fts5(
+        nombre, content='servicios', content_rowid='clave', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_observaciones USING fts5(
+        observaciones, content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_clientes_insert
+    AFTER INSERT ON clientes
+    BEGIN
+        INSERT INTO busqueda_clientes (rowid, apellidos, nombres, telefono)
+        VALUES (NEW.clave, NEW.apellidos, NEW.nombres, NEW.telefono);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_clientes_update
+    AFTER UPDATE OF apellidos, nombres, telefono ON clientes
+    BEGIN
+        INSERT INTO busqueda_clientes (busqueda_clientes, rowid, apellidos, nombres, telefono)
+        VALUES ('delete', OLD.clave, OLD.apellidos, OLD.nombres, OLD.telefono);
+        INSERT INTO busqueda_clientes (rowid, apellidos, nombres, telefono)
+        VALUES (NEW.clave, NEW.apellidos, NEW.nombres, NEW.telefono);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_clientes_delete
+    AFTER DELETE ON clientes
+    BEGIN
+        INSERT INTO busqueda_clientes (busqueda_clientes, rowid, apellidos, nombres, telefono)
+        VALUES ('delete', OLD.clave, OLD.apellidos, OLD.nombres, OLD.telefono);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_servicios_insert
+    AFTER INSERT ON servicios
+    BEGIN
+        INSERT INTO busqueda_servicios (rowid, nombre) VALUES (NEW.clave, NEW.nombre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_servicios_update
+    AFTER UPDATE OF nombre ON servicios
+    BEGIN
+        INSERT INTO busqueda_servicios (busqueda_servicios, rowid, nombre) VALUES ('delete', OLD.clave, OLD.nombre);
+        INSERT INTO busqueda_servicios (rowid, nombre) VALUES (NEW.clave, NEW.nombre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_servicios_delete
+    AFTER DELETE ON servicios
+    BEGIN
+        INSERT INTO busqueda_servicios (busqueda_servicios, rowid, nombre) VALUES ('delete', OLD.clave, OLD.nombre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_insert
+    AFTER INSERT ON detalles_nota
+    WHEN NEW.observaciones <> ''
+    BEGIN
+        INSERT INTO busqueda_observaciones (rowid, observaciones) VALUES (NEW.id, NEW.observaciones);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_update
+    AFTER UPDATE OF observaciones ON detalles_nota
+    BEGIN
+        INSERT INTO busqueda_observaciones (busqueda_observaciones, rowid, observaciones)
+        SELECT 'delete', OLD.id, OLD.observaciones WHERE OLD.observaciones <> '';
+        INSERT INTO busqueda_observaciones (rowid, observaciones)
+        SELECT NEW.id, NEW.observaciones WHERE NEW.observaciones <> '';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_delete
+    AFTER DELETE ON detalles_nota
+    WHEN OLD.observaciones <> ''
+    BEGIN
+        INSERT INTO busqueda_observaciones (busqueda_observaciones, rowid, observaciones)
+        VALUES ('delete', OLD.id, OLD.observaciones);
+    END""",
+]
+
+# 9: índices pendientes de una importación masiva (ya no se usa; ver esquema.restaurar_indices)
+DIFERIDOS_V9 = [
+    """CREATE TABLE IF NOT EXISTS indices_diferidos (
+        nombre TEXT PRIMARY KEY,
+        sql TEXT NOT NULL
+    )""",
+]
+
+# 10: contador de cambios de los catálogos (catalogo.py)
+CATALOGO_V10 = [
+    """CREATE TABLE IF NOT EXISTS versiones_catalogo (
+        tabla TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    """INSERT OR IGNORE INTO versiones_catalogo (tabla) VALUES ('clientes'), ('servicios')""",
+    """CREATE TRIGGER IF NOT EXISTS trg_catalogo_clientes_insert
+           AFTER INSERT ON clientes
+           BEGIN
+               UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'clientes';
+           END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_catalogo_clientes_update
+           AFTER UPDATE ON clientes
+           BEGIN
+               UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'clientes';
+           END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_catalogo_clientes_delete
+           AFTER DELETE ON clientes
+           BEGIN
+               UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'clientes';
+           END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_catalogo_servicios_insert
+           AFTER INSERT ON servicios
+           BEGIN
+               UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'servicios';
+           END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_catalogo_servicios_update
+           AFTER UPDATE ON servicios
+           BEGIN
+               UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'servicios';
+           END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_catalogo_servicios_delete
+           AFTER DELETE ON servicios
+           BEGIN
+               UPDATE versiones_catalogo SET version = version + 1 WHERE tabla = 'servicios';
+           END""",
+]
+
+# 11: los triggers de notas y detalles_nota, con la condición de suspension.ACTIVOS
+TRIGGERS_V11 = [
+    """CREATE TABLE IF NOT EXISTS triggers_suspendidos (
+    motivo TEXT NOT NULL
+)""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_detalle_insert
+    AFTER INSERT ON detalles_nota
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND (SELECT cancelada FROM notas WHERE folio = NEW.folio) = 0
+    BEGIN
+        INSERT INTO resumen_diario (fecha, notas, ingresos, suma_cuadrados)
+        SELECT n.fecha,
+               (SELECT COUNT(*) FROM detalles_nota WHERE folio = NEW.folio) = 1,
+               NEW.costo,
+               NEW.costo * (2 * ((SELECT SUM(costo) FROM detalles_nota WHERE folio = NEW.folio) - NEW.costo) + NEW.costo)
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha) DO UPDATE SET
+            notas = notas + excluded.notas,
+            ingresos = ingresos + excluded.ingresos,
+            suma_cuadrados = suma_cuadrados + excluded.suma_cuadrados;
+
+        INSERT INTO resumen_diario_servicio (fecha, servicio_clave, veces, ingresos)
+        SELECT n.fecha, NEW.servicio_clave, 1, NEW.costo
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha, servicio_clave) DO UPDATE SET
+            veces = veces + 1,
+            ingresos = ingresos + excluded.ingresos;
+
+        INSERT INTO resumen_diario_cliente (fecha, cliente_clave, notas, servicios, ingresos)
+        SELECT n.fecha, n.cliente_clave,
+               (SELECT COUNT(*) FROM detalles_nota WHERE folio = NEW.folio) = 1,
+               1, NEW.costo
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha, cliente_clave) DO UPDATE SET
+            notas = notas + excluded.notas,
+            servicios = servicios + 1,
+            ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_detalle_delete
+    AFTER DELETE ON detalles_nota
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND (SELECT cancelada FROM notas WHERE folio = OLD.folio) = 0
+    BEGIN
+        UPDATE resumen_diario SET
+            notas = notas - (NOT EXISTS (SELECT 1 FROM detalles_nota WHERE folio = OLD.folio)),
+            ingresos = ingresos - OLD.costo,
+            suma_cuadrados = suma_cuadrados - OLD.costo * (
+                2 * (SELECT IFNULL(SUM(costo), 0) FROM detalles_nota WHERE folio = OLD.folio) + OLD.costo)
+        WHERE fecha = (SELECT fecha FROM notas WHERE folio = OLD.folio);
+
+        UPDATE resumen_diario_servicio SET
+            veces = veces - 1,
+            ingresos = ingresos - OLD.costo
+        WHERE fecha = (SELECT fecha FROM notas WHERE folio = OLD.folio)
+          AND servicio_clave = OLD.servicio_clave;
+
+        UPDATE resumen_diario_cliente SET
+            notas = notas - (NOT EXISTS (SELECT 1 FROM detalles_nota WHERE folio = OLD.folio)),
+            servicios = servicios - 1,
+            ingresos = ingresos - OLD.costo
+        WHERE (fecha, cliente_clave) = (SELECT fecha, cliente_clave FROM notas WHERE folio = OLD.folio);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_nota_cancelada
+    AFTER UPDATE OF cancelada ON notas
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND OLD.cancelada <> NEW.cancelada
+     AND EXISTS (SELECT 1 FROM detalles_nota WHERE folio = NEW.folio)
+    BEGIN
+        INSERT INTO resumen_diario (fecha, notas, ingresos, suma_cuadrados)
+        SELECT NEW.fecha,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo) * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        ON CONFLICT (fecha) DO UPDATE SET
+            notas = notas + excluded.notas,
+            ingresos = ingresos + excluded.ingresos,
+            suma_cuadrados = suma_cuadrados + excluded.suma_cuadrados;
+
+        INSERT INTO resumen_diario_servicio (fecha, servicio_clave, veces, ingresos)
+        SELECT NEW.fecha, servicio_clave,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * COUNT(*),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        GROUP BY servicio_clave
+        ON CONFLICT (fecha, servicio_clave) DO UPDATE SET
+            veces = veces + excluded.veces,
+            ingresos = ingresos + excluded.ingresos;
+
+        INSERT INTO resumen_diario_cliente (fecha, cliente_clave, notas, servicios, ingresos)
+        SELECT NEW.fecha, NEW.cliente_clave,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * COUNT(*),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        ON CONFLICT (fecha, cliente_clave) DO UPDATE SET
+            notas = notas + excluded.notas,
+            servicios = servicios + excluded.servicios,
+            ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_nota_insert
+    AFTER INSERT ON notas
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT NEW.fecha AS fecha) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_nota_update
+    AFTER UPDATE ON notas
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT OLD.fecha AS fecha UNION SELECT NEW.fecha) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_nota_delete
+    AFTER DELETE ON notas
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT OLD.fecha AS fecha) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_detalle_insert
+    AFTER INSERT ON detalles_nota
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT fecha FROM notas WHERE folio = NEW.folio) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_detalle_update
+    AFTER UPDATE ON detalles_nota
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT fecha FROM notas WHERE folio IN (OLD.folio, NEW.folio)) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cambios_detalle_delete
+    AFTER DELETE ON detalles_nota
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO cambios_fecha (fecha, version)
+        SELECT fecha, (SELECT IFNULL(MAX(version), 0) + 1 FROM cambios_fecha) FROM (SELECT fecha FROM notas WHERE folio = OLD.folio) WHERE fecha IS NOT NULL
+        ON CONFLICT (fecha) DO UPDATE SET version = excluded.version;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_insert
+    AFTER INSERT ON notas
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND NEW.cancelada = 1
+    BEGIN
+        INSERT OR REPLACE INTO cancelaciones (folio, dia) VALUES (NEW.folio, CAST(julianday('now', 'localtime') - 2440587.5 AS INTEGER));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_update
+    AFTER UPDATE OF cancelada ON notas
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        DELETE FROM cancelaciones WHERE folio = NEW.folio AND NEW.cancelada = 0;
+        INSERT OR REPLACE INTO cancelaciones (folio, dia)
+        SELECT NEW.folio, CAST(julianday('now', 'localtime') - 2440587.5 AS INTEGER) WHERE NEW.cancelada = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_cancelaciones_delete
+    AFTER DELETE ON notas
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        DELETE FROM cancelaciones WHERE folio = OLD.folio;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_insert
+    AFTER INSERT ON detalles_nota
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND NEW.observaciones <> ''
+    BEGIN
+        INSERT INTO busqueda_observaciones (rowid, observaciones) VALUES (NEW.id, NEW.observaciones);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_update
+    AFTER UPDATE OF observaciones ON detalles_nota
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO busqueda_observaciones (busqueda_observaciones, rowid, observaciones)
+        SELECT 'delete', OLD.id, OLD.observaciones WHERE OLD.observaciones <> '';
+        INSERT INTO busqueda_observaciones (rowid, observaciones)
+        SELECT NEW.id, NEW.observaciones WHERE NEW.observaciones <> '';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busqueda_detalle_delete
+    AFTER DELETE ON detalles_nota
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND OLD.observaciones <> ''
+    BEGIN
+        INSERT INTO busqueda_observaciones (busqueda_observaciones, rowid, observaciones)
+        VALUES ('delete', OLD.id, OLD.observaciones);
+    END""",
+]
+
+# 12: los triggers de los acumulados, con la condición de suspension.ACTIVOS
+ACUMULADOS_V12 = [
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_servicio_insert
+    AFTER INSERT ON resumen_diario_servicio
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.servicio_clave, NEW.veces, NEW.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.servicio_clave, NEW.veces, NEW.ingresos),
+               ('total', NEW.servicio_clave, NEW.veces, NEW.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_servicio_delete
+    AFTER DELETE ON resumen_diario_servicio
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(OLD.fecha, 1, 7), OLD.servicio_clave, -OLD.veces, -OLD.ingresos),
+               (substr(OLD.fecha, 1, 4), OLD.servicio_clave, -OLD.veces, -OLD.ingresos),
+               ('total', OLD.servicio_clave, -OLD.veces, -OLD.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_servicio_update
+    AFTER UPDATE ON resumen_diario_servicio
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND OLD.fecha = NEW.fecha AND OLD.servicio_clave = NEW.servicio_clave
+    BEGIN
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.servicio_clave, NEW.veces - OLD.veces, NEW.ingresos - OLD.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.servicio_clave, NEW.veces - OLD.veces, NEW.ingresos - OLD.ingresos),
+               ('total', NEW.servicio_clave, NEW.veces - OLD.veces, NEW.ingresos - OLD.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_servicio_update_llave
+    AFTER UPDATE ON resumen_diario_servicio
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND NOT (OLD.fecha = NEW.fecha AND OLD.servicio_clave = NEW.servicio_clave)
+    BEGIN
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(OLD.fecha, 1, 7), OLD.servicio_clave, -OLD.veces, -OLD.ingresos),
+               (substr(OLD.fecha, 1, 4), OLD.servicio_clave, -OLD.veces, -OLD.ingresos),
+               ('total', OLD.servicio_clave, -OLD.veces, -OLD.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+        INSERT INTO resumen_periodo_servicio (periodo, servicio_clave, veces, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.servicio_clave, NEW.veces, NEW.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.servicio_clave, NEW.veces, NEW.ingresos),
+               ('total', NEW.servicio_clave, NEW.veces, NEW.ingresos)
+        ON CONFLICT (periodo, servicio_clave)
+        DO UPDATE SET veces = veces + excluded.veces, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_cliente_insert
+    AFTER INSERT ON resumen_diario_cliente
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos),
+               ('total', NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_cliente_delete
+    AFTER DELETE ON resumen_diario_cliente
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos)
+    BEGIN
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(OLD.fecha, 1, 7), OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos),
+               (substr(OLD.fecha, 1, 4), OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos),
+               ('total', OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_cliente_update
+    AFTER UPDATE ON resumen_diario_cliente
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND OLD.fecha = NEW.fecha AND OLD.cliente_clave = NEW.cliente_clave
+    BEGIN
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.cliente_clave, NEW.notas - OLD.notas, NEW.servicios - OLD.servicios, NEW.ingresos - OLD.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.cliente_clave, NEW.notas - OLD.notas, NEW.servicios - OLD.servicios, NEW.ingresos - OLD.ingresos),
+               ('total', NEW.cliente_clave, NEW.notas - OLD.notas, NEW.servicios - OLD.servicios, NEW.ingresos - OLD.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_resumen_periodo_cliente_update_llave
+    AFTER UPDATE ON resumen_diario_cliente
+    WHEN NOT EXISTS (SELECT 1 FROM triggers_suspendidos) AND NOT (OLD.fecha = NEW.fecha AND OLD.cliente_clave = NEW.cliente_clave)
+    BEGIN
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(OLD.fecha, 1, 7), OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos),
+               (substr(OLD.fecha, 1, 4), OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos),
+               ('total', OLD.cliente_clave, -OLD.notas, -OLD.servicios, -OLD.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+        INSERT INTO resumen_periodo_cliente (periodo, cliente_clave, notas, servicios, ingresos)
+        VALUES (substr(NEW.fecha, 1, 7), NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos),
+               (substr(NEW.fecha, 1, 4), NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos),
+               ('total', NEW.cliente_clave, NEW.notas, NEW.servicios, NEW.ingresos)
+        ON CONFLICT (periodo, cliente_clave)
+        DO UPDATE SET notas = notas + excluded.notas, servicios = servicios + excluded.servicios, ingresos = ingresos + excluded.ingresos;
+    END""",
+]
@@ -0,0 +1,78 @@
+# Reportes de rangos largos repartidos por fechas: el período se corta en tramos con un número
+# parecido de notas (según resumen_diario) y cada tramo se lee en un hilo con su propia conexión
+# de solo lectura. SQLite suelta el GIL mientras ejecuta la consulta, así que los tramos avanzan a
+# la vez; conviene que cada tramo devuelva un resultado ya agregado (ver api.tendencia_central).
+# Una nota es de un solo día, así que ningún tramo parte una nota.
+# Las conexiones de cada tramo ven la base en momentos apenas distintos: una nota registrada
+# mientras corre el reporte puede aparecer en un tramo y no en otro, como en dos consultas seguidas.
+import os
+import threading
+from datetime import date, timedelta
+
+import conexion
+
+# Hilos lectores; con 1 todo se calcula en una sola pasada
+HILOS = os.cpu_count() or 1
+# Por debajo de estas notas una sola pasada es más rápida que repartir
+MINIMO_NOTAS = 100_000
+
+_grupo = None
+_candado = threading.Lock()
+
+
+def tramos(fecha_inicio, fecha_fin, partes=None, nombre_db=None):
+    # [(inicio, fin)] contiguos que cubren el período, con notas parecidas en cada uno
+    partes = partes or HILOS
+    if partes < 2:
+        return [(fecha_inicio, fecha_fin)]
+    dias = conexion.obtener_conexion(nombre_db).execute("""
+        SELECT fecha, notas FROM resumen_diario WHERE fecha BETWEEN ? AND ? AND notas > 0 ORDER BY fecha
+    """, (fecha_inicio, fecha_fin)).fetchall()
+    total = sum(notas for _, notas in dias)
+    if total < MINIMO_NOTAS:
+        return [(fecha_inicio, fecha_fin)]
+
+    cortes = []
+    acumulado = 0
+    for fecha, notas in dias[:-1]:
+        acumulado += notas
+        if acumulado >= total * (len(cortes) + 1) / partes:
+            cortes.append(fecha)
+    resultado = []
+    inicio = fecha_inicio
+    for fin in cortes:
+        resultado.append((inicio, fin))
+        inicio = (date.fromisoformat(fin) + timedelta(days=1)).isoformat()
+    resultado.append((inicio, fecha_fin))
+    return resultado
+
+
+def _en_hilo(funcion, ruta, inicio, fin):
+    return funcion(conexion.obtener_conexion(ruta, solo_lectura=True), inicio, fin)
+
+
+def ejecutar(funcion, tramos_periodo, nombre_db=None):
+    # funcion(conn, inicio, fin) por tramo; devuelve los resultados en el orden de los tramos.
+    # Un solo tramo se calcula aquí mismo, con la conexión de siempre.
+    if len(tramos_periodo) == 1:
+        return [funcion(conexion.obtener_conexion(nombre_db), *tramos_periodo[0])]
+    global _grupo
+    with _candado:
+        if _grupo is None:
+            # Aquí y no arriba: concurrent.futures (con logging) alarga el arranque del menú y
+            # la mayoría de los reportes tiene un solo tramo
+            from concurrent.futures import ThreadPoolExecutor
+            _grupo = ThreadPoolExecutor(HILOS, thread_name_prefix="tramo")
+        grupo = _grupo
+    ruta = os.path.abspath(nombre_db or conexion.RUTA_DB)
+    futuros = [grupo.submit(_en_hilo, funcion, ruta, inicio, fin) for inicio, fin in tramos_periodo]
+    return [futuro.result() for futuro in futuros]
+
+
+def cerrar():
+    # Termina los hilos lectores (y con ellos sus conexiones); se vuelven a crear al usarlos
+    global _grupo
+    with _candado:
+        grupo, _grupo = _grupo, None
+    if grupo is not None:
+        grupo.shutdown()
@@ -0,0 +1,293 @@
+# Años archivados: las notas y detalles de un año cerrado se pasan a un archivo aparte
+# (taller.2021.db junto a taller.db) para que la base en uso solo tenga los años recientes.
+# Cada conexión adjunta los archivos con ATTACH y crea las vistas temporales todas_notas,
+# todas_lineas, todos_detalles y totales_nota, que unen la base con los años archivados: las consultas de
+# notas las usan sin saber dónde está cada año. SQLite lleva el filtro por dia a cada archivo,
+# así que un año fuera del rango cuesta una búsqueda en su índice y no se recorre.
+# Los resúmenes (resumen.py) se quedan en la base e incluyen los años archivados. Las notas de
+# un año archivado no se pueden cancelar ni recuperar hasta desarchivarlo.
+# El archivo de notas depuradas (taller.archivo.db, ver depuracion.py) se adjunta y se une igual.
+# Uso: python particiones.py listar | archivar 2021 | desarchivar 2021
+import argparse
+import os
+import sqlite3
+import time
+from datetime import date
+
+import conexion
+from api import ErrorTaller
+from fechas import SQL_DIA, a_dia
+from suspension import triggers_suspendidos
+
+ESQUEMA_PARTICIONES = [
+    """CREATE TABLE IF NOT EXISTS anios_archivados (
+        anio INTEGER PRIMARY KEY,
+        archivo TEXT NOT NULL,
+        notas INTEGER NOT NULL,
+        lineas INTEGER NOT NULL
+    )""",
+]
+
+# Esquema con que se adjunta el archivo de notas depuradas
+ARCHIVO_NOTAS = "archivo"
+
+# Tablas de cada archivo; los folios e ids vienen de la base, así que no llevan AUTOINCREMENT
+TABLAS_ARCHIVO = [
+    """CREATE TABLE IF NOT EXISTS {esquema}.notas (
+        folio INTEGER PRIMARY KEY,
+        dia INTEGER NOT NULL,
+        cliente_clave INTEGER NOT NULL,
+        cancelada INTEGER NOT NULL DEFAULT 0,
+        fecha TEXT GENERATED ALWAYS AS (date(dia + 2440587.5)) VIRTUAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS {esquema}.detalles_nota (
+        id INTEGER PRIMARY KEY,
+        folio INTEGER NOT NULL,
+        servicio_clave INTEGER NOT NULL,
+        observaciones TEXT,
+        costo REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_notas_cancelada_dia ON notas (cancelada, dia, folio, cliente_clave)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_detalles_folio ON detalles_nota (folio, servicio_clave, costo)",
+]
+
+# Cada vista es la unión de esta consulta sobre la base y sobre cada año archivado.
+# todas_lineas es para agregados: solo trae columnas que cubren los índices (SQLite no quita
+# las columnas que no se usan de una unión); todos_detalles trae la línea completa.
+VISTAS = {
+    "todas_notas": """
+        SELECT n.folio, {dia} AS dia, n.fecha, n.cliente_clave, n.cancelada
+        FROM {esquema}.notas n""",
+    "todas_lineas": """
+        SELECT n.folio, {dia} AS dia, n.cliente_clave, n.cancelada, d.servicio_clave, d.costo
+        FROM {esquema}.notas n
+        JOIN {esquema}.detalles_nota d ON d.folio = n.folio""",
+    "todos_detalles": """
+        SELECT n.folio, {dia} AS dia, n.fecha, n.cliente_clave, n.cancelada,
+               d.id, d.servicio_clave, d.observaciones, d.costo
+        FROM {esquema}.notas n
+        JOIN {esquema}.detalles_nota d ON d.folio = n.folio""",
+    "totales_nota": """
+        SELECT n.folio, {dia} AS dia, n.fecha, n.cliente_clave, n.cancelada,
+               IFNULL((SELECT SUM(d.costo) FROM {esquema}.detalles_nota d WHERE d.folio = n.folio), 0.0) AS total
+        FROM {esquema}.notas n""",
+}
+
+
+def _esquema(anio):
+    return f"anio_{anio}"
+
+
+def _ruta_archivo(conn, anio):
+    # La del registro si el año ya está archivado; si no, taller.db -> taller.2021.db
+    base = conn.execute("PRAGMA database_list").fetchone()[2]
+    if "anios_archivados" in _tablas(conn):
+        fila = conn.execute("SELECT archivo FROM anios_archivados WHERE anio = ?", (anio,)).fetchone()
+        if fila:
+            return os.path.join(os.path.dirname(base), fila[0])
+    return f"{os.path.splitext(base)[0]}.{anio}.db"
+
+
+def ruta_archivo_notas(conn):
+    # taller.db -> taller.archivo.db
+    base = conn.execute("PRAGMA database_list").fetchone()[2]
+    return f"{os.path.splitext(base)[0]}.{ARCHIVO_NOTAS}.db"
+
+
+def _tablas(conn):
+    return {fila[0] for fila in conn.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+
+
+def revisar_limite_adjuntos(conn, esquemas):
+    # esquemas: los archivos que quedarán adjuntos. SQLite adjunta a lo más SQLITE_LIMIT_ATTACHED
+    # (10 por omisión) además de main y temp; pasado el límite ATTACH falla sin decir qué sobra.
+    limite = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) if hasattr(conn, "getlimit") else 10
+    if len(esquemas) > limite:
+        raise ErrorTaller(f"SQLite adjunta a lo más {limite} archivos por conexión y harían falta {len(esquemas)} "
+                          "(años archivados y notas depuradas). Desarchive algún año antes de continuar.")
+
+
+def adjuntar_particiones(conn):
+    # Adjunta los años archivados y (re)crea las vistas. Se llama al abrir cada conexión y cuando
+    # cambia el esquema de la base (otra conexión archivó o desarchivó un año).
+    tablas = _tablas(conn)
+    if "notas" not in tablas:
+        return
+    registrados = {}
+    if "anios_archivados" in tablas:
+        directorio = os.path.dirname(conn.execute("PRAGMA database_list").fetchone()[2])
+        registrados = {_esquema(anio): os.path.join(directorio, archivo)
+                       for anio, archivo in conn.execute("SELECT anio, archivo FROM anios_archivados")}
+    if os.path.exists(ruta_archivo_notas(conn)):
+        registrados[ARCHIVO_NOTAS] = ruta_archivo_notas(conn)
+    adjuntos = {fila[1] for fila in conn.execute("PRAGMA database_list")}
+    otros = {e for e in adjuntos if e not in ("main", "temp") and not e.startswith("anio_") and e != ARCHIVO_NOTAS}
+    revisar_limite_adjuntos(conn, otros | registrados.keys())
+    for esquema in adjuntos - registrados.keys():
+        if esquema.startswith("anio_") or esquema == ARCHIVO_NOTAS:
+            conn.execute(f"DETACH DATABASE {esquema}")
+    for esquema, ruta in registrados.items():
+        if esquema not in adjuntos:
+            conn.execute("ATTACH DATABASE ? AS " + esquema, (ruta,))
+
+    # Antes de la migración 6 notas no tiene dia; se calcula desde la fecha para que las
+    # migraciones anteriores (que reconstruyen resúmenes) ya puedan usar las vistas
+    columnas = {fila[1] for fila in conn.execute("PRAGMA main.table_info(notas)")}
+    dia = "n.dia" if "dia" in columnas else SQL_DIA.format("n.fecha")
+    for vista, consulta in VISTAS.items():
+        union = " UNION ALL ".join(consulta.format(esquema=esquema, dia=dia)
+                                   for esquema in ["main", *sorted(registrados)])
+        conn.execute(f"DROP VIEW IF EXISTS temp.{vista}")
+        conn.execute(f"CREATE TEMP VIEW {vista} AS {union}")
+
+
+def quitar_vistas(conn):
+    # Para cambiar la tabla notas: SQLite revisa las vistas que la mencionan al renombrar tablas
+    for vista in VISTAS:
+        conn.execute(f"DROP VIEW IF EXISTS temp.{vista}")
+
+
+def maximo_folio(conn):
+    # El folio más alto de la base y de los archivos adjuntos; MAX sobre cada tabla usa su llave
+    esquemas = [fila[1] for fila in conn.execute("PRAGMA database_list") if fila[1] != "temp"]
+    return max(conn.execute(f"SELECT IFNULL(MAX(folio), 0) FROM {e}.notas").fetchone()[0] for e in esquemas)
+
+
+def anios_archivados(nombre_db=None):
+    # [(año, archivo, notas, líneas, bytes del archivo)]
+    conn = conexion.obtener_conexion(nombre_db)
+    if "anios_archivados" not in _tablas(conn):
+        return []
+    resultado = []
+    for anio, archivo, notas, lineas in conn.execute("SELECT anio, archivo, notas, lineas FROM anios_archivados "
+                                                     "ORDER BY anio").fetchall():
+        ruta = _ruta_archivo(conn, anio)
+        resultado.append((anio, archivo, notas, lineas, os.path.getsize(ruta) if os.path.exists(ruta) else 0))
+    return resultado
+
+
+def archivar_anio(anio, nombre_db=None):
+    # Pasa las notas del año (y sus detalles) a su archivo. Si el año ya estaba archivado se
+    # agregan las notas que se hayan registrado después con fecha de ese año.
+    conn = conexion.obtener_conexion(nombre_db)
+    anio = int(anio)
+    if anio >= date.today().year:
+        raise ErrorTaller("Solo se pueden archivar años anteriores al actual.")
+    if "anios_archivados" not in _tablas(conn):
+        raise ErrorTaller("La base no tiene el esquema actualizado; ejecute el sistema una vez para migrarla.")
+    inicio = time.perf_counter()
+    esquema, ruta = _esquema(anio), _ruta_archivo(conn, anio)
+    rango = (a_dia(f"{anio}-01-01"), a_dia(f"{anio}-12-31"))
+    cursor = conn.cursor()
+    registrado = cursor.execute("SELECT 1 FROM anios_archivados WHERE anio = ?", (anio,)).fetchone()
+    if not registrado and not cursor.execute("SELECT 1 FROM main.notas WHERE dia BETWEEN ? AND ? LIMIT 1",
+                                             rango).fetchone():
+        raise ErrorTaller(f"No hay notas de {anio} en la base.")
+    adjuntos = {fila[1] for fila in cursor.execute("PRAGMA database_list")}
+    if not registrado:
+        revisar_limite_adjuntos(conn, adjuntos - {"main", "temp"} | {esquema})
+    if not registrado and os.path.exists(ruta):
+        # Restos de un desarchivado interrumpido: sus notas ya están en la base
+        if esquema in adjuntos:
+            cursor.execute(f"DETACH DATABASE {esquema}")
+        os.remove(ruta)
+    if esquema not in {fila[1] for fila in cursor.execute("PRAGMA database_list")}:
+        cursor.execute("ATTACH DATABASE ? AS " + esquema, (ruta,))
+    for sentencia in TABLAS_ARCHIVO:
+        cursor.execute(sentencia.format(esquema=esquema))
+    conn.commit()
+
+    copiar = [
+        f"""INSERT OR REPLACE INTO {esquema}.notas (folio, dia, cliente_clave, cancelada)
+            SELECT folio, dia, cliente_clave, cancelada FROM main.notas WHERE dia BETWEEN ? AND ?""",
+        f"""INSERT OR REPLACE INTO {esquema}.detalles_nota (id, folio, servicio_clave, observaciones, costo)
+            SELECT d.id, d.folio, d.servicio_clave, d.observaciones, d.costo
+            FROM main.notas n JOIN main.detalles_nota d ON d.folio = n.folio
+            WHERE n.dia BETWEEN ? AND ?""",
+    ]
+    # Se copia y se borra de la base en una sola transacción sobre la base y el archivo adjunto:
+    # si el proceso se interrumpe, las notas siguen solo en la base. Los resúmenes ya cuentan
+    # estas notas, así que los triggers se suspenden mientras se mueven (ver suspension.py).
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        notas, lineas = cursor.execute("""
+            SELECT COUNT(*), IFNULL(SUM((SELECT COUNT(*) FROM main.detalles_nota d WHERE d.folio = n.folio)), 0)
+            FROM main.notas n WHERE n.dia BETWEEN ? AND ?
+        """, rango).fetchone()
+        with triggers_suspendidos(cursor, "archivar"):
+            for sentencia in copiar:
+                cursor.execute(sentencia, rango)
+            cursor.execute("DELETE FROM main.detalles_nota WHERE folio IN "
+                           "(SELECT folio FROM main.notas WHERE dia BETWEEN ? AND ?)", rango)
+            cursor.execute("DELETE FROM main.notas WHERE dia BETWEEN ? AND ?", rango)
+        cursor.execute("""
+            INSERT INTO anios_archivados (anio, archivo, notas, lineas) VALUES (?, ?, ?, ?)
+            ON CONFLICT (anio) DO UPDATE SET notas = notas + excluded.notas, lineas = lineas + excluded.lineas
+        """, (anio, os.path.basename(ruta), notas, lineas))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    adjuntar_particiones(conn)
+    return {"anio": anio, "archivo": ruta, "notas": notas, "lineas": lineas,
+            "segundos": time.perf_counter() - inicio}
+
+
+def desarchivar_anio(anio, nombre_db=None):
+    # Devuelve las notas del año a la base y borra su archivo
+    conn = conexion.obtener_conexion(nombre_db)
+    anio = int(anio)
+    esquema, ruta = _esquema(anio), _ruta_archivo(conn, anio)
+    if not ("anios_archivados" in _tablas(conn)
+            and conn.execute("SELECT 1 FROM anios_archivados WHERE anio = ?", (anio,)).fetchone()):
+        raise ErrorTaller(f"El año {anio} no está archivado.")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        with triggers_suspendidos(cursor, "desarchivar"):
+            cursor.execute(f"""INSERT INTO main.notas (folio, dia, cliente_clave, cancelada)
+                               SELECT folio, dia, cliente_clave, cancelada FROM {esquema}.notas""")
+            notas = cursor.rowcount
+            cursor.execute(f"""INSERT INTO main.detalles_nota (id, folio, servicio_clave, observaciones, costo)
+                               SELECT id, folio, servicio_clave, observaciones, costo FROM {esquema}.detalles_nota""")
+            lineas = cursor.rowcount
+        cursor.execute("DELETE FROM anios_archivados WHERE anio = ?", (anio,))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    adjuntar_particiones(conn)
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    return {"anio": anio, "notas": notas, "lineas": lineas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archiva años cerrados de notas en archivos aparte.")
+    parser.add_argument("comando", choices=("listar", "archivar", "desarchivar"))
+    parser.add_argument("anio", nargs="?", type=int)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    if args.comando == "listar":
+        for anio, archivo, notas, lineas, tamano in anios_archivados(args.db):
+            print(f"{anio}: {notas} notas, {lineas} líneas en {archivo} ({tamano / 1024 ** 2:.1f} MB)")
+        return
+    if args.anio is None:
+        parser.error("indique el año")
+    try:
+        if args.comando == "archivar":
+            resultado = archivar_anio(args.anio, args.db)
+            print(f"{resultado['notas']} notas y {resultado['lineas']} líneas de {resultado['anio']} "
+                  f"pasaron a {resultado['archivo']} en {resultado['segundos']:.1f} s.")
+        else:
+            resultado = desarchivar_anio(args.anio, args.db)
+            print(f"{resultado['notas']} notas y {resultado['lineas']} líneas de {resultado['anio']} "
+                  "regresaron a la base.")
+    except ErrorTaller as e:
+        print(e)
+
+
+if __name__ == "__main__":
+    main()
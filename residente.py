@@ -0,0 +1,249 @@
+# Proceso residente del menú. Python, pandas, las conexiones y los cachés de catálogos quedan
+# cargados en un proceso que se deja abierto; cada vez que se abre el menú con este módulo un
+# cliente ligero (no importa Main ni pandas) se conecta por 127.0.0.1 y reenvía el teclado y la
+# pantalla. El puerto y una clave al azar quedan en un archivo junto a la base (taller.residente,
+# legible solo por el usuario); sin la clave el residente no atiende. Si no hay residente, el
+# menú se abre en el mismo proceso, como con python Main.py.
+# Cada sesión corre en su propio hilo (hasta SESIONES a la vez) con las conexiones del hilo, así
+# que los archivos exportados quedan en la carpeta donde se inició el residente.
+# Uso: python residente.py iniciar [--db taller.db]   (deja el residente atendiendo)
+#      python residente.py [--db taller.db]           (abre el menú)
+#      python residente.py detener [--db taller.db]
+import os
+import socket
+import sys
+import threading
+
+RUTA_DB = "taller.db"
+SESIONES = 4
+ESPERA_CONEXION = 0.5   # segundos para conectar con el residente antes de abrir el menú aquí
+
+
+def ruta_residente(nombre_db=None):
+    # taller.db -> taller.residente
+    return os.path.splitext(os.path.abspath(nombre_db or RUTA_DB))[0] + ".residente"
+
+
+def _leer_residente(nombre_db):
+    try:
+        with open(ruta_residente(nombre_db), encoding="utf-8") as f:
+            puerto, clave = f.read().split()[:2]
+        return int(puerto), clave
+    except (OSError, ValueError):
+        return None
+
+
+def _conectar(nombre_db, comando):
+    # Socket ya autenticado con el residente, o None si no hay uno atendiendo
+    datos = _leer_residente(nombre_db)
+    if datos is None:
+        return None
+    puerto, clave = datos
+    try:
+        sock = socket.create_connection(("127.0.0.1", puerto), timeout=ESPERA_CONEXION)
+    except OSError:
+        return None
+    sock.settimeout(None)
+    sock.sendall(f"{clave} {comando}\n".encode())
+    return sock
+
+
+# ---------------------------------------------------------------- cliente
+
+def _enviar_teclado(sock):
+    try:
+        for linea in sys.stdin.buffer:
+            sock.sendall(linea)
+    except OSError:
+        return
+    try:
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+def abrir_menu(nombre_db=None):
+    sock = _conectar(nombre_db, "menu")
+    if sock is None:
+        # Sin residente: el menú en este proceso (arranque en frío)
+        import conexion
+        import Main
+        if nombre_db:
+            conexion.RUTA_DB = nombre_db
+        Main.crear_tablas()
+        Main.mainMenu()
+        Main.cerrar_conexiones()
+        return
+    threading.Thread(target=_enviar_teclado, args=(sock,), daemon=True).start()
+    try:
+        while datos := sock.recv(65536):
+            sys.stdout.buffer.write(datos)
+            sys.stdout.buffer.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+
+def detener(nombre_db=None):
+    sock = _conectar(nombre_db, "detener")
+    if sock is None:
+        print("No hay un residente atendiendo.")
+        return
+    with sock:
+        print(sock.makefile(encoding="utf-8").read(), end="")
+
+
+# ---------------------------------------------------------------- residente
+
+_sesion = threading.local()
+
+
+class _SalidaPorHilo:
+    # sys.stdout del residente: lo que imprime una sesión va a su cliente; lo demás, a la consola
+    def __init__(self, original):
+        self._original = original
+
+    def _destino(self):
+        return getattr(_sesion, "salida", None) or self._original
+
+    def write(self, texto):
+        return self._destino().write(texto)
+
+    def flush(self):
+        self._destino().flush()
+
+    def __getattr__(self, nombre):
+        return getattr(self._original, nombre)
+
+
+def _input_por_hilo(input_original):
+    def leer(mensaje=""):
+        entrada = getattr(_sesion, "entrada", None)
+        if entrada is None:
+            return input_original(mensaje)
+        _sesion.salida.write(str(mensaje))
+        _sesion.salida.flush()
+        linea = entrada.readline()
+        if not linea:
+            # El cliente cerró (fin de la entrada o Ctrl+C): termina la sesión
+            raise EOFError
+        return linea.rstrip("\r\n")
+    return leer
+
+
+def precalentar():
+    # Lo que en frío se paga al abrir el menú y al pedir el primer reporte
+    import pandas   # noqa: F401
+    import analitica   # noqa: F401
+    import series   # noqa: F401
+    import api
+    import Main
+    Main.crear_tablas()
+    api.servicios_activos()
+
+
+def _atender(conexion_cliente, clave, detenido):
+    import secrets
+    import traceback
+    import Main
+    with conexion_cliente:
+        entrada = conexion_cliente.makefile("r", encoding="utf-8", newline="\n")
+        salida = conexion_cliente.makefile("w", encoding="utf-8")
+        try:
+            recibida, _, comando = entrada.readline().strip().partition(" ")
+            if not secrets.compare_digest(recibida, clave):
+                return
+            if comando == "detener":
+                detenido.set()
+                salida.write("Residente detenido.\n")
+                salida.flush()
+                return
+            if comando != "menu":
+                return
+            _sesion.entrada, _sesion.salida = entrada, salida
+            try:
+                Main.crear_tablas()
+                Main.mainMenu()
+            except EOFError:
+                pass
+            except Exception:
+                traceback.print_exc(file=salida)
+                traceback.print_exc(file=sys.__stderr__)
+            finally:
+                _sesion.entrada = _sesion.salida = None
+            salida.flush()
+        except OSError:
+            pass   # el cliente se fue mientras se le escribía
+
+
+def iniciar(nombre_db=None):
+    import builtins
+    import secrets
+    from concurrent.futures import ThreadPoolExecutor
+    import conexion
+
+    sock = _conectar(nombre_db, "ninguno")
+    if sock is not None:
+        sock.close()
+        print("Ya hay un residente atendiendo esta base.")
+        return
+    if nombre_db:
+        conexion.RUTA_DB = nombre_db
+    precalentar()
+
+    servidor = socket.socket()
+    servidor.bind(("127.0.0.1", 0))
+    servidor.listen()
+    # accept() con espera corta para notar el 'detener' de una sesión
+    servidor.settimeout(0.5)
+    clave = secrets.token_hex(16)
+    ruta = ruta_residente(nombre_db)
+    descriptor = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+        f.write(f"{servidor.getsockname()[1]} {clave} {os.getpid()}\n")
+
+    sys.stdout = _SalidaPorHilo(sys.stdout)
+    builtins.input = _input_por_hilo(builtins.input)
+    print(f"Residente atendiendo {os.path.abspath(conexion.RUTA_DB)} (Ctrl+C o 'detener' para terminar).",
+          flush=True)
+    detenido = threading.Event()
+    grupo = ThreadPoolExecutor(SESIONES, thread_name_prefix="sesion")
+    try:
+        while not detenido.is_set():
+            try:
+                conexion_cliente, _ = servidor.accept()
+            except socket.timeout:
+                continue
+            conexion_cliente.settimeout(None)
+            grupo.submit(_atender, conexion_cliente, clave, detenido)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.close()
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+    print("Residente detenido.", flush=True)
+    # Sin esperar a las sesiones que sigan abiertas (están bloqueadas leyendo a su cliente)
+    os._exit(0)
+
+
+def main():
+    # Sin argparse: importarlo tarda más que conectar con el residente
+    argumentos = sys.argv[1:]
+    nombre_db = None
+    if "--db" in argumentos:
+        i = argumentos.index("--db")
+        nombre_db = argumentos[i + 1] if i + 1 < len(argumentos) else None
+        del argumentos[i:i + 2]
+    accion = argumentos[0] if argumentos else "menu"
+    acciones = {"menu": abrir_menu, "iniciar": iniciar, "detener": detener}
+    if accion not in acciones or len(argumentos) > 1 or ("--db" in sys.argv and not nombre_db):
+        sys.exit("Uso: python residente.py [menu | iniciar | detener] [--db RUTA]")
+    acciones[accion](nombre_db)
+
+
+if __name__ == "__main__":
+    main()
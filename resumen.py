@@ -0,0 +1,413 @@
+# Resumen diario materializado de las notas activas (no canceladas y con al menos un servicio).
+# Los triggers lo mantienen al registrar, cancelar o recuperar notas; reconstruir_resumen
+# lo recalcula desde las tablas originales y verificar_resumen compara ambos.
+import sys
+from datetime import date, timedelta
+from operator import add
+
+from conexion import obtener_conexion
+from fechas import SQL_FECHA, rango_dias
+from suspension import ACTIVOS
+
+TOLERANCIA = 0.005
+
+ESQUEMA_RESUMEN = [
+    """CREATE TABLE IF NOT EXISTS resumen_diario (
+        fecha TEXT PRIMARY KEY,
+        notas INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        suma_cuadrados REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS resumen_diario_servicio (
+        fecha TEXT NOT NULL,
+        servicio_clave INTEGER NOT NULL,
+        veces INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, servicio_clave)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS resumen_diario_cliente (
+        fecha TEXT NOT NULL,
+        cliente_clave INTEGER NOT NULL,
+        notas INTEGER NOT NULL DEFAULT 0,
+        servicios INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, cliente_clave)
+    ) WITHOUT ROWID""",
+
+    # Nueva línea de servicio en una nota activa
+    f"""CREATE TRIGGER IF NOT EXISTS trg_resumen_detalle_insert
+    AFTER INSERT ON detalles_nota
+    WHEN {ACTIVOS} AND (SELECT cancelada FROM notas WHERE folio = NEW.folio) = 0
+    BEGIN
+        INSERT INTO resumen_diario (fecha, notas, ingresos, suma_cuadrados)
+        SELECT n.fecha,
+               (SELECT COUNT(*) FROM detalles_nota WHERE folio = NEW.folio) = 1,
+               NEW.costo,
+               NEW.costo * (2 * ((SELECT SUM(costo) FROM detalles_nota WHERE folio = NEW.folio) - NEW.costo) + NEW.costo)
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha) DO UPDATE SET
+            notas = notas + excluded.notas,
+            ingresos = ingresos + excluded.ingresos,
+            suma_cuadrados = suma_cuadrados + excluded.suma_cuadrados;
+
+        INSERT INTO resumen_diario_servicio (fecha, servicio_clave, veces, ingresos)
+        SELECT n.fecha, NEW.servicio_clave, 1, NEW.costo
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha, servicio_clave) DO UPDATE SET
+            veces = veces + 1,
+            ingresos = ingresos + excluded.ingresos;
+
+        INSERT INTO resumen_diario_cliente (fecha, cliente_clave, notas, servicios, ingresos)
+        SELECT n.fecha, n.cliente_clave,
+               (SELECT COUNT(*) FROM detalles_nota WHERE folio = NEW.folio) = 1,
+               1, NEW.costo
+        FROM notas n WHERE n.folio = NEW.folio
+        ON CONFLICT (fecha, cliente_clave) DO UPDATE SET
+            notas = notas + excluded.notas,
+            servicios = servicios + 1,
+            ingresos = ingresos + excluded.ingresos;
+    END""",
+
+    # Línea de servicio eliminada de una nota activa
+    f"""CREATE TRIGGER IF NOT EXISTS trg_resumen_detalle_delete
+    AFTER DELETE ON detalles_nota
+    WHEN {ACTIVOS} AND (SELECT cancelada FROM notas WHERE folio = OLD.folio) = 0
+    BEGIN
+        UPDATE resumen_diario SET
+            notas = notas - (NOT EXISTS (SELECT 1 FROM detalles_nota WHERE folio = OLD.folio)),
+            ingresos = ingresos - OLD.costo,
+            suma_cuadrados = suma_cuadrados - OLD.costo * (
+                2 * (SELECT IFNULL(SUM(costo), 0) FROM detalles_nota WHERE folio = OLD.folio) + OLD.costo)
+        WHERE fecha = (SELECT fecha FROM notas WHERE folio = OLD.folio);
+
+        UPDATE resumen_diario_servicio SET
+            veces = veces - 1,
+            ingresos = ingresos - OLD.costo
+        WHERE fecha = (SELECT fecha FROM notas WHERE folio = OLD.folio)
+          AND servicio_clave = OLD.servicio_clave;
+
+        UPDATE resumen_diario_cliente SET
+            notas = notas - (NOT EXISTS (SELECT 1 FROM detalles_nota WHERE folio = OLD.folio)),
+            servicios = servicios - 1,
+            ingresos = ingresos - OLD.costo
+        WHERE (fecha, cliente_clave) = (SELECT fecha, cliente_clave FROM notas WHERE folio = OLD.folio);
+    END""",
+
+    # Cancelación (resta la nota completa) o recuperación (la vuelve a sumar)
+    f"""CREATE TRIGGER IF NOT EXISTS trg_resumen_nota_cancelada
+    AFTER UPDATE OF cancelada ON notas
+    WHEN {ACTIVOS} AND OLD.cancelada <> NEW.cancelada
+     AND EXISTS (SELECT 1 FROM detalles_nota WHERE folio = NEW.folio)
+    BEGIN
+        INSERT INTO resumen_diario (fecha, notas, ingresos, suma_cuadrados)
+        SELECT NEW.fecha,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo) * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        ON CONFLICT (fecha) DO UPDATE SET
+            notas = notas + excluded.notas,
+            ingresos = ingresos + excluded.ingresos,
+            suma_cuadrados = suma_cuadrados + excluded.suma_cuadrados;
+
+        INSERT INTO resumen_diario_servicio (fecha, servicio_clave, veces, ingresos)
+        SELECT NEW.fecha, servicio_clave,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * COUNT(*),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        GROUP BY servicio_clave
+        ON CONFLICT (fecha, servicio_clave) DO UPDATE SET
+            veces = veces + excluded.veces,
+            ingresos = ingresos + excluded.ingresos;
+
+        INSERT INTO resumen_diario_cliente (fecha, cliente_clave, notas, servicios, ingresos)
+        SELECT NEW.fecha, NEW.cliente_clave,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END,
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * COUNT(*),
+               CASE NEW.cancelada WHEN 0 THEN 1 ELSE -1 END * SUM(costo)
+        FROM detalles_nota WHERE folio = NEW.folio
+        ON CONFLICT (fecha, cliente_clave) DO UPDATE SET
+            notas = notas + excluded.notas,
+            servicios = servicios + excluded.servicios,
+            ingresos = ingresos + excluded.ingresos;
+    END""",
+]
+
+# Acumulados por mes ('2024-03'), por año ('2024') y de todo el historial ('total') de los
+# resúmenes por servicio y por cliente, mantenidos por triggers sobre las tablas diarias. Un rango
+# largo se arma con años y meses completos más los días sueltos de las orillas (ver
+# tramos_periodo): cinco años de rankings leen unas cuantas filas por clave en lugar de una por día.
+ACUMULADOS = (
+    ("resumen_periodo_servicio", "resumen_diario_servicio", "servicio_clave", ("veces", "ingresos")),
+    ("resumen_periodo_cliente", "resumen_diario_cliente", "cliente_clave", ("notas", "servicios", "ingresos")),
+)
+
+
+def _acumular(destino, llave, valores, fila, cambio):
+    # Suma cambio(valor) al mes, al año y al total de la fila NEW u OLD de la tabla diaria
+    nuevos = ", ".join(cambio(v) for v in valores)
+    return f"""INSERT INTO {destino} (periodo, {llave}, {", ".join(valores)})
+        VALUES (substr({fila}.fecha, 1, 7), {fila}.{llave}, {nuevos}),
+               (substr({fila}.fecha, 1, 4), {fila}.{llave}, {nuevos}),
+               ('total', {fila}.{llave}, {nuevos})
+        ON CONFLICT (periodo, {llave})
+        DO UPDATE SET {", ".join(f"{v} = {v} + excluded.{v}" for v in valores)};"""
+
+
+def _esquema_acumulados():
+    sentencias = []
+    for destino, origen, llave, valores in ACUMULADOS:
+        columnas = ",\n        ".join(f"{v} {'REAL' if v == 'ingresos' else 'INTEGER'} NOT NULL DEFAULT 0"
+                                       for v in valores)
+        sentencias.append(f"""CREATE TABLE IF NOT EXISTS {destino} (
+        periodo TEXT NOT NULL,
+        {llave} INTEGER NOT NULL,
+        {columnas},
+        PRIMARY KEY (periodo, {llave})
+    ) WITHOUT ROWID""")
+
+        misma_fila = f"OLD.fecha = NEW.fecha AND OLD.{llave} = NEW.{llave}"
+        triggers = (
+            ("insert", "INSERT", f"\n    WHEN {ACTIVOS}", _acumular(destino, llave, valores, "NEW", lambda v: f"NEW.{v}")),
+            ("delete", "DELETE", f"\n    WHEN {ACTIVOS}", _acumular(destino, llave, valores, "OLD", lambda v: f"-OLD.{v}")),
+            # Lo normal: los triggers de notas solo cambian los valores del día, basta la diferencia
+            ("update", "UPDATE", f"\n    WHEN {ACTIVOS} AND {misma_fila}",
+             _acumular(destino, llave, valores, "NEW", lambda v: f"NEW.{v} - OLD.{v}")),
+            ("update_llave", "UPDATE", f"\n    WHEN {ACTIVOS} AND NOT ({misma_fila})",
+             _acumular(destino, llave, valores, "OLD", lambda v: f"-OLD.{v}") + "\n        "
+             + _acumular(destino, llave, valores, "NEW", lambda v: f"NEW.{v}")),
+        )
+        for nombre, evento, condicion, cuerpo in triggers:
+            sentencias.append(f"""CREATE TRIGGER IF NOT EXISTS trg_{destino}_{nombre}
+    AFTER {evento} ON {origen}{condicion}
+    BEGIN
+        {cuerpo}
+    END""")
+    return sentencias
+
+
+ESQUEMA_ACUMULADOS = _esquema_acumulados()
+
+
+def tramos_periodo(conn, fecha_inicio, fecha_fin):
+    # Parte [fecha_inicio, fecha_fin] en (rangos de días sueltos, periodos completos 'YYYY',
+    # 'YYYY-MM' o 'total'). El rango se recorta primero a las fechas con notas activas, así que
+    # "0000-01-01".."9999-12-31" no genera diez mil años y cubre todo el historial con 'total'.
+    primera = conn.execute("SELECT MIN(fecha) FROM resumen_diario WHERE notas > 0").fetchone()[0]
+    ultima = conn.execute("SELECT MAX(fecha) FROM resumen_diario WHERE notas > 0").fetchone()[0]
+    if primera is None:
+        return [], []
+    if fecha_inicio <= primera and fecha_fin >= ultima:
+        return [], ["total"]
+    inicio = date.fromisoformat(max(fecha_inicio, primera))
+    fin = date.fromisoformat(min(fecha_fin, ultima))
+
+    dias, periodos = [], []
+    actual = inicio
+    while actual <= fin:
+        fin_anio = date(actual.year, 12, 31)
+        siguiente_mes = (actual.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if actual.month == 1 and actual.day == 1 and fin_anio <= fin:
+            periodos.append(f"{actual.year:04d}")
+            actual = fin_anio + timedelta(days=1)
+        elif actual.day == 1 and siguiente_mes - timedelta(days=1) <= fin:
+            periodos.append(actual.isoformat()[:7])
+            actual = siguiente_mes
+        else:
+            hasta = min(fin, siguiente_mes - timedelta(days=1))
+            if dias and date.fromisoformat(dias[-1][1]) + timedelta(days=1) == actual:
+                dias[-1] = (dias[-1][0], hasta.isoformat())
+            else:
+                dias.append((actual.isoformat(), hasta.isoformat()))
+            actual = hasta + timedelta(days=1)
+    return dias, periodos
+
+
+def reconstruir_acumulados(conn, fecha_inicio="0000-01-01", fecha_fin="9999-12-31"):
+    # Recalcula desde las tablas diarias los años completos que tocan el rango (y sus meses);
+    # el total se vuelve a sumar desde los años
+    anio_inicio, anio_fin = fecha_inicio[:4], fecha_fin[:4]
+    cursor = conn.cursor()
+    for destino, origen, llave, valores in ACUMULADOS:
+        sumas = ", ".join(f"SUM({v})" for v in valores)
+        cursor.execute(f"DELETE FROM {destino} WHERE periodo BETWEEN ? AND ?", (anio_inicio, anio_fin + "-99"))
+        for largo in (7, 4):
+            cursor.execute(f"""
+                INSERT INTO {destino} (periodo, {llave}, {", ".join(valores)})
+                SELECT substr(fecha, 1, {largo}), {llave}, {sumas}
+                FROM {origen}
+                WHERE fecha BETWEEN ? AND ?
+                GROUP BY 1, 2
+            """, (anio_inicio + "-01-01", anio_fin + "-12-31"))
+        cursor.execute(f"DELETE FROM {destino} WHERE periodo = 'total'")
+        cursor.execute(f"""
+            INSERT INTO {destino} (periodo, {llave}, {", ".join(valores)})
+            SELECT 'total', {llave}, {sumas}
+            FROM {destino}
+            WHERE length(periodo) = 4
+            GROUP BY {llave}
+        """)
+    conn.commit()
+
+
+# Agregados calculados desde las notas (incluidos los años archivados, ver particiones.py); se
+# usan para reconstruir y para verificar. Reciben el rango como números de día.
+CONSULTA_DIARIO = f"""
+    SELECT {SQL_FECHA.format("dia")}, COUNT(*), SUM(total), SUM(total * total)
+    FROM (
+        SELECT dia, SUM(costo) AS total
+        FROM todas_lineas
+        WHERE cancelada = 0 AND dia BETWEEN ? AND ?
+        GROUP BY folio
+    )
+    GROUP BY dia
+"""
+
+CONSULTA_SERVICIO = f"""
+    SELECT {SQL_FECHA.format("dia")}, servicio_clave, COUNT(*), SUM(costo)
+    FROM todas_lineas
+    WHERE cancelada = 0 AND dia BETWEEN ? AND ?
+    GROUP BY dia, servicio_clave
+"""
+
+CONSULTA_CLIENTE = f"""
+    SELECT {SQL_FECHA.format("dia")}, cliente_clave, COUNT(*), SUM(lineas), SUM(total)
+    FROM (
+        SELECT dia, cliente_clave, COUNT(*) AS lineas, SUM(costo) AS total
+        FROM todas_lineas
+        WHERE cancelada = 0 AND dia BETWEEN ? AND ?
+        GROUP BY folio
+    )
+    GROUP BY dia, cliente_clave
+"""
+
+TABLAS = (
+    ("resumen_diario", "fecha, notas, ingresos, suma_cuadrados", CONSULTA_DIARIO, 1),
+    ("resumen_diario_servicio", "fecha, servicio_clave, veces, ingresos", CONSULTA_SERVICIO, 2),
+    ("resumen_diario_cliente", "fecha, cliente_clave, notas, servicios, ingresos", CONSULTA_CLIENTE, 2),
+)
+
+
+def reconstruir_resumen(conn, fecha_inicio="0000-01-01", fecha_fin="9999-12-31", acumulados=True):
+    cursor = conn.cursor()
+    for tabla, columnas, consulta, _ in TABLAS:
+        cursor.execute(f"DELETE FROM {tabla} WHERE fecha BETWEEN ? AND ?", (fecha_inicio, fecha_fin))
+        cursor.execute(f"INSERT INTO {tabla} ({columnas}) {consulta}", rango_dias(fecha_inicio, fecha_fin))
+    conn.commit()
+    # Los triggers ya llevaron los cambios a los acumulados; se recalculan por si estaban mal
+    if acumulados:
+        reconstruir_acumulados(conn, fecha_inicio, fecha_fin)
+
+
+def _agrupar(diferencias, largo):
+    # Suma las diferencias de cada (fecha o periodo, clave) en las del periodo de largo caracteres
+    # ('2024-03' o '2024'; 0 es el total)
+    grupos = {}
+    for (fecha, clave), cambio in diferencias.items():
+        llave = (fecha[:largo] if largo else "total", clave)
+        acumulado = grupos.get(llave)
+        if acumulado is None:
+            grupos[llave] = cambio[:]
+        else:
+            acumulado[:] = map(add, acumulado, cambio)
+    return grupos
+
+
+def sumar_diferencias(cursor, por_dia, por_servicio, por_cliente):
+    # Lleva al resumen diario y a los acumulados lo que agregó una carga hecha con los triggers
+    # suspendidos (importación masiva), ya agrupado por quien cargó:
+    #   por_dia {fecha: [notas, ingresos, suma_cuadrados]}
+    #   por_servicio {(fecha, servicio_clave): [veces, ingresos]}
+    #   por_cliente {(fecha, cliente_clave): [notas, servicios, ingresos]}
+    # Lo mismo que harían los triggers fila por fila, con una sentencia por tabla. Dentro de la
+    # transacción en curso y con los triggers suspendidos: si no, los de los acumulados sumarían dos veces.
+    cursor.executemany("""
+        INSERT INTO resumen_diario (fecha, notas, ingresos, suma_cuadrados) VALUES (?, ?, ?, ?)
+        ON CONFLICT (fecha) DO UPDATE SET
+            notas = notas + excluded.notas,
+            ingresos = ingresos + excluded.ingresos,
+            suma_cuadrados = suma_cuadrados + excluded.suma_cuadrados
+    """, [(fecha, *valores) for fecha, valores in por_dia.items()])
+    for (destino, origen, llave, valores), por_fecha in zip(ACUMULADOS, (por_servicio, por_cliente)):
+        columnas = ", ".join(valores)
+        marcas = ", ".join("?" for _ in valores)
+        sumar = ", ".join(f"{v} = {v} + excluded.{v}" for v in valores)
+        # Los meses salen de los días, los años de los meses y el total de los años
+        por_mes = _agrupar(por_fecha, 7)
+        por_anio = _agrupar(por_mes, 4)
+        por_periodo = {**por_mes, **por_anio, **_agrupar(por_anio, 0)}
+        for tabla, columna, diferencias in ((origen, "fecha", por_fecha), (destino, "periodo", por_periodo)):
+            cursor.executemany(f"""
+                INSERT INTO {tabla} ({columna}, {llave}, {columnas}) VALUES (?, ?, {marcas})
+                ON CONFLICT ({columna}, {llave}) DO UPDATE SET {sumar}
+            """, [(*fila, *cambio) for fila, cambio in diferencias.items()])
+
+
+def verificar_resumen(conn, fecha_inicio="0000-01-01", fecha_fin="9999-12-31"):
+    # Devuelve una lista de (tabla, llave, esperado, guardado) con cada diferencia encontrada
+    cursor = conn.cursor()
+    diferencias = []
+
+    for tabla, columnas, consulta, tamano_llave in TABLAS:
+        esperado = {fila[:tamano_llave]: fila[tamano_llave:]
+                    for fila in cursor.execute(consulta, rango_dias(fecha_inicio, fecha_fin))}
+        cursor.execute(f"SELECT {columnas} FROM {tabla} WHERE fecha BETWEEN ? AND ?", (fecha_inicio, fecha_fin))
+        guardado = {}
+        for fila in cursor.fetchall():
+            # Las filas en cero quedan después de cancelar todas las notas de un día
+            if fila[tamano_llave] != 0:
+                guardado[fila[:tamano_llave]] = fila[tamano_llave:]
+
+        for llave in esperado.keys() | guardado.keys():
+            valores_esperados = esperado.get(llave)
+            valores_guardados = guardado.get(llave)
+            if (valores_esperados is None or valores_guardados is None
+                    or any(abs(a - b) > TOLERANCIA * max(1.0, abs(a))
+                           for a, b in zip(valores_esperados, valores_guardados))):
+                diferencias.append((tabla, llave, valores_esperados, valores_guardados))
+
+    # Los acumulados de los años que tocan el rango, y el total, contra las tablas diarias
+    anio_inicio, anio_fin = fecha_inicio[:4], fecha_fin[:4]
+    for destino, origen, llave, valores in ACUMULADOS:
+        sumas = ", ".join(f"SUM({v})" for v in valores)
+        esperado = {}
+        for periodo, inicio, fin in (("substr(fecha, 1, 7)", anio_inicio + "-01-01", anio_fin + "-12-31"),
+                                     ("substr(fecha, 1, 4)", anio_inicio + "-01-01", anio_fin + "-12-31"),
+                                     ("'total'", "0000-01-01", "9999-12-31")):
+            for fila in cursor.execute(f"""
+                SELECT {periodo}, {llave}, {sumas} FROM {origen}
+                WHERE fecha BETWEEN ? AND ? GROUP BY 1, 2
+            """, (inicio, fin)):
+                if fila[2] != 0:
+                    esperado[fila[:2]] = fila[2:]
+        guardado = {fila[:2]: fila[2:] for fila in cursor.execute(
+            f"SELECT periodo, {llave}, {', '.join(valores)} FROM {destino} "
+            "WHERE periodo BETWEEN ? AND ? OR periodo = 'total'",
+            (anio_inicio, anio_fin + "-99")) if fila[2] != 0}
+        for llave_fila in esperado.keys() | guardado.keys():
+            valores_esperados = esperado.get(llave_fila)
+            valores_guardados = guardado.get(llave_fila)
+            if (valores_esperados is None or valores_guardados is None
+                    or any(abs(a - b) > TOLERANCIA * max(1.0, abs(a))
+                           for a, b in zip(valores_esperados, valores_guardados))):
+                diferencias.append((destino, llave_fila, valores_esperados, valores_guardados))
+
+    return diferencias
+
+
+def main():
+    conn = obtener_conexion()
+    comando = sys.argv[1] if len(sys.argv) > 1 else "verificar"
+    if comando == "reconstruir":
+        reconstruir_resumen(conn)
+        print("Resumen diario reconstruido.")
+    else:
+        diferencias = verificar_resumen(conn)
+        if not diferencias:
+            print("El resumen diario coincide con las notas registradas.")
+        for tabla, llave, esperado, guardado in diferencias[:20]:
+            print(f"{tabla} {llave}: esperado {esperado}, guardado {guardado}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# Series de tiempo de ingresos y volumen por día, semana ISO y mes, con ventanas móviles de
+# 7 y 30 días y comparación contra el año anterior.
+# Los totales diarios se leen en una sola consulta (del resumen diario o, con fuente="notas",
+# agrupando notas y detalles) desde un año y 30 días antes del período, y se acomodan en un
+# arreglo con un lugar por día del calendario. Cualquier suma de días consecutivos sale de sus
+# sumas acumuladas (acumulado[fin + 1] - acumulado[inicio]), así que intervalos, ventanas y año
+# anterior se calculan con NumPy para todos los intervalos a la vez, sin una consulta por intervalo.
+import numpy as np
+import pandas as pd
+
+from api import ErrorTaller
+from conexion import obtener_conexion
+from fechas import SQL_DIA, SQL_FECHA
+
+AGRUPACIONES = ("dia", "semana", "mes")
+VENTANAS = (7, 30)
+# Días y semanas se comparan contra 52 semanas antes (mismo día de la semana); los meses,
+# contra el mismo mes del año anterior
+DIAS_ANIO_ANTERIOR = 364
+
+FUENTES = {
+    "resumen": "SELECT fecha, notas, ingresos FROM resumen_diario WHERE fecha BETWEEN ? AND ? AND notas > 0",
+    "notas": f"""
+        SELECT {SQL_FECHA.format("dia")}, COUNT(DISTINCT folio), SUM(costo)
+        FROM todas_lineas
+        WHERE cancelada = 0 AND dia BETWEEN {SQL_DIA.format("?")} AND {SQL_DIA.format("?")}
+        GROUP BY dia
+    """,
+}
+
+
+def _totales_diarios(conn, primer_dia, ultimo_dia, fuente):
+    # (notas, ingresos) por cada día de [primer_dia, ultimo_dia], con ceros en los días sin notas
+    dias = (ultimo_dia - primer_dia).astype(int) + 1
+    notas = np.zeros(dias)
+    ingresos = np.zeros(dias)
+    filas = conn.execute(FUENTES[fuente], (str(primer_dia), str(ultimo_dia))).fetchall()
+    if filas:
+        fechas, cantidades, montos = zip(*filas)
+        posiciones = (np.array(fechas, dtype="datetime64[D]") - primer_dia).astype(int)
+        notas[posiciones] = cantidades
+        ingresos[posiciones] = montos
+    return notas, ingresos
+
+
+def _acumulado(valores):
+    return np.concatenate(([0.0], np.cumsum(valores)))
+
+
+def _intervalos(dias, agrupacion):
+    # Posiciones (inicio, fin) de cada intervalo dentro de dias y su etiqueta
+    if agrupacion == "dia":
+        posiciones = np.arange(len(dias))
+        return posiciones, posiciones, dias.astype(str)
+    if agrupacion == "semana":
+        iso = pd.DatetimeIndex(dias).isocalendar()
+        llave = iso["year"].to_numpy() * 100 + iso["week"].to_numpy()
+    else:
+        llave = dias.astype("datetime64[M]").astype(int)
+    inicios = np.flatnonzero(np.diff(llave, prepend=llave[0] - 1))
+    fines = np.append(inicios[1:] - 1, len(dias) - 1)
+    if agrupacion == "semana":
+        etiquetas = [f"{a}-W{s:02d}" for a, s in zip(iso["year"].to_numpy()[inicios], iso["week"].to_numpy()[inicios])]
+    else:
+        etiquetas = dias[inicios].astype("datetime64[M]").astype(str)
+    return inicios, fines, np.asarray(etiquetas)
+
+
+def _anio_anterior(dias, inicios, fines, agrupacion):
+    # Primer y último día (como datetime64) del mismo intervalo un año antes
+    if agrupacion != "mes":
+        return dias[inicios] - DIAS_ANIO_ANTERIOR, dias[fines] - DIAS_ANIO_ANTERIOR
+    # Se recorre el fin exclusivo para que un mes completo caiga en el mes completo anterior
+    # (el 29 de febrero incluido o no, según el año)
+    un_anio = pd.DateOffset(years=1)
+    primeros = (pd.DatetimeIndex(dias[inicios]) - un_anio).to_numpy().astype("datetime64[D]")
+    ultimos = (pd.DatetimeIndex(dias[fines] + 1) - un_anio).to_numpy().astype("datetime64[D]") - 1
+    return primeros, ultimos
+
+
+def _dividir(numerador, denominador):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominador > 0, numerador / denominador, np.nan)
+
+
+def series_tiempo(fecha_inicio, fecha_fin, agrupacion="dia", fuente="resumen", nombre_db=None) -> pd.DataFrame:
+    if agrupacion not in AGRUPACIONES:
+        raise ErrorTaller(f"Agrupación inválida; use {', '.join(AGRUPACIONES)}.")
+    if fuente not in FUENTES:
+        raise ErrorTaller(f"Fuente inválida; use {' o '.join(FUENTES)}.")
+    inicio, fin = np.datetime64(fecha_inicio, "D"), np.datetime64(fecha_fin, "D")
+    if fin < inicio:
+        raise ErrorTaller("La fecha final no puede ser anterior a la inicial.")
+
+    # El arreglo empieza antes del período para que las ventanas y el año anterior de los
+    # primeros intervalos estén completos
+    base = inicio - 366 - max(VENTANAS)
+    notas, ingresos = _totales_diarios(obtener_conexion(nombre_db), base, fin, fuente)
+    acumulado_notas, acumulado_ingresos = _acumulado(notas), _acumulado(ingresos)
+
+    def suma(acumulado, primeros, ultimos):
+        # primeros y últimos son fechas; se pasan a posiciones del arreglo
+        return acumulado[(ultimos - base).astype(int) + 1] - acumulado[(primeros - base).astype(int)]
+
+    dias = np.arange(inicio, fin + 1)
+    inicios, fines, etiquetas = _intervalos(dias, agrupacion)
+    primeros, ultimos = dias[inicios], dias[fines]
+    notas_intervalo = suma(acumulado_notas, primeros, ultimos)
+    ingresos_intervalo = suma(acumulado_ingresos, primeros, ultimos)
+    anteriores = _anio_anterior(dias, inicios, fines, agrupacion)
+    ingresos_anteriores = suma(acumulado_ingresos, *anteriores)
+
+    columnas = {
+        "Periodo": etiquetas,
+        "Inicio": primeros.astype(str),
+        "Fin": ultimos.astype(str),
+        "Notas": notas_intervalo.astype(int),
+        "Ingresos": ingresos_intervalo.round(2),
+        "Ticket promedio": _dividir(ingresos_intervalo, notas_intervalo).round(2),
+    }
+    if agrupacion == "dia":
+        for ventana in VENTANAS:
+            notas_ventana = suma(acumulado_notas, ultimos - (ventana - 1), ultimos)
+            ingresos_ventana = suma(acumulado_ingresos, ultimos - (ventana - 1), ultimos)
+            columnas[f"Notas {ventana} días"] = notas_ventana.astype(int)
+            columnas[f"Ingresos {ventana} días"] = ingresos_ventana.round(2)
+            columnas[f"Ticket {ventana} días"] = _dividir(ingresos_ventana, notas_ventana).round(2)
+    columnas["Notas año anterior"] = suma(acumulado_notas, *anteriores).astype(int)
+    columnas["Ingresos año anterior"] = ingresos_anteriores.round(2)
+    # + 0.0 para que un -0.0 del redondeo se muestre como 0.0
+    columnas["Variación anual %"] = (_dividir(ingresos_intervalo - ingresos_anteriores, ingresos_anteriores)
+                                     * 100).round(1) + 0.0
+    return pd.DataFrame(columnas)
@@ -0,0 +1,307 @@
+# Servidor HTTP/JSON para que varios mostradores trabajen sobre la misma taller.db.
+# El bucle asyncio solo atiende las conexiones; las escrituras van a la cola de escritura
+# (cola_escritura.py), que las agrupa en commits, y las consultas a un grupo de hilos lectores,
+# cada uno con su conexión.
+#
+#   POST /notas                       {"cliente_clave": 1, "fecha": "2024-01-15",
+#                                      "lineas": [{"servicio_clave": 2, "observaciones": ""}]}
+#   GET  /notas/<folio>[?cancelada=1]
+#   POST /notas/<folio>/cancelar
+#   POST /notas/<folio>/recuperar
+#   GET  /reportes/<periodo|tendencia|dispersion|servicios|clientes>?inicio=YYYY-MM-DD&fin=YYYY-MM-DD
+#        (sin inicio, desde la nota más antigua; un fin futuro se toma como hoy)
+#        servicios y clientes aceptan además &k=10&criterio=cantidad|ingresos&empates=0
+#   GET  /buscar/<notas|clientes|servicios>?texto=frenos+del*[&desde=20]   (ver busqueda.py; desde es el
+#        "siguiente" de la respuesta anterior)
+#   GET  /estado
+#   GET  /metricas[?formato=json]        contadores de instrumentacion.py (con --medir)
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from urllib.parse import urlsplit, parse_qs
+
+import api
+import busqueda
+import conexion
+from cola_escritura import ColaEscritura
+import esquema
+import instrumentacion
+from api import ErrorTaller
+
+LECTORES = 4
+MOTIVOS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+REPORTES = {
+    "periodo": api.reporte_periodo,
+    "tendencia": api.tendencia_central,
+    "dispersion": api.dispersion,
+    "servicios": api.servicios_mas_prestados,
+    "clientes": api.clientes_con_mas_servicios,
+}
+RANKINGS = ("servicios", "clientes")
+
+
+def _a_json(valor):
+    # Convierte los resultados de la API (dataclasses, listas, None) a tipos de JSON
+    if isinstance(valor, list):
+        return [_a_json(v) for v in valor]
+    if isinstance(valor, api.Nota):
+        return {**asdict(valor), "total": valor.total}
+    if hasattr(valor, "__dataclass_fields__"):
+        return asdict(valor)
+    if isinstance(valor, tuple):
+        return list(valor)
+    return valor
+
+
+# ---------------------------------------------------------------- trabajo en los hilos
+
+def _leer_nota(datos):
+    # (cliente_clave, fecha, lineas) para ColaEscritura.registrar
+    if not isinstance(datos, dict):
+        raise ErrorTaller("Se esperaba un objeto JSON.")
+    try:
+        lineas = [(int(l["servicio_clave"]), l.get("observaciones", "")) for l in datos["lineas"]]
+        cliente_clave = int(datos["cliente_clave"])
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ErrorTaller("Se requieren cliente_clave y lineas con servicio_clave.") from None
+    # Lo que no es texto lo rechazaría SQLite ya dentro del lote de la cola de escritura
+    if not all(isinstance(observaciones, str) for _, observaciones in lineas):
+        raise ErrorTaller("observaciones debe ser texto.")
+    return cliente_clave, datos.get("fecha"), lineas
+
+
+def _consultar_nota(folio, cancelada):
+    nota = api.obtener_nota(folio, cancelada)
+    if nota is None:
+        return 404, {"error": "Nota no encontrada."}
+    return 200, _a_json(nota)
+
+
+def _reporte(nombre, fecha_inicio, fecha_fin, opciones=()):
+    # Fechas ya normalizadas con api.validar_periodo; sin inicio, desde la nota más antigua
+    fecha_inicio = fecha_inicio or min(api.fecha_mas_antigua() or fecha_fin, fecha_fin)
+    return 200, {"inicio": fecha_inicio, "fin": fecha_fin,
+                 "resultado": _a_json(REPORTES[nombre](fecha_inicio, fecha_fin, **dict(opciones)))}
+
+
+def _buscar(donde, texto, desde):
+    # desde es el "siguiente" de la página anterior: un número o dos separados por coma
+    try:
+        despues = tuple(int(parte) for parte in desde.split(",")) if desde else None
+    except ValueError:
+        raise ErrorTaller("desde debe ser un número o dos separados por coma.") from None
+    if despues and (len(despues) > 2 or despues[0] < 0):
+        raise ErrorTaller("desde debe ser un número o dos separados por coma.")
+    pagina = busqueda.BUSQUEDAS[donde](texto, despues)
+    return 200, {"resultados": _a_json(pagina.elementos),
+                 "siguiente": ",".join(map(str, pagina.siguiente)) if pagina.siguiente else None,
+                 "aviso": pagina.aviso}
+
+
+def _en_hilo(funcion, *args):
+    # La respuesta se codifica en el hilo de trabajo para no bloquear el bucle con reportes grandes
+    estado, datos = funcion(*args)
+    return estado, _codificar(datos)
+
+
+def _codificar(datos):
+    return json.dumps(datos, ensure_ascii=False).encode("utf-8")
+
+
+# ---------------------------------------------------------------- servidor
+
+class Servidor:
+    def __init__(self, lectores=LECTORES):
+        # Un solo escritor: las escrituras no compiten entre sí por el candado de SQLite. El hilo
+        # escritor aplica las migraciones; las notas van a la cola, que tiene su propio hilo.
+        self.escritor = ThreadPoolExecutor(1, thread_name_prefix="escritor")
+        self.cola = ColaEscritura()
+        self.lectores = ThreadPoolExecutor(lectores, thread_name_prefix="lector")
+        self._en_curso = {}
+        self.peticiones = 0
+        self.coalescidas = 0
+
+    async def _ejecutar(self, grupo, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(grupo, _en_hilo, funcion, *args)
+
+    async def _coalescer(self, llave, funcion, *args):
+        # Reportes idénticos que llegan mientras uno está en curso comparten su resultado
+        futuro = self._en_curso.get(llave)
+        if futuro is not None:
+            self.coalescidas += 1
+            return await asyncio.shield(futuro)
+        futuro = asyncio.ensure_future(self._ejecutar(self.lectores, funcion, *args))
+        self._en_curso[llave] = futuro
+        try:
+            return await asyncio.shield(futuro)
+        finally:
+            if self._en_curso.get(llave) is futuro:
+                del self._en_curso[llave]
+
+    async def despachar(self, metodo, destino, cuerpo):
+        url = urlsplit(destino)
+        partes = [p for p in url.path.split("/") if p]
+        parametros = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if partes == ["estado"] and metodo == "GET":
+            cache = api.CACHE_REPORTES
+            return 200, {"peticiones": self.peticiones, "coalescidas": self.coalescidas,
+                         "en_curso": len(self._en_curso),
+                         "cache_reportes": {"aciertos": cache.aciertos, "fallos": cache.fallos,
+                                            "desalojos": cache.desalojos},
+                         "cola_escritura": self.cola.estadisticas()}
+
+        if partes == ["metricas"] and metodo == "GET":
+            if parametros.get("formato") == "json":
+                return 200, instrumentacion.instantanea()
+            return 200, instrumentacion.prometheus()
+
+        if partes == ["notas"]:
+            if metodo != "POST":
+                return 405, {"error": "Método no permitido."}
+            nota = await asyncio.wrap_future(self.cola.registrar(*_leer_nota(json.loads(cuerpo or b"{}"))))
+            return 201, _a_json(nota)
+
+        if len(partes) in (2, 3) and partes[0] == "notas":
+            try:
+                folio = int(partes[1])
+            except ValueError:
+                raise ErrorTaller("Folio inválido.") from None
+            if len(partes) == 2 and metodo == "GET":
+                cancelada = parametros.get("cancelada", "0") in ("1", "true")
+                return await self._ejecutar(self.lectores, _consultar_nota, folio, cancelada)
+            if len(partes) == 3 and partes[2] in ("cancelar", "recuperar"):
+                if metodo != "POST":
+                    return 405, {"error": "Método no permitido."}
+                cambio = self.cola.cancelar if partes[2] == "cancelar" else self.cola.recuperar
+                await asyncio.wrap_future(cambio(folio))
+                return 200, {"folio": folio, "cancelada": partes[2] == "cancelar"}
+
+        if len(partes) == 2 and partes[0] == "reportes" and partes[1] in REPORTES and metodo == "GET":
+            # Normalizadas antes de coalescer: fin=2024-06-30 y fin=2024-6-30 son el mismo reporte
+            inicio, fin = api.validar_periodo(parametros.get("inicio"), parametros.get("fin"))
+            opciones = ()
+            if partes[1] in RANKINGS:
+                opciones = tuple((nombre, parametros[nombre]) for nombre in ("k", "criterio") if nombre in parametros)
+                if "empates" in parametros:
+                    opciones += (("empates", parametros["empates"] not in ("0", "false")),)
+            return await self._coalescer((partes[1], inicio, fin, opciones), _reporte, partes[1], inicio, fin,
+                                         opciones)
+
+        if len(partes) == 2 and partes[0] == "buscar" and partes[1] in busqueda.BUSQUEDAS and metodo == "GET":
+            return await self._ejecutar(self.lectores, _buscar, partes[1], parametros.get("texto", ""),
+                                        parametros.get("desde"))
+
+        return 404, {"error": "Ruta no encontrada."}
+
+    async def _responder(self, metodo, destino, cuerpo):
+        self.peticiones += 1
+        try:
+            return await self.despachar(metodo, destino, cuerpo)
+        except ErrorTaller as e:
+            return 400, {"error": str(e)}
+        except json.JSONDecodeError:
+            return 400, {"error": "JSON inválido."}
+        except Exception as e:
+            print(f"Error al atender {metodo} {destino}: {e!r}")
+            return 500, {"error": "Error interno del servidor."}
+
+    async def atender(self, lector, escritor):
+        # HTTP/1.1 mínimo con conexiones persistentes (keep-alive)
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, destino, _ = linea.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                encabezados = {}
+                while True:
+                    encabezado = await lector.readline()
+                    if encabezado in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = encabezado.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+                largo = encabezados.get("content-length", "0")
+                if not (largo.isascii() and largo.isdigit()):
+                    # Sin un largo válido no se sabe dónde termina el cuerpo: se responde y se cierra
+                    await self._escribir(escritor, 400, {"error": "Content-Length inválido."}, True)
+                    break
+                largo = int(largo)
+                cuerpo = await lector.readexactly(largo) if largo else b""
+
+                estado, contenido = await self._responder(metodo.upper(), destino, cuerpo)
+                cerrar = encabezados.get("connection", "").lower() == "close"
+                await self._escribir(escritor, estado, contenido, cerrar)
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _escribir(self, escritor, estado, contenido, cerrar):
+        tipo = "application/json"
+        if isinstance(contenido, str):
+            # Texto de Prometheus (GET /metricas)
+            tipo, contenido = "text/plain; version=0.0.4", contenido.encode("utf-8")
+        elif not isinstance(contenido, bytes):
+            contenido = _codificar(contenido)
+        escritor.write(
+            f"HTTP/1.1 {estado} {MOTIVOS.get(estado, '')}\r\n"
+            f"Content-Type: {tipo}; charset=utf-8\r\n"
+            f"Content-Length: {len(contenido)}\r\n"
+            f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n".encode("latin-1") + contenido)
+        await escritor.drain()
+
+    def cerrar(self):
+        self.cola.cerrar()
+        self.escritor.submit(conexion.cerrar_conexiones).result()
+        self.escritor.shutdown()
+        self.lectores.shutdown()
+
+
+async def servir(host, puerto, lectores):
+    servidor = Servidor(lectores)
+    # Las migraciones se aplican en el hilo escritor antes de aceptar peticiones
+    await asyncio.get_running_loop().run_in_executor(
+        servidor.escritor, lambda: esquema.crear_tablas(conexion.obtener_conexion()))
+    tcp = await asyncio.start_server(servidor.atender, host, puerto)
+    host, puerto = tcp.sockets[0].getsockname()[:2]
+    print(f"Escuchando en http://{host}:{puerto}", flush=True)
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        servidor.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON del taller.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--db", default=None)
+    parser.add_argument("--lectores", type=int, default=LECTORES)
+    parser.add_argument("--medir", type=float, nargs="?", const=instrumentacion.UMBRAL_LENTAS_MS,
+                        metavar="UMBRAL_MS", help="mide las sentencias y registra las que pasen del umbral")
+    args = parser.parse_args()
+
+    if args.db:
+        conexion.RUTA_DB = args.db
+    if args.medir is not None:
+        # Antes de servir: cada hilo abre sus conexiones al atender su primera petición
+        instrumentacion.activar(args.medir)
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.lectores))
+    except KeyboardInterrupt:
+        print("Servidor detenido.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# Suspensión de los triggers de notas y detalles_nota (y de los acumulados sobre las tablas
+# diarias del resumen) mientras se mueven notas que los resúmenes (resumen.py), el registro de
+# cambios (cambios.py), las cancelaciones (depuracion.py) y el índice de búsqueda (busqueda.py)
+# ya cuentan: al archivar o desarchivar un año, al depurar o restaurar una nota, al generar datos
+# de prueba que después se resumen de una vez y en la importación masiva, que suma cada lote.
+# Cada uno de esos triggers lleva la condición ACTIVOS; triggers_suspendidos anota una fila en
+# la transacción en curso y la quita al terminar. Otra conexión nunca la ve, y si el proceso se
+# interrumpe se deshace con la transacción. El esquema no cambia, así que las demás conexiones
+# no tienen que volver a preparar sus consultas ni adjuntar sus particiones.
+from contextlib import contextmanager
+
+TABLA_SUSPENSION = """CREATE TABLE IF NOT EXISTS triggers_suspendidos (
+    motivo TEXT NOT NULL
+)"""
+
+ACTIVOS = "NOT EXISTS (SELECT 1 FROM triggers_suspendidos)"
+
+
+@contextmanager
+def triggers_suspendidos(cursor, motivo):
+    # Solo dentro de una transacción abierta (BEGIN IMMEDIATE): si algo falla, el rollback de
+    # quien llama quita la fila
+    if not cursor.connection.in_transaction:
+        raise RuntimeError("triggers_suspendidos requiere una transacción abierta.")
+    fila = cursor.execute("INSERT INTO main.triggers_suspendidos (motivo) VALUES (?)", (motivo,)).lastrowid
+    yield
+    cursor.execute("DELETE FROM main.triggers_suspendidos WHERE rowid = ?", (fila,))
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto están en la raíz, sin paquete
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+import api
+import conexion
+import esquema
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    # Una base nueva por prueba en su propia carpeta (taller.db es relativo, como en Main.py)
+    monkeypatch.chdir(tmp_path)
+    api.CATALOGO_CLIENTES.invalidar()
+    api.CATALOGO_SERVICIOS.invalidar()
+    conn = conexion.obtener_conexion()
+    esquema.crear_tablas(conn)
+    yield conn
+    conexion.cerrar_conexiones()
@@ -0,0 +1,43 @@
+import api
+import busqueda
+
+
+def test_relevancia_solo_en_las_candidatas(conn, monkeypatch):
+    monkeypatch.setattr(busqueda, "CANDIDATAS", 5)
+    cliente = api.alta_cliente("Pérez", "Ana", "5512345678").clave
+    servicio = api.alta_servicio("Afinación", 800).clave
+    # Doce líneas con "frenos"; entre las cinco más recientes, la 9 es la más relevante
+    for i in range(12):
+        texto = "frenos frenos frenos" if i in (2, 9) else f"revisar frenos y otras cosas {i}"
+        api.crear_nota(cliente, "2024-01-15", [(servicio, texto)])
+
+    vistas, despues = [], None
+    while True:
+        pagina = busqueda.buscar_notas("frenos", despues, limite=3)
+        vistas += [c.observaciones for c in pagina.elementos]
+        despues = pagina.siguiente
+        if despues is None:
+            break
+
+    assert vistas[0] == "frenos frenos frenos"
+    assert sorted(vistas[1:5]) == sorted(f"revisar frenos y otras cosas {i}" for i in (7, 8, 10, 11))
+    # Después de las candidatas, de la más reciente a la más antigua, sin bm25
+    assert vistas[5:] == [f"revisar frenos y otras cosas {i}" for i in (6, 5, 4, 3)] + \
+        ["frenos frenos frenos"] + [f"revisar frenos y otras cosas {i}" for i in (1, 0)]
+    # Una página pedida por número llega a las mismas líneas que siguiendo las llaves
+    assert [c.observaciones for c in busqueda.buscar_notas("frenos", (7,), limite=3).elementos] == vistas[7:10]
+
+
+def test_demasiadas_coincidencias_van_por_fecha(conn, monkeypatch):
+    monkeypatch.setattr(busqueda, "MAX_RELEVANCIA", 3)
+    cliente = api.alta_cliente("Pérez", "Ana", "5512345678").clave
+    servicio = api.alta_servicio("Afinación", 800).clave
+    for i in range(5):
+        api.crear_nota(cliente, "2024-01-15", [(servicio, "frenos frenos" if i == 0 else f"frenos {i}")])
+
+    pagina = busqueda.buscar_notas("frenos", limite=3)
+    assert pagina.aviso
+    assert [c.observaciones for c in pagina.elementos] == ["frenos 4", "frenos 3", "frenos 2"]
+    siguiente = busqueda.buscar_notas("frenos", pagina.siguiente, limite=3)
+    assert [c.observaciones for c in siguiente.elementos] == ["frenos 1", "frenos frenos"]
+    assert busqueda.buscar_notas("frenos 2").aviso is None
@@ -0,0 +1,21 @@
+import api
+from cola_escritura import ColaEscritura
+
+
+def test_un_pedido_con_error_no_tira_el_lote(conn):
+    cliente = api.alta_cliente("Pérez", "Ana", "5512345678")
+    servicio = api.alta_servicio("Afinación", 800)
+    # Un lote de 256 con ventana larga: los tres pedidos van en la misma transacción
+    with ColaEscritura(ventana_ms=200) as cola:
+        buenos = [cola.registrar(cliente.clave, "2024-01-15", [(servicio.clave, "")]) for _ in range(2)]
+        linea_mala = cola.registrar(cliente.clave, "2024-01-15", [(1,)])
+        tipo_malo = cola.registrar(cliente.clave, "2024-01-15", [(servicio.clave, {"a": 1})])
+        buenos.append(cola.registrar(cliente.clave, "2024-01-16", [(servicio.clave, "ruido")]))
+
+    assert isinstance(linea_mala.exception(), ValueError)
+    assert tipo_malo.exception() is not None
+    folios = [f.result().folio for f in buenos]
+    assert cola.estadisticas()["lotes"] == 1
+    guardados = [fila[0] for fila in conn.execute("SELECT folio FROM notas ORDER BY folio")]
+    assert guardados == folios
+    assert api.obtener_nota(folios[-1]).lineas[0].observaciones == "ruido"
@@ -0,0 +1,26 @@
+from datetime import date, timedelta
+
+import api
+from depuracion import archivar_notas
+from importacion import importar_notas
+
+
+def test_cancelada_importada_cuenta_desde_la_fecha_de_la_nota(conn, tmp_path):
+    servicio = api.alta_servicio("Afinación", 800).clave
+    hace_60 = (date.today() - timedelta(days=60)).isoformat()
+    ruta = tmp_path / "historico.csv"
+    ruta.write_text("folio,fecha,telefono,apellidos,nombres,servicio_clave,cancelada\n"
+                    f"1,{hace_60},5511111111,Pérez,Ana,{servicio},si\n"
+                    f"2,{hace_60},5511111111,Pérez,Ana,{servicio},\n", encoding="utf-8")
+    importar_notas(str(ruta))
+    # Una nota de la misma fecha cancelada hoy desde el menú sí tiene su fila
+    cliente = api.alta_cliente("López", "Juan", "5522222222").clave
+    folio = api.crear_nota(cliente, hace_60, [(servicio, "")]).folio
+    api.cancelar(folio)
+
+    assert [fila[0] for fila in conn.execute("SELECT folio FROM cancelaciones")] == [folio]
+    resultado = archivar_notas(horizonte_dias=None, dias_cancelada=30)
+    assert resultado["notas"] == 1
+    restantes = conn.execute("SELECT folio, cancelada FROM notas ORDER BY folio").fetchall()
+    assert [cancelada for _, cancelada in restantes] == [0, 1]
+    assert restantes[1][0] == folio
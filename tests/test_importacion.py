@@ -0,0 +1,101 @@
+import csv
+import sqlite3
+
+import api
+from busqueda import buscar_notas
+from importacion import importar_notas
+from resumen import verificar_resumen
+
+ENCABEZADO = ["folio", "fecha", "telefono", "apellidos", "nombres", "servicio_clave", "observaciones", "costo",
+              "cancelada"]
+
+
+def escribir(ruta, filas):
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(ENCABEZADO)
+        escritor.writerows(filas)
+    return str(ruta)
+
+
+def historico(servicio):
+    # Cuatro notas: una de tres líneas, una cancelada y dos de clientes que se dan de alta
+    return [
+        [1, "2024-01-15", "5511111111", "Pérez", "Ana", servicio, "cambio de frenos", ""],
+        [1, "2024-01-15", "5511111111", "Pérez", "Ana", servicio, "", "250.5"],
+        [2, "01-15-2024", "5522222222", "López", "Juan", servicio, "", "", "si"],
+        [3, "2024-02-01", "5522222222", "López", "Juan", servicio, "ruido en la suspensión", ""],
+        [1, "2024-01-15", "5511111111", "Pérez", "Ana", servicio, "", "99"],
+        [4, "2023-12-31", "5511111111", "Pérez", "Ana", servicio, "", ""],
+    ]
+
+
+def indices(conn):
+    return {fila[0] for fila in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name IN ('notas', 'detalles_nota')")}
+
+
+def test_base_vacia_en_una_transaccion(conn, tmp_path):
+    servicio = api.alta_servicio("Afinación", 800).clave
+    antes = indices(conn)
+    resumen = importar_notas(escribir(tmp_path / "historico.csv", historico(servicio)))
+
+    assert (resumen["notas"], resumen["lineas"], resumen["clientes_nuevos"], resumen["rechazadas"]) == (4, 6, 2, 0)
+    assert indices(conn) == antes
+    assert verificar_resumen(conn) == []
+    assert conn.execute("SELECT SUM(ingresos) FROM resumen_periodo_cliente WHERE periodo = 'total'").fetchone()[0] \
+        == 800 + 250.5 + 99 + 800 + 800
+    fechas = {fila[0] for fila in conn.execute("SELECT fecha FROM cambios_fecha")}
+    assert fechas == {"2023-12-31", "2024-01-15", "2024-02-01"}
+    assert [c.observaciones for c in buscar_notas("frenos").elementos] == ["cambio de frenos"]
+    # El candado exclusivo se suelta al terminar
+    otra = sqlite3.connect("taller.db", timeout=0)
+    assert otra.execute("SELECT COUNT(*) FROM notas").fetchone()[0] == 4
+    otra.close()
+
+
+def test_base_en_uso_por_lotes(conn, tmp_path):
+    servicio = api.alta_servicio("Afinación", 800).clave
+    cliente = api.alta_cliente("Pérez", "Ana", "5511111111").clave
+    api.crear_nota(cliente, "2024-01-15", [(servicio, "")])
+    # Con lotes de dos líneas la nota 1 queda repartida en tres lotes
+    resumen = importar_notas(escribir(tmp_path / "historico.csv", historico(servicio)), tamano_lote=2)
+
+    assert (resumen["notas"], resumen["lineas"], resumen["clientes_nuevos"]) == (4, 6, 1)
+    assert verificar_resumen(conn) == []
+    assert conn.execute("SELECT notas FROM resumen_diario WHERE fecha = '2024-01-15'").fetchone()[0] == 2
+    assert [c.observaciones for c in buscar_notas("suspension").elementos] == ["ruido en la suspensión"]
+    # Después de importar, los triggers siguen contando lo que se registra
+    api.crear_nota(cliente, "2024-02-01", [(servicio, "")])
+    assert verificar_resumen(conn) == []
+
+
+def test_otra_conexion_abierta_usa_lotes(conn, tmp_path):
+    servicio = api.alta_servicio("Afinación", 800).clave
+    otra = sqlite3.connect("taller.db")
+    otra.execute("SELECT COUNT(*) FROM notas").fetchone()
+    antes = indices(conn)
+    importar_notas(escribir(tmp_path / "historico.csv", historico(servicio)), tamano_lote=2)
+
+    assert indices(conn) == antes
+    assert verificar_resumen(conn) == []
+    assert otra.execute("SELECT COUNT(*) FROM notas").fetchone()[0] == 4
+    otra.close()
+
+
+def test_filas_rechazadas(conn, tmp_path):
+    servicio = api.alta_servicio("Afinación", 800).clave
+    filas = [
+        # Cliente nuevo en una fila con servicio inexistente: no se da de alta
+        [1, "2024-01-15", "5533333333", "Ruiz", "Eva", 999, "", ""],
+        [2, "2024-01-15", "5511111111", "Pérez", "Ana", servicio, "", "inf"],
+        [3, "2024-01-15", "5511111111", "Pérez", "Ana", servicio, "", "nan"],
+        [4, "2024-01-15", "5511111111", "Pérez", "Ana", servicio, "", "-5"],
+        [5, "2024-01-15", "5511111111", "Pérez", "Ana", servicio, "", "100"],
+    ]
+    resumen = importar_notas(escribir(tmp_path / "historico.csv", filas))
+
+    assert resumen["rechazadas"] == 4
+    assert [linea for linea, _ in resumen["errores"]] == [2, 3, 4, 5]
+    assert [fila[0] for fila in conn.execute("SELECT telefono FROM clientes")] == ["5511111111"]
+    assert verificar_resumen(conn) == []
@@ -0,0 +1,46 @@
+import pytest
+
+import api
+import conexion
+import esquema
+import instrumentacion
+
+
+@pytest.fixture
+def medida(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api.CATALOGO_CLIENTES.invalidar()
+    api.CATALOGO_SERVICIOS.invalidar()
+    instrumentacion.activar(archivo_lentas="")
+    instrumentacion.reiniciar()
+    conn = conexion.obtener_conexion()
+    esquema.crear_tablas(conn)
+    yield conn
+    instrumentacion.desactivar()
+    instrumentacion.reiniciar()
+
+
+def sentencias(funcion):
+    return {s["sql"]: s for s in instrumentacion.instantanea()["sentencias"] if s["funcion"].endswith(funcion)}
+
+
+def test_atribuye_a_la_funcion_que_ejecuta(medida):
+    cliente = api.alta_cliente("Pérez", "Ana", "5512345678").clave
+    for _ in range(3):
+        medida.execute("SELECT nombres FROM clientes WHERE clave = ?", (cliente,)).fetchone()
+        medida.cursor().execute("SELECT apellidos FROM clientes").fetchall()
+
+    propias = sentencias("test_atribuye_a_la_funcion_que_ejecuta")
+    assert propias["SELECT nombres FROM clientes WHERE clave = ?"]["ejecuciones"] == 3
+    assert propias["SELECT apellidos FROM clientes"]["filas"] == 3
+    assert any(s.startswith("INSERT INTO clientes") for s in sentencias("api.alta_cliente"))
+
+
+def test_prometheus_separa_sentencias_con_el_mismo_inicio(medida):
+    relleno = " AND ".join(["clave > 0"] * 20)
+    for final in ("clave < 5", "clave < 6"):
+        medida.execute(f"SELECT nombres FROM clientes WHERE {relleno} AND {final}").fetchall()
+
+    series = [linea.rsplit(" ", 1)[0] for linea in instrumentacion.prometheus().splitlines()
+              if linea.startswith("taller_sql_ejecuciones_total{") and "test_prometheus" in linea]
+    assert len(series) == len(set(series)) == 2
@@ -0,0 +1,35 @@
+import re
+
+import esquema
+from busqueda import ESQUEMA_BUSQUEDA
+from cambios import ESQUEMA_CAMBIOS
+from catalogo import ESQUEMA_CATALOGO
+from depuracion import ESQUEMA_DEPURACION
+from particiones import ESQUEMA_PARTICIONES
+from resumen import ESQUEMA_ACUMULADOS, ESQUEMA_RESUMEN
+from suspension import TABLA_SUSPENSION
+
+ACTUALES = [*ESQUEMA_RESUMEN, *ESQUEMA_CAMBIOS, *ESQUEMA_ACUMULADOS, *ESQUEMA_PARTICIONES, *ESQUEMA_DEPURACION,
+            *ESQUEMA_BUSQUEDA, *ESQUEMA_CATALOGO, TABLA_SUSPENSION]
+_CREATE = re.compile(r"^CREATE (?:VIRTUAL )?(TABLE|TRIGGER|INDEX|VIEW) IF NOT EXISTS (\w+)")
+
+
+def test_migrada_desde_cero_igual_a_las_definiciones(conn):
+    # sqlite_master guarda el texto de cada CREATE sin el IF NOT EXISTS
+    guardado = {(tipo, nombre): sql for tipo, nombre, sql in conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL")}
+    esperado = {}
+    for sentencia in ACTUALES:
+        coincidencia = _CREATE.match(sentencia)
+        if coincidencia:
+            tipo, nombre = coincidencia.groups()
+            esperado[(tipo.lower(), nombre)] = sentencia.replace("IF NOT EXISTS ", "", 1)
+    assert {llave: guardado.get(llave) for llave in esperado} == esperado
+    # Ningún trigger de una versión anterior quedó sin quitar
+    assert {nombre for tipo, nombre in guardado if tipo == "trigger"} == \
+        {nombre for tipo, nombre in esperado if tipo == "trigger"}
+
+
+def test_una_base_al_dia_no_migra(conn):
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(esquema.MIGRACIONES)
+    assert esquema.crear_tablas(conn) == []
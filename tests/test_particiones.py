@@ -0,0 +1,25 @@
+import sqlite3
+
+import pytest
+
+import api
+import particiones
+from api import ErrorTaller
+
+
+def test_no_archiva_mas_alla_del_limite_de_adjuntos(conn):
+    cliente = api.alta_cliente("Pérez", "Ana", "5512345678").clave
+    servicio = api.alta_servicio("Afinación", 800).clave
+    for anio in (2019, 2020, 2021):
+        api.crear_nota(cliente, f"{anio}-03-01", [(servicio, "")])
+    conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 2)
+    particiones.archivar_anio(2019)
+    particiones.archivar_anio(2020)
+
+    with pytest.raises(ErrorTaller, match="a lo más 2 archivos"):
+        particiones.archivar_anio(2021)
+    assert [anio for anio, *_ in particiones.anios_archivados()] == [2019, 2020]
+    assert conn.execute("SELECT COUNT(*) FROM main.notas").fetchone()[0] == 1
+    # Un año ya archivado no necesita otro archivo
+    api.crear_nota(cliente, "2020-05-01", [(servicio, "")])
+    assert particiones.archivar_anio(2020)["notas"] == 1
@@ -0,0 +1,29 @@
+from datetime import date
+
+import pytest
+
+import api
+import particiones
+from benchmarks.datos_sinteticos import generar_datos
+from benchmarks.revisar_planes import consultas, problemas
+
+
+@pytest.fixture
+def periodo(conn):
+    # Tres años de notas con el más antiguo archivado, como benchmarks/revisar_planes.py
+    generar_datos(conn, notas=600, dias=3 * 365)
+    particiones.archivar_anio(date.today().year - 2)
+    conn.execute("ANALYZE")
+    conn.commit()
+    return api.fecha_mas_antigua(), api.validar_fecha(None)
+
+
+def test_reportes_y_listados_usan_los_indices(conn, periodo):
+    sentencias = consultas(conn, periodo)
+    assert sentencias
+    assert {" ".join(sql.split())[:100]: problemas(conn, sql) for sql in sentencias if problemas(conn, sql)} == {}
+
+
+def test_detecta_una_consulta_sin_indice(conn, periodo):
+    conn.execute("DROP INDEX idx_detalles_folio")
+    assert any(problemas(conn, sql) for sql in consultas(conn, periodo))
@@ -0,0 +1,41 @@
+import pytest
+
+import servidor
+from api import ErrorTaller
+
+
+def test_leer_nota_convierte_las_claves():
+    datos = {"cliente_clave": "3", "lineas": [{"servicio_clave": "2", "observaciones": "ruido"}, {"servicio_clave": 1}]}
+    assert servidor._leer_nota(datos) == (3, None, [(2, "ruido"), (1, "")])
+
+
+@pytest.mark.parametrize("linea", [
+    {"servicio_clave": [1]},
+    {"servicio_clave": "dos"},
+    {"servicio_clave": 1, "observaciones": {"a": 1}},
+    {"servicio_clave": 1, "observaciones": 5},
+    {"servicio_clave": 1, "observaciones": None},
+    (1,),
+])
+def test_leer_nota_rechaza_tipos_invalidos(linea):
+    with pytest.raises(ErrorTaller):
+        servidor._leer_nota({"cliente_clave": 1, "lineas": [linea]})
+
+
+def test_buscar_acepta_la_llave_de_dos_partes(conn, monkeypatch):
+    monkeypatch.setattr(servidor.busqueda, "CANDIDATAS", 2)
+    cliente = servidor.api.alta_cliente("Pérez", "Ana", "5512345678").clave
+    servicio = servidor.api.alta_servicio("Afinación", 800).clave
+    for _ in range(4):
+        servidor.api.crear_nota(cliente, "2024-01-15", [(servicio, "frenos")])
+    _, primera = servidor._buscar("notas", "frenos", None)
+    assert (len(primera["resultados"]), primera["siguiente"]) == (4, None)
+    # Después de las dos candidatas, las líneas con id < 3
+    _, datos = servidor._buscar("notas", "frenos", "2,3")
+    assert [r["observaciones"] for r in datos["resultados"]] == ["frenos", "frenos"]
+
+
+@pytest.mark.parametrize("desde", ["x", "-1", "1,2,3"])
+def test_buscar_rechaza_desde_invalido(conn, desde):
+    with pytest.raises(ErrorTaller):
+        servidor._buscar("notas", "frenos", desde)
@@ -0,0 +1,25 @@
+import math
+from datetime import datetime
+
+# Reglas compartidas por el menú interactivo y la importación masiva
+
+
+def nombre_valido(texto):
+    return texto.replace(" ", "").isalpha()
+
+
+def telefono_valido(telefono):
+    return telefono.isdigit() and len(telefono) == 10
+
+
+def costo_valido(costo):
+    # float() acepta "inf" y "nan" de un CSV o una celda de Excel
+    return math.isfinite(costo) and costo > 0
+
+
+def convertir_fecha(texto, formato="%m-%d-%Y"):
+    # Devuelve la fecha en formato de la base (YYYY-MM-DD); no se aceptan fechas futuras
+    fecha_obj = datetime.strptime(texto, formato)
+    if fecha_obj > datetime.now():
+        raise ValueError("Fecha futura no permitida.")
+    return fecha_obj.strftime("%Y-%m-%d")